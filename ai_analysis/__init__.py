@@ -6,20 +6,41 @@
 - OpenAI анализатор для обработки торговых сигналов
 - Сборщик рыночного контекста
 - Утилиты для работы с ИИ API
-"""
+- Сервис анализа в отдельном процессе (очередь задач по Unix сокету)
 
-from .openai_analyzer import OpenAIAnalyzer
-from .market_context import MarketContextCollector
+Классы подгружаются лениво (PEP 562): SDK openai импортируется только
+при первом обращении к OpenAIAnalyzer.
+"""
+import importlib
+import logging
 
 __version__ = "1.0.0"
 __author__ = "Trading AI System"
 
-# Экспорт основных классов
-__all__ = [
-    'OpenAIAnalyzer',
-    'MarketContextCollector'
-]
+# Экспорт основных классов: имя -> модуль пакета
+_LAZY_ATTRIBUTES = {
+    'OpenAIAnalyzer': 'openai_analyzer',
+    'MarketContextCollector': 'market_context',
+    'AnalysisService': 'service',
+    'AnalysisServiceClient': 'service',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 # Логирование инициализации
-import logging
 logging.getLogger(__name__).info("🤖 AI Analysis module loaded")
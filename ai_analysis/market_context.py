@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 import logging
 import json
 
+from utils.metrics import timed
+
 
 class MarketContextCollector:
     """
@@ -20,7 +22,9 @@ class MarketContextCollector:
         
         logging.info("📊 Сборщик рыночного контекста инициализирован")
     
-    async def collect_context(self, symbol: str, timeframe: str, candles_data: np.ndarray) -> Dict[str, Any]:
+    @timed('market_context_seconds')
+    async def collect_context(self, symbol: str, timeframe: str, candles_data: np.ndarray,
+                              exchange: str = '', market_regime: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Собирает полный рыночный контекст
         
@@ -28,6 +32,9 @@ class MarketContextCollector:
             symbol: Торговая пара (например, BTCUSDT)
             timeframe: Таймфрейм (например, 15m)  
             candles_data: Данные свечей из Jesse
+            exchange: Биржа маршрута (ключ общего движка режима рынка)
+            market_regime: Готовый снимок режима (сервис анализа получает его от
+                стратегии - в другом процессе общего движка нет)
             
         Returns:
             Словарь с рыночным контекстом
@@ -42,6 +49,10 @@ class MarketContextCollector:
             # Анализируем свечи из Jesse
             if len(candles_data) > 0:
                 context.update(await self._analyze_candles(candles_data))
+                if market_regime is not None:
+                    context['market_regime'] = market_regime
+                else:
+                    context.update(self._get_market_regime(exchange, symbol, timeframe, candles_data))
             
             # Получаем дополнительные рыночные данные
             context.update(await self._get_market_sentiment(symbol))
@@ -81,6 +92,21 @@ class MarketContextCollector:
             logging.warning(f"⚠️ Ошибка анализа свечей: {e}")
             return {'candle_analysis': 'error'}
     
+    def _get_market_regime(self, exchange: str, symbol: str, timeframe: str,
+                           candles: np.ndarray) -> Dict[str, Any]:
+        """
+        Режим рынка из общего движка - тот же снимок, что видят стратегии
+        """
+        try:
+            from utils.market_regime import get_market_regime_engine
+            
+            snapshot = get_market_regime_engine().update((exchange, symbol, timeframe), candles)
+            return {'market_regime': snapshot.as_dict()} if snapshot else {}
+            
+        except Exception as e:
+            logging.warning(f"⚠️ Ошибка определения режима рынка: {e}")
+            return {}
+    
     def _determine_price_trend(self, closes: np.ndarray) -> str:
         """
         Определяет ценовой тренд
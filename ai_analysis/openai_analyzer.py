@@ -4,9 +4,12 @@ import json
 import os
 from typing import Dict, Any, Optional
 import asyncio
-from datetime import datetime
 import logging
 
+from utils.metrics import span, timed
+
+from .prompt_templates import SIGNAL_SYSTEM_PROMPT, build_messages, build_signal_prompt
+
 
 class OpenAIAnalyzer:
     """
@@ -27,6 +30,7 @@ class OpenAIAnalyzer:
         
         logging.info(f"🤖 OpenAI анализатор инициализирован с моделью: {self.model}")
     
+    @timed('ai_analyze_signal_seconds')
     async def analyze_signal(self, signal_data: Dict[str, Any], market_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Анализирует торговый сигнал через OpenAI
@@ -43,22 +47,14 @@ class OpenAIAnalyzer:
             
             for attempt in range(self.max_retries):
                 try:
-                    response = await self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": self._get_system_prompt()
-                            },
-                            {
-                                "role": "user", 
-                                "content": prompt
-                            }
-                        ],
-                        temperature=0.3,  # Низкая температура для более точных ответов
-                        max_tokens=1500,
-                        timeout=self.timeout
-                    )
+                    with span('openai_request_seconds', model=self.model):
+                        response = await self.client.chat.completions.create(
+                            model=self.model,
+                            messages=build_messages(SIGNAL_SYSTEM_PROMPT, prompt),
+                            temperature=0.3,  # Низкая температура для более точных ответов
+                            max_tokens=1500,
+                            timeout=self.timeout
+                        )
                     
                     analysis_text = response.choices[0].message.content
                     parsed_analysis = self._parse_ai_response(analysis_text)
@@ -89,110 +85,15 @@ class OpenAIAnalyzer:
     
     def _get_system_prompt(self) -> str:
         """
-        Системный промпт для ИИ анализатора
+        Системный промпт для ИИ анализатора (константа - кэшируется провайдером)
         """
-        return """Ты - эксперт по техническому анализу криптовалютных рынков с 10+ лет опыта.
-
-ТВОЯ ЗАДАЧА:
-Проанализировать торговый сигнал и дать объективную оценку с аргументацией.
-
-ФОРМАТ ОТВЕТА (строго JSON):
-{
-    "recommendation": "BUY|SELL|HOLD|AVOID",
-    "confidence": 0-100,
-    "risk_level": "LOW|MEDIUM|HIGH",
-    "key_factors": {
-        "bullish": ["фактор1", "фактор2"],
-        "bearish": ["фактор1", "фактор2"]
-    },
-    "market_analysis": "краткий анализ рыночной ситуации",
-    "strategy_assessment": "оценка качества сигнала стратегии",
-    "risk_warnings": ["предупреждение1", "предупреждение2"],
-    "target_zones": {
-        "entry_optimal": "цена входа",
-        "stop_loss": "стоп-лосс", 
-        "take_profit_1": "первая цель",
-        "take_profit_2": "вторая цель"
-    },
-    "summary": "итоговое заключение в 2-3 предложения"
-}
-
-ПРИНЦИПЫ АНАЛИЗА:
-- Объективность выше всего
-- Учитывай весь рыночный контекст
-- Не бойся говорить AVOID при плохих условиях
-- Confidence = реальная уверенность в сигнале
-- Risk_level основан на волатильности и неопределенности"""
+        return SIGNAL_SYSTEM_PROMPT
 
     def _build_analysis_prompt(self, signal_data: Dict[str, Any], market_data: Dict[str, Any]) -> str:
         """
         Строит промпт для анализа конкретного сигнала
         """
-        # Форматируем данные о сигнале
-        strategy = signal_data.get('strategy', 'Unknown')
-        signal_type = signal_data.get('signal_type', 'Unknown')
-        reason = signal_data.get('reason', 'Unknown')
-        price = signal_data.get('price', 0)
-        symbol = signal_data.get('symbol', 'Unknown')
-        timeframe = signal_data.get('timeframe', 'Unknown')
-        
-        # Индикаторы
-        indicators = signal_data.get('indicators', {})
-        
-        # Последние свечи
-        recent_candles = signal_data.get('candles_data', {}).get('recent_candles', [])
-        
-        # Рыночный контекст
-        market_sentiment = market_data.get('sentiment', 'NEUTRAL')
-        volatility = market_data.get('volatility', 'MEDIUM')
-        
-        prompt = f"""АНАЛИЗ ТОРГОВОГО СИГНАЛА:
-
-=== ОСНОВНЫЕ ДАННЫЕ ===
-Стратегия: {strategy}
-Сигнал: {signal_type} на {symbol}
-Таймфрейм: {timeframe}
-Текущая цена: ${price:,.2f}
-Причина сигнала: {reason}
-Время: {datetime.fromtimestamp(signal_data.get('timestamp', 0)).strftime('%Y-%m-%d %H:%M:%S')}
-
-=== ТЕХНИЧЕСКИЕ ИНДИКАТОРЫ ==="""
-
-        # Добавляем индикаторы
-        for indicator, value in indicators.items():
-            if isinstance(value, (int, float)):
-                prompt += f"\n{indicator.upper()}: {value:.2f}"
-        
-        prompt += f"\n\n=== РЫНОЧНЫЕ УСЛОВИЯ ==="
-        prompt += f"\nНастроение рынка: {market_sentiment}"
-        prompt += f"\nВолатильность: {volatility}"
-        
-        # Добавляем данные о последних свечах (краткий анализ)
-        if recent_candles:
-            prompt += f"\n\n=== ПОСЛЕДНИЕ {len(recent_candles)} СВЕЧЕЙ ==="
-            
-            # Берем только последние 5 свечей для краткости
-            for i, candle in enumerate(recent_candles[-5:]):
-                open_price = candle.get('open', 0)
-                close_price = candle.get('close', 0)
-                high_price = candle.get('high', 0)
-                low_price = candle.get('low', 0)
-                volume = candle.get('volume', 0)
-                
-                change = ((close_price - open_price) / open_price * 100) if open_price > 0 else 0
-                candle_type = "🟢" if change > 0 else "🔴" if change < 0 else "⚪"
-                
-                prompt += f"\n{candle_type} #{i+1}: O${open_price:.2f} H${high_price:.2f} L${low_price:.2f} C${close_price:.2f} ({change:+.2f}%) Vol:{volume:.0f}"
-        
-        prompt += f"\n\n=== ДОПОЛНИТЕЛЬНЫЙ КОНТЕКСТ ==="
-        additional_data = signal_data.get('additional_data', {})
-        if additional_data:
-            for key, value in additional_data.items():
-                prompt += f"\n{key}: {value}"
-        
-        prompt += f"\n\nПРОВЕДИ ПОЛНЫЙ АНАЛИЗ ЭТОГО СИГНАЛА И ВЕРНИ РЕЗУЛЬТАТ В ФОРМАТЕ JSON!"
-        
-        return prompt
+        return build_signal_prompt(signal_data, market_data)
     
     def _parse_ai_response(self, response_text: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,249 @@
+# ai_analysis/prompt_templates.py
+"""
+Шаблоны промптов для OpenAI
+
+- системные промпты - константы модуля: один и тот же объект строки на
+  каждый запрос и всегда первым сообщением, чтобы у провайдера срабатывал
+  кэш префикса промпта (prompt caching)
+- PromptTemplate разбирает скелет промпта один раз при импорте и
+  заполняет его одним ''.join вместо цепочки += и f-строк
+- estimate_tokens: число токенов (tiktoken, если установлен, иначе оценка)
+"""
+from datetime import datetime
+from string import Formatter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+
+SIGNAL_SYSTEM_PROMPT = """Ты - эксперт по техническому анализу криптовалютных рынков с 10+ лет опыта.
+
+ТВОЯ ЗАДАЧА:
+Проанализировать торговый сигнал и дать объективную оценку с аргументацией.
+
+ФОРМАТ ОТВЕТА (строго JSON):
+{
+    "recommendation": "BUY|SELL|HOLD|AVOID",
+    "confidence": 0-100,
+    "risk_level": "LOW|MEDIUM|HIGH",
+    "key_factors": {
+        "bullish": ["фактор1", "фактор2"],
+        "bearish": ["фактор1", "фактор2"]
+    },
+    "market_analysis": "краткий анализ рыночной ситуации",
+    "strategy_assessment": "оценка качества сигнала стратегии",
+    "risk_warnings": ["предупреждение1", "предупреждение2"],
+    "target_zones": {
+        "entry_optimal": "цена входа",
+        "stop_loss": "стоп-лосс", 
+        "take_profit_1": "первая цель",
+        "take_profit_2": "вторая цель"
+    },
+    "summary": "итоговое заключение в 2-3 предложения"
+}
+
+ПРИНЦИПЫ АНАЛИЗА:
+- Объективность выше всего
+- Учитывай весь рыночный контекст
+- Не бойся говорить AVOID при плохих условиях
+- Confidence = реальная уверенность в сигнале
+- Risk_level основан на волатильности и неопределенности"""
+
+MARKET_SYSTEM_PROMPT = """Ты - эксперт по анализу криптовалютных рынков.
+
+ЗАДАЧА: Проанализировать рынок BTC на основе данных от торговых стратегий.
+
+ФОРМАТ ОТВЕТА (строго JSON):
+{
+    "market_phase": "BULLISH|BEARISH|NEUTRAL|VOLATILE",
+    "confidence": 0-100,
+    "key_insights": ["инсайт1", "инсайт2", "инсайт3"],
+    "recommendations": ["рекомендация1", "рекомендация2", "рекомендация3"],
+    "risk_level": "LOW|MEDIUM|HIGH",
+    "summary": "краткая сводка в 2-3 предложения"
+}
+
+НЕ добавляй никакой текст вне JSON. Отвечай только валидным JSON."""
+
+
+class PromptTemplate:
+    """
+    Скелет промпта, разобранный один раз
+
+    Синтаксис как у str.format ({name}, {name:spec}). render() собирает
+    список частей и склеивает их одним join.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts: List[Tuple[str, Optional[str], str]] = [
+            (literal, field, spec or '')
+            for literal, field, spec, _ in Formatter().parse(source)
+        ]
+        self.fields = tuple(field for _, field, _ in self._parts if field is not None)
+
+    def render(self, values: Dict[str, Any]) -> str:
+        pieces = []
+        append = pieces.append
+        for literal, field, spec in self._parts:
+            append(literal)
+            if field is not None:
+                value = values[field]
+                append(format(value, spec) if spec else str(value))
+        return ''.join(pieces)
+
+
+# === Промпт анализа сигнала (OpenAIAnalyzer) ===
+
+SIGNAL_PROMPT = PromptTemplate("""АНАЛИЗ ТОРГОВОГО СИГНАЛА:
+
+=== ОСНОВНЫЕ ДАННЫЕ ===
+Стратегия: {strategy}
+Сигнал: {signal_type} на {symbol}
+Таймфрейм: {timeframe}
+Текущая цена: ${price:,.2f}
+Причина сигнала: {reason}
+Время: {time}
+
+=== ТЕХНИЧЕСКИЕ ИНДИКАТОРЫ ==={indicators}
+
+=== РЫНОЧНЫЕ УСЛОВИЯ ===
+Настроение рынка: {sentiment}
+Волатильность: {volatility}{candles}
+
+=== ДОПОЛНИТЕЛЬНЫЙ КОНТЕКСТ ==={additional}
+
+ПРОВЕДИ ПОЛНЫЙ АНАЛИЗ ЭТОГО СИГНАЛА И ВЕРНИ РЕЗУЛЬТАТ В ФОРМАТЕ JSON!""")
+
+# Сколько последних свечей попадает в промпт
+PROMPT_CANDLES = 5
+
+
+def _indicator_lines(indicators: Dict[str, Any]) -> str:
+    return ''.join(
+        f"\n{name.upper()}: {value:.2f}"
+        for name, value in indicators.items()
+        if isinstance(value, (int, float))
+    )
+
+
+# Строка свечи - один вызов str.format вместо пяти f-подстановок
+CANDLE_LINE = "\n{0} #{1}: O${2:.2f} H${3:.2f} L${4:.2f} C${5:.2f} ({6:+.2f}%) Vol:{7:.0f}"
+_CANDLE_TYPES = ("⚪", "🟢", "🔴")
+
+
+def _candle_line(number: int, candle: Dict[str, Any]) -> str:
+    get = candle.get
+    open_price = get('open', 0)
+    close_price = get('close', 0)
+
+    change = ((close_price - open_price) / open_price * 100) if open_price > 0 else 0
+    candle_type = _CANDLE_TYPES[(change > 0) + 2 * (change < 0)]
+
+    return CANDLE_LINE.format(candle_type, number, open_price, get('high', 0),
+                              get('low', 0), close_price, change, get('volume', 0))
+
+
+def _candle_lines(candles: List[Dict[str, Any]]) -> str:
+    if not candles:
+        return ''
+    header = f"\n\n=== ПОСЛЕДНИЕ {len(candles)} СВЕЧЕЙ ==="
+    return header + ''.join(
+        _candle_line(number, candle) for number, candle in enumerate(candles[-PROMPT_CANDLES:], 1)
+    )
+
+
+def _key_value_lines(data: Dict[str, Any]) -> str:
+    return ''.join(f"\n{key}: {value}" for key, value in data.items())
+
+
+def build_signal_prompt(signal_data: Dict[str, Any], market_data: Dict[str, Any]) -> str:
+    """Пользовательский промпт для анализа торгового сигнала"""
+    timestamp = signal_data.get('timestamp', 0)
+
+    return SIGNAL_PROMPT.render({
+        'strategy': signal_data.get('strategy', 'Unknown'),
+        'signal_type': signal_data.get('signal_type', 'Unknown'),
+        'symbol': signal_data.get('symbol', 'Unknown'),
+        'timeframe': signal_data.get('timeframe', 'Unknown'),
+        'price': signal_data.get('price', 0),
+        'reason': signal_data.get('reason', 'Unknown'),
+        'time': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+        'indicators': _indicator_lines(signal_data.get('indicators', {})),
+        'sentiment': market_data.get('sentiment', 'NEUTRAL'),
+        'volatility': market_data.get('volatility', 'MEDIUM'),
+        'candles': _candle_lines(signal_data.get('candles_data', {}).get('recent_candles', [])),
+        'additional': _key_value_lines(signal_data.get('additional_data', {}) or {}),
+    })
+
+
+# === Промпт обзора рынка (MarketAnalyzer) ===
+
+MARKET_PROMPT = PromptTemplate("""АНАЛИЗ РЫНКА BTC:
+
+=== ТЕКУЩИЕ ДАННЫЕ ===
+Цена: ${price:,.2f}
+Изменение 24ч: {change_24h:+.2f}%
+Объем 24ч: {volume_24h:,.0f}
+Источник данных: Bybit Testnet API
+
+=== АНАЛИЗ ПО СТРАТЕГИЯМ ==={strategies}
+
+ЗАДАЧА: Проанализируй общее состояние рынка BTC на основе этих данных.
+
+ВАЖНО: Ответь СТРОГО в формате JSON. Не добавляй никаких комментариев вне JSON.
+""")
+
+MARKET_STRATEGY_BLOCK = PromptTemplate("""
+
+{strategy} ({timeframe}):
+- Сигнал: {signal}
+- Уверенность: {confidence}%""")
+
+
+def build_market_prompt(strategy_analyses: Iterable[Dict[str, Any]], market_data: Dict[str, Any]) -> str:
+    """Пользовательский промпт для обзора рынка по стратегиям"""
+    return MARKET_PROMPT.render({
+        'price': market_data.get('price', 0),
+        'change_24h': market_data.get('change_24h', 0),
+        'volume_24h': market_data.get('volume_24h', 0),
+        'strategies': ''.join(MARKET_STRATEGY_BLOCK.render(analysis) for analysis in strategy_analyses),
+    })
+
+
+# === Сообщения и токены ===
+
+def build_messages(system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
+    """Сообщения chat.completions: статичный системный промпт всегда первым"""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+_encoding_cache: Dict[str, Any] = {}
+
+
+def estimate_tokens(text: str, model: str = 'gpt-4') -> int:
+    """
+    Число токенов в тексте
+
+    С tiktoken - точный подсчет для модели, без него - оценка по UTF-8
+    байтам (~4 байта на токен; кириллица выходит ~2 символа на токен).
+    """
+    if TIKTOKEN_AVAILABLE:
+        encoding = _encoding_cache.get(model)
+        if encoding is None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding('cl100k_base')
+            _encoding_cache[model] = encoding
+        return len(encoding.encode(text))
+
+    return (len(text.encode('utf-8')) + 3) // 4
@@ -0,0 +1,465 @@
+# ai_analysis/service.py
+"""
+Сервис ИИ анализа: отдельный процесс с очередью задач по Unix сокету
+
+Jesse (стратегии) и bot_runner - разные процессы, и раньше каждый делал
+ИИ анализ сам: стратегии - в потоках внутри процесса торговли, где
+разбор контекста конкурирует за GIL с циклом стратегий. Сервис
+принимает задачи от обоих:
+
+- канал: Unix сокет AI_SERVICE_SOCKET (/tmp/ai_analysis.sock); на одно
+  соединение - один запрос и один ответ, JSON строкой
+- приоритеты: PRIORITY_HIGH (/analyze пользователя) обгоняет сигналы
+  стратегий; одновременно выполняется AI_SERVICE_CONCURRENCY задач
+- дедупликация: задача с тем же ключом (по умолчанию - хэш вида и
+  payload) присоединяется к уже поставленной; готовый результат
+  отдается повторно AI_SERVICE_RESULT_TTL секунд
+- рыночный контекст (NumPy) считается в пуле из AI_SERVICE_PROCESSES
+  процессов, запросы к OpenAI идут асинхронно в процессе сервиса
+- доставка: wait=true - результат в ответе на запрос; иначе сразу
+  подтверждение с job_id, а результат - по {"op": "result"} или, с
+  notify=true, сообщением в Telegram через notify()
+
+Виды задач:
+- signal: анализ сигнала стратегии (signal_data, symbol, timeframe,
+  candles, market_regime) -> ответ OpenAIAnalyzer
+- market: MarketAnalyzer.analyze_all_strategies() (команда /analyze)
+
+Запуск (Dockerfile поднимает его перед ботом):
+    python -m ai_analysis.service
+
+Если сервис не запущен, клиент возвращает None и вызывающий код
+выполняет анализ у себя, как раньше.
+"""
+import asyncio
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.loop_monitor import monitor_loop, watch_executor
+
+# Приоритеты задач (меньше - важнее)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Сколько последних свечей стратегия передает сервису для контекста
+CONTEXT_BARS = 100
+
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+
+# Импортируются при старте в потоке: импорт openai в обработчике держал бы loop ~1с
+PRELOAD_MODULES = ('ai_analysis.openai_analyzer', 'market_analyzer', 'notifications.message_formatter')
+
+
+def service_socket_path() -> str:
+    """Путь сокета сервиса (пустое значение AI_SERVICE_SOCKET - сервис не используется)"""
+    return os.getenv('AI_SERVICE_SOCKET', '/tmp/ai_analysis.sock')
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data, ensure_ascii=False, default=_json_default).encode() + b'\n'
+
+
+def job_key(kind: str, payload: Dict[str, Any]) -> str:
+    """Ключ дедупликации по умолчанию: хэш вида задачи и payload"""
+    raw = json.dumps([kind, payload], sort_keys=True, default=_json_default)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def collect_context_sync(symbol: str, timeframe: str, candles: list,
+                         market_regime: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Рыночный контекст сигнала (выполняется в процессе пула)"""
+    from .market_context import MarketContextCollector
+
+    candles_array = np.asarray(candles, dtype=float).reshape(-1, 6) if candles else np.empty((0, 6))
+    collector = MarketContextCollector()
+    return asyncio.run(collector.collect_context(symbol, timeframe, candles_array, market_regime=market_regime))
+
+
+class AnalysisJob:
+    """Задача сервиса и ее результат"""
+
+    def __init__(self, job_id: str, kind: str, payload: Dict[str, Any], priority: int, key: str, notify: bool):
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.key = key
+        self.notify = notify
+
+        self.started = False
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+
+    def response(self) -> Dict[str, Any]:
+        if not self.done.is_set():
+            return {'ok': True, 'job_id': self.id, 'status': 'running' if self.started else 'queued'}
+        if self.error is not None:
+            return {'ok': False, 'job_id': self.id, 'status': 'failed', 'error': self.error}
+        return {'ok': True, 'job_id': self.id, 'status': 'done', 'result': self.result}
+
+
+class AnalysisService:
+    """Процесс-сервис: Unix сокет, очередь с приоритетами, дедупликация, пул процессов"""
+
+    def __init__(self, socket_path: Optional[str] = None, concurrency: Optional[int] = None,
+                 processes: Optional[int] = None, result_ttl: Optional[float] = None,
+                 handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]]] = None):
+        self.socket_path = socket_path or service_socket_path()
+        self.concurrency = concurrency or int(os.getenv('AI_SERVICE_CONCURRENCY', '8'))
+        self.processes = processes or int(os.getenv('AI_SERVICE_PROCESSES', str(min(4, os.cpu_count() or 1))))
+        self.result_ttl = float(os.getenv('AI_SERVICE_RESULT_TTL', '30')) if result_ttl is None else result_ttl
+        self.wait_timeout = float(os.getenv('AI_SERVICE_TIMEOUT', '120'))
+        self.logger = logging.getLogger(__name__)
+
+        self.handlers = {'signal': self._run_signal, 'market': self._run_market}
+        self.handlers.update(handlers or {})
+
+        self.jobs: Dict[str, AnalysisJob] = {}
+        self.by_key: Dict[str, AnalysisJob] = {}
+        self.submitted = 0
+        self.deduped = 0
+        self.completed = 0
+        self.failed = 0
+
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop_monitor = None
+        self._signal_analyzer = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # === ЖИЗНЕННЫЙ ЦИКЛ ===
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.PriorityQueue()
+        self.pool = ProcessPoolExecutor(max_workers=max(1, self.processes))
+        watch_executor('ai_service_processes', self.pool)
+        self._loop_monitor = monitor_loop('ai_service')
+        await asyncio.to_thread(self._preload)
+
+        # Сокет от прошлого запуска (процесс упал, не удалив файл)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path,
+                                                       limit=MAX_REQUEST_BYTES)
+        os.chmod(self.socket_path, 0o600)
+
+        self._workers = [asyncio.create_task(self._worker(), name=f"ai-service-worker-{i}")
+                         for i in range(self.concurrency)]
+        self.logger.info(f"🧠 Сервис ИИ анализа: {self.socket_path} "
+                         f"(задач одновременно {self.concurrency}, процессов {self.processes})")
+
+    def _preload(self):
+        for name in PRELOAD_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Модуль {name} не загружен: {e}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._loop_monitor is not None:
+            self._loop_monitor.stop()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def request_stop(self):
+        """Останавливает run() из любого потока"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def run(self):
+        """Блокирующий запуск до Ctrl+C/SIGTERM или request_stop()"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, loop.stop)
+                except NotImplementedError:
+                    pass
+
+        try:
+            loop.run_until_complete(self.start())
+            loop.run_forever()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            try:
+                loop.run_until_complete(self.stop())
+            finally:
+                loop.close()
+                self.logger.info("🛑 Сервис ИИ анализа остановлен")
+
+    # === ЗАДАЧИ ===
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: int = PRIORITY_NORMAL,
+               key: Optional[str] = None, notify: bool = False) -> Tuple[AnalysisJob, bool]:
+        """Ставит задачу или присоединяет к такой же; (задача, была ли она уже)"""
+        if kind not in self.handlers:
+            raise ValueError(f"Неизвестный вид задачи: {kind}")
+
+        self._expire()
+        key = key or job_key(kind, payload)
+        existing = self.by_key.get(key)
+        if existing is not None and existing.error is None:
+            self.deduped += 1
+            if not existing.done.is_set():
+                existing.notify = existing.notify or notify
+                if priority < existing.priority and not existing.started:
+                    # Повторная запись с более высоким приоритетом; старую worker пропустит
+                    existing.priority = priority
+                    self._queue.put_nowait((priority, next(self._sequence), existing.id))
+            return existing, True
+
+        job = AnalysisJob(f"{kind}-{next(self._sequence)}", kind, payload, priority, key, notify)
+        self.jobs[job.id] = job
+        self.by_key[key] = job
+        self.submitted += 1
+        self._queue.put_nowait((priority, next(self._sequence), job.id))
+        return job, False
+
+    def _expire(self):
+        """Убирает завершенные задачи старше result_ttl"""
+        deadline = time.monotonic() - self.result_ttl
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and job.finished_at < deadline:
+                del self.jobs[job_id]
+                if self.by_key.get(job.key) is job:
+                    del self.by_key[job.key]
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job.started:
+                continue
+
+            job.started = True
+            started = time.perf_counter()
+            try:
+                job.result = await self.handlers[job.kind](job.payload)
+                self.completed += 1
+                self.logger.info(f"✅ Задача {job.id} за {time.perf_counter() - started:.2f}с")
+                if job.notify:
+                    self._deliver(job)
+            except Exception as e:
+                job.error = str(e) or e.__class__.__name__
+                self.failed += 1
+                # Неудачную задачу можно сразу поставить заново
+                if self.by_key.get(job.key) is job:
+                    del self.by_key[job.key]
+                self.logger.error(f"❌ Задача {job.id} не выполнена: {job.error}")
+            finally:
+                job.finished_at = time.monotonic()
+                job.done.set()
+
+    async def _run_signal(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        market_data = await loop.run_in_executor(
+            self.pool, collect_context_sync,
+            payload.get('symbol', ''), payload.get('timeframe', ''),
+            payload.get('candles') or [], payload.get('market_regime'),
+        )
+
+        # Один анализатор на процесс: клиент OpenAI держит пул соединений
+        if self._signal_analyzer is None:
+            from .openai_analyzer import OpenAIAnalyzer
+            self._signal_analyzer = OpenAIAnalyzer()
+        return await self._signal_analyzer.analyze_signal(payload['signal_data'], market_data)
+
+    async def _run_market(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        from market_analyzer import MarketAnalyzer
+        return await MarketAnalyzer().analyze_all_strategies()
+
+    def _deliver(self, job: AnalysisJob):
+        """Результат сигнала - уведомлением в Telegram"""
+        if job.kind != 'signal' or not job.result:
+            return
+        try:
+            from notifications.message_formatter import MessageFormatter
+            from notifications.message_queue import notify
+
+            message = MessageFormatter().format_analysis_message(job.payload['signal_data'], job.result)
+            if not notify(message):
+                self.logger.warning(f"⚠️ Уведомление по задаче {job.id} не принято очередью")
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка отправки уведомления по задаче {job.id}: {e}")
+
+    # === ПРОТОКОЛ ===
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            line = await reader.readline()
+            try:
+                request = json.loads(line)
+                response = await self._dispatch(request)
+            except (ValueError, KeyError, TypeError) as e:
+                response = {'ok': False, 'error': f"Некорректный запрос: {e}"}
+            writer.write(_dumps(response))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get('op', 'submit')
+
+        if op == 'submit':
+            job, deduped = self.submit(
+                request['kind'], request.get('payload') or {},
+                priority=int(request.get('priority', PRIORITY_NORMAL)),
+                key=request.get('key'), notify=bool(request.get('notify')),
+            )
+            if request.get('wait', True):
+                timeout = float(request.get('timeout') or self.wait_timeout)
+                try:
+                    await asyncio.wait_for(job.done.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            response = job.response()
+            response['deduped'] = deduped
+            return response
+
+        if op == 'result':
+            job = self.jobs.get(request.get('job_id'))
+            if job is None:
+                return {'ok': False, 'error': 'Задача не найдена или результат устарел'}
+            return job.response()
+
+        if op == 'stats':
+            return {'ok': True, 'stats': self.stats()}
+
+        if op == 'ping':
+            return {'ok': True}
+
+        return {'ok': False, 'error': f"Неизвестная операция: {op}"}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'submitted': self.submitted,
+            'deduped': self.deduped,
+            'completed': self.completed,
+            'failed': self.failed,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'jobs': len(self.jobs),
+        }
+
+
+class AnalysisServiceClient:
+    """
+    Клиент сервиса (async для бота, синхронный submit_nowait для стратегий)
+
+    Все методы возвращают None, если сервис не запущен или не ответил -
+    тогда вызывающий код выполняет анализ сам.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, connect_timeout: float = 1.0):
+        self.socket_path = socket_path or service_socket_path()
+        self.connect_timeout = connect_timeout
+        self.logger = logging.getLogger(__name__)
+
+    def available(self) -> bool:
+        return bool(self.socket_path) and os.path.exists(self.socket_path)
+
+    async def request(self, request: Dict[str, Any], timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        if not self.available():
+            return None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.socket_path, limit=MAX_REQUEST_BYTES), self.connect_timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.logger.warning(f"⚠️ Сервис ИИ анализа недоступен: {e}")
+            return None
+
+        try:
+            writer.write(_dumps(request))
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            return json.loads(line) if line else None
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            self.logger.warning(f"⚠️ Сервис ИИ анализа не ответил: {e}")
+            return None
+        finally:
+            writer.close()
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: int = PRIORITY_NORMAL,
+                     key: Optional[str] = None, notify: bool = False,
+                     timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Ставит задачу и ждет результата (ответ сервиса: ok, result или error)"""
+        timeout = timeout or float(os.getenv('AI_SERVICE_TIMEOUT', '120'))
+        return await self.request({
+            'op': 'submit', 'kind': kind, 'payload': payload, 'priority': priority,
+            'key': key, 'notify': notify, 'wait': True, 'timeout': timeout,
+        }, timeout=timeout + 5)
+
+    def submit_nowait(self, kind: str, payload: Dict[str, Any], priority: int = PRIORITY_NORMAL,
+                      key: Optional[str] = None, notify: bool = False) -> Optional[str]:
+        """Ставит задачу без ожидания результата (блокирующий сокет); job_id или None"""
+        if not self.available():
+            return None
+        request = {'op': 'submit', 'kind': kind, 'payload': payload, 'priority': priority,
+                   'key': key, 'notify': notify, 'wait': False}
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.connect_timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(_dumps(request))
+                response = json.loads(sock.makefile('rb').readline())
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️ Сервис ИИ анализа недоступен: {e}")
+            return None
+        return response.get('job_id') if response.get('ok') else None
+
+
+def main() -> int:
+    from utils.logging_utils import configure_logging
+
+    os.environ.setdefault('METRICS_ROLE', 'ai_service')
+    os.environ.setdefault('LOOP_MONITOR_ENABLED', 'true')
+    configure_logging(log_file=os.getenv('AI_SERVICE_LOG_FILE'))
+    AnalysisService().run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+"""
+Воспроизводимые бенчмарки стратегий и конвейера анализа
+
+Запуск: python -m benchmarks.run --help
+"""
@@ -0,0 +1,139 @@
+# benchmarks/fixtures.py
+"""
+OHLCV фикстуры для бенчмарков
+
+- synthetic: геометрическое броуновское движение с фиксированным seed
+  (воспроизводимо на любой машине)
+- recorded: CSV в benchmarks/fixtures/, записанный с Bybit командой
+  python -m benchmarks.fixtures record --symbol BTCUSDT --interval 15 --bars 3000
+
+Свечи всегда в порядке колонок Jesse: timestamp, open, close, high, low, volume.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+CSV_HEADER = 'timestamp,open,close,high,low,volume'
+
+INTERVAL_MS = {'1': 60_000, '5': 300_000, '15': 900_000, '60': 3_600_000, '240': 14_400_000}
+
+
+def synthetic_candles(bars: int = 5000, seed: int = 42, start_price: float = 50_000.0,
+                      interval_ms: int = 900_000, drift: float = 0.0,
+                      volatility: float = 0.004) -> np.ndarray:
+    """Синтетические свечи (GBM) с правдоподобными тенями и объемом"""
+    rng = np.random.default_rng(seed)
+
+    returns = rng.normal(drift, volatility, bars)
+    closes = start_price * np.exp(np.cumsum(returns))
+    opens = np.concatenate(([start_price], closes[:-1]))
+
+    wick = np.abs(rng.normal(0, volatility / 2, (2, bars))) * closes
+    highs = np.maximum(opens, closes) + wick[0]
+    lows = np.minimum(opens, closes) - wick[1]
+
+    # Объем растет вместе с размером движения
+    volumes = rng.lognormal(3.0, 0.5, bars) * (1 + np.abs(returns) / volatility)
+
+    timestamps = 1_600_000_000_000 + np.arange(bars, dtype=np.int64) * interval_ms
+
+    return np.column_stack((timestamps, opens, closes, highs, lows, volumes)).astype(np.float64)
+
+
+def fixture_path(name: str) -> str:
+    return name if name.endswith('.csv') else os.path.join(FIXTURES_DIR, f"{name}.csv")
+
+
+def load_fixture(name: str) -> np.ndarray:
+    """Загружает записанную фикстуру (имя в benchmarks/fixtures/ или путь к CSV)"""
+    return np.loadtxt(fixture_path(name), delimiter=',', skiprows=1, dtype=np.float64, ndmin=2)
+
+
+def save_fixture(name: str, candles: np.ndarray) -> str:
+    path = fixture_path(name)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savetxt(path, candles, delimiter=',', header=CSV_HEADER, comments='', fmt='%.8f')
+    return path
+
+
+def get_candles(fixture: str, bars: int, seed: int = 42) -> np.ndarray:
+    """'synthetic' или имя записанной фикстуры"""
+    if fixture == 'synthetic':
+        return synthetic_candles(bars=bars, seed=seed)
+
+    candles = load_fixture(fixture)
+    return candles[-bars:] if bars else candles
+
+
+def record_bybit(symbol: str = 'BTCUSDT', interval: str = '15', bars: int = 3000,
+                 base_url: Optional[str] = None) -> np.ndarray:
+    """Скачивает историю свечей Bybit (страницами по 1000) в порядке Jesse"""
+    import requests
+    from utils.config_manager import DEFAULT_BYBIT_API_URL
+
+    base_url = base_url or os.getenv('BYBIT_API_URL', DEFAULT_BYBIT_API_URL)
+    step_ms = INTERVAL_MS.get(interval, 900_000)
+    end = int(time.time() * 1000)
+    rows = {}
+
+    while len(rows) < bars:
+        response = requests.get(
+            f"{base_url}/v5/market/kline",
+            params={'category': 'linear', 'symbol': symbol, 'interval': interval,
+                    'end': end, 'limit': 1000},
+            timeout=15
+        )
+        response.raise_for_status()
+        data = response.json()
+        if data.get('retCode') != 0:
+            raise RuntimeError(f"Bybit: {data.get('retMsg')}")
+
+        page = data['result']['list']
+        if not page:
+            break
+
+        # Bybit: [start, open, high, low, close, volume, turnover], новые сначала
+        for start, open_, high, low, close, volume, *_ in page:
+            rows[int(start)] = (int(start), float(open_), float(close), float(high), float(low), float(volume))
+
+        end = int(page[-1][0]) - step_ms
+
+    candles = np.array([rows[ts] for ts in sorted(rows)], dtype=np.float64)
+    return candles[-bars:]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="OHLCV фикстуры для бенчмарков")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    record = sub.add_parser('record', help="записать свечи Bybit в benchmarks/fixtures/")
+    record.add_argument('--symbol', default='BTCUSDT')
+    record.add_argument('--interval', default='15')
+    record.add_argument('--bars', type=int, default=3000)
+    record.add_argument('--name', help="имя фикстуры (по умолчанию SYMBOL_INTERVAL)")
+
+    synthetic = sub.add_parser('synthetic', help="сохранить синтетическую фикстуру в CSV")
+    synthetic.add_argument('--bars', type=int, default=5000)
+    synthetic.add_argument('--seed', type=int, default=42)
+    synthetic.add_argument('--name', default='synthetic')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        candles = record_bybit(args.symbol, args.interval, args.bars)
+        path = save_fixture(args.name or f"{args.symbol}_{args.interval}", candles)
+    else:
+        candles = synthetic_candles(args.bars, args.seed)
+        path = save_fixture(args.name, candles)
+
+    print(f"✅ {len(candles)} свечей сохранено: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# benchmarks/kernel_parity.py
+"""
+Сверка векторных ядер (utils/kernels.py) с эталоном
+
+1. NumPy-ядра против циклов (и скомпилированных numba, если он есть)
+   на нескольких наборах параметров
+2. Ядра против предикатов стратегий бар за баром: FakeoutHunter (пробои,
+   отскоки BB/EMA), BalancedTrader._is_good_candle, QualityTrader._is_market_choppy
+
+Запуск из корня репозитория:
+    python -m benchmarks.kernel_parity
+    python -m benchmarks.kernel_parity --fixture BTCUSDT_15 --bars 5000
+
+Код возврата 1 при любом расхождении. Те же сверки в pytest: tests/test_kernels.py.
+"""
+import argparse
+import importlib
+import logging
+import sys
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from .fixtures import get_candles
+from .replay import StrategyReplay, CLOSE, HIGH, LOW, OPEN
+from utils import kernels
+
+# Параметры для сверки NumPy с циклами: значения стратегий и более жесткие/мягкие
+PARAMETER_SETS = (
+    {'lookback': 4, 'penetration': 0.4, 'ret': 0.05, 'tolerance': 0.2, 'body': 0.25, 'window': 10, 'range': 2.0},
+    {'lookback': 1, 'penetration': 0.1, 'ret': 0.0, 'tolerance': 0.05, 'body': 0.0, 'window': 3, 'range': 0.5},
+    {'lookback': 12, 'penetration': 2.0, 'ret': 0.5, 'tolerance': 1.0, 'body': 0.5, 'window': 48, 'range': 8.0},
+)
+
+
+def _kernel_cases(candles: np.ndarray, bands: np.ndarray, ema: np.ndarray, p: Dict) -> Dict[str, tuple]:
+    """Имя случая -> (ядро, аргументы)"""
+    o, c, h, l = candles[:, OPEN], candles[:, CLOSE], candles[:, HIGH], candles[:, LOW]
+    upper, lower = bands[0], bands[2]
+    return {
+        'lower_fakeout': ('fakeout', (l, c, lower, 1.0, p['lookback'], p['penetration'], p['ret'])),
+        'upper_fakeout': ('fakeout', (h, c, upper, -1.0, p['lookback'], p['penetration'], p['ret'])),
+        'bb_bounce_up': ('bounce', (o, l, c, lower, 1.0, p['tolerance'], False)),
+        'bb_bounce_down': ('bounce', (o, h, c, upper, -1.0, p['tolerance'], False)),
+        'ema_bounce_up': ('bounce', (o, l, c, ema, 1.0, p['tolerance'], True)),
+        'ema_bounce_down': ('bounce', (o, h, c, ema, -1.0, p['tolerance'], True)),
+        'good_candle': ('good_candle', (o, h, l, c, p['body'], 0.3)),
+        'choppy': ('choppy', (h, l, c, p['window'], p['range'])),
+    }
+
+
+def reference_bands(candles: np.ndarray):
+    """Полосы (20, 2σ) и EMA-заменитель (SMA 50) для сверки бэкендов - Jesse не нужен"""
+    window = np.lib.stride_tricks.sliding_window_view(candles[:, CLOSE], 20)
+    middle = np.full(len(candles), np.nan)
+    deviation = np.full(len(candles), np.nan)
+    middle[19:], deviation[19:] = window.mean(axis=1), window.std(axis=1)
+    bands = np.array([middle + 2 * deviation, middle, middle - 2 * deviation])
+    ema = np.full(len(candles), np.nan)
+    ema[49:] = np.lib.stride_tricks.sliding_window_view(candles[:, CLOSE], 50).mean(axis=1)
+    return bands, ema
+
+
+def check_backends(candles: np.ndarray, bands: np.ndarray, ema: np.ndarray) -> List[str]:
+    """Расхождения NumPy-ядер и скомпилированных ядер с циклами на Python"""
+    backends = {'numpy': kernels.NUMPY_KERNELS}
+    if kernels.NUMBA_AVAILABLE:
+        backends['numba'] = {
+            name: kernels.numba.njit(cache=True, error_model='numpy')(func)
+            for name, func in kernels.LOOP_KERNELS.items()
+        }
+
+    mismatches = []
+    for number, params in enumerate(PARAMETER_SETS):
+        for case, (kernel, kernel_args) in _kernel_cases(candles, bands, ema, params).items():
+            expected = kernels.LOOP_KERNELS[kernel](*kernel_args)
+            for backend, table in backends.items():
+                actual = table[kernel](*kernel_args)
+                diff = np.flatnonzero(actual != expected)
+                if len(diff):
+                    mismatches.append(f"{backend}/{case} (набор {number}): {len(diff)} баров, первый {diff[0]}")
+    return mismatches
+
+
+def _strategy_series(strategy, candles: np.ndarray, warmup: int,
+                     predicates: Dict[str, Callable]) -> Dict[str, np.ndarray]:
+    """Значения предикатов стратегии на каждом баре [warmup, len(candles))"""
+    series = {name: np.zeros(len(candles), dtype=np.bool_) for name in predicates}
+    for i in range(warmup, len(candles)):
+        strategy._replay_i = i
+        strategy.index = i
+        for name, predicate in predicates.items():
+            series[name][i] = bool(predicate(strategy))
+    return series
+
+
+def check_strategies(candles: np.ndarray, warmup: int) -> List[str]:
+    """Расхождения ядер с предикатами стратегий"""
+    import jesse.indicators as ta
+
+    def load(name):
+        strategy_class = getattr(importlib.import_module(f"strategies.{name}"), name)
+        return StrategyReplay(strategy_class, candles).strategy
+
+    o, c, h, l = candles[:, OPEN], candles[:, CLOSE], candles[:, HIGH], candles[:, LOW]
+    expected, actual = {}, {}
+
+    fakeout_hunter = load('FakeoutHunter')
+    bands = ta.bollinger_bands(candles, period=fakeout_hunter.bb_period, devup=fakeout_hunter.bb_std, sequential=True)
+    ema = ta.ema(candles, period=fakeout_hunter.ema_period, sequential=True)
+    fakeout = dict(lookback=fakeout_hunter.max_bars_outside, max_penetration=fakeout_hunter.max_fakeout_penetration,
+                   min_return=fakeout_hunter.min_fakeout_return)
+
+    expected.update(_strategy_series(fakeout_hunter, candles, warmup, {
+        'FakeoutHunter._is_bb_lower_fakeout': lambda s: s._is_bb_lower_fakeout()[0],
+        'FakeoutHunter._is_bb_upper_fakeout': lambda s: s._is_bb_upper_fakeout()[0],
+        'FakeoutHunter._is_bb_lower_bounce': lambda s: s._is_bb_lower_bounce()[0],
+        'FakeoutHunter._is_bb_upper_bounce': lambda s: s._is_bb_upper_bounce()[0],
+        'FakeoutHunter._is_ema_bounce_up': lambda s: s._is_ema_bounce_up()[0],
+        'FakeoutHunter._is_ema_bounce_down': lambda s: s._is_ema_bounce_down()[0],
+    }))
+    # Цикл ложных пробоев в стратегии читает столбцы 3 и 2 свечей (в формате Jesse это high и close)
+    actual['FakeoutHunter._is_bb_lower_fakeout'] = kernels.lower_fakeout(candles[:, 3], c, bands[2], **fakeout)
+    actual['FakeoutHunter._is_bb_upper_fakeout'] = kernels.upper_fakeout(candles[:, 2], c, bands[0], **fakeout)
+    actual['FakeoutHunter._is_bb_lower_bounce'] = kernels.bounce_up(o, l, c, bands[2], fakeout_hunter.bb_bounce_tolerance)
+    actual['FakeoutHunter._is_bb_upper_bounce'] = kernels.bounce_down(o, h, c, bands[0], fakeout_hunter.bb_bounce_tolerance)
+    actual['FakeoutHunter._is_ema_bounce_up'] = kernels.bounce_up(o, l, c, ema, fakeout_hunter.ema_bounce_tolerance, True)
+    actual['FakeoutHunter._is_ema_bounce_down'] = kernels.bounce_down(o, h, c, ema, fakeout_hunter.ema_bounce_tolerance, True)
+
+    balanced_trader = load('BalancedTrader')
+    expected.update(_strategy_series(balanced_trader, candles, warmup, {
+        'BalancedTrader._is_good_candle': lambda s: s._is_good_candle(),
+    }))
+    actual['BalancedTrader._is_good_candle'] = kernels.good_candle(o, h, l, c, balanced_trader.min_candle_body)
+
+    quality_trader = load('QualityTrader')
+    expected.update(_strategy_series(quality_trader, candles, warmup, {
+        'QualityTrader._is_market_choppy': lambda s: s._is_market_choppy(),
+    }))
+    # Стратегия берет столбцы 2 и 3 (close и high в формате Jesse)
+    actual['QualityTrader._is_market_choppy'] = kernels.choppy(candles[:, 2], candles[:, 3], c, window=10, max_range_pct=2.0)
+
+    mismatches = []
+    for name, values in expected.items():
+        diff = np.flatnonzero(values[warmup:] != actual[name][warmup:])
+        if len(diff):
+            mismatches.append(f"{name}: {len(diff)} баров, первый {warmup + diff[0]}")
+    return mismatches
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Сверка векторных ядер предикатов с эталоном")
+    parser.add_argument('--fixture', default='synthetic', help="'synthetic' или имя фикстуры в benchmarks/fixtures/")
+    parser.add_argument('--bars', type=int, default=3000)
+    parser.add_argument('--warmup', type=int, default=210)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-strategies', action='store_true', help="только сверка бэкендов (без Jesse)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    candles = get_candles(args.fixture, args.bars + args.warmup, seed=args.seed)
+
+    print(f"⚙️ Бэкенд ядер: {kernels.BACKEND} (numba {'есть' if kernels.NUMBA_AVAILABLE else 'не установлен'})")
+
+    bands, ema = reference_bands(candles)
+    mismatches = check_backends(candles, bands, ema)
+    print(f"{'✅' if not mismatches else '❌'} Бэкенды: {len(PARAMETER_SETS)} набора параметров")
+
+    if not args.skip_strategies:
+        from .run import _import_jesse
+        _import_jesse()
+        strategy_mismatches = check_strategies(candles, args.warmup)
+        print(f"{'✅' if not strategy_mismatches else '❌'} Стратегии: {len(candles) - args.warmup} баров")
+        mismatches += strategy_mismatches
+
+    for line in mismatches:
+        print(f"  {line}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
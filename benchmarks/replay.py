@@ -0,0 +1,245 @@
+# benchmarks/replay.py
+"""
+Прогон стратегии Jesse по массиву свечей без движка бэктеста
+
+Подменяет свойства, которые в Jesse читают состояние из store (candles,
+close, position, ...), и исполняет ордера по упрощенной модели: вход по
+цене закрытия бара, выход по стопу/тейку по high/low следующих баров.
+Нужен для замеров скорости и профилирования, а не для оценки доходности.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.logging_utils import strategy_log
+
+# Прогон - симуляция вне Jesse: сделки из хуков стратегий (utils/strategy_hooks.py)
+# не должны попадать в снапшот статистики, который читает бот
+os.environ.setdefault('TRADE_STATS_FILE', '')
+
+# Колонки свечей в порядке Jesse
+TIMESTAMP, OPEN, CLOSE, HIGH, LOW, VOLUME = range(6)
+
+
+class ReplayOrder:
+    """Исполненный ордер (то, что стратегии читают в on_*_position)"""
+
+    def __init__(self, price: float, qty: float):
+        self.price = price
+        self.qty = qty
+
+
+class ReplayPosition:
+    """Позиция стратегии в режиме прогона"""
+
+    def __init__(self, strategy: 'ReplayMixin'):
+        self._strategy = strategy
+        self.qty = 0.0
+        self.entry_price: Optional[float] = None
+        self.type = 'close'
+
+    @property
+    def is_open(self) -> bool:
+        return self.type != 'close'
+
+    @property
+    def is_close(self) -> bool:
+        return self.type == 'close'
+
+    @property
+    def is_long(self) -> bool:
+        return self.type == 'long'
+
+    @property
+    def is_short(self) -> bool:
+        return self.type == 'short'
+
+    @property
+    def pnl(self) -> float:
+        if not self.is_open:
+            return 0.0
+        direction = 1 if self.is_long else -1
+        return (self._strategy.close - self.entry_price) * self.qty * direction
+
+    def open(self, side: str, qty: float, price: float):
+        self.type = side
+        self.qty = qty
+        self.entry_price = price
+
+    def close(self):
+        self.type = 'close'
+        self.qty = 0.0
+        self.entry_price = None
+
+
+def _ignored_setter(self, value):
+    # Jesse.Strategy.__init__ может присваивать эти атрибуты - игнорируем
+    pass
+
+
+def _replay_property(getter):
+    return property(getter, _ignored_setter)
+
+
+class ReplayMixin:
+    """Подмена свойств Jesse.Strategy, читающих store"""
+
+    _replay_candles: np.ndarray
+    _replay_i: int = 0
+    _replay_position: ReplayPosition
+
+    candles = _replay_property(lambda self: self._replay_candles[:self._replay_i + 1])
+    current_candle = _replay_property(lambda self: self._replay_candles[self._replay_i])
+    open = _replay_property(lambda self: float(self._replay_candles[self._replay_i, OPEN]))
+    close = _replay_property(lambda self: float(self._replay_candles[self._replay_i, CLOSE]))
+    price = _replay_property(lambda self: float(self._replay_candles[self._replay_i, CLOSE]))
+    high = _replay_property(lambda self: float(self._replay_candles[self._replay_i, HIGH]))
+    low = _replay_property(lambda self: float(self._replay_candles[self._replay_i, LOW]))
+    position = _replay_property(lambda self: self._replay_position)
+    is_long = _replay_property(lambda self: self._replay_position.is_long)
+    is_short = _replay_property(lambda self: self._replay_position.is_short)
+    is_open = _replay_property(lambda self: self._replay_position.is_open)
+    is_close = _replay_property(lambda self: self._replay_position.is_close)
+    available_margin = _replay_property(lambda self: self._replay_balance)
+    balance = _replay_property(lambda self: self._replay_balance)
+    capital = _replay_property(lambda self: self._replay_balance)
+
+    # Прогон не ходит в OpenAI и Telegram, даже если в .env включен ИИ анализ:
+    # потоки анализа и сетевые запросы исказили бы замер и тратили токены
+    enable_ai_analysis = _replay_property(lambda self: False)
+    enable_notifications = _replay_property(lambda self: False)
+
+    def _submit_to_analysis_service(self, signal_type, signal_data) -> bool:
+        return False
+
+    # Режимы и ограничение частоты как в Jesse, запись - только счетчик
+    log = strategy_log
+
+    def _emit_log(self, msg, log_type='info', send_notification=False, webhook=None):
+        self._replay_log_count += 1
+
+    def liquidate(self):
+        if self._replay_position.is_open:
+            self._replay_close(self.close)
+
+
+def _orders(value) -> List[tuple]:
+    """self.buy / stop_loss / take_profit: (qty, price) или список таких пар"""
+    if value is None:
+        return []
+    if isinstance(value, (list, np.ndarray)) and len(value) and isinstance(value[0], (tuple, list, np.ndarray)):
+        return [tuple(v) for v in value]
+    return [tuple(value)]
+
+
+class StrategyReplay:
+    """
+    Прогон класса стратегии по свечам
+
+    replay = StrategyReplay(FakeoutHunter, candles)
+    stats = replay.run()
+    """
+
+    def __init__(self, strategy_class, candles: np.ndarray, symbol: str = 'BTC-USDT',
+                 exchange: str = 'Bybit USDT Perpetual', timeframe: str = '15m',
+                 balance: float = 10_000.0):
+        replay_class = type(f"Replay{strategy_class.__name__}", (ReplayMixin, strategy_class), {})
+
+        strategy = replay_class.__new__(replay_class)
+        strategy._replay_candles = candles
+        strategy._replay_i = 0
+        strategy._replay_position = ReplayPosition(strategy)
+        strategy._replay_balance = balance
+        strategy._replay_log_count = 0
+        strategy._replay_close = self._close_position
+        strategy.__init__()
+
+        strategy.symbol = symbol
+        strategy.exchange = exchange
+        strategy.timeframe = timeframe
+
+        self.strategy = strategy
+        self.candles = candles
+        self.trades = 0
+        self.closed_pnl = 0.0
+
+    def _open_position(self, side: str):
+        strategy = self.strategy
+        orders = _orders(getattr(strategy, 'buy' if side == 'long' else 'sell', None))
+        qty = sum(float(qty) for qty, _ in orders) or 1.0
+        price = strategy.close
+
+        strategy._replay_position.open(side, qty, price)
+        if hasattr(strategy, 'on_open_position'):
+            strategy.on_open_position(ReplayOrder(price, qty))
+
+    def _close_position(self, price: float):
+        strategy = self.strategy
+        position = strategy._replay_position
+        qty = position.qty
+        direction = 1 if position.is_long else -1
+        pnl = (price - position.entry_price) * qty * direction
+
+        if hasattr(strategy, 'on_close_position'):
+            strategy.on_close_position(ReplayOrder(price, qty))
+
+        position.close()
+        strategy._replay_balance += pnl
+        self.trades += 1
+        self.closed_pnl += pnl
+
+    def _check_exits(self):
+        """Срабатывание стопа/тейка по диапазону текущего бара"""
+        strategy = self.strategy
+        position = strategy._replay_position
+        high, low = strategy.high, strategy.low
+
+        for _, price in _orders(getattr(strategy, 'stop_loss', None)):
+            price = float(price)
+            if (position.is_long and low <= price) or (position.is_short and high >= price):
+                self._close_position(price)
+                return
+
+        for _, price in _orders(getattr(strategy, 'take_profit', None)):
+            price = float(price)
+            if (position.is_long and high >= price) or (position.is_short and low <= price):
+                self._close_position(price)
+                return
+
+    def step(self, i: int):
+        """Один бар в порядке вызовов Jesse"""
+        strategy = self.strategy
+        strategy._replay_i = i
+        strategy.index = i
+
+        strategy.before()
+
+        if strategy._replay_position.is_open:
+            self._check_exits()
+            if strategy._replay_position.is_open:
+                strategy.update_position()
+        else:
+            strategy.buy = strategy.sell = strategy.stop_loss = strategy.take_profit = None
+            if strategy.should_long():
+                strategy.go_long()
+                self._open_position('long')
+            elif strategy.should_short():
+                strategy.go_short()
+                self._open_position('short')
+
+        if hasattr(strategy, 'after'):
+            strategy.after()
+
+    def run(self, warmup: int = 210, bars: Optional[int] = None) -> Dict[str, Any]:
+        """Прогоняет бары [warmup, warmup + bars), возвращает счетчики"""
+        end = len(self.candles) if bars is None else min(len(self.candles), warmup + bars)
+        for i in range(warmup, end):
+            self.step(i)
+
+        return {
+            'bars': max(0, end - warmup),
+            'trades': self.trades,
+            'pnl': self.closed_pnl,
+            'log_calls': self.strategy._replay_log_count,
+        }
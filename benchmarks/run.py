@@ -0,0 +1,563 @@
+# benchmarks/run.py
+"""
+Бенчмарки стратегий и конвейера анализа
+
+Запуск из корня репозитория:
+    python -m benchmarks.run                              # все наборы, синтетические свечи
+    python -m benchmarks.run --fixture BTCUSDT_15         # записанная фикстура
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --suites strategies --strategy-logs quiet
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.15
+
+Наборы:
+- strategies: бары/сек для каждой стратегии из strategies/ (benchmarks/replay.py)
+- routes:     бары/сек группы стратегий на одном маршруте, с шиной индикаторов и без
+- kernels:    бары/сек предикатов входа FakeoutHunter: векторные ядра (utils/kernels.py) и по бару
+- context:    методы MarketContextCollector, мкс/вызов
+- prompts:    сборка промптов и разбор ответа, мкс/вызов; размер промптов в токенах
+- formatter:  форматтеры MessageFormatter, мкс/вызов
+- startup:    холодный импорт модулей бота, мс (benchmarks/startup_time.py)
+
+При сравнении с baseline код возврата 1, если хоть одна метрика ухудшилась
+больше чем на --tolerance.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .fixtures import get_candles
+from .replay import StrategyReplay, CLOSE, HIGH, LOW, OPEN, VOLUME
+from .startup_time import bench_startup
+from utils.indicator_bus import get_indicator_bus
+from utils.logging_utils import STRATEGY_LOG_MODES, set_strategy_log_mode
+from utils.market_regime import get_market_regime_engine
+
+SUITES = ('strategies', 'routes', 'kernels', 'context', 'prompts', 'formatter', 'startup')
+
+STRATEGIES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'strategies')
+
+SAMPLE_AI_RESPONSE = """Вот результат анализа:
+{
+    "recommendation": "BUY",
+    "confidence": 72,
+    "risk_level": "MEDIUM",
+    "key_factors": {
+        "bullish": ["Отскок от нижней полосы Боллинджера", "RSI выходит из перепроданности"],
+        "bearish": ["Объем ниже среднего"]
+    },
+    "market_analysis": "Цена консолидируется у поддержки, импульс восстанавливается",
+    "strategy_assessment": "Сигнал соответствует логике стратегии",
+    "risk_warnings": ["Возможен ложный пробой"],
+    "target_zones": {"entry": 50100, "stop_loss": 49600, "take_profit": 51200},
+    "summary": "Умеренно бычий сетап с приемлемым риском. Вход допустим с консервативным стопом."
+}
+Учитывайте риск-менеджмент."""
+
+
+def _result(suite: str, name: str, value: float, unit: str, higher_is_better: bool, **extra) -> Dict[str, Any]:
+    return {
+        'suite': suite,
+        'name': name,
+        'value': value,
+        'unit': unit,
+        'higher_is_better': higher_is_better,
+        **extra
+    }
+
+
+def measure(func: Callable, is_async: bool = False, repeat: int = 7, round_time: float = 0.05) -> Dict[str, float]:
+    """
+    Время одного вызова в микросекундах
+
+    Количество вызовов в раунде подбирается так, чтобы раунд шел ~round_time.
+    Для сравнения используется минимум по раундам (как в timeit), медиана - справочно.
+    """
+    if is_async:
+        loop = asyncio.new_event_loop()
+
+        def run_batch(number: int) -> float:
+            async def batch():
+                started = time.perf_counter()
+                for _ in range(number):
+                    await func()
+                return time.perf_counter() - started
+            return loop.run_until_complete(batch())
+    else:
+        def run_batch(number: int) -> float:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            return time.perf_counter() - started
+
+    try:
+        single = max(run_batch(1), 1e-7)
+        number = max(1, int(round_time / single))
+
+        per_call = [run_batch(number) / number * 1e6 for _ in range(repeat)]
+    finally:
+        if is_async:
+            loop.close()
+
+    return {'median_us': statistics.median(per_call), 'min_us': min(per_call), 'calls_per_round': number}
+
+
+def _skip_reason(error: Exception) -> str:
+    message = str(error).strip().splitlines()
+    return f"{type(error).__name__}: {message[0] if message else ''}"
+
+
+def _import_jesse():
+    """
+    Импорт jesse.strategies для офлайн-прогона
+
+    Jesse при импорте моделей пытается подключиться к Postgres из .env. Без базы
+    первая попытка падает, но модули уже загружены - повторный импорт проходит.
+    """
+    try:
+        importlib.import_module('jesse.strategies')
+    except ImportError:
+        raise
+    except Exception as e:
+        print(f"  (Jesse без базы данных: {_skip_reason(e)})")
+        importlib.import_module('jesse.strategies')
+
+
+# === Наборы ===
+
+def bench_strategies(candles, args) -> List[Dict[str, Any]]:
+    _import_jesse()
+
+    results = []
+    names = sorted(
+        name for name in os.listdir(STRATEGIES_DIR)
+        if os.path.isfile(os.path.join(STRATEGIES_DIR, name, '__init__.py'))
+    )
+    if args.strategies:
+        names = [name for name in names if name in args.strategies.split(',')]
+
+    for name in names:
+        try:
+            module = importlib.import_module(f"strategies.{name}")
+            strategy_class = getattr(module, name)
+        except Exception as e:
+            results.append(_result('strategies', name, 0.0, 'bars/s', True, skipped=_skip_reason(e)))
+            continue
+
+        # Каждый раунд - свежий экземпляр, результат - лучший раунд (меньше всего шума)
+        rates = []
+        try:
+            for _ in range(args.rounds):
+                # без значений от предыдущего прогона
+                get_indicator_bus().clear()
+                get_market_regime_engine().reset()
+                replay = StrategyReplay(strategy_class, candles)
+                started = time.perf_counter()
+                stats = replay.run(warmup=args.warmup)
+                elapsed = time.perf_counter() - started
+                rates.append(stats['bars'] / elapsed if elapsed > 0 else 0.0)
+        except Exception as e:
+            results.append(_result('strategies', name, 0.0, 'bars/s', True, skipped=_skip_reason(e)))
+            continue
+
+        results.append(_result(
+            'strategies', name, max(rates), 'bars/s', True,
+            median_bars_per_sec=statistics.median(rates), bars=stats['bars'], trades=stats['trades'], log_calls=stats['log_calls']
+        ))
+
+    return results
+
+
+# Стратегии с пересекающимися индикаторами (EMA/RSI/ATR/SMA объема)
+ROUTE_GROUP = ('AdaptiveMomentum', 'BalancedTrader', 'FakeoutHunter', 'QualityTrader', 'TrendRider')
+
+
+def bench_routes(candles, args) -> List[Dict[str, Any]]:
+    """
+    Группа стратегий на одном exchange/symbol/timeframe, бар за баром вместе
+
+    Как несколько маршрутов routes.py в одном процессе Jesse: сравнивается
+    прогон с общей шиной индикаторов (utils/indicator_bus.py) и без нее.
+    """
+    _import_jesse()
+
+    names = [name for name in ROUTE_GROUP if not args.strategies or name in args.strategies.split(',')]
+    classes = [getattr(importlib.import_module(f"strategies.{name}"), name) for name in names]
+    bus = get_indicator_bus()
+    enabled = bus.enabled
+    results = []
+
+    try:
+        for use_bus in (False, True):
+            bus.enabled = use_bus
+            rates, stats = [], {}
+            for _ in range(args.rounds):
+                bus.clear()
+                get_market_regime_engine().reset()
+                replays = [StrategyReplay(strategy_class, candles) for strategy_class in classes]
+                started = time.perf_counter()
+                for i in range(args.warmup, len(candles)):
+                    for replay in replays:
+                        replay.step(i)
+                elapsed = time.perf_counter() - started
+                rates.append((len(candles) - args.warmup) / elapsed if elapsed > 0 else 0.0)
+                stats = bus.stats()
+
+            name = 'group_with_bus' if use_bus else 'group_without_bus'
+            extra = {'strategies': names, 'median_bars_per_sec': statistics.median(rates)}
+            if use_bus:
+                extra.update(hit_rate=stats['hit_rate'], computed=stats['misses'], served=stats['hits'])
+            results.append(_result('routes', name, max(rates), 'bars/s', True, **extra))
+    finally:
+        bus.enabled = enabled
+        bus.clear()
+
+    return results
+
+
+def bench_kernels(candles, args) -> List[Dict[str, Any]]:
+    """
+    Шесть предикатов входа FakeoutHunter по всей истории
+
+    per_bar - методы стратегии на каждом баре (как в бэктесте Jesse),
+    vectorized - ядра utils/kernels.py по массивам (BB и EMA считаются заранее).
+    """
+    _import_jesse()
+    import jesse.indicators as ta
+    from utils import kernels
+
+    from strategies.FakeoutHunter import FakeoutHunter
+
+    o, c, h, l = candles[:, OPEN], candles[:, CLOSE], candles[:, HIGH], candles[:, LOW]
+    bars = len(candles) - args.warmup
+    results = []
+
+    def per_bar():
+        strategy = StrategyReplay(FakeoutHunter, candles).strategy
+        for i in range(args.warmup, len(candles)):
+            strategy._replay_i = i
+            strategy.index = i
+            strategy._is_bb_lower_fakeout(), strategy._is_bb_upper_fakeout()
+            strategy._is_bb_lower_bounce(), strategy._is_bb_upper_bounce()
+            strategy._is_ema_bounce_up(), strategy._is_ema_bounce_down()
+
+    def vectorized():
+        strategy = StrategyReplay(FakeoutHunter, candles).strategy
+        upper, _, lower = ta.bollinger_bands(candles, period=strategy.bb_period, devup=strategy.bb_std, sequential=True)
+        ema = ta.ema(candles, period=strategy.ema_period, sequential=True)
+        fakeout = dict(lookback=strategy.max_bars_outside, max_penetration=strategy.max_fakeout_penetration,
+                       min_return=strategy.min_fakeout_return)
+        kernels.lower_fakeout(candles[:, 3], c, lower, **fakeout)
+        kernels.upper_fakeout(candles[:, 2], c, upper, **fakeout)
+        kernels.bounce_up(o, l, c, lower, strategy.bb_bounce_tolerance)
+        kernels.bounce_down(o, h, c, upper, strategy.bb_bounce_tolerance)
+        kernels.bounce_up(o, l, c, ema, strategy.ema_bounce_tolerance, confirm_close=True)
+        kernels.bounce_down(o, h, c, ema, strategy.ema_bounce_tolerance, confirm_close=True)
+
+    for name, func in (('FakeoutHunter.per_bar', per_bar), ('FakeoutHunter.vectorized', vectorized)):
+        rates = []
+        for _ in range(args.rounds):
+            get_indicator_bus().clear()
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            rates.append(bars / elapsed if elapsed > 0 else 0.0)
+        results.append(_result('kernels', name, max(rates), 'bars/s', True,
+                               median_bars_per_sec=statistics.median(rates), backend=kernels.BACKEND))
+
+    return results
+
+
+def _sample_signal_data(candles) -> Dict[str, Any]:
+    """Данные сигнала в формате EnhancedStrategy._collect_signal_data"""
+    last = candles[-1]
+    return {
+        'strategy': 'FakeoutHunter',
+        'signal_type': 'LONG',
+        'reason': 'BB bounce with RSI confirmation',
+        'price': float(last[CLOSE]),
+        'timestamp': int(last[0] / 1000),
+        'symbol': 'BTC-USDT',
+        'timeframe': '15m',
+        'exchange': 'Bybit USDT Perpetual',
+        'candles_data': {
+            'recent_candles': [
+                {'timestamp': int(c[0]), 'open': float(c[OPEN]), 'high': float(c[HIGH]),
+                 'low': float(c[LOW]), 'close': float(c[CLOSE]), 'volume': float(c[VOLUME])}
+                for c in candles[-20:]
+            ],
+            'current_volume': float(last[VOLUME]),
+        },
+        'indicators': {'rsi': 41.3, 'ema21': float(last[CLOSE]) * 0.998, 'ema50': float(last[CLOSE]) * 0.995,
+                       'bb_upper': float(last[CLOSE]) * 1.01, 'bb_lower': float(last[CLOSE]) * 0.99,
+                       'atr': float(last[HIGH] - last[LOW]), 'current_price': float(last[CLOSE])},
+        'additional_data': {'entry_price': float(last[CLOSE]), 'position_size': 0.05},
+    }
+
+
+def bench_context(candles, args) -> List[Dict[str, Any]]:
+    from ai_analysis.market_context import MarketContextCollector
+
+    collector = MarketContextCollector()
+    window = candles[-200:]
+    recent = window[-20:]
+    closes, highs, lows, volumes = recent[:, 4], recent[:, 2], recent[:, 3], recent[:, 5]
+
+    cases = {
+        'collect_context': (lambda: collector.collect_context('BTC-USDT', '15m', window), True),
+        '_analyze_candles': (lambda: collector._analyze_candles(window), True),
+        '_calculate_volatility_metrics': (lambda: collector._calculate_volatility_metrics(window), True),
+        '_analyze_volume_profile': (lambda: collector._analyze_volume_profile(window), True),
+        '_determine_price_trend': (lambda: collector._determine_price_trend(closes), False),
+        '_find_support_resistance': (lambda: collector._find_support_resistance(highs, lows), False),
+        '_identify_candle_patterns': (lambda: collector._identify_candle_patterns(recent), False),
+        '_calculate_momentum': (lambda: collector._calculate_momentum(closes), False),
+        '_analyze_volume_trend': (lambda: collector._analyze_volume_trend(volumes), False),
+    }
+
+    results = []
+    for name, (func, is_async) in cases.items():
+        timing = measure(func, is_async=is_async)
+        results.append(_result('context', f"MarketContextCollector.{name}", timing['min_us'], 'us', False, **timing))
+    return results
+
+
+def bench_prompts(candles, args) -> List[Dict[str, Any]]:
+    from ai_analysis.market_context import MarketContextCollector
+    from ai_analysis.openai_analyzer import OpenAIAnalyzer
+    from ai_analysis.prompt_templates import (MARKET_SYSTEM_PROMPT, SIGNAL_SYSTEM_PROMPT, TIKTOKEN_AVAILABLE,
+                                              build_market_prompt, estimate_tokens)
+
+    # Без клиента OpenAI и API ключа - нужны только чистые методы
+    analyzer = object.__new__(OpenAIAnalyzer)
+    analyzer.model = 'benchmark'
+
+    signal_data = _sample_signal_data(candles)
+    market_data = asyncio.run(MarketContextCollector().collect_context('BTC-USDT', '15m', candles[-200:]))
+    strategy_analyses = [
+        {'strategy': name, 'timeframe': timeframe, 'signal': 'BUY', 'confidence': 65}
+        for name, timeframe in (('ActiveScalper', '5m'), ('BalancedTrader', '15m'), ('QualityTrader', '1h'))
+    ]
+    overview_data = {'price': float(candles[-1][CLOSE]), 'change_24h': 1.25, 'volume_24h': 123_456.0}
+
+    results = []
+    for name, func in (
+        ('OpenAIAnalyzer._build_analysis_prompt', lambda: analyzer._build_analysis_prompt(signal_data, market_data)),
+        ('OpenAIAnalyzer._parse_ai_response', lambda: analyzer._parse_ai_response(SAMPLE_AI_RESPONSE)),
+        ('OpenAIAnalyzer._get_system_prompt', analyzer._get_system_prompt),
+        ('build_market_prompt', lambda: build_market_prompt(strategy_analyses, overview_data)),
+    ):
+        timing = measure(func)
+        results.append(_result('prompts', name, timing['min_us'], 'us', False, **timing))
+
+    # Стоимость запроса в токенах; системный промпт - кэшируемый префикс
+    method = 'tiktoken' if TIKTOKEN_AVAILABLE else 'estimate'
+    for name, text in (
+        ('tokens/signal_system_prompt', SIGNAL_SYSTEM_PROMPT),
+        ('tokens/signal_user_prompt', analyzer._build_analysis_prompt(signal_data, market_data)),
+        ('tokens/market_system_prompt', MARKET_SYSTEM_PROMPT),
+        ('tokens/market_user_prompt', build_market_prompt(strategy_analyses, overview_data)),
+    ):
+        results.append(_result('prompts', name, float(estimate_tokens(text)), 'tokens', False,
+                               chars=len(text), method=method))
+    return results
+
+
+def bench_formatter(candles, args) -> List[Dict[str, Any]]:
+    from notifications.message_formatter import MessageFormatter
+    from utils.trade_stats import TradeStatsAggregator
+
+    formatter = MessageFormatter()
+    signal_data = _sample_signal_data(candles)
+    ai_analysis = json.loads(SAMPLE_AI_RESPONSE[SAMPLE_AI_RESPONSE.find('{'):SAMPLE_AI_RESPONSE.rfind('}') + 1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = TradeStatsAggregator(snapshot_path=os.path.join(tmp, 'stats.json'), snapshot_interval=10 ** 9)
+        now = time.time()
+        for i, pnl in enumerate((candles[1:301, CLOSE] - candles[:300, CLOSE]) / 100):
+            stats.record_trade(['FakeoutHunter', 'TrendRider', 'RSIBot'][i % 3], float(pnl),
+                               symbol='BTC-USDT', timestamp=now - (300 - i) * 600)
+        summary = stats.get_summary()
+        daily = stats.get_daily_summary()
+
+    market_report = {
+        'timestamp': signal_data['timestamp'],
+        'price': signal_data['price'],
+        'change_24h': 1.7,
+        'strategy_analyses': [
+            {'strategy': name, 'timeframe': tf, 'signal': signal, 'confidence': conf}
+            for name, tf, signal, conf in (('ActiveScalper', '5m', 'BUY', 64), ('BalancedTrader', '15m', 'HOLD', 51),
+                                            ('QualityTrader', '1h', 'SELL', 58))
+        ],
+        'overall_analysis': {
+            'market_phase': 'ACCUMULATION', 'risk_level': 'MEDIUM', 'confidence': 66,
+            'key_insights': ['Снижение волатильности', 'Рост объема на покупках', 'Поддержка удерживается'],
+            'recommendations': ['Частичный вход', 'Стоп под минимумом дня', 'Фиксация на сопротивлении'],
+            'summary': 'Рынок в фазе накопления, приоритет - аккуратные покупки от поддержки.'
+        },
+    }
+
+    cases = {
+        'format_analysis_message': lambda: formatter.format_analysis_message(signal_data, ai_analysis),
+        'format_market_analysis': lambda: formatter.format_market_analysis(market_report),
+        'format_trade_update': lambda: formatter.format_trade_update({
+            'status': 'CLOSED', 'symbol': 'BTC-USDT', 'pnl': 42.5, 'strategy': 'FakeoutHunter',
+            'entry_price': 50000.0, 'exit_price': 50850.0, 'duration': 5400}),
+        'format_daily_summary': lambda: formatter.format_daily_summary(daily),
+        'format_trade_statistics': lambda: formatter.format_trade_statistics(summary),
+        'format_error_alert': lambda: formatter.format_error_alert({
+            'type': 'API_ERROR', 'message': 'Bybit timeout', 'strategy': 'TrendRider', 'severity': 'ERROR'}),
+        'format_system_status': lambda: formatter.format_system_status({
+            'strategies': {name: {'status': 'active', 'trades_today': 2} for name in ('RSIBot', 'TrendRider')},
+            'ai_enabled': True, 'api_connected': True, 'uptime': 86400}),
+    }
+
+    results = []
+    for name, func in cases.items():
+        timing = measure(func)
+        results.append(_result('formatter', f"MessageFormatter.{name}", timing['min_us'], 'us', False, **timing))
+    return results
+
+
+SUITE_RUNNERS = {
+    'strategies': bench_strategies,
+    'routes': bench_routes,
+    'kernels': bench_kernels,
+    'context': bench_context,
+    'prompts': bench_prompts,
+    'formatter': bench_formatter,
+    'startup': bench_startup,
+}
+
+
+# === Сравнение с baseline ===
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Список ухудшений больше tolerance (доля, 0.1 = 10%)"""
+    previous = {(r['suite'], r['name']): r for r in baseline.get('results', []) if not r.get('skipped')}
+    regressions = []
+
+    for result in results:
+        base = previous.get((result['suite'], result['name']))
+        if base is None or result.get('skipped') or not base['value']:
+            continue
+
+        if result['higher_is_better']:
+            change = (base['value'] - result['value']) / base['value']
+        else:
+            change = (result['value'] - base['value']) / base['value']
+
+        result['baseline'] = base['value']
+        result['regression'] = change
+
+        if change > tolerance:
+            regressions.append(
+                f"{result['suite']}/{result['name']}: {base['value']:.2f} -> {result['value']:.2f} "
+                f"{result['unit']} ({change * 100:+.1f}% хуже)"
+            )
+
+    return regressions
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _print_results(results: List[Dict[str, Any]]):
+    for result in results:
+        if result.get('skipped'):
+            line = f"  {result['name']:<54} пропущено: {result['skipped']}"
+        else:
+            line = f"  {result['name']:<54} {result['value']:>12.2f} {result['unit']}"
+            if 'regression' in result:
+                line += f"  ({-result['regression'] * 100:+.1f}% к baseline)"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки стратегий и конвейера анализа")
+    parser.add_argument('--suites', default=','.join(SUITES), help=f"через запятую: {', '.join(SUITES)}")
+    parser.add_argument('--strategies', help="только эти стратегии (через запятую)")
+    parser.add_argument('--fixture', default='synthetic', help="'synthetic' или имя фикстуры в benchmarks/fixtures/")
+    parser.add_argument('--bars', type=int, default=3000)
+    parser.add_argument('--warmup', type=int, default=210, help="баров до начала замера стратегий")
+    parser.add_argument('--rounds', type=int, default=3, help="прогонов каждой стратегии (берется лучший)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--strategy-logs', default='full', choices=STRATEGY_LOG_MODES,
+                        help="режим self.log стратегий (quiet - как бэктест Jesse по умолчанию)")
+    parser.add_argument('--output', help="записать результаты в JSON")
+    parser.add_argument('--baseline', help="сравнить с сохраненными результатами")
+    parser.add_argument('--save-baseline', help="сохранить результаты как baseline")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="допустимое ухудшение (доля)")
+    args = parser.parse_args(argv)
+
+    # Стратегии логируют на каждом баре - в бенчмарке это шум
+    logging.disable(logging.WARNING)
+    set_strategy_log_mode(args.strategy_logs)
+
+    candles = get_candles(args.fixture, args.bars + args.warmup, seed=args.seed)
+
+    results: List[Dict[str, Any]] = []
+    for suite in (s.strip() for s in args.suites.split(',') if s.strip()):
+        runner = SUITE_RUNNERS.get(suite)
+        if runner is None:
+            parser.error(f"неизвестный набор: {suite}")
+
+        print(f"▶ {suite}")
+        try:
+            suite_results = runner(candles, args)
+        except ImportError as e:
+            suite_results = [_result(suite, suite, 0.0, '', False, skipped=_skip_reason(e))]
+        _print_results(suite_results)
+        results.extend(suite_results)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    document = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': _git_revision(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'fixture': args.fixture,
+            'bars': len(candles) - args.warmup,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        print(f"💾 Результаты записаны: {path}")
+
+    if regressions:
+        print(f"\n❌ Регрессии (допуск {args.tolerance * 100:.0f}%):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    if args.baseline:
+        print(f"\n✅ Регрессий нет (допуск {args.tolerance * 100:.0f}%)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
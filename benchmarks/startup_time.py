@@ -0,0 +1,159 @@
+# benchmarks/startup_time.py
+"""
+Время холодного импорта модулей бота (python -X importtime)
+
+Каждая цель импортируется в чистом процессе; в зачет идет суммарное
+время импортов после старта интерпретатора (site и прочее, что грузится
+и для пустого `python -c pass`, вычитается). Берется лучший из --repeat.
+
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --targets bot_runner --top 15
+
+Также доступен как набор `startup` в python -m benchmarks.run.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Что грузится при старте бота, Jesse воркера и стратегии
+DEFAULT_TARGETS = (
+    'utils.metrics',
+    'utils',
+    'ai_analysis',
+    'notifications',
+    'market_analyzer',
+    'bot_runner',
+    'strategies.FakeoutHunter',
+)
+
+# Jesse при импорте моделей ходит в Postgres; без базы первая попытка падает,
+# повторная проходит (см. benchmarks/run.py::_import_jesse).
+# __import__, а не importlib.import_module: последний -X importtime не видит
+IMPORT_CODE = """
+target = {target!r}
+if target.startswith('strategies.'):
+    try:
+        import jesse.strategies
+    except ImportError:
+        raise
+    except Exception:
+        pass
+__import__(target)
+"""
+
+ImportRow = Tuple[str, int, int, int]  # модуль, уровень вложенности, self мкс, cumulative мкс
+
+
+def _parse_importtime(stderr: str) -> List[ImportRow]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        # Вложенность - по два пробела на уровень, у модулей верхнего уровня ровно один
+        depth = (len(module) - len(module.lstrip(' '))) // 2
+        rows.append((module.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _children(rows: List[ImportRow], baseline: Set[str]) -> List[ImportRow]:
+    """Прямые зависимости модулей верхнего уровня (кроме импортов старта интерпретатора)"""
+    children, pending = [], []
+    # -X importtime печатает модуль после всех его зависимостей
+    for row in rows:
+        if row[1] == 1:
+            pending.append(row)
+        elif row[1] == 0:
+            if row[0] not in baseline:
+                children.extend(pending)
+            pending = []
+    return children
+
+
+def _run_importtime(code: str) -> Tuple[int, str]:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT_DIR, capture_output=True, text=True, env=env, timeout=120
+    )
+    return completed.returncode, completed.stderr
+
+
+def interpreter_modules() -> Set[str]:
+    """Модули верхнего уровня, которые импортируются и для пустого процесса"""
+    _, stderr = _run_importtime('pass')
+    return {module for module, depth, _, _ in _parse_importtime(stderr) if depth == 0}
+
+
+def measure_target(target: str, repeat: int = 5, baseline: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Лучшее из repeat время импорта цели, мс, и самые дорогие модули"""
+    baseline = interpreter_modules() if baseline is None else baseline
+    best: Optional[Dict[str, Any]] = None
+
+    for _ in range(repeat):
+        returncode, stderr = _run_importtime(IMPORT_CODE.format(target=target))
+        rows = _parse_importtime(stderr)
+        if returncode != 0:
+            error = [line for line in stderr.splitlines() if line and not line.startswith('import time:')]
+            return {'target': target, 'skipped': error[-1] if error else f"код возврата {returncode}"}
+
+        top_level = [row for row in rows if row[1] == 0 and row[0] not in baseline]
+        total_ms = sum(cumulative for _, _, _, cumulative in top_level) / 1000
+
+        if best is None or total_ms < best['total_ms']:
+            heaviest = sorted(_children(rows, baseline), key=lambda row: row[3], reverse=True)
+            best = {
+                'target': target,
+                'total_ms': total_ms,
+                'heaviest': [(module, cumulative / 1000) for module, _, _, cumulative in heaviest],
+            }
+
+    return best
+
+
+def bench_startup(candles, args) -> List[Dict[str, Any]]:
+    """Набор для benchmarks.run: мс на холодный импорт каждой цели"""
+    from .run import _result
+
+    baseline = interpreter_modules()
+    targets = getattr(args, 'startup_targets', None) or DEFAULT_TARGETS
+    results = []
+
+    for target in targets:
+        measured = measure_target(target, repeat=getattr(args, 'startup_repeat', 5), baseline=baseline)
+        if 'skipped' in measured:
+            results.append(_result('startup', target, 0.0, 'ms', False, skipped=measured['skipped']))
+        else:
+            results.append(_result('startup', target, measured['total_ms'], 'ms', False,
+                                   heaviest=[name for name, _ in measured['heaviest'][:5]]))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Время холодного импорта модулей бота")
+    parser.add_argument('--targets', default=','.join(DEFAULT_TARGETS), help="модули через запятую")
+    parser.add_argument('--repeat', type=int, default=5, help="прогонов на цель (берется лучший)")
+    parser.add_argument('--top', type=int, default=8, help="сколько самых дорогих модулей показать")
+    args = parser.parse_args(argv)
+
+    baseline = interpreter_modules()
+
+    for target in (t.strip() for t in args.targets.split(',') if t.strip()):
+        measured = measure_target(target, repeat=args.repeat, baseline=baseline)
+        if 'skipped' in measured:
+            print(f"▶ {target}: пропущено ({measured['skipped']})")
+            continue
+
+        print(f"▶ {target}: {measured['total_ms']:.1f} мс")
+        for module, cumulative_ms in measured['heaviest'][:args.top]:
+            print(f"    {module:<48} {cumulative_ms:>8.1f} мс")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
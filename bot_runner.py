@@ -1,25 +1,21 @@
 # bot_runner.py - ПОЛНАЯ ИСПРАВЛЕННАЯ ВЕРСИЯ с детальным логированием ИИ анализа
 import os
 import logging
-from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-from telegram.error import TelegramError, RetryAfter
 from datetime import datetime
-import asyncio
-import concurrent.futures
+import html
 import sys
 import traceback
 
+from utils.concurrency import per_user, run_cpu
+from utils.config_manager import describe_changes, get_config
+from utils.logging_utils import configure_logging
+from utils.loop_monitor import monitor_loop
+
 def setup_logging():
-    """Настройка логирования"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('/tmp/telegram_bot_complete.log'),
-            logging.StreamHandler()
-        ]
-    )
+    """Настройка логирования (файл и консоль пишет фоновый поток)"""
+    configure_logging(log_file=os.getenv('BOT_LOG_FILE', '/tmp/telegram_bot_complete.log'))
     return logging.getLogger(__name__)
 
 class TelegramBot:
@@ -29,6 +25,7 @@ class TelegramBot:
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
         self.logger = setup_logging()
+        self.loop_monitor = None
         
         if not self.bot_token or not self.chat_id:
             raise ValueError("TELEGRAM_BOT_TOKEN и TELEGRAM_CHAT_ID должны быть установлены!")
@@ -37,6 +34,14 @@ class TelegramBot:
         self.logger.info(f"Bot token: {self.bot_token[:10]}...")
         self.logger.info(f"Chat ID: {self.chat_id}")
 
+    async def post_init(self, application: Application):
+        """Запуск монитора задержки event loop (Application.post_init)"""
+        self.loop_monitor = monitor_loop('bot')
+
+    async def post_shutdown(self, application: Application):
+        if self.loop_monitor is not None:
+            self.loop_monitor.stop()
+
     async def command_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
         try:
@@ -95,7 +100,9 @@ class TelegramBot:
                 "• /help - Подробная справка\n"
                 "• /status - Статус всех систем\n"
                 "• /stats - Статистика торговли\n"
-                "• /analyze - Быстрый ИИ анализ\n\n"
+                "• /analyze - Быстрый ИИ анализ\n"
+                "• /scan [N] - Сканер рынка: топ-N символов\n"
+                "• /reload_config - Перечитать настройки (админ)\n\n"
                 "<b>🧠 ИИ АНАЛИЗ (ИСПРАВЛЕН):</b>\n"
                 "• РЕАЛЬНЫЙ анализ рыночных условий\n"
                 "• GPT-4 оценка всех стратегий БЕЗ mock данных\n"
@@ -160,27 +167,20 @@ class TelegramBot:
         try:
             self.logger.info("📈 /stats команда")
             
-            stats_text = (
-                "📊 <b>ТОРГОВАЯ СТАТИСТИКА</b>\n\n"
-                "📅 <b>За сегодня:</b>\n"
-                "• Сделок: 12\n"
-                "• Прибыльных: 8 (66.7%)\n"
-                "• P&L: +$45.23\n\n"
-                "📈 <b>За неделю:</b>\n"
-                "• Сделок: 89\n"
-                "• Прибыльных: 58 (65.2%)\n"
-                "• P&L: +$234.67\n\n"
-                "🎯 <b>По стратегиям:</b>\n"
-                "• ActiveScalper: +$78.90\n"
-                "• BalancedTrader: +$123.45\n"
-                "• QualityTrader: +$32.32\n\n"
-                "⚡ <b>Последние сделки:</b>\n"
-                "• BUY BTCUSDT $43,250 → +$12.34\n"
-                "• SELL BTCUSDT $43,890 → +$23.45\n"
-                "• BUY BTCUSDT $42,100 → -$8.76\n\n"
-                "📈 <b>Общая доходность:</b> +5.67%\n\n"
-                "✅ <b>ИИ анализ:</b> Реальные данные, без mock"
-            )
+            # Статистика из снапшота агрегатора (обновляется стратегиями)
+            from utils.trade_stats import get_trade_stats
+            from utils.live_state import get_live_state
+            from notifications.message_formatter import MessageFormatter
+            
+            formatter = MessageFormatter()
+            trade_stats = get_trade_stats()
+            trade_stats.refresh_from_disk()
+            stats_text = formatter.format_trade_statistics(trade_stats.get_summary())
+            
+            # Текущие позиции и счетчики стратегий (общая память процесса Jesse)
+            states = get_live_state().read_all(active_only=True)
+            if states:
+                stats_text += f"\n\n🔄 <b>СЕЙЧАС</b>\n{formatter.format_live_strategies(states)}"
             
             keyboard = [[InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]]
             reply_markup = InlineKeyboardMarkup(inline_keyboard=keyboard)
@@ -194,6 +194,7 @@ class TelegramBot:
         except Exception as e:
             self.logger.error(f"❌ Ошибка /stats: {e}")
 
+    @per_user
     async def command_analyze(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда для быстрого ИИ анализа (ИСПРАВЛЕНА)"""
         try:
@@ -227,6 +228,77 @@ class TelegramBot:
             except:
                 pass
 
+    @per_user
+    async def command_scan(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Сканер рынка по всем USDT perpetual символам (/scan [N])"""
+        try:
+            self.logger.info("🔭 /scan команда")
+            
+            top = None
+            if context.args and context.args[0].isdigit():
+                top = max(1, min(int(context.args[0]), 20))
+            
+            loading_msg = await update.message.reply_text(
+                "🔭 <b>Сканирую рынок...</b>\n"
+                "📋 Загружаю список инструментов Bybit...\n"
+                "📊 Считаю сигналы стратегий по всем символам...",
+                parse_mode="HTML"
+            )
+            
+            from market_scanner import MarketScanner
+            
+            async with MarketScanner() as scanner:
+                scan_result = await scanner.scan(top=top)
+            
+            await loading_msg.edit_text(self._format_scan_result(scan_result), parse_mode="HTML")
+            
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка /scan: {e}")
+            try:
+                await update.message.reply_text(
+                    f"❌ <b>Ошибка сканирования:</b>\n<code>{html.escape(str(e))}</code>",
+                    parse_mode="HTML"
+                )
+            except:
+                pass
+
+    async def command_reload_config(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Перечитывает конфигурацию без перезапуска (только для TELEGRAM_CHAT_ID)"""
+        try:
+            if str(update.effective_chat.id) != str(self.chat_id):
+                self.logger.warning(f"⛔ /reload_config из чужого чата {update.effective_chat.id}")
+                await update.message.reply_text("⛔ Команда доступна только администратору")
+                return
+            
+            self.logger.info("🔄 /reload_config команда")
+            
+            config = get_config()
+            changes = config.reload()
+            
+            if changes is None:
+                text = (
+                    "❌ <b>Конфигурация не применена</b>\n\n"
+                    "Новые значения не прошли проверку, подробности в логах.\n"
+                    f"Действует версия {config.version}."
+                )
+            elif not changes and config.errors:
+                errors = "\n".join(f"• {html.escape(error)}" for error in config.errors)
+                text = f"⚠️ Конфигурация (версия {config.version}) с ошибками:\n{errors}"
+            elif not changes:
+                text = f"ℹ️ Конфигурация не изменилась (версия {config.version})"
+            else:
+                lines = "\n".join(f"• <code>{html.escape(line)}</code>" for line in describe_changes(changes))
+                text = f"✅ <b>Конфигурация обновлена</b> (версия {config.version})\n\n{lines}"
+            
+            await update.message.reply_text(text, parse_mode="HTML")
+            
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка /reload_config: {e}")
+            try:
+                await update.message.reply_text(f"❌ Ошибка перезагрузки конфигурации: {str(e)[:200]}")
+            except:
+                pass
+
     async def handle_button(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик нажатий на кнопки"""
         try:
@@ -253,6 +325,7 @@ class TelegramBot:
         except Exception as e:
             self.logger.error(f"❌ Ошибка обработки кнопки: {e}")
 
+    @per_user
     async def _show_ai_analysis_inline(self, query):
         """ИСПРАВЛЕН: Показывает ИИ анализ с детальным логированием БЕЗ mock данных"""
         try:
@@ -299,14 +372,15 @@ class TelegramBot:
             # ШАГ 1: Проверяем переменные окружения
             self.logger.info("🔍 ШАГ 1: Проверка переменных окружения")
             
-            ai_enabled = os.getenv('AI_ANALYSIS_ENABLED', 'false').lower()
-            openai_key = os.getenv('OPENAI_API_KEY')
+            ai_config = get_config().ai
+            ai_enabled = ai_config.enabled
+            openai_key = ai_config.openai_api_key
             
-            self.logger.info(f"  AI_ANALYSIS_ENABLED = '{ai_enabled}'")
+            self.logger.info(f"  AI_ANALYSIS_ENABLED = {ai_enabled}")
             self.logger.info(f"  OPENAI_API_KEY = '{openai_key[:10] if openai_key else 'НЕ УСТАНОВЛЕН'}...'")
             
-            if ai_enabled != 'true':
-                error_msg = f"AI_ANALYSIS_ENABLED = '{ai_enabled}' (должно быть 'true')"
+            if not ai_enabled:
+                error_msg = "AI_ANALYSIS_ENABLED выключен (должно быть 'true')"
                 self.logger.error(f"❌ {error_msg}")
                 return self._format_error_response("Настройки ИИ", error_msg)
             
@@ -349,7 +423,7 @@ class TelegramBot:
             self.logger.info("🔬 ШАГ 4: Выполнение analyze_all_strategies (БЕЗ MOCK)")
             
             try:
-                analysis_data = await analyzer.analyze_all_strategies()
+                analysis_data = await self._run_market_analysis(analyzer)
                 self.logger.info("✅ analyze_all_strategies выполнен успешно")
                 
                 # Проверяем что данные НЕ mock
@@ -381,7 +455,8 @@ class TelegramBot:
                 # ШАГ 5: Форматирование результата
                 self.logger.info("📝 ШАГ 5: Форматирование РЕАЛЬНОГО результата для пользователя")
                 
-                formatted_result = self._format_ai_analysis_result(analysis_data)
+                # Сборка длинного сообщения - в пуле, чтобы не задерживать других пользователей
+                formatted_result = await run_cpu(self._format_ai_analysis_result, analysis_data)
                 
                 self.logger.info("🎉 ВСЕ ШАГИ ЗАВЕРШЕНЫ УСПЕШНО! РЕАЛЬНЫЕ ДАННЫЕ ПОЛУЧЕНЫ!")
                 return formatted_result
@@ -398,6 +473,21 @@ class TelegramBot:
             self.logger.error(f"Полный traceback: {traceback.format_exc()}")
             return self._format_error_response("Системная ошибка", error_msg, str(e))
 
+    async def _run_market_analysis(self, analyzer) -> dict:
+        """Анализ через сервис ИИ анализа (общий с другими пользователями), без него - в процессе бота"""
+        from ai_analysis.service import PRIORITY_HIGH, AnalysisServiceClient
+        
+        response = await AnalysisServiceClient().submit('market', {}, priority=PRIORITY_HIGH)
+        if response is None:
+            return await analyzer.analyze_all_strategies()
+        
+        if response.get('status') != 'done':
+            raise Exception(response.get('error') or f"Сервис ИИ анализа не успел ({response.get('status')})")
+        
+        self.logger.info(f"🧠 Результат сервиса ИИ анализа: задача {response['job_id']}"
+                         f"{' (общая с другим запросом)' if response.get('deduped') else ''}")
+        return response['result']
+
     def _format_error_response(self, error_category: str, error_message: str, technical_details: str = "") -> str:
         """Форматирует ошибку для отправки пользователю"""
         current_time = datetime.now().strftime("%H:%M:%S")
@@ -557,33 +647,38 @@ class TelegramBot:
 
     async def _get_status_text(self) -> str:
         """Получает текст статуса системы"""
-        # Проверяем статус компонентов
-        ai_enabled = os.getenv('AI_ANALYSIS_ENABLED', 'false').lower() == 'true'
-        openai_key = bool(os.getenv('OPENAI_API_KEY'))
+        # Проверяем статус компонентов (снимок конфигурации, без os.environ)
+        config = get_config()
         
-        ai_status = "✅ Активен (исправлен)" if ai_enabled and openai_key else "❌ Отключен"
+        ai_status = "✅ Активен (исправлен)" if config.ai_analysis_enabled else "❌ Отключен"
         telegram_status = "✅ Работает (исправлен)"  # Если мы здесь, значит работает
         
         # Проверяем API ключи
-        bybit_key = bool(os.getenv('BYBIT_USDT_PERPETUAL_TESTNET_API_KEY'))
+        bybit_key = bool(config.exchange.bybit_api_key)
         api_status = "✅ Настроены" if bybit_key else "❌ Отсутствуют"
         
         current_time = datetime.now().strftime("%H:%M:%S")
         current_date = datetime.now().strftime("%d.%m.%Y")
         
+        # Живое состояние стратегий из общей памяти (без запросов к БД)
+        from utils.live_state import get_live_state
+        from notifications.message_formatter import MessageFormatter
+        
+        states = get_live_state().read_all()
+        active = sum(1 for state in states if state.is_active)
+        strategies_text = MessageFormatter().format_live_strategies(states)
+        
         return (
             "🟢 <b>ПОЛНЫЙ СТАТУС ИСПРАВЛЕННОЙ СИСТЕМЫ</b>\n\n"
             f"📱 <b>Telegram бот:</b> {telegram_status}\n"
             f"🤖 <b>ИИ анализ:</b> {ai_status}\n"
             f"🔑 <b>API ключи:</b> {api_status}\n"
-            f"📊 <b>Jesse фреймворк:</b> ✅ Активен\n"
-            f"🔄 <b>Стратегии:</b> 3 активные\n"
+            f"📊 <b>Jesse фреймворк:</b> {'✅ Активен' if active else '⚪ Нет активных стратегий'}\n"
+            f"🔄 <b>Стратегии:</b> {active} активные из {len(states)}\n"
             f"💾 <b>База данных:</b> ✅ PostgreSQL\n"
             f"⚡ <b>Кэш:</b> ✅ Redis\n\n"
             "<b>📈 АКТИВНЫЕ СТРАТЕГИИ:</b>\n"
-            "• <code>ActiveScalper</code> → BTCUSDT (5m)\n"
-            "• <code>BalancedTrader</code> → BTCUSDT (15m)\n" 
-            "• <code>QualityTrader</code> → BTCUSDT (1h)\n\n"
+            f"{strategies_text}\n"
             "<b>🌐 ПОДКЛЮЧЕНИЯ:</b>\n"
             "• Bybit Testnet ✅\n"
             "• OpenAI API ✅ (исправлен)\n"
@@ -651,12 +746,11 @@ class TelegramBot:
 
     async def _show_settings_inline(self, query):
         """Показывает настройки"""
-        ai_enabled = os.getenv('AI_ANALYSIS_ENABLED', 'false').lower() == 'true'
-        openai_key = bool(os.getenv('OPENAI_API_KEY'))
+        config = get_config()
         
         settings_text = (
             "⚙️ <b>НАСТРОЙКИ ИСПРАВЛЕННОЙ СИСТЕМЫ</b>\n\n"
-            f"🤖 ИИ анализ: {'✅ Включен (исправлен)' if ai_enabled and openai_key else '❌ Отключен'}\n"
+            f"🤖 ИИ анализ: {'✅ Включен (исправлен)' if config.ai_analysis_enabled else '❌ Отключен'}\n"
             "📊 Стратегий: 3 активные\n"
             "🔔 Уведомления: ✅ Включены\n"
             "⚡ Режим: Тестовый (Bybit Testnet)\n\n"
@@ -665,7 +759,8 @@ class TelegramBot:
             "• Символ: BTCUSDT\n"
             "• Риск-менеджмент: Активен\n\n"
             "<b>ИСПРАВЛЕННЫЕ ИИ Настройки:</b>\n"
-            f"• OpenAI модель: {os.getenv('OPENAI_MODEL', 'gpt-4')}\n"
+            f"• OpenAI модель: {config.ai.openai_model}\n"
+            f"• Мин. уверенность ИИ: {config.trading.min_ai_confidence}%\n"
             "• Mock данные: ❌ ОТКЛЮЧЕНЫ\n"
             "• Детальные ошибки: ✅ ВКЛЮЧЕНЫ\n"
             "• Строгий анализ: ✅ АКТИВЕН\n"
@@ -678,6 +773,10 @@ class TelegramBot:
             "<i>Настройки изменяются через .env файл</i>"
         )
         
+        if config.errors:
+            errors = "\n".join(f"• {html.escape(error)}" for error in config.errors)
+            settings_text += f"\n\n⚠️ <b>Ошибки конфигурации:</b>\n{errors}"
+        
         keyboard = [[InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]]
         reply_markup = InlineKeyboardMarkup(inline_keyboard=keyboard)
         
@@ -689,29 +788,15 @@ class TelegramBot:
 
     async def _show_history_inline(self, query):
         """Показывает историю сделок"""
-        history_text = (
-            "📋 <b>ИСТОРИЯ СДЕЛОК (ИСПРАВЛЕННАЯ)</b>\n\n"
-            "<b>Последние 5 сделок:</b>\n\n"
-            "1️⃣ <b>BUY BTCUSDT</b>\n"
-            "   💰 $43,250 → $43,790 (+$12.34)\n"
-            "   ⏰ 10:30 | 🎯 BalancedTrader\n"
-            "   🧠 ИИ: BUY (85% уверенность)\n\n"
-            "2️⃣ <b>SELL BTCUSDT</b>\n"
-            "   💰 $43,890 → $43,345 (+$23.45)\n"
-            "   ⏰ 09:15 | 🎯 QualityTrader\n"
-            "   🧠 ИИ: SELL (90% уверенность)\n\n"
-            "3️⃣ <b>BUY BTCUSDT</b>\n"
-            "   💰 $42,100 → $41,975 (-$8.76)\n"
-            "   ⏰ 08:45 | 🎯 ActiveScalper\n"
-            "   🧠 ИИ: HOLD (45% уверенность)\n\n"
-            "📊 <b>Итого за день:</b> +$45.23\n"
-            "📈 <b>Винрейт:</b> 66.7% (8/12)\n\n"
-            "🧠 <b>ИСПРАВЛЕННЫЕ ИИ рекомендации:</b>\n"
-            "• Реальные данные от GPT-4\n"
-            "• Убраны все mock заглушки\n"
-            "• QualityTrader + ИИ показывает высокий винрейт\n"
-            "• Детальная аналитика всех ошибок\n\n"
-            "✅ <b>Статус:</b> Все данные проверены и корректны"
+        # Закрытые сделки - из снапшота агрегатора, открытые позиции - из общей памяти
+        from utils.trade_stats import get_trade_stats
+        from utils.live_state import get_live_state
+        from notifications.message_formatter import MessageFormatter
+        
+        trade_stats = get_trade_stats()
+        trade_stats.refresh_from_disk()
+        history_text = MessageFormatter().format_trade_history(
+            trade_stats.get_summary()['recent_trades'], get_live_state().read_all(active_only=True)
         )
         
         keyboard = [[InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]]
@@ -756,6 +841,33 @@ class TelegramBot:
             reply_markup=reply_markup
         )
 
+    def _format_scan_result(self, scan_result: dict) -> str:
+        """Форматирует результат сканера рынка"""
+        message = (
+            f"🔭 <b>СКАНЕР РЫНКА</b> ({scan_result['interval']}m)\n\n"
+            f"📋 Просканировано: {scan_result['scanned']}/{scan_result['universe']} "
+            f"за {scan_result['elapsed_s']:.1f}с\n\n"
+        )
+        
+        opportunities = scan_result.get('opportunities', [])
+        if not opportunities:
+            return message + "⚪ Возможностей не найдено"
+        
+        message += "<b>🎯 ТОП ВОЗМОЖНОСТЕЙ:</b>\n"
+        for rank, item in enumerate(opportunities, 1):
+            direction_emoji = {'LONG': '🟢', 'SHORT': '🔴'}.get(item['direction'], '⚪')
+            signals = " ".join(self._get_signal_emoji(a['signal']) for a in item['strategy_analyses'])
+            message += (
+                f"{rank}. {direction_emoji} <b>{item['symbol']}</b> {item['direction']} "
+                f"(score {item['score']:+.2f})\n"
+                f"    ${item['price']:,.4f} ({item['change_24h']:+.2f}%) {signals}\n"
+            )
+        
+        if scan_result.get('failed'):
+            message += f"\n⚠️ Без данных: {len(scan_result['failed'])} символов"
+        
+        return message
+
     def _get_signal_emoji(self, signal: str) -> str:
         """Возвращает эмодзи для торгового сигнала"""
         if 'STRONG_BUY' in signal:
@@ -770,22 +882,19 @@ class TelegramBot:
             return '⚪'
 
     async def send_notification(self, message: str) -> bool:
-        """Отправляет уведомление в чат"""
+        """Отправляет уведомление в чат через общую очередь сообщений"""
         try:
-            bot = Bot(self.bot_token)
-            await bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
-                parse_mode="HTML"
-            )
-            await bot.close()
-            return True
+            from notifications.message_queue import get_message_queue
+            
+            return await get_message_queue(self.bot_token).send(message, chat_id=self.chat_id)
         except Exception as e:
             self.logger.error(f"❌ Ошибка отправки уведомления: {e}")
             return False
 
 def main():
     """Главная функция"""
+    os.environ.setdefault('METRICS_ROLE', 'bot')
+    os.environ.setdefault('LOOP_MONITOR_ENABLED', 'true')
     try:
         # Создаем бота
         telegram_bot = TelegramBot()
@@ -794,7 +903,16 @@ def main():
         telegram_bot.logger.info("🚀 Создание Application...")
         
         # Создаем приложение для python-telegram-bot 20.0+
-        application = Application.builder().token(telegram_bot.bot_token).build()
+        from notifications.message_queue import telegram_base_url
+        from notifications.webhook_server import TelegramWebhookServer, telegram_mode, update_concurrency
+        
+        application = (Application.builder()
+                       .token(telegram_bot.bot_token)
+                       .base_url(telegram_base_url())
+                       .concurrent_updates(update_concurrency())
+                       .post_init(telegram_bot.post_init)
+                       .post_shutdown(telegram_bot.post_shutdown)
+                       .build())
         
         # Добавляем обработчики команд
         application.add_handler(CommandHandler("start", telegram_bot.command_start))
@@ -802,21 +920,27 @@ def main():
         application.add_handler(CommandHandler("status", telegram_bot.command_status))
         application.add_handler(CommandHandler("stats", telegram_bot.command_stats))
         application.add_handler(CommandHandler("analyze", telegram_bot.command_analyze))  # ← ИСПРАВЛЕННАЯ КОМАНДА!
+        application.add_handler(CommandHandler("reload_config", telegram_bot.command_reload_config))
+        application.add_handler(CommandHandler("scan", telegram_bot.command_scan))
         
         # КРИТИЧЕСКИ ВАЖНО: Добавляем обработчик кнопок
         application.add_handler(CallbackQueryHandler(telegram_bot.handle_button))
         
         telegram_bot.logger.info("✅ Все обработчики команд и кнопок добавлены (ИСПРАВЛЕННАЯ ВЕРСИЯ)")
-        telegram_bot.logger.info("🎯 Доступные команды: /start, /help, /status, /stats, /analyze")
+        telegram_bot.logger.info("🎯 Доступные команды: /start, /help, /status, /stats, /analyze, /scan, /reload_config")
         telegram_bot.logger.info("🔘 Доступные кнопки: Статус, ИСПРАВЛЕННЫЙ ИИ Анализ, Помощь, Настройки, История")
         telegram_bot.logger.info("🧠 ИИ анализ: ПОЛНОСТЬЮ ИСПРАВЛЕН, БЕЗ MOCK ДАННЫХ")
-        telegram_bot.logger.info("🚀 Запуск polling...")
         
         # Запускаем бота
-        application.run_polling(
-            drop_pending_updates=True,
-            allowed_updates=Update.ALL_TYPES
-        )
+        if telegram_mode() == 'webhook':
+            telegram_bot.logger.info("🚀 Запуск webhook сервера...")
+            TelegramWebhookServer(application).run()
+        else:
+            telegram_bot.logger.info("🚀 Запуск polling...")
+            application.run_polling(
+                drop_pending_updates=True,
+                allowed_updates=Update.ALL_TYPES
+            )
         
     except KeyboardInterrupt:
         print("🛑 Остановка по Ctrl+C")
@@ -2,10 +2,15 @@
 from jesse.strategies import Strategy
 import threading
 import time
-import os
 import logging
 from typing import Dict, Any, Optional
 
+from utils.config_manager import get_config
+from utils.logging_utils import install_strategy_logging
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import submit_to_analysis_service, track_strategy
+from utils.strategy_profiler import profile_if_enabled
+
 
 class EnhancedStrategy(Strategy):
     """
@@ -17,16 +22,19 @@ class EnhancedStrategy(Strategy):
     - Нет конфликтов с базовой логикой Jesse
     """
     
+    def __init_subclass__(cls, **kwargs):
+        """Логи, профайлер, замер should_long/should_short и общие хуки каждой стратегии-наследника"""
+        super().__init_subclass__(**kwargs)
+        install_strategy_logging(cls)
+        profile_if_enabled(cls)
+        instrument_strategy(cls)
+        track_strategy(cls)
+    
     def __init__(self):
         super().__init__()
         
-        # Проверяем доступность компонентов
-        self.enable_ai_analysis = self._check_ai_enabled()
-        self.enable_notifications = self._check_telegram_enabled()
-        
         # Кэш последних анализов
         self.last_analysis_time = {}
-        self.min_analysis_gap = 300  # 5 минут между анализами
         
         # Логирование состояния
         if self.enable_ai_analysis:
@@ -39,22 +47,36 @@ class EnhancedStrategy(Strategy):
         else:
             self.log("⚠️ Telegram уведомления ОТКЛЮЧЕНЫ")
     
+    # Флаги читаются из снимка конфигурации (utils/config_manager.py), а не из
+    # os.environ: это атрибуты, и они подхватывают reload без перезапуска
+    
+    @property
+    def enable_ai_analysis(self) -> bool:
+        return self._check_ai_enabled()
+    
+    @property
+    def enable_notifications(self) -> bool:
+        return self._check_telegram_enabled()
+    
+    @property
+    def min_analysis_gap(self) -> int:
+        """Минимум секунд между анализами (AI_MIN_ANALYSIS_GAP)"""
+        try:
+            return get_config().ai.min_analysis_gap
+        except Exception:
+            return 300
+    
     def _check_ai_enabled(self) -> bool:
         """Проверяет доступность ИИ анализа"""
         try:
-            ai_enabled = os.getenv('AI_ANALYSIS_ENABLED', 'false').lower() in ('true', '1', 'yes')
-            openai_key = bool(os.getenv('OPENAI_API_KEY'))
-            return ai_enabled and openai_key
+            return get_config().ai_analysis_enabled
         except Exception:
             return False
     
     def _check_telegram_enabled(self) -> bool:
         """Проверяет доступность Telegram"""
         try:
-            telegram_enabled = os.getenv('TELEGRAM_ENABLED', 'false').lower() in ('true', '1', 'yes')
-            bot_token = bool(os.getenv('TELEGRAM_BOT_TOKEN'))
-            chat_id = bool(os.getenv('TELEGRAM_CHAT_ID'))
-            return telegram_enabled and bot_token and chat_id
+            return get_config().telegram_enabled
         except Exception:
             return False
     
@@ -100,6 +122,8 @@ class EnhancedStrategy(Strategy):
             pnl = float(self.position.pnl) if hasattr(self, 'position') and self.position else 0
             self.log(f"🏁 Позиция закрыта на {self.symbol}. P&L: ${pnl:.2f}")
             
+            # Статистика сделок и живое состояние - в track_strategy (utils/strategy_hooks.py)
+
             # Анализируем результат сделки
             if self.enable_ai_analysis:
                 self._trigger_ai_analysis_async(
@@ -138,15 +162,24 @@ class EnhancedStrategy(Strategy):
             self.log(f"❌ Ошибка сбора данных сигнала: {e}")
             return
         
+        # Сервис ИИ анализа (отдельный процесс) - если запущен, поток не нужен
+        if self._submit_to_analysis_service(signal_type, signal_data):
+            self.last_analysis_time[strategy_name] = current_time
+            return
+        
         # Запускаем анализ в отдельном daemon потоке
         def run_analysis_in_thread():
             """Функция для выполнения ИИ анализа в отдельном потоке"""
+            monitor = None
             try:
                 import asyncio
                 
+                from utils.loop_monitor import monitor_loop
+                
                 # Создаем НОВЫЙ event loop только для этого потока
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
+                monitor = monitor_loop('strategy_ai', loop)
                 
                 async def perform_analysis():
                     try:
@@ -163,7 +196,8 @@ class EnhancedStrategy(Strategy):
                         market_data = await context_collector.collect_context(
                             symbol=self.symbol,
                             timeframe=self.timeframe,
-                            candles_data=self.candles
+                            candles_data=self.candles,
+                            exchange=self.exchange
                         )
                         
                         # Выполняем ИИ анализ
@@ -193,6 +227,8 @@ class EnhancedStrategy(Strategy):
                 self.log(f"❌ Ошибка потока ИИ анализа: {e}")
             finally:
                 try:
+                    if monitor is not None:
+                        monitor.stop()
                     loop.close()
                 except Exception:
                     pass
@@ -207,8 +243,12 @@ class EnhancedStrategy(Strategy):
         
         self.log(f"🚀 ИИ анализ запущен в потоке: {analysis_thread.name}")
     
+    def _submit_to_analysis_service(self, signal_type: str, signal_data: Dict) -> bool:
+        """Передает сигнал сервису ИИ анализа; False - сервис не запущен, анализ здесь"""
+        return submit_to_analysis_service(self, signal_type, signal_data)
+    
     async def _send_notification_async(self, signal_data: Dict, ai_analysis: Dict):
-        """Отправляет уведомление через Telegram"""
+        """Ставит уведомление в очередь Telegram (без ожидания доставки)"""
         try:
             from notifications.telegram_bot import TelegramNotifier
             from notifications.message_formatter import MessageFormatter
@@ -217,12 +257,11 @@ class EnhancedStrategy(Strategy):
             formatter = MessageFormatter()
             
             message = formatter.format_analysis_message(signal_data, ai_analysis)
-            success = await notifier.send_message_safe(message)
             
-            if success:
-                self.log("📱 Уведомление отправлено в Telegram")
+            if notifier.enqueue_message(message) is not None:
+                self.log("📱 Уведомление поставлено в очередь Telegram")
             else:
-                self.log("❌ Не удалось отправить уведомление")
+                self.log("❌ Не удалось поставить уведомление в очередь")
                 
         except Exception as e:
             self.log(f"❌ Ошибка отправки уведомления: {e}")
@@ -0,0 +1,7 @@
+# loadtest/__init__.py
+"""
+Офлайн нагрузочные тесты: mock серверы Bybit, OpenAI, Telegram и драйвер нагрузки
+
+Запуск mock серверов:  python -m loadtest.servers
+Нагрузочный прогон:    python -m loadtest.driver --help
+"""
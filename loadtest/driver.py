@@ -0,0 +1,392 @@
+# loadtest/driver.py
+"""
+Нагрузочный драйвер: /analyze и всплески сигналов против mock серверов
+
+- analyze: N одновременных команд /analyze через update_queue и обработчики
+  bot_runner с тем же concurrent_updates, что в bot_runner.main
+  (Telegram -> MarketAnalyzer -> Bybit -> OpenAI -> Telegram); параллельно
+  другой пользователь раз в --status-interval шлет /status - его задержка
+  и задержка event loop показывают, не блокирует ли анализ остальных
+- signals: всплески SignalPublisher.publish_signal в mock webhook
+- scan: полные проходы MarketScanner по вселенной mock Bybit
+- webhook: апдейты /status, отправленные POST-запросами в webhook сервер
+  бота (notifications/webhook_server.py), как их присылает Telegram
+
+С --ai-service /analyze идет через сервис ИИ анализа
+(ai_analysis/service.py), запущенный отдельным процессом: одновременные
+запросы объединяются в одну задачу.
+
+Отчет: пропускная способность, p50/p95/p99/max по каждому сценарию и
+счетчики mock серверов. Пример:
+    python -m loadtest.driver --concurrency 20 --flows 100 --signal-bursts 5 --burst-size 200 --scans 3
+    python -m loadtest.driver --flows 0 --signal-bursts 0 --webhook-updates 1000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict
+
+from utils.metrics import LatencyHistogram
+
+from loadtest.servers import MockServers
+
+LOADTEST_CHAT_ID = 424242
+LOADTEST_USER_ID = 434343
+LOADTEST_WEBHOOK_SECRET = 'loadtest-webhook-secret'
+
+# Переменные окружения, без которых бот не стартует (значения фиктивные)
+LOADTEST_ENV = {
+    'TELEGRAM_BOT_TOKEN': '123456789:LOADTEST-mock-telegram-token',
+    'TELEGRAM_CHAT_ID': str(LOADTEST_CHAT_ID),
+    'OPENAI_API_KEY': 'sk-loadtest-mock-openai-key-000000',
+    'AI_ANALYSIS_ENABLED': 'true',
+}
+
+
+def _command_update(update_id: int, command: str, chat_id: int = LOADTEST_CHAT_ID,
+                    user_id: int = LOADTEST_USER_ID) -> Dict[str, Any]:
+    """Апдейт Telegram с командой бота"""
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Load', 'username': 'loadtest'},
+            'text': command,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(command)}],
+        },
+    }
+
+
+def _signal(i: int) -> Dict[str, Any]:
+    return {
+        'strategy': 'LoadTest',
+        'signal_type': 'LONG' if i % 2 == 0 else 'SHORT',
+        'symbol': 'BTCUSDT',
+        'timeframe': '15m',
+        'price': 50_000.0 + i,
+        'reason': 'loadtest',
+        'timestamp': time.time(),
+        'indicators': {'rsi': 55.0, 'ema_fast': 50_010.0, 'ema_slow': 49_990.0},
+    }
+
+
+def _report(name: str, histogram: LatencyHistogram, elapsed: float, errors: int) -> Dict[str, Any]:
+    summary = histogram.summary()
+    summary.update({
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'throughput_per_s': (histogram.count / elapsed) if elapsed > 0 else 0.0,
+    })
+    print(f"\n📊 {name}: {histogram.count} за {elapsed:.2f}с "
+          f"({summary['throughput_per_s']:.1f}/с), ошибок: {errors}")
+    print(f"   p50={summary['p50_ms']:.1f}мс  p95={summary['p95_ms']:.1f}мс  "
+          f"p99={summary['p99_ms']:.1f}мс  max={summary['max_ms']:.1f}мс")
+    return summary
+
+
+async def run_analyze_flows(flows: int, concurrency: int, servers: MockServers,
+                            status_interval: float = 0.05) -> Dict[str, Any]:
+    """N команд /analyze, не более concurrency одновременно, и /status от другого пользователя"""
+    from telegram import Update
+    from telegram.ext import Application, CommandHandler, TypeHandler
+
+    from bot_runner import TelegramBot
+    from notifications.message_queue import telegram_base_url
+    from notifications.webhook_server import update_concurrency
+    from utils.loop_monitor import LoopLagMonitor
+
+    # Как в bot_runner.main: апдейты идут через update_queue и concurrent_updates
+    telegram_bot = TelegramBot()
+    application = (Application.builder()
+                   .token(telegram_bot.bot_token)
+                   .base_url(telegram_base_url())
+                   .updater(None)
+                   .concurrent_updates(update_concurrency())
+                   .build())
+    application.add_handler(CommandHandler("analyze", telegram_bot.command_analyze))
+    application.add_handler(CommandHandler("status", telegram_bot.command_status))
+
+    # Группа 1 выполняется после обработчика команды - отмечает конец обработки апдейта
+    pending: Dict[int, asyncio.Future] = {}
+
+    async def processed(update: Update, context):
+        future = pending.pop(update.update_id, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    application.add_handler(TypeHandler(Update, processed), group=1)
+
+    async def handle(update_id: int, command: str, user_id: int) -> float:
+        """Кладет апдейт в update_queue (как getUpdates/webhook); время до конца обработки"""
+        future = pending[update_id] = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        await application.update_queue.put(
+            Update.de_json(_command_update(update_id, command, user_id=user_id), application.bot))
+        await future
+        return time.perf_counter() - started
+
+    histogram = LatencyHistogram()
+    status_histogram = LatencyHistogram()
+    semaphore = asyncio.Semaphore(concurrency)
+    errors_before = servers.telegram.error_messages
+    done = asyncio.Event()
+
+    async def flow(update_id: int):
+        async with semaphore:
+            # Разные пользователи: одинаковые сериализуются per_user
+            histogram.record(await handle(update_id, '/analyze', LOADTEST_USER_ID + update_id))
+
+    async def status_probe():
+        update_id = flows + 1
+        while not done.is_set():
+            update_id += 1
+            status_histogram.record(await handle(update_id, '/status', LOADTEST_USER_ID - 1))
+            await asyncio.sleep(status_interval)
+
+    async with application:
+        await application.start()
+        monitor = LoopLagMonitor('loadtest', interval=0.01).start()
+        probe = asyncio.create_task(status_probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(flow(i + 1) for i in range(flows)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe
+        monitor.stop()
+        await application.stop()
+
+    summary = _report("/analyze", histogram, elapsed, servers.telegram.error_messages - errors_before)
+    summary['status_during_analyze'] = status_histogram.summary()
+    summary['loop_lag'] = monitor.summary()
+    print(f"   обработчиков одновременно: {update_concurrency()}")
+    print(f"   /status во время анализа: p50={summary['status_during_analyze']['p50_ms']:.1f}мс  "
+          f"p99={summary['status_during_analyze']['p99_ms']:.1f}мс  "
+          f"max={summary['status_during_analyze']['max_ms']:.1f}мс")
+    print(f"   задержка event loop: p99={summary['loop_lag']['p99_ms']:.1f}мс  "
+          f"max={summary['loop_lag']['max_ms']:.1f}мс")
+    return summary
+
+
+async def run_signal_bursts(bursts: int, burst_size: int, pause: float) -> Dict[str, Any]:
+    """Всплески по burst_size одновременных publish_signal"""
+    from utils.signal_publisher import SignalPublisher
+
+    histogram = LatencyHistogram()
+    errors = 0
+
+    async def publish(publisher: SignalPublisher, i: int) -> bool:
+        started = time.perf_counter()
+        ok = await publisher.publish_signal(_signal(i))
+        histogram.record(time.perf_counter() - started)
+        return ok
+
+    async with SignalPublisher() as publisher:
+        started = time.perf_counter()
+        for burst in range(bursts):
+            results = await asyncio.gather(*(publish(publisher, burst * burst_size + i) for i in range(burst_size)))
+            errors += results.count(False)
+            if pause and burst < bursts - 1:
+                await asyncio.sleep(pause)
+        elapsed = time.perf_counter() - started
+
+    return _report("signals", histogram, elapsed, errors)
+
+
+async def run_scans(scans: int) -> Dict[str, Any]:
+    """Последовательные проходы сканера рынка (вселенная - MOCK_BYBIT_INSTRUMENTS)"""
+    from market_scanner import MarketScanner
+
+    histogram = LatencyHistogram()
+    errors = 0
+
+    async with MarketScanner() as scanner:
+        started = time.perf_counter()
+        for _ in range(scans):
+            scan_started = time.perf_counter()
+            result = await scanner.scan()
+            histogram.record(time.perf_counter() - scan_started)
+            errors += len(result['failed'])
+        elapsed = time.perf_counter() - started
+
+    summary = _report("scan", histogram, elapsed, errors)
+    summary['symbols'] = result['universe']
+    return summary
+
+
+async def run_webhook_updates(updates: int, concurrency: int, servers: MockServers) -> Dict[str, Any]:
+    """
+    updates апдейтов /status от разных чатов в webhook сервер бота
+
+    Гистограмма - время ответа на POST (прием апдейта); отдельно -
+    сколько апдейтов в секунду обработано до ответа в mock Telegram.
+    """
+    import aiohttp
+    from telegram.ext import Application, CommandHandler
+
+    from bot_runner import TelegramBot
+    from notifications.message_queue import telegram_base_url
+    from notifications.webhook_server import SECRET_HEADER, TelegramWebhookServer, WebhookSettings
+
+    telegram_bot = TelegramBot()
+    application = (Application.builder()
+                   .token(telegram_bot.bot_token)
+                   .base_url(telegram_base_url())
+                   .updater(None)
+                   .concurrent_updates(concurrency)
+                   .build())
+    application.add_handler(CommandHandler("status", telegram_bot.command_status))
+
+    settings = WebhookSettings(host='127.0.0.1', port=int(os.getenv('LOADTEST_WEBHOOK_PORT', '8805')),
+                               secret_token=LOADTEST_WEBHOOK_SECRET, max_pending=max(updates, 1000))
+    server = TelegramWebhookServer(application, settings)
+    url = f"http://{settings.host}:{settings.port}{settings.path}"
+
+    histogram = LatencyHistogram()
+    semaphore = asyncio.Semaphore(concurrency)
+    sent_before = servers.telegram.calls['sendMessage']
+    errors = 0
+
+    async def post(session: aiohttp.ClientSession, update_id: int, secret: str = LOADTEST_WEBHOOK_SECRET) -> int:
+        async with semaphore:
+            started = time.perf_counter()
+            payload = _command_update(update_id, '/status', chat_id=LOADTEST_CHAT_ID + update_id % 1000)
+            async with session.post(url, json=payload, headers={SECRET_HEADER: secret}) as response:
+                await response.read()
+            histogram.record(time.perf_counter() - started)
+            return response.status
+
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            # Апдейт с чужим секретом должен быть отклонен
+            if await post(session, 0, secret='wrong-secret') != 403:
+                errors += 1
+            histogram = LatencyHistogram()
+
+            started = time.perf_counter()
+            statuses = await asyncio.gather(*(post(session, i + 1) for i in range(updates)))
+            accepted = time.perf_counter() - started
+            errors += sum(1 for status in statuses if status != 200)
+
+            # Ждем, пока обработчики ответят на все принятые апдейты
+            deadline = time.perf_counter() + 60
+            while (servers.telegram.calls['sendMessage'] - sent_before < updates
+                   and time.perf_counter() < deadline):
+                await asyncio.sleep(0.01)
+            processed_in = time.perf_counter() - started
+    finally:
+        await server.stop()
+
+    processed = servers.telegram.calls['sendMessage'] - sent_before
+    summary = _report("webhook (прием)", histogram, accepted, errors)
+    summary.update({
+        'processed': processed,
+        'processed_per_s': processed / processed_in if processed_in > 0 else 0.0,
+        'server': server.stats(),
+    })
+    print(f"   обработано {processed}/{updates} за {processed_in:.2f}с "
+          f"({summary['processed_per_s']:.1f}/с), одновременно {concurrency}")
+    return summary
+
+
+async def start_ai_service() -> asyncio.subprocess.Process:
+    """Сервис ИИ анализа отдельным процессом на временном сокете"""
+    from ai_analysis.service import AnalysisServiceClient
+
+    os.environ['AI_SERVICE_SOCKET'] = f"/tmp/loadtest_ai_service_{os.getpid()}.sock"
+    env = dict(os.environ, LOG_LEVEL=logging.getLevelName(logging.getLogger().level))
+    process = await asyncio.create_subprocess_exec(sys.executable, '-m', 'ai_analysis.service', env=env)
+
+    client = AnalysisServiceClient()
+    deadline = time.perf_counter() + 30
+    while await client.request({'op': 'ping'}) is None:
+        if process.returncode is not None or time.perf_counter() > deadline:
+            raise RuntimeError("Сервис ИИ анализа не запустился")
+        await asyncio.sleep(0.1)
+    return process
+
+
+async def stop_ai_service(process: asyncio.subprocess.Process) -> Dict[str, Any]:
+    from ai_analysis.service import AnalysisServiceClient
+
+    response = await AnalysisServiceClient().request({'op': 'stats'})
+    process.terminate()
+    await process.wait()
+    stats = response['stats'] if response else {}
+    print(f"\n🧠 Сервис ИИ анализа: {json.dumps(stats, ensure_ascii=False)}")
+    return stats
+
+
+async def run(args) -> Dict[str, Any]:
+    servers = MockServers().start()
+    os.environ.update(LOADTEST_ENV)
+    os.environ.update(servers.env)
+    # По умолчанию меряем прямую доставку, без SQLite outbox
+    os.environ.setdefault('SIGNAL_OUTBOX_ENABLED', 'false')
+    # Без --ai-service бот не должен найти сервис, запущенный вне теста
+    os.environ['AI_SERVICE_SOCKET'] = ''
+
+    results: Dict[str, Any] = {}
+    ai_service = await start_ai_service() if args.ai_service else None
+    try:
+        if args.flows:
+            results['analyze'] = await run_analyze_flows(args.flows, args.concurrency, servers, args.status_interval)
+        if args.signal_bursts:
+            results['signals'] = await run_signal_bursts(args.signal_bursts, args.burst_size, args.burst_pause)
+        if args.scans:
+            results['scan'] = await run_scans(args.scans)
+        if args.webhook_updates:
+            results['webhook'] = await run_webhook_updates(args.webhook_updates, args.concurrency, servers)
+    finally:
+        if ai_service is not None:
+            results['ai_service'] = await stop_ai_service(ai_service)
+        results['mocks'] = servers.stats()
+        servers.stop()
+
+    print(f"\n🧪 Mock серверы: {json.dumps(results['mocks'], ensure_ascii=False)}")
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Офлайн нагрузочный тест бота")
+    parser.add_argument('--flows', type=int, default=50, help="число команд /analyze (0 - пропустить)")
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help="одновременных /analyze и обработчиков webhook апдейтов")
+    parser.add_argument('--status-interval', type=float, default=0.05,
+                        help="пауза между /status другого пользователя во время /analyze, с")
+    parser.add_argument('--signal-bursts', type=int, default=5, help="число всплесков сигналов (0 - пропустить)")
+    parser.add_argument('--burst-size', type=int, default=100, help="сигналов во всплеске")
+    parser.add_argument('--burst-pause', type=float, default=0.5, help="пауза между всплесками, с")
+    parser.add_argument('--scans', type=int, default=0, help="проходов сканера рынка (0 - пропустить)")
+    parser.add_argument('--webhook-updates', type=int, default=0,
+                        help="апдейтов /status через webhook сервер (0 - пропустить)")
+    parser.add_argument('--ai-service', action='store_true',
+                        help="/analyze через сервис ИИ анализа в отдельном процессе")
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--output', help="сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+    # bot_runner настраивает свой INFO лог - для нагрузки он только мешает
+    logging.getLogger().setLevel(args.log_level.upper())
+    for name in ('httpx', 'aiohttp.access'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 Результаты сохранены: {args.output}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# loadtest/mock_bybit.py
+"""
+Mock Bybit v5 market API
+
+- GET /v5/market/kline            - свечи из фикстуры (benchmarks/fixtures), новые сначала
+- GET /v5/market/instruments-info - список инструментов с пагинацией через cursor
+
+Свечи отдаются "скользящим окном": каждый запрос сдвигает текущий бар,
+так что последовательные анализы видят меняющийся рынок.
+"""
+import asyncio
+import os
+import random
+
+from aiohttp import web
+
+from benchmarks.fixtures import get_candles
+
+BASE_COINS = ('BTC', 'ETH', 'SOL', 'XRP', 'DOGE', 'ADA', 'AVAX', 'LINK', 'DOT', 'TON',
+              'LTC', 'BCH', 'NEAR', 'APT', 'ARB', 'OP', 'SUI', 'INJ', 'ATOM', 'FIL')
+
+
+class MockBybit:
+    """Состояние mock сервера Bybit"""
+
+    def __init__(self, fixture: str = None, bars: int = 5000, latency_ms: float = None,
+                 instruments: int = None):
+        self.candles = get_candles(fixture or os.getenv('MOCK_BYBIT_FIXTURE', 'synthetic'), bars)
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv('MOCK_BYBIT_LATENCY_MS', '20'))
+        self.instruments = self._build_instruments(
+            instruments if instruments is not None else int(os.getenv('MOCK_BYBIT_INSTRUMENTS', '200'))
+        )
+        self.position = 200
+        self.requests = 0
+
+    @staticmethod
+    def _build_instruments(count: int) -> list:
+        symbols = []
+        for i in range(count):
+            base = BASE_COINS[i] if i < len(BASE_COINS) else f"COIN{i}"
+            symbols.append({
+                'symbol': f"{base}USDT",
+                'contractType': 'LinearPerpetual',
+                'status': 'Trading',
+                'baseCoin': base,
+                'quoteCoin': 'USDT',
+                'launchTime': '1585526400000',
+                'priceScale': '2',
+                'lotSizeFilter': {'minOrderQty': '0.001', 'qtyStep': '0.001'},
+            })
+        return symbols
+
+    async def _delay(self):
+        self.requests += 1
+        if self.latency_ms > 0:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency_ms / 1000)
+
+    async def kline(self, request: web.Request) -> web.Response:
+        await self._delay()
+
+        limit = min(int(request.query.get('limit', 200)), 1000)
+
+        # Сдвигаем "текущий момент" по фикстуре, по кругу
+        self.position = self.position + 1 if self.position + 1 < len(self.candles) else limit
+        window = self.candles[max(0, self.position - limit):self.position]
+        now_ms = int(window[-1][0]) if len(window) else 0
+
+        # Bybit: [start, open, high, low, close, volume, turnover], новые сначала
+        rows = [
+            [str(int(c[0])), f"{c[1]:.2f}", f"{c[3]:.2f}", f"{c[4]:.2f}",
+             f"{c[2]:.2f}", f"{c[5]:.4f}", f"{c[5] * c[2]:.2f}"]
+            for c in window[::-1]
+        ]
+
+        return web.json_response({
+            'retCode': 0,
+            'retMsg': 'OK',
+            'result': {'symbol': request.query.get('symbol', 'BTCUSDT'),
+                       'category': request.query.get('category', 'linear'), 'list': rows},
+            'time': now_ms,
+        })
+
+    async def instruments_info(self, request: web.Request) -> web.Response:
+        await self._delay()
+
+        limit = min(int(request.query.get('limit', 500)), 1000)
+        start = int(request.query.get('cursor') or 0)
+        page = self.instruments[start:start + limit]
+        next_cursor = str(start + limit) if start + limit < len(self.instruments) else ''
+
+        return web.json_response({
+            'retCode': 0,
+            'retMsg': 'OK',
+            'result': {'category': request.query.get('category', 'linear'),
+                       'list': page, 'nextPageCursor': next_cursor},
+        })
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/v5/market/kline', self.kline)
+        app.router.add_get('/v5/market/instruments-info', self.instruments_info)
+        return app
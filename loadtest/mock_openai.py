@@ -0,0 +1,89 @@
+# loadtest/mock_openai.py
+"""
+Mock OpenAI-совместимого API
+
+- POST /v1/chat/completions - ответ в формате chat.completion с JSON,
+  который проходит валидацию и MarketAnalyzer, и OpenAIAnalyzer
+- задержка MOCK_OPENAI_LATENCY_MS (±50%)
+- доля ответов 429 MOCK_OPENAI_429_RATE (0..1) с заголовком retry-after
+
+Клиент openai направляется сюда через OPENAI_BASE_URL=http://host:port/v1
+"""
+import asyncio
+import json
+import os
+import random
+import time
+
+from aiohttp import web
+
+MARKET_PHASES = ('BULLISH', 'BEARISH', 'NEUTRAL', 'VOLATILE')
+RECOMMENDATIONS = ('BUY', 'SELL', 'HOLD')
+RISK_LEVELS = ('LOW', 'MEDIUM', 'HIGH')
+
+
+class MockOpenAI:
+    """Состояние mock сервера OpenAI"""
+
+    def __init__(self, latency_ms: float = None, rate_limit_ratio: float = None,
+                 retry_after: float = None):
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv('MOCK_OPENAI_LATENCY_MS', '800'))
+        self.rate_limit_ratio = (rate_limit_ratio if rate_limit_ratio is not None
+                                 else float(os.getenv('MOCK_OPENAI_429_RATE', '0')))
+        self.retry_after = retry_after if retry_after is not None else float(os.getenv('MOCK_OPENAI_RETRY_AFTER', '0.5'))
+        self.requests = 0
+        self.rate_limited = 0
+
+    @staticmethod
+    def _content() -> str:
+        confidence = random.randint(40, 90)
+        return json.dumps({
+            'market_phase': random.choice(MARKET_PHASES),
+            'recommendation': random.choice(RECOMMENDATIONS),
+            'confidence': confidence,
+            'risk_level': random.choice(RISK_LEVELS),
+            'key_insights': ["Объем выше среднего", "Цена у локального уровня", "Волатильность умеренная"],
+            'recommendations': ["Держать стоп-лосс", "Уменьшить размер позиции", "Дождаться подтверждения"],
+            'summary': f"Mock анализ рынка, уверенность {confidence}%.",
+        }, ensure_ascii=False)
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.json()
+
+        if self.rate_limit_ratio > 0 and random.random() < self.rate_limit_ratio:
+            self.rate_limited += 1
+            return web.json_response(
+                {'error': {'message': 'Rate limit reached (mock)', 'type': 'requests',
+                           'param': None, 'code': 'rate_limit_exceeded'}},
+                status=429,
+                headers={'retry-after': str(self.retry_after)}
+            )
+
+        if self.latency_ms > 0:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency_ms / 1000)
+
+        content = self._content()
+        prompt_tokens = sum(len(m.get('content') or '') for m in body.get('messages', [])) // 4
+
+        return web.json_response({
+            'id': f"chatcmpl-mock-{self.requests}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'gpt-4'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(content) // 4,
+                'total_tokens': prompt_tokens + len(content) // 4,
+            },
+        })
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self.chat_completions)
+        return app
@@ -0,0 +1,103 @@
+# loadtest/mock_telegram.py
+"""
+Заглушка Telegram Bot API
+
+- POST/GET /bot{token}/{method} - getMe, sendMessage, editMessageText,
+  answerCallbackQuery, getUpdates, ... с валидными объектами User/Message
+- задержка MOCK_TELEGRAM_LATENCY_MS (±50%)
+- счетчики вызовов по методам и сообщений об ошибках
+
+Бот направляется сюда через TELEGRAM_API_BASE_URL=http://host:port
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+BOT_USER = {
+    'id': 100000001,
+    'is_bot': True,
+    'first_name': 'MockTradingBot',
+    'username': 'mock_trading_bot',
+    'can_join_groups': True,
+    'can_read_all_group_messages': False,
+    'supports_inline_queries': False,
+}
+
+
+class MockTelegram:
+    """Состояние заглушки Telegram Bot API"""
+
+    def __init__(self, latency_ms: float = None):
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv('MOCK_TELEGRAM_LATENCY_MS', '30'))
+        self.calls = Counter()
+        self.messages = []
+        self.error_messages = 0
+        self._message_id = 0
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict:
+        if request.content_type == 'application/json':
+            return await request.json()
+        if request.method == 'POST':
+            return dict(await request.post())
+        return dict(request.query)
+
+    def _message(self, params: dict, message_id: int = None) -> dict:
+        if message_id is None:
+            self._message_id += 1
+            message_id = self._message_id
+
+        chat_id = int(params.get('chat_id', 0) or 0)
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            'text': params.get('text', ''),
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.calls[method] += 1
+        params = await self._params(request)
+
+        if self.latency_ms > 0:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency_ms / 1000)
+
+        # Ошибки бот показывает пользователю сообщениями с "❌"
+        if str(params.get('text', '')).startswith('❌'):
+            self.error_messages += 1
+
+        if method == 'getMe':
+            result = BOT_USER
+        elif method == 'sendMessage':
+            result = self._message(params)
+            self.messages.append(result)
+        elif method == 'editMessageText':
+            result = self._message(params, int(params.get('message_id', 0) or 0))
+        elif method == 'getUpdates':
+            # Long polling: держим соединение как настоящий API, но без апдейтов
+            await asyncio.sleep(min(float(params.get('timeout', 0) or 0), 1.0))
+            result = []
+        elif method == 'getMyCommands':
+            result = []
+        elif method == 'getWebhookInfo':
+            result = {'url': '', 'has_custom_certificate': False, 'pending_update_count': 0}
+        else:
+            # answerCallbackQuery, deleteWebhook, setMyCommands, close, ...
+            result = True
+
+        return web.Response(
+            text=json.dumps({'ok': True, 'result': result}, ensure_ascii=False),
+            content_type='application/json'
+        )
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self.handle)
+        return app
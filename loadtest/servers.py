@@ -0,0 +1,162 @@
+# loadtest/servers.py
+"""
+Запуск всех mock серверов
+
+- Bybit     MOCK_BYBIT_PORT    (8801) -> BYBIT_API_URL=http://host:8801
+- OpenAI    MOCK_OPENAI_PORT   (8802) -> OPENAI_BASE_URL=http://host:8802/v1
+- Telegram  MOCK_TELEGRAM_PORT (8803) -> TELEGRAM_API_BASE_URL=http://host:8803
+- Webhooks  MOCK_WEBHOOK_PORT  (8804) -> SIGNAL_WEBHOOKS=http://host:8804/signal
+
+Серверы работают в отдельном потоке со своим event loop: часть кода бота
+делает блокирующие HTTP запросы, и общий loop с ними бы заблокировался.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from loadtest.mock_bybit import MockBybit
+from loadtest.mock_openai import MockOpenAI
+from loadtest.mock_telegram import MockTelegram
+
+
+class WebhookSink:
+    """Приемник webhooks сигналов: принимает все и считает события"""
+
+    def __init__(self):
+        self.requests = 0
+        self.events = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.read()
+
+        if request.content_type == 'application/json':
+            # Пакет: {"batch": [...], "count": N}, одиночное событие - просто объект
+            self.events += json.loads(body).get('count', 1)
+        elif request.content_type == 'application/x-ndjson':
+            self.events += body.count(b'\n') + 1
+        else:
+            self.events += 1
+
+        return web.json_response({'ok': True})
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024 ** 2)
+        app.router.add_post('/{tail:.*}', self.handle)
+        return app
+
+
+class MockServers:
+    """Все mock серверы в фоновом потоке"""
+
+    def __init__(self, host: str = '127.0.0.1', bybit: MockBybit = None, openai: MockOpenAI = None,
+                 telegram: MockTelegram = None):
+        self.host = host
+        self.bybit = bybit or MockBybit()
+        self.openai = openai or MockOpenAI()
+        self.telegram = telegram or MockTelegram()
+        self.webhooks = WebhookSink()
+        self.ports = {
+            'bybit': int(os.getenv('MOCK_BYBIT_PORT', '8801')),
+            'openai': int(os.getenv('MOCK_OPENAI_PORT', '8802')),
+            'telegram': int(os.getenv('MOCK_TELEGRAM_PORT', '8803')),
+            'webhook': int(os.getenv('MOCK_WEBHOOK_PORT', '8804')),
+        }
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runners = []
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def env(self) -> Dict[str, str]:
+        """Переменные окружения, направляющие бота на mock серверы"""
+        base = f"http://{self.host}"
+        return {
+            'BYBIT_API_URL': f"{base}:{self.ports['bybit']}",
+            'OPENAI_BASE_URL': f"{base}:{self.ports['openai']}/v1",
+            'TELEGRAM_API_BASE_URL': f"{base}:{self.ports['telegram']}",
+            'SIGNAL_WEBHOOKS': f"{base}:{self.ports['webhook']}/signal",
+        }
+
+    async def _start_site(self, app: web.Application, port: int):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.host, port).start()
+        self._runners.append(runner)
+
+    async def _start_all(self):
+        await self._start_site(self.bybit.app(), self.ports['bybit'])
+        await self._start_site(self.openai.app(), self.ports['openai'])
+        await self._start_site(self.telegram.app(), self.ports['telegram'])
+        await self._start_site(self.webhooks.app(), self.ports['webhook'])
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._start_all())
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            return
+
+        self._ready.set()
+        self._loop.run_forever()
+
+        for runner in self._runners:
+            self._loop.run_until_complete(runner.cleanup())
+        self._loop.close()
+
+    def start(self) -> 'MockServers':
+        self._thread = threading.Thread(target=self._run, daemon=True, name="MockServers")
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise RuntimeError(f"Не удалось запустить mock серверы: {self._error}")
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'bybit_requests': self.bybit.requests,
+            'openai_requests': self.openai.requests,
+            'openai_rate_limited': self.openai.rate_limited,
+            'telegram_calls': dict(self.telegram.calls),
+            'telegram_error_messages': self.telegram.error_messages,
+            'webhook_requests': self.webhooks.requests,
+            'webhook_events': self.webhooks.events,
+        }
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    host = os.getenv('MOCK_HOST', '127.0.0.1')
+    servers = MockServers(host=host).start()
+
+    print("🧪 Mock серверы запущены:")
+    for name, value in servers.env.items():
+        print(f"  {name}={value}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("🛑 Остановка mock серверов")
+    finally:
+        servers.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
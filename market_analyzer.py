@@ -7,6 +7,49 @@ from datetime import datetime
 import logging
 import traceback
 import os
+import weakref
+
+from ai_analysis.prompt_templates import MARKET_SYSTEM_PROMPT, build_market_prompt, build_messages
+from utils.concurrency import run_cpu
+from utils.config_manager import DEFAULT_BYBIT_API_URL, get_config
+from utils.metrics import span, timed
+
+# Клиенты OpenAI по event loop и ключу: создание клиента (SSL контекст, пул
+# httpx) стоит десятки мс CPU, а пул соединений полезно переиспользовать
+_openai_clients: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+_unsubscribe_config = None
+
+
+def _create_openai_client(api_key: str):
+    import openai
+    return openai.AsyncOpenAI(api_key=api_key)
+
+
+def _drop_stale_openai_clients(old, new, changes):
+    """Подписчик конфигурации: после смены OPENAI_API_KEY закрывает клиентов со старым ключом"""
+    if 'ai.openai_api_key' not in changes:
+        return
+    
+    for loop, clients in list(_openai_clients.items()):
+        for api_key in [key for key in clients if key != new.ai.openai_api_key]:
+            client = clients.pop(api_key, None)
+            if client is not None and not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(client.close(), loop)
+    logging.info("🔑 OPENAI_API_KEY изменен, клиенты OpenAI со старым ключом закрыты")
+
+
+async def get_openai_client(api_key: str):
+    """Общий AsyncOpenAI для текущего event loop (первый создается в пуле CPU-работы)"""
+    global _unsubscribe_config
+    if _unsubscribe_config is None:
+        _unsubscribe_config = get_config().subscribe(_drop_stale_openai_clients)
+    
+    clients = _openai_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        client = clients.setdefault(api_key, await run_cpu(_create_openai_client, api_key))
+    return client
+
 
 class MarketAnalyzer:
     """
@@ -16,6 +59,9 @@ class MarketAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
+        # Базовый URL Bybit API (для локальных стендов - адрес mock сервера)
+        self.bybit_api_url = os.getenv('BYBIT_API_URL', DEFAULT_BYBIT_API_URL).rstrip('/')
+        
         # Список активных стратегий
         self.strategies = [
             {'name': 'ActiveScalper', 'timeframe': '5m'},
@@ -25,6 +71,7 @@ class MarketAnalyzer:
         
         self.logger.info("🏗️ MarketAnalyzer инициализирован (с официальной OpenAI библиотекой)")
 
+    @timed('market_analysis_seconds')
     async def analyze_all_strategies(self) -> Dict[str, Any]:
         """ИСПРАВЛЕНО: анализ с официальной OpenAI библиотекой"""
         try:
@@ -32,7 +79,8 @@ class MarketAnalyzer:
             
             # 1. Получаем данные с биржи
             self.logger.info("📊 ШАГ 1: Получение данных с Bybit")
-            current_data = await self._get_current_market_data_safe()
+            with span('market_analysis_step_seconds', step='bybit'):
+                current_data = await self._get_current_market_data_safe()
             
             if not current_data or current_data.get('price', 0) == 0:
                 raise Exception("Не удалось получить корректные данные с биржи Bybit")
@@ -41,17 +89,15 @@ class MarketAnalyzer:
             
             # 2. Анализируем каждую стратегию
             self.logger.info("🎯 ШАГ 2: Анализ стратегий")
-            strategy_analyses = []
             
-            for strategy in self.strategies:
-                self.logger.info(f"  Анализируем {strategy['name']}...")
-                analysis = self._analyze_strategy_sync(strategy, current_data)
-                strategy_analyses.append(analysis)
-                self.logger.info(f"  ✅ {strategy['name']}: {analysis['signal']} ({analysis['confidence']}%)")
+            with span('market_analysis_step_seconds', step='strategies'):
+                # NumPy расчеты - в пуле, event loop бота обслуживает других пользователей
+                strategy_analyses = await run_cpu(self._analyze_strategies_sync, current_data)
             
             # 3. ИИ анализ (ИСПРАВЛЕНО: с официальной OpenAI библиотекой!)
             self.logger.info("🧠 ШАГ 3: Запуск ИИ анализа (OpenAI)")
-            overall_analysis = await self._get_ai_market_overview_strict(strategy_analyses, current_data)
+            with span('market_analysis_step_seconds', step='openai'):
+                overall_analysis = await self._get_ai_market_overview_strict(strategy_analyses, current_data)
             
             if not overall_analysis or 'error' in overall_analysis:
                 error_msg = overall_analysis.get('error', 'Неизвестная ошибка ИИ анализа') if overall_analysis else 'ИИ анализ вернул пустой результат'
@@ -84,8 +130,10 @@ class MarketAnalyzer:
         try:
             self.logger.info("🌐 Подключаюсь к Bybit API...")
             
-            response = requests.get(
-                'https://api-testnet.bybit.com/v5/market/kline',
+            # requests блокирующий - запрос в отдельном потоке, event loop бота не ждет
+            response = await asyncio.to_thread(
+                requests.get,
+                f'{self.bybit_api_url}/v5/market/kline',
                 params={
                     'category': 'linear',
                     'symbol': 'BTCUSDT',
@@ -156,6 +204,16 @@ class MarketAnalyzer:
             self.logger.error(f"❌ Ошибка получения данных с Bybit: {e}")
             raise Exception(f"Не удалось получить данные с Bybit: {e}")
 
+    def _analyze_strategies_sync(self, market_data: Dict) -> List[Dict[str, Any]]:
+        """Анализ всех стратегий (выполняется в пуле CPU-работы)"""
+        strategy_analyses = []
+        for strategy in self.strategies:
+            self.logger.info(f"  Анализируем {strategy['name']}...")
+            analysis = self._analyze_strategy_sync(strategy, market_data)
+            strategy_analyses.append(analysis)
+            self.logger.info(f"  ✅ {strategy['name']}: {analysis['signal']} ({analysis['confidence']}%)")
+        return strategy_analyses
+
     def _analyze_strategy_sync(self, strategy: Dict, market_data: Dict) -> Dict[str, Any]:
         """Анализирует рынок с точки зрения конкретной стратегии"""
         
@@ -233,10 +291,7 @@ class MarketAnalyzer:
             self.logger.info(f"🔑 OpenAI ключ найден (длина: {len(openai_key)})")
             
             # ИСПРАВЛЕНИЕ: Используем официальную OpenAI библиотеку вместо aiohttp
-            import openai
-            
-            # Создаем асинхронного клиента
-            client = openai.AsyncOpenAI(api_key=openai_key)
+            client = await get_openai_client(openai_key)
             
             prompt = self._build_market_analysis_prompt(strategy_analyses, market_data)
             self.logger.info(f"📝 Промпт подготовлен (длина: {len(prompt)} символов)")
@@ -247,16 +302,7 @@ class MarketAnalyzer:
             # Делаем запрос через официальную библиотеку
             response = await client.chat.completions.create(
                 model=model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": self._get_market_analysis_system_prompt()
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=build_messages(MARKET_SYSTEM_PROMPT, prompt),
                 temperature=0.3,
                 max_tokens=1500
             )
@@ -294,53 +340,11 @@ class MarketAnalyzer:
 
     def _build_market_analysis_prompt(self, strategy_analyses: List, market_data: Dict) -> str:
         """Строит промпт для ИИ анализа"""
-        price = market_data.get('price', 0)
-        change_24h = market_data.get('change_24h', 0)
-        volume_24h = market_data.get('volume_24h', 0)
-        
-        prompt = f"""АНАЛИЗ РЫНКА BTC:
-
-=== ТЕКУЩИЕ ДАННЫЕ ===
-Цена: ${price:,.2f}
-Изменение 24ч: {change_24h:+.2f}%
-Объем 24ч: {volume_24h:,.0f}
-Источник данных: Bybit Testnet API
-
-=== АНАЛИЗ ПО СТРАТЕГИЯМ ==="""
-
-        for analysis in strategy_analyses:
-            prompt += f"""
-
-{analysis['strategy']} ({analysis['timeframe']}):
-- Сигнал: {analysis['signal']}
-- Уверенность: {analysis['confidence']}%"""
-
-        prompt += f"""
-
-ЗАДАЧА: Проанализируй общее состояние рынка BTC на основе этих данных.
-
-ВАЖНО: Ответь СТРОГО в формате JSON. Не добавляй никаких комментариев вне JSON.
-"""
-        
-        return prompt
+        return build_market_prompt(strategy_analyses, market_data)
 
     def _get_market_analysis_system_prompt(self) -> str:
-        """Системный промпт для анализа рынка"""
-        return """Ты - эксперт по анализу криптовалютных рынков.
-
-ЗАДАЧА: Проанализировать рынок BTC на основе данных от торговых стратегий.
-
-ФОРМАТ ОТВЕТА (строго JSON):
-{
-    "market_phase": "BULLISH|BEARISH|NEUTRAL|VOLATILE",
-    "confidence": 0-100,
-    "key_insights": ["инсайт1", "инсайт2", "инсайт3"],
-    "recommendations": ["рекомендация1", "рекомендация2", "рекомендация3"],
-    "risk_level": "LOW|MEDIUM|HIGH",
-    "summary": "краткая сводка в 2-3 предложения"
-}
-
-НЕ добавляй никакой текст вне JSON. Отвечай только валидным JSON."""
+        """Системный промпт для анализа рынка (константа - кэшируется провайдером)"""
+        return MARKET_SYSTEM_PROMPT
 
     def _parse_ai_response_strict(self, response_text: str) -> Dict[str, Any]:
         """Строгий парсинг без fallback'ов"""
@@ -0,0 +1,316 @@
+# market_scanner.py
+"""
+Сканер рынка по множеству символов Bybit (linear)
+
+MarketAnalyzer смотрит только на BTCUSDT. Сканер берет вселенную
+символов из /v5/market/instruments-info (пагинация по cursor), качает
+свечи параллельно через общий aiohttp пул (не больше SCANNER_CONCURRENCY
+запросов одновременно) и считает эвристики стратегий MarketAnalyzer
+(_get_scalper_signal, _get_balanced_signal, _get_quality_signal) сразу для
+всех символов - над 2D массивами numpy, без цикла по символам.
+
+Результат - список возможностей, отсортированный по силе согласованного
+сигнала стратегий. QualityTrader считается как в MarketAnalyzer, но в
+оценку и фазу не входит: его пороги (объем > 800000, цена > 43000) заданы
+в единицах BTCUSDT и для других символов ничего не значат.
+
+Настройки:
+- SCANNER_SYMBOLS       - явный список через запятую (без запроса инструментов)
+- SCANNER_MAX_SYMBOLS   - размер вселенной (по умолчанию 200)
+- SCANNER_CONCURRENCY   - одновременных запросов свечей (по умолчанию 20)
+- SCANNER_INTERVAL      - интервал свечей Bybit (по умолчанию 5)
+- SCANNER_TOP           - сколько возможностей показывать (по умолчанию 10)
+
+    python -m market_scanner
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+from utils.concurrency import run_cpu
+from utils.config_manager import DEFAULT_BYBIT_API_URL
+from utils.metrics import inc, timed
+
+# Колонки как в MarketAnalyzer: timestamp, open, high, low, close, volume
+CLOSE = 4
+VOLUME = 5
+
+# Сколько последних свечей идет в расчет (MarketAnalyzer берет candles[:20])
+SCAN_BARS = 20
+KLINE_LIMIT = 50
+
+# Те же стратегии, что и в MarketAnalyzer.strategies. scored - входит ли
+# стратегия в оценку: у QualityTrader абсолютные пороги BTCUSDT
+STRATEGIES = (
+    {'name': 'ActiveScalper', 'timeframe': '5m', 'scored': True},
+    {'name': 'BalancedTrader', 'timeframe': '15m', 'scored': True},
+    {'name': 'QualityTrader', 'timeframe': '1h', 'scored': False},
+)
+SCORED = np.array([strategy['scored'] for strategy in STRATEGIES])
+
+
+def strategy_signals(prices: np.ndarray, candles: np.ndarray, change_24h: np.ndarray,
+                     volume_24h: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Векторные версии эвристик MarketAnalyzer._analyze_strategy_sync
+
+    candles - массив (символы, SCAN_BARS, 6), новые свечи сначала.
+    Возвращает сигналы и уверенность формы (символы, стратегии).
+    """
+    # ActiveScalper: цена против среднего close последних 5 строк
+    avg_price = candles[:, -5:, CLOSE].mean(axis=1)
+    scalper = np.select(
+        [prices > avg_price * 1.002, prices < avg_price * 0.998],
+        ['BUY', 'SELL'], default='NEUTRAL'
+    )
+    scalper_confidence = np.where(scalper == 'BUY', 75, 60)
+
+    # BalancedTrader: изменение за период
+    balanced = np.select([change_24h > 2, change_24h < -2], ['BUY', 'SELL'], default='HOLD')
+    balanced_confidence = np.where(np.abs(change_24h) < 3, 70, 50)
+
+    # QualityTrader: объем
+    quality = np.select(
+        [(volume_24h > 800000) & (prices > 43000), volume_24h > 800000, volume_24h < 300000],
+        ['STRONG_BUY', 'BUY', 'NEUTRAL'], default='HOLD'
+    )
+    quality_confidence = np.where(volume_24h > 500000, 80, 40)
+
+    signals = np.stack([scalper, balanced, quality], axis=1).astype(object)
+    confidence = np.stack([scalper_confidence, balanced_confidence, quality_confidence], axis=1)
+    return signals, confidence
+
+
+def rank_opportunities(signals: np.ndarray, confidence: np.ndarray, change_24h: np.ndarray,
+                       scored: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Оценка и порядок символов
+
+    score = сумма(направление * уверенность) / (100 * число стратегий), в
+    [-1, 1]: BUY-сигналы дают +1, SELL - -1. Учитываются только колонки
+    scored (по умолчанию все). Сортировка по |score|, при равенстве - по
+    |изменению за период|.
+    """
+    if scored is not None:
+        signals, confidence = signals[:, scored], confidence[:, scored]
+
+    is_buy = np.char.find(signals.astype(str), 'BUY') >= 0
+    is_sell = np.char.find(signals.astype(str), 'SELL') >= 0
+    direction = is_buy.astype(int) - is_sell.astype(int)
+
+    score = (direction * confidence).sum(axis=1) / (100.0 * signals.shape[1])
+
+    # Фаза как в MarketAnalyzer._determine_market_phase
+    buy_count, sell_count = is_buy.sum(axis=1), is_sell.sum(axis=1)
+    phase = np.select([buy_count > sell_count + 1, sell_count > buy_count + 1],
+                      ['BULLISH', 'BEARISH'], default='NEUTRAL')
+
+    order = np.lexsort((-np.abs(change_24h), -np.abs(score)))
+    return order, score, phase
+
+
+class MarketScanner:
+    """
+    Сканер возможностей по вселенной символов Bybit
+    """
+
+    def __init__(self, symbols: Optional[List[str]] = None):
+        self.logger = logging.getLogger(__name__)
+
+        self.bybit_api_url = os.getenv('BYBIT_API_URL', DEFAULT_BYBIT_API_URL).rstrip('/')
+        self.max_symbols = int(os.getenv('SCANNER_MAX_SYMBOLS', '200'))
+        self.concurrency = max(1, int(os.getenv('SCANNER_CONCURRENCY', '20')))
+        self.interval = os.getenv('SCANNER_INTERVAL', '5')
+        self.top = int(os.getenv('SCANNER_TOP', '10'))
+        self.timeout = aiohttp.ClientTimeout(total=float(os.getenv('SCANNER_TIMEOUT', '15')))
+
+        configured = os.getenv('SCANNER_SYMBOLS', '')
+        self.symbols = symbols or [s.strip().upper() for s in configured.split(',') if s.strip()] or None
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.logger.info(f"🔭 MarketScanner инициализирован (до {self.max_symbols} символов, "
+                         f"{self.concurrency} параллельно)")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """Закрывает пул соединений"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Общая сессия с пулом на concurrency соединений (пересоздается для другого loop)"""
+        loop = asyncio.get_running_loop()
+
+        if self.session is None or self.session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={'User-Agent': 'AI-Trading-Bot/1.0'}
+            )
+            self._session_loop = loop
+
+        return self.session
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._get_session().get(f'{self.bybit_api_url}{path}', params=params) as response:
+            if response.status != 200:
+                raise Exception(f"Bybit API вернул статус {response.status}")
+            data = await response.json(content_type=None)
+
+        if data.get('retCode') != 0:
+            raise Exception(f"Ошибка Bybit API: {data.get('retMsg')} (код: {data.get('retCode')})")
+        return data['result']
+
+    async def fetch_universe(self) -> List[str]:
+        """Торгуемые USDT perpetual символы (или SCANNER_SYMBOLS)"""
+        if self.symbols:
+            return self.symbols[:self.max_symbols]
+
+        symbols: List[str] = []
+        cursor = ''
+
+        while len(symbols) < self.max_symbols:
+            params = {'category': 'linear', 'limit': 1000}
+            if cursor:
+                params['cursor'] = cursor
+            result = await self._get('/v5/market/instruments-info', params)
+
+            for instrument in result.get('list', []):
+                if (instrument.get('status') == 'Trading'
+                        and instrument.get('quoteCoin') == 'USDT'
+                        and instrument.get('contractType') == 'LinearPerpetual'):
+                    symbols.append(instrument['symbol'])
+
+            cursor = result.get('nextPageCursor') or ''
+            if not cursor:
+                break
+
+        self.logger.info(f"📋 Вселенная сканера: {len(symbols[:self.max_symbols])} символов")
+        return symbols[:self.max_symbols]
+
+    async def _fetch_candles(self, semaphore: asyncio.Semaphore, symbol: str) -> np.ndarray:
+        """Последние SCAN_BARS свечей символа, новые сначала"""
+        async with semaphore:
+            result = await self._get('/v5/market/kline', {
+                'category': 'linear',
+                'symbol': symbol,
+                'interval': self.interval,
+                'limit': KLINE_LIMIT,
+            })
+
+        rows = result.get('list') or []
+        if len(rows) < SCAN_BARS:
+            raise ValueError(f"мало свечей: {len(rows)} из {SCAN_BARS}")
+
+        return np.array([row[:6] for row in rows[:SCAN_BARS]], dtype=float)
+
+    @timed('market_scan_seconds')
+    async def scan(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """Сканирует вселенную и возвращает ранжированные возможности"""
+        started = time.perf_counter()
+        symbols = await self.fetch_universe()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        fetched = await asyncio.gather(
+            *(self._fetch_candles(semaphore, symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+
+        scanned, stacked, failed = [], [], {}
+        for symbol, candles in zip(symbols, fetched):
+            if isinstance(candles, BaseException):
+                failed[symbol] = str(candles)
+            else:
+                scanned.append(symbol)
+                stacked.append(candles)
+
+        if failed:
+            inc('market_scan_failed_total', len(failed))
+            self.logger.warning(f"⚠️ Не удалось получить свечи для {len(failed)} символов")
+
+        # Расчет по всей вселенной - в пуле, event loop бота остается свободным
+        opportunities = await run_cpu(self.evaluate, scanned, np.stack(stacked)) if stacked else []
+        elapsed = time.perf_counter() - started
+
+        self.logger.info(f"✅ Сканирование: {len(scanned)}/{len(symbols)} символов за {elapsed:.2f}с")
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'interval': self.interval,
+            'universe': len(symbols),
+            'scanned': len(scanned),
+            'failed': failed,
+            'elapsed_s': elapsed,
+            'opportunities': opportunities[:top or self.top],
+        }
+
+    def evaluate(self, symbols: List[str], candles: np.ndarray) -> List[Dict[str, Any]]:
+        """Сигналы стратегий и ранжирование для массива свечей (символы, SCAN_BARS, 6)"""
+        closes = candles[:, :, CLOSE]
+        prices = closes[:, 0]
+        # Как в MarketAnalyzer: изменение против 11-й с конца свечи, объем - сумма за SCAN_BARS
+        change_24h = (prices - closes[:, 10]) / closes[:, 10] * 100
+        volume_24h = candles[:, :, VOLUME].sum(axis=1)
+
+        signals, confidence = strategy_signals(prices, candles, change_24h, volume_24h)
+        order, score, phase = rank_opportunities(signals, confidence, change_24h, SCORED)
+
+        opportunities = []
+        for i in order:
+            opportunities.append({
+                'symbol': symbols[i],
+                'price': float(prices[i]),
+                'change_24h': float(change_24h[i]),
+                'volume_24h': float(volume_24h[i]),
+                'score': float(score[i]),
+                'direction': 'LONG' if score[i] > 0 else 'SHORT' if score[i] < 0 else 'NEUTRAL',
+                'market_phase': str(phase[i]),
+                'strategy_analyses': [
+                    {
+                        'strategy': strategy['name'],
+                        'timeframe': strategy['timeframe'],
+                        'signal': signals[i, j],
+                        'confidence': int(confidence[i, j]),
+                        'scored': strategy['scored'],
+                    }
+                    for j, strategy in enumerate(STRATEGIES)
+                ],
+            })
+        return opportunities
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    async def run():
+        async with MarketScanner() as scanner:
+            return await scanner.scan()
+
+    result = asyncio.run(run())
+
+    print(f"\n🔭 {result['scanned']}/{result['universe']} символов за {result['elapsed_s']:.2f}с")
+    for rank, item in enumerate(result['opportunities'], 1):
+        signals = ', '.join(f"{a['strategy']}={a['signal']}" for a in item['strategy_analyses'] if a['scored'])
+        print(f"{rank:>3}. {item['symbol']:<14} {item['direction']:<7} score={item['score']:+.2f} "
+              f"${item['price']:,.4f} ({item['change_24h']:+.2f}%)  {signals}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,21 +5,45 @@
 Включает:
 - Telegram бот для отправки уведомлений
 - Форматтер сообщений
+- Очередь исходящих сообщений с приоритетами и лимитами
+- Webhook сервер для приема апдейтов (альтернатива long polling)
 - Система оповещений о торговых сигналах
-"""
 
-from .telegram_bot import TelegramNotifier
-from .message_formatter import MessageFormatter
+Классы подгружаются лениво (PEP 562): MessageFormatter не тянет за собой
+python-telegram-bot.
+"""
+import importlib
+import logging
 
 __version__ = "1.0.0"
 __author__ = "Trading AI System"
 
-# Экспорт основных классов
-__all__ = [
-    'TelegramNotifier', 
-    'MessageFormatter'
-]
+# Экспорт основных классов: имя -> модуль пакета
+_LAZY_ATTRIBUTES = {
+    'TelegramNotifier': 'telegram_bot',
+    'MessageFormatter': 'message_formatter',
+    'TelegramMessageQueue': 'message_queue',
+    'get_message_queue': 'message_queue',
+    'notify': 'message_queue',
+    'TelegramWebhookServer': 'webhook_server',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 # Логирование инициализации
-import logging
 logging.getLogger(__name__).info("📱 Notifications module loaded")
@@ -3,7 +3,7 @@
 Форматирует сообщения для отправки в Telegram
 """
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 class MessageFormatter:
@@ -338,6 +338,127 @@ class MessageFormatter:
                 message += f"❌ Худшая: <b>${worst_trade:.2f}</b>\n"
         
         return message
+
+    def format_trade_statistics(self, stats: Dict[str, Any]) -> str:
+        """
+        Форматирует накопленную статистику (TradeStatsAggregator.get_summary)
+        """
+        totals = stats.get('totals', {})
+        total_trades = totals.get('trades', 0)
+
+        if total_trades == 0:
+            return (
+                "📊 <b>ТОРГОВАЯ СТАТИСТИКА</b>\n\n"
+                "📭 Закрытых сделок пока нет\n\n"
+                f"⏰ {datetime.now().strftime('%H:%M:%S')}"
+            )
+
+        # Сегодняшняя сводка в общем формате
+        message = self.format_daily_summary(stats.get('today', {}))
+
+        total_pnl = totals.get('total_pnl', 0)
+        pnl_emoji = '💰' if total_pnl >= 0 else '💸'
+
+        message += f"\n📈 <b>ЗА ВСЁ ВРЕМЯ</b>\n"
+        message += f"🎯 Сделок: <b>{total_trades}</b> (винрейт {totals.get('win_rate', 0):.1f}%)\n"
+        message += f"{pnl_emoji} P&L: <b>${total_pnl:.2f}</b>\n"
+        message += f"📊 Средняя сделка: <b>${totals.get('mean', 0):.2f}</b> ± {totals.get('std', 0):.2f}\n"
+        message += f"⚖️ Sharpe (на сделку): <b>{totals.get('sharpe', 0):.2f}</b>\n"
+        message += f"📉 Макс. просадка: <b>${totals.get('max_drawdown', 0):.2f}</b>\n"
+        message += f"🔥 Серии: {totals.get('max_win_streak', 0)} побед / {totals.get('max_loss_streak', 0)} убытков\n"
+
+        strategies = stats.get('strategies', {})
+        if strategies:
+            message += f"\n🎯 <b>ПО СТРАТЕГИЯМ</b>\n"
+            for strategy_name, strategy_stats in strategies.items():
+                strategy_pnl = strategy_stats.get('total_pnl', 0)
+                strategy_emoji = '🟢' if strategy_pnl > 0 else '🔴' if strategy_pnl < 0 else '⚪'
+                message += f"{strategy_emoji} <b>{strategy_name}</b>: "
+                message += f"{strategy_stats.get('trades', 0)} сделок, "
+                message += f"${strategy_pnl:.2f} ({strategy_stats.get('win_rate', 0):.1f}%)\n"
+
+        recent_trades = stats.get('recent_trades', [])
+        if recent_trades:
+            message += f"\n⚡ <b>ПОСЛЕДНИЕ СДЕЛКИ</b>\n"
+            for trade in reversed(recent_trades[-3:]):
+                pnl = trade.get('pnl', 0)
+                message += f"• {trade.get('strategy', '?')} {trade.get('symbol') or ''} → "
+                message += f"{'+' if pnl >= 0 else '-'}${abs(pnl):.2f}\n"
+
+        message += f"\n⏰ {datetime.now().strftime('%H:%M:%S')}"
+
+        if len(message) > self.max_message_length:
+            message = message[:self.max_message_length - 50] + "\n\n<i>... сообщение обрезано</i>"
+
+        return message
+
+    def format_live_strategies(self, states: List[Any]) -> str:
+        """
+        Форматирует живое состояние стратегий (utils.live_state.StrategyState)
+        """
+        if not states:
+            return "📭 Стратегии не публикуют состояние (не запущены)\n"
+        
+        message = ""
+        for state in states:
+            activity = '🟢' if state.is_active else '💤'
+            message += f"{activity} <code>{state.strategy}</code> → {state.symbol} ({state.timeframe})\n"
+            
+            if state.side:
+                pnl_emoji = '💰' if state.unrealized_pnl >= 0 else '💸'
+                message += f"   📍 {state.side_name} {state.qty:g} @ ${state.entry_price:,.2f} "
+                message += f"→ ${state.price:,.2f} | {pnl_emoji} ${state.unrealized_pnl:.2f}\n"
+            else:
+                message += f"   ⚪ Без позиции | 💲 ${state.price:,.2f}\n"
+            
+            message += f"   🎯 Сделок: {state.trades} (за день {state.daily_trades_count}) | "
+            message += f"P&L ${state.realized_pnl:.2f} | убытков подряд {state.consecutive_losses}\n"
+            
+            if state.last_signal:
+                signal_time = datetime.fromtimestamp(state.last_signal_at).strftime('%H:%M')
+                message += f"   📡 {state.last_signal} ${state.last_signal_price:,.2f} в {signal_time}\n"
+            
+            indicators = [
+                f"{name} {value:.2f}" for name, value in state.indicators.items() if name != 'current_price'
+            ]
+            if indicators:
+                message += f"   📊 {', '.join(indicators[:4])}\n"
+        
+        return message
+    
+    def format_trade_history(self, recent_trades: List[Dict[str, Any]], states: List[Any]) -> str:
+        """
+        Форматирует историю сделок (TradeStatsAggregator.recent_trades) и открытые позиции
+        """
+        message = "📋 <b>ИСТОРИЯ СДЕЛОК</b>\n\n"
+        
+        open_positions = [state for state in states if state.side]
+        if open_positions:
+            message += "<b>Открытые позиции:</b>\n"
+            for state in open_positions:
+                pnl_emoji = '💰' if state.unrealized_pnl >= 0 else '💸'
+                message += f"• <b>{state.side_name} {state.symbol}</b> ${state.entry_price:,.2f} → "
+                message += f"${state.price:,.2f} ({pnl_emoji} ${state.unrealized_pnl:.2f}) | 🎯 {state.strategy}\n"
+            message += "\n"
+        
+        if not recent_trades:
+            message += "📭 Закрытых сделок пока нет\n"
+        else:
+            trades = recent_trades[-5:]
+            message += f"<b>Последние {len(trades)} сделок:</b>\n\n"
+            for number, trade in enumerate(reversed(trades), 1):
+                pnl = trade.get('pnl', 0)
+                closed_at = datetime.fromtimestamp(trade.get('timestamp', 0)).strftime('%d.%m %H:%M')
+                exit_price = trade.get('exit_price')
+                
+                message += f"{number}. <b>{trade.get('symbol') or '?'}</b> "
+                message += f"{'+' if pnl >= 0 else '-'}${abs(pnl):.2f}"
+                if exit_price:
+                    message += f" (выход ${exit_price:,.2f})"
+                message += f"\n   ⏰ {closed_at} | 🎯 {trade.get('strategy', '?')}\n"
+        
+        message += f"\n⏰ {datetime.now().strftime('%H:%M:%S')}"
+        return message
     
     def format_error_alert(self, error_data: Dict[str, Any]) -> str:
         """
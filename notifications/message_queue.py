@@ -0,0 +1,467 @@
+# notifications/message_queue.py
+"""
+Очередь исходящих сообщений Telegram
+
+Один долгоживущий Bot в отдельном потоке со своим event loop:
+- приоритеты (критичные торговые алерты идут вне очереди)
+- лимиты Telegram: глобальный и на каждый чат
+- склейка пачек низкоприоритетных сообщений в одно (до 4096 символов):
+  PRIORITY_LOW - статус, обзоры рынка, алерты мониторинга
+- RetryAfter и сетевые ошибки обрабатываются без блокировки отправителя
+- notify(): fire-and-forget через кольцевой буфер, который разбирает
+  этот же поток отправителя
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from telegram import Bot
+from telegram.error import RetryAfter
+
+from utils.loop_monitor import monitor_loop
+from utils.metrics import inc, span
+
+from .notify_buffer import NotifyRingBuffer
+
+
+# Приоритеты сообщений (меньше - важнее)
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+@dataclass(eq=False)
+class QueuedMessage:
+    """Сообщение в очереди отправки"""
+    priority: int
+    seq: int
+    chat_id: str
+    text: str
+    parse_mode: Optional[str]
+    not_before: float = 0.0
+    attempts: int = 0
+    futures: List[concurrent.futures.Future] = field(default_factory=list)
+
+
+class TelegramMessageQueue:
+    """
+    Долгоживущий асинхронный отправитель сообщений Telegram
+
+    submit() потокобезопасен и не ждет сети: сообщение передается
+    в event loop отправителя, результат доступен через Future.
+    """
+
+    def __init__(self, bot_token: Optional[str] = None, default_chat_id: Optional[str] = None,
+                 ring: Optional[NotifyRingBuffer] = None):
+        self.bot_token = bot_token or os.getenv('TELEGRAM_BOT_TOKEN')
+        self.default_chat_id = default_chat_id or os.getenv('TELEGRAM_CHAT_ID')
+
+        if not self.bot_token:
+            raise ValueError("TELEGRAM_BOT_TOKEN должен быть установлен!")
+
+        # Лимиты Telegram: ~30 сообщений/с глобально, ~1 сообщение/с в чат
+        self.global_rate = float(os.getenv('TELEGRAM_GLOBAL_RATE_LIMIT', '30'))
+        self.chat_rate = float(os.getenv('TELEGRAM_CHAT_RATE_LIMIT', '1'))
+        self.coalesce_window = float(os.getenv('TELEGRAM_COALESCE_WINDOW', '2.0'))
+        self.max_message_length = int(os.getenv('TELEGRAM_MAX_MESSAGE_LENGTH', '4096'))
+        self.max_retries = int(os.getenv('TELEGRAM_RETRY_ATTEMPTS', '3'))
+        self.retry_delay = 2
+
+        # Кольцевой буфер notify() опрашивается диспетчером
+        self.ring = ring
+        self.ring_poll_interval = float(os.getenv('TELEGRAM_NOTIFY_POLL_INTERVAL', '0.05'))
+        self._reported_drops = 0
+
+        self.logger = logging.getLogger(__name__)
+
+        self._pending: List[QueuedMessage] = []
+        self._coalesce_targets: Dict[Tuple[str, Optional[str]], QueuedMessage] = {}
+        self._chat_next_send: Dict[str, float] = {}
+        self._global_next_send = 0.0
+        self._seq = itertools.count()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._running = False
+
+        # Счетчики
+        self.sent_count = 0
+        self.failed_count = 0
+        self.coalesced_count = 0
+
+    # === ЖИЗНЕННЫЙ ЦИКЛ ===
+
+    def start(self, wait: bool = True):
+        """Запускает поток отправителя (wait=False - не ждать готовности его event loop)"""
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run_thread, daemon=True, name="TelegramSender")
+        self._thread.start()
+        if wait:
+            self._started.wait(timeout=5)
+
+        self.logger.info("📤 Очередь сообщений Telegram запущена")
+
+    def stop(self, timeout: float = 10.0):
+        """Останавливает отправителя, дождавшись отправки очереди"""
+        if not self._running:
+            return
+        self._started.wait(timeout=5)
+        if not self._loop:
+            return
+
+        self._running = False
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass
+
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+        self.logger.info("🛑 Очередь сообщений Telegram остановлена")
+
+    def _run_thread(self):
+        """Точка входа потока отправителя"""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._wakeup = asyncio.Event()
+        self._started.set()
+        monitor = monitor_loop('telegram_sender', self._loop)
+
+        try:
+            self._loop.run_until_complete(self._dispatch_loop())
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка потока отправки Telegram: {e}")
+        finally:
+            if monitor is not None:
+                monitor.stop()
+            self._loop.close()
+
+    # === ПОСТАНОВКА В ОЧЕРЕДЬ ===
+
+    def submit(self, text: str, chat_id: Optional[str] = None, parse_mode: Optional[str] = 'HTML',
+               priority: int = PRIORITY_NORMAL) -> concurrent.futures.Future:
+        """
+        Ставит сообщение в очередь (потокобезопасно, без ожидания сети)
+
+        Returns:
+            Future с результатом доставки (True/False)
+        """
+        if not self._running:
+            self.start()
+        if not self._started.is_set():
+            # Очередь запущена из notify() без ожидания - loop нужен здесь
+            self._started.wait(timeout=5)
+
+        future = concurrent.futures.Future()
+        chat_id = str(chat_id or self.default_chat_id)
+
+        self._loop.call_soon_threadsafe(self._enqueue, chat_id, text, parse_mode, priority, future)
+        return future
+
+    async def send(self, text: str, chat_id: Optional[str] = None, parse_mode: Optional[str] = 'HTML',
+                   priority: int = PRIORITY_NORMAL) -> bool:
+        """Ставит сообщение в очередь и дожидается доставки"""
+        return await asyncio.wrap_future(self.submit(text, chat_id, parse_mode, priority))
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _enqueue(self, chat_id: str, text: str, parse_mode: Optional[str], priority: int,
+                 future: Optional[concurrent.futures.Future] = None):
+        """Добавляет сообщение (выполняется в потоке отправителя)"""
+        now = time.monotonic()
+
+        if priority >= PRIORITY_LOW:
+            key = (chat_id, parse_mode)
+            target = self._coalesce_targets.get(key)
+
+            # Склеиваем с ожидающим низкоприоритетным сообщением того же чата
+            if target is not None and \
+                    len(target.text) + len(text) + 2 <= self.max_message_length:
+                target.text = f"{target.text}\n\n{text}"
+                if future is not None:
+                    target.futures.append(future)
+                self.coalesced_count += 1
+                return
+
+        for chunk in self._split_text(text):
+            message = QueuedMessage(
+                priority=priority,
+                seq=next(self._seq),
+                chat_id=chat_id,
+                text=chunk,
+                parse_mode=parse_mode,
+                not_before=now + self.coalesce_window if priority >= PRIORITY_LOW else 0.0
+            )
+            self._pending.append(message)
+
+        # Future отмечаем на последнем фрагменте
+        if future is not None:
+            message.futures.append(future)
+
+        if priority >= PRIORITY_LOW:
+            self._coalesce_targets[(chat_id, parse_mode)] = message
+
+        self._wakeup.set()
+
+    def _split_text(self, text: str) -> List[str]:
+        """Делит текст на части по лимиту Telegram (по границам строк)"""
+        if len(text) <= self.max_message_length:
+            return [text]
+
+        chunks = []
+        current = ""
+        for line in text.split('\n'):
+            while len(line) > self.max_message_length:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(line[:self.max_message_length])
+                line = line[self.max_message_length:]
+
+            if current and len(current) + len(line) + 1 > self.max_message_length:
+                chunks.append(current)
+                current = line
+            else:
+                current = f"{current}\n{line}" if current else line
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    # === ДИСПЕТЧЕР ===
+
+    def _pick_next(self, now: float) -> Tuple[Optional[QueuedMessage], float]:
+        """Выбирает готовое сообщение с наивысшим приоритетом или время ожидания"""
+        best = None
+        wait = None
+
+        for message in self._pending:
+            ready_at = max(message.not_before, self._chat_next_send.get(message.chat_id, 0.0))
+            if ready_at <= now:
+                if best is None or (message.priority, message.seq) < (best.priority, best.seq):
+                    best = message
+            elif wait is None or ready_at - now < wait:
+                wait = ready_at - now
+
+        if best is not None and self._global_next_send > now:
+            return None, self._global_next_send - now
+
+        return best, wait if wait is not None else 1.0
+
+    def _drain_ring(self):
+        """Переносит уведомления из кольцевого буфера в очередь"""
+        for chat_id, text, parse_mode, priority in self.ring.pop_batch():
+            self._enqueue(chat_id or str(self.default_chat_id), text, parse_mode, priority)
+
+        dropped = self.ring.dropped
+        if dropped > self._reported_drops:
+            self.logger.warning(f"⚠️ Буфер уведомлений переполнен, отброшено: {dropped - self._reported_drops}")
+            self._reported_drops = dropped
+
+    async def _dispatch_loop(self):
+        """Основной цикл отправки"""
+        bot = Bot(self.bot_token, base_url=telegram_base_url())
+        await bot.initialize()
+
+        try:
+            while self._running or self._pending or (self.ring is not None and len(self.ring)):
+                if self.ring is not None:
+                    self._drain_ring()
+
+                now = time.monotonic()
+                message, wait = self._pick_next(now)
+
+                if message is None:
+                    if self.ring is not None:
+                        wait = min(wait, self.ring_poll_interval)
+
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+
+                    # При остановке отправляем отложенные сообщения без ожидания склейки
+                    if not self._running:
+                        for pending in self._pending:
+                            pending.not_before = 0.0
+                    continue
+
+                self._pending.remove(message)
+                if self._coalesce_targets.get((message.chat_id, message.parse_mode)) is message:
+                    del self._coalesce_targets[(message.chat_id, message.parse_mode)]
+
+                await self._deliver(bot, message)
+
+        finally:
+            # Все, что не успели отправить, отмечаем как неудачу
+            for message in self._pending:
+                self._resolve(message, False)
+            self._pending.clear()
+
+            try:
+                await bot.shutdown()
+            except Exception:
+                pass
+
+    async def _deliver(self, bot: Bot, message: QueuedMessage):
+        """Отправляет одно сообщение с учетом лимитов"""
+        now = time.monotonic()
+        self._global_next_send = now + 1.0 / self.global_rate
+        self._chat_next_send[message.chat_id] = now + 1.0 / self.chat_rate
+
+        try:
+            with span('telegram_api_seconds'):
+                await bot.send_message(
+                    chat_id=message.chat_id,
+                    text=message.text,
+                    parse_mode=message.parse_mode
+                )
+            self.sent_count += 1
+            self._resolve(message, True)
+
+            if message.attempts > 0:
+                self.logger.info(f"✅ Сообщение отправлено с попытки {message.attempts + 1}")
+
+        except RetryAfter as e:
+            # Telegram просит подождать - откладываем только этот чат
+            retry_after = e.retry_after
+            wait_time = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+            self.logger.warning(f"⏰ Rate limit, чат {message.chat_id} ждет {wait_time}с")
+            self._chat_next_send[message.chat_id] = time.monotonic() + wait_time
+            self._retry(message, delay=0)
+
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка отправки сообщения (попытка {message.attempts + 1}): {e}")
+            self._retry(message, delay=self.retry_delay * (message.attempts + 1))
+
+    def _retry(self, message: QueuedMessage, delay: float):
+        """Возвращает сообщение в очередь или фиксирует неудачу"""
+        message.attempts += 1
+
+        if message.attempts >= self.max_retries:
+            self.failed_count += 1
+            inc('telegram_messages_failed_total')
+            self.logger.error(f"❌ Не удалось отправить сообщение после {self.max_retries} попыток")
+            self._resolve(message, False)
+            return
+
+        message.not_before = time.monotonic() + delay
+        self._pending.append(message)
+
+    @staticmethod
+    def _resolve(message: QueuedMessage, success: bool):
+        for future in message.futures:
+            if not future.done():
+                future.set_result(success)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Ждет, пока буфер и очередь опустеют"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._pending and (self.ring is None or not len(self.ring)):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def get_stats(self) -> Dict[str, int]:
+        """Возвращает счетчики очереди"""
+        stats = {
+            'pending': self.pending_count,
+            'sent': self.sent_count,
+            'failed': self.failed_count,
+            'coalesced': self.coalesced_count,
+        }
+        if self.ring is not None:
+            stats.update({f"buffer_{key}": value for key, value in self.ring.get_stats().items()})
+        return stats
+
+
+# === ГЛОБАЛЬНЫЙ ЭКЗЕМПЛЯР ===
+
+_global_queue: Optional[TelegramMessageQueue] = None
+_global_queue_lock = threading.Lock()
+
+
+def telegram_base_url() -> str:
+    """Базовый URL Bot API (TELEGRAM_API_BASE_URL - для локальных стендов и нагрузочных тестов)"""
+    return os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org').rstrip('/') + '/bot'
+
+
+# Буфер notify() существует с момента импорта, чтобы запись в него была дешевой
+_notify_buffer = NotifyRingBuffer(int(os.getenv('TELEGRAM_NOTIFY_BUFFER_SIZE', '1000')))
+
+
+def get_message_queue(bot_token: Optional[str] = None, wait: bool = True) -> TelegramMessageQueue:
+    """
+    Возвращает глобальную очередь сообщений (запускается при первом вызове)
+
+    wait=False - не ждать, пока поток отправителя поднимет event loop
+    (для notify(): буфер опрашивается диспетчером, loop ему не нужен).
+    """
+    global _global_queue
+
+    if _global_queue is None:
+        with _global_queue_lock:
+            if _global_queue is None:
+                queue = TelegramMessageQueue(bot_token, ring=_notify_buffer)
+                queue.start(wait=wait)
+                _global_queue = queue
+                atexit.register(shutdown_message_queue)
+
+    return _global_queue
+
+
+def notify(text: str, priority: int = PRIORITY_NORMAL, chat_id: Optional[str] = None,
+           parse_mode: Optional[str] = 'HTML') -> bool:
+    """
+    Fire-and-forget уведомление для стратегий
+
+    Только кладет сообщение в кольцевой буфер и сразу возвращается,
+    доставку выполняет поток отправителя.
+
+    Returns:
+        True если сообщение принято, False если буфер переполнен
+    """
+    if _global_queue is None:
+        try:
+            get_message_queue(wait=False)
+        except Exception as e:
+            logging.error(f"❌ Очередь Telegram недоступна: {e}")
+            return False
+
+    return _notify_buffer.push((chat_id, text, parse_mode, priority))
+
+
+def get_notify_stats() -> Dict[str, int]:
+    """Счетчики буфера notify() (включая переполнения)"""
+    return _notify_buffer.get_stats()
+
+
+def shutdown_message_queue(timeout: float = 10.0):
+    """Досылает буфер и очередь при завершении процесса"""
+    queue = _global_queue
+    if queue is None:
+        return
+
+    try:
+        if not queue.flush(timeout):
+            logging.warning(f"⚠️ Не все уведомления отправлены при остановке: {queue.get_stats()}")
+        queue.stop(timeout=timeout)
+    except Exception as e:
+        logging.error(f"❌ Ошибка остановки очереди Telegram: {e}")
@@ -0,0 +1,68 @@
+# notifications/notify_buffer.py
+"""
+Кольцевой буфер уведомлений для fire-and-forget отправки из стратегий
+
+Производители (потоки Jesse) только добавляют элемент в deque - без
+системных вызовов, под короткой блокировкой счетчиков. Забирает элементы
+единственный потребитель - поток отправителя Telegram.
+"""
+import threading
+from collections import deque
+from typing import Any, List
+
+
+class NotifyRingBuffer:
+    """
+    Буфер фиксированной емкости
+
+    При переполнении новые элементы отбрасываются и учитываются в счетчике,
+    производитель никогда не ждет.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._items = deque()
+
+        # "+= 1" не атомарен между потоками - счетчики под блокировкой
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.drained = 0
+
+    def push(self, item: Any) -> bool:
+        """Добавляет элемент, False - буфер переполнен"""
+        with self._lock:
+            if len(self._items) >= self.capacity:
+                self.dropped += 1
+                return False
+
+            self._items.append(item)
+            self.enqueued += 1
+        return True
+
+    def pop_batch(self, max_items: int = 100) -> List[Any]:
+        """Забирает до max_items элементов (вызывается только потребителем)"""
+        batch = []
+        try:
+            while len(batch) < max_items:
+                batch.append(self._items.popleft())
+        except IndexError:
+            pass
+
+        if batch:
+            with self._lock:
+                self.drained += len(batch)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'buffered': len(self),
+                'capacity': self.capacity,
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'drained': self.drained,
+            }
@@ -1,16 +1,21 @@
 # notifications/telegram_bot.py - ИСПРАВЛЕНО для python-telegram-bot 20.0+
 
-import asyncio
 import os
 import logging
 import threading
 from datetime import datetime
 from typing import Dict, Any, Optional
-import concurrent.futures
 
 from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-from telegram.error import TelegramError, RetryAfter
+
+from utils.config_manager import get_config
+from utils.loop_monitor import monitor_loop
+from utils.metrics import timed
+
+from .message_queue import (get_message_queue, notify, telegram_base_url,
+                            PRIORITY_CRITICAL, PRIORITY_LOW, PRIORITY_NORMAL)
+from .webhook_server import TelegramWebhookServer, telegram_mode, update_concurrency
 
 
 class TelegramNotifier:
@@ -28,8 +33,10 @@ class TelegramNotifier:
         
         self.bot: Optional[Bot] = None
         self.application: Optional[Application] = None
+        self.webhook_server: Optional[TelegramWebhookServer] = None
         self.running = False
         self.bot_thread = None
+        self.loop_monitor = None
         
         # Настройка логирования
         self.logger = logging.getLogger(__name__)
@@ -55,7 +62,13 @@ class TelegramNotifier:
                 self.logger.info("🚀 Запуск Telegram бота в отдельном потоке...")
                 
                 # Создаем Application
-                self.application = Application.builder().token(self.bot_token).build()
+                self.application = (Application.builder()
+                                    .token(self.bot_token)
+                                    .base_url(telegram_base_url())
+                                    .concurrent_updates(update_concurrency())
+                                    .post_init(self._post_init)
+                                    .post_shutdown(self._post_shutdown)
+                                    .build())
                 self.bot = self.application.bot
                 
                 # Добавляем обработчики команд
@@ -68,11 +81,15 @@ class TelegramNotifier:
                 
                 self.logger.info("✅ Обработчики команд добавлены")
                 
-                # Запускаем polling
-                self.application.run_polling(
-                    drop_pending_updates=True,
-                    allowed_updates=Update.ALL_TYPES
-                )
+                if telegram_mode() == 'webhook':
+                    self.webhook_server = TelegramWebhookServer(self.application)
+                    self.webhook_server.run()
+                else:
+                    # Запускаем polling
+                    self.application.run_polling(
+                        drop_pending_updates=True,
+                        allowed_updates=Update.ALL_TYPES
+                    )
                 
             except Exception as e:
                 self.logger.error(f"❌ Ошибка запуска бота: {e}")
@@ -90,12 +107,24 @@ class TelegramNotifier:
         """Останавливает бота"""
         if self.application and self.running:
             try:
-                self.application.stop_running()
+                if self.webhook_server is not None:
+                    self.webhook_server.request_stop()
+                else:
+                    self.application.stop_running()
                 self.running = False
                 self.logger.info("🛑 Telegram бот остановлен")
             except Exception as e:
                 self.logger.error(f"❌ Ошибка остановки: {e}")
     
+    async def _post_init(self, application: Application):
+        """Мониторинг event loop потока бота"""
+        self.loop_monitor = monitor_loop('notifier')
+
+    async def _post_shutdown(self, application: Application):
+        if self.loop_monitor is not None:
+            self.loop_monitor.stop()
+            self.loop_monitor = None
+    
     # === ОБРАБОТЧИКИ КОМАНД ===
     
     async def _command_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -179,7 +208,7 @@ class TelegramNotifier:
             self.logger.info("📊 /status команда")
             
             # Проверяем статус компонентов
-            ai_status = "✅ Включен" if os.getenv('AI_ANALYSIS_ENABLED') == 'true' else "❌ Отключен"
+            ai_status = "✅ Включен" if get_config().ai.enabled else "❌ Отключен"
             telegram_status = "✅ Работает" if self.running else "❌ Не работает"
             
             status_text = (
@@ -229,7 +258,7 @@ class TelegramNotifier:
     
     async def _show_status_inline(self, query):
         """Показывает статус через inline кнопки"""
-        ai_status = "✅ Включен" if os.getenv('AI_ANALYSIS_ENABLED') == 'true' else "❌ Отключен"
+        ai_status = "✅ Включен" if get_config().ai.enabled else "❌ Отключен"
         
         status_text = (
             "🟢 <b>СТАТУС СИСТЕМЫ</b>\n\n"
@@ -308,71 +337,45 @@ class TelegramNotifier:
     
     # === МЕТОДЫ ДЛЯ ОТПРАВКИ СООБЩЕНИЙ ===
     
-    async def send_message_safe(self, text: str, parse_mode: str = 'HTML') -> bool:
-        """
-        Безопасная отправка сообщений БЕЗ конфликтов event loop
+    @timed('telegram_send_seconds')
+    async def send_message_safe(self, text: str, parse_mode: str = 'HTML',
+                                priority: int = PRIORITY_NORMAL) -> bool:
         """
-        for attempt in range(self.max_retries):
-            try:
-                # Создаем отдельный Bot объект для отправки
-                bot = Bot(self.bot_token)
-                
-                # Отправляем сообщение
-                await bot.send_message(
-                    chat_id=self.chat_id,
-                    text=text,
-                    parse_mode=parse_mode
-                )
-                
-                # Закрываем соединение
-                await bot.close()
-                
-                if attempt > 0:
-                    self.logger.info(f"✅ Сообщение отправлено с попытки {attempt + 1}")
-                
-                return True
-                
-            except RetryAfter as e:
-                wait_time = e.retry_after
-                self.logger.warning(f"⏰ Rate limit, ожидание {wait_time}с (попытка {attempt + 1})")
-                await asyncio.sleep(wait_time)
-                
-            except Exception as e:
-                self.logger.error(f"❌ Ошибка отправки сообщения (попытка {attempt + 1}): {e}")
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+        Безопасная отправка сообщений через общую очередь отправителя
         
-        self.logger.error(f"❌ Не удалось отправить сообщение после {self.max_retries} попыток")
-        return False
+        Bot не создается на каждое сообщение: доставкой, лимитами и
+        повторами занимается долгоживущий TelegramMessageQueue.
+        """
+        try:
+            queue = get_message_queue(self.bot_token)
+            return await queue.send(text, chat_id=self.chat_id, parse_mode=parse_mode, priority=priority)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка постановки сообщения в очередь: {e}")
+            return False
     
-    def send_message_sync(self, text: str, parse_mode: str = 'HTML') -> bool:
-        """Синхронная отправка сообщения (для использования из Jesse стратегий)"""
-        def send_in_thread():
-            try:
-                # Создаем новый event loop для этого потока
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                try:
-                    return loop.run_until_complete(self.send_message_safe(text, parse_mode))
-                finally:
-                    loop.close()
-                    
-            except Exception as e:
-                self.logger.error(f"❌ Ошибка синхронной отправки: {e}")
-                return False
+    def enqueue_message(self, text: str, parse_mode: str = 'HTML', priority: int = PRIORITY_NORMAL):
+        """Ставит сообщение в очередь без ожидания доставки"""
+        try:
+            return get_message_queue(self.bot_token).submit(
+                text, chat_id=self.chat_id, parse_mode=parse_mode, priority=priority
+            )
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка постановки сообщения в очередь: {e}")
+            return None
+    
+    def send_message_sync(self, text: str, parse_mode: str = 'HTML',
+                          priority: int = PRIORITY_NORMAL) -> bool:
+        """
+        Синхронная отправка сообщения (для использования из Jesse стратегий)
         
-        # Выполняем в отдельном потоке с таймаутом
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(send_in_thread)
-            try:
-                return future.result(timeout=self.message_timeout)
-            except concurrent.futures.TimeoutError:
-                self.logger.error("⏰ Таймаут отправки сообщения")
-                return False
-            except Exception as e:
-                self.logger.error(f"❌ Ошибка выполнения отправки: {e}")
-                return False
+        Не блокирует вызывающий поток: сообщение кладется в кольцевой буфер,
+        доставкой занимается поток отправителя. Возвращает True, если
+        сообщение принято в буфер.
+        """
+        accepted = notify(text, priority=priority, chat_id=self.chat_id, parse_mode=parse_mode)
+        if not accepted:
+            self.logger.warning("⚠️ Буфер уведомлений переполнен, сообщение отброшено")
+        return accepted
     
     async def send_analysis_notification(self, signal_data: Dict[str, Any], ai_analysis: Dict[str, Any]) -> bool:
         """Отправляет уведомление об ИИ анализе"""
@@ -396,12 +399,37 @@ class TelegramNotifier:
             formatter = MessageFormatter()
             message = formatter.format_trade_update(trade_data)
             
-            return await self.send_message_safe(message)
+            # Торговые события - критичный приоритет
+            return await self.send_message_safe(message, priority=PRIORITY_CRITICAL)
             
         except Exception as e:
             self.logger.error(f"❌ Ошибка отправки уведомления о сделке: {e}")
             return False
     
+    async def send_market_overview(self, market_report: Dict[str, Any]) -> bool:
+        """Отправляет обзор рынка (низкий приоритет: серия обзоров склеивается в одно сообщение)"""
+        try:
+            from notifications.message_formatter import MessageFormatter
+            
+            message = MessageFormatter().format_market_analysis(market_report)
+            return await self.send_message_safe(message, priority=PRIORITY_LOW)
+            
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка отправки обзора рынка: {e}")
+            return False
+    
+    async def send_system_status(self, status_data: Dict[str, Any]) -> bool:
+        """Отправляет статус системы (низкий приоритет, как и обзор рынка)"""
+        try:
+            from notifications.message_formatter import MessageFormatter
+            
+            message = MessageFormatter().format_system_status(status_data)
+            return await self.send_message_safe(message, priority=PRIORITY_LOW)
+            
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка отправки статуса системы: {e}")
+            return False
+    
     async def test_connection(self) -> bool:
         """Тестирует подключение к Telegram"""
         try:
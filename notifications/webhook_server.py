@@ -0,0 +1,223 @@
+# notifications/webhook_server.py
+"""
+Прием апдейтов Telegram через webhook вместо long polling
+
+TELEGRAM_MODE=webhook - бот поднимает aiohttp сервер в своем процессе:
+- POST TELEGRAM_WEBHOOK_PATH принимает апдейт, проверяет заголовок
+  X-Telegram-Bot-Api-Secret-Token и кладет апдейт в очередь Application
+  (ответ сразу, обработчики работают отдельно)
+- обработчики выполняются параллельно, не больше TELEGRAM_CONCURRENT_UPDATES
+  одновременно (concurrent_updates в Application)
+- если в очереди больше TELEGRAM_WEBHOOK_MAX_PENDING апдейтов, ответ 503 -
+  Telegram повторит доставку позже
+- GET /health - счетчики сервера
+
+Если задан TELEGRAM_WEBHOOK_URL (публичный адрес, например
+https://bot.onrender.com), при старте вызывается setWebhook с этим URL и
+секретом. Порт задается только явно (TELEGRAM_WEBHOOK_PORT): PORT контейнера
+уже занят Jesse.
+
+Нагрузочная проверка с локальной заглушкой:
+    python -m loadtest.driver --flows 0 --signal-bursts 0 --webhook-updates 500
+"""
+import asyncio
+import hmac
+import logging
+import os
+import secrets
+import signal
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def telegram_mode() -> str:
+    """Способ получения апдейтов: polling (по умолчанию) или webhook"""
+    return os.getenv('TELEGRAM_MODE', 'polling').lower()
+
+
+def update_concurrency() -> int:
+    """
+    Сколько апдейтов обрабатывается одновременно (и в polling, и в webhook)
+
+    Долгие обработчики (/analyze, /scan) сериализуются по пользователю
+    (utils.concurrency.per_user), так что параллельны только разные люди.
+    Обработчики - корутины одного loop и изменяемого состояния в TelegramBot
+    не держат; config.reload() синхронный и под своей блокировкой.
+    """
+    return max(1, int(os.getenv('TELEGRAM_CONCURRENT_UPDATES', '16')))
+
+
+@dataclass
+class WebhookSettings:
+    """Параметры webhook сервера (TELEGRAM_WEBHOOK_* из окружения)"""
+    host: str = '0.0.0.0'
+    port: int = 8443
+    path: str = '/telegram/webhook'
+    url: str = ''
+    secret_token: str = ''
+    max_pending: int = 1000
+    max_connections: int = 40
+    drop_pending_updates: bool = True
+
+    @classmethod
+    def from_env(cls) -> 'WebhookSettings':
+        port = os.getenv('TELEGRAM_WEBHOOK_PORT')
+        if not port:
+            raise ValueError("TELEGRAM_MODE=webhook требует TELEGRAM_WEBHOOK_PORT")
+
+        return cls(
+            host=os.getenv('TELEGRAM_WEBHOOK_HOST', '0.0.0.0'),
+            port=int(port),
+            path='/' + os.getenv('TELEGRAM_WEBHOOK_PATH', '/telegram/webhook').lstrip('/'),
+            url=os.getenv('TELEGRAM_WEBHOOK_URL', '').rstrip('/'),
+            # Допустимые символы секрета: A-Z, a-z, 0-9, _ и - (token_urlsafe подходит)
+            secret_token=os.getenv('TELEGRAM_WEBHOOK_SECRET') or secrets.token_urlsafe(32),
+            max_pending=int(os.getenv('TELEGRAM_WEBHOOK_MAX_PENDING', '1000')),
+            max_connections=int(os.getenv('TELEGRAM_WEBHOOK_MAX_CONNECTIONS', '40')),
+            drop_pending_updates=os.getenv('TELEGRAM_WEBHOOK_DROP_PENDING', 'true').lower() == 'true',
+        )
+
+
+class TelegramWebhookServer:
+    """
+    aiohttp сервер, передающий апдейты в Application python-telegram-bot
+
+    start()/stop() - в уже работающем event loop (нагрузочный тест),
+    run() - блокирующий запуск со своим loop, как run_polling.
+    """
+
+    def __init__(self, application: Application, settings: Optional[WebhookSettings] = None):
+        self.application = application
+        self.settings = settings or WebhookSettings.from_env()
+        self.logger = logging.getLogger(__name__)
+
+        self.received = 0
+        self.rejected = 0
+        self.overloaded = 0
+        self.invalid = 0
+
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._secret = self.settings.secret_token.encode()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.settings.path, self.handle_update)
+        app.router.add_get('/health', self.handle_health)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, '').encode()
+        if not hmac.compare_digest(token, self._secret):
+            self.rejected += 1
+            return web.Response(status=403)
+
+        update_queue = self.application.update_queue
+        if update_queue.qsize() >= self.settings.max_pending:
+            self.overloaded += 1
+            return web.Response(status=503, headers={'Retry-After': '1'})
+
+        try:
+            update = Update.de_json(await request.json(), self.application.bot)
+        except Exception as e:
+            self.invalid += 1
+            self.logger.warning(f"⚠️ Некорректный апдейт webhook: {e}")
+            return web.Response(status=400)
+
+        if update is None:
+            self.invalid += 1
+            return web.Response(status=400)
+
+        await update_queue.put(update)
+        self.received += 1
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> dict:
+        return {
+            'received': self.received,
+            'rejected': self.rejected,
+            'overloaded': self.overloaded,
+            'invalid': self.invalid,
+            'pending': self.application.update_queue.qsize(),
+            'concurrent_updates': self.application.concurrent_updates,
+        }
+
+    async def start(self):
+        """Запускает Application, HTTP сервер и (если задан URL) регистрирует webhook"""
+        settings = self.settings
+        self._loop = asyncio.get_running_loop()
+
+        # Тот же порядок, что в run_polling: initialize -> post_init -> start
+        await self.application.initialize()
+        if self.application.post_init:
+            await self.application.post_init(self.application)
+        await self.application.start()
+
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, settings.host, settings.port).start()
+        self.logger.info(f"🌐 Webhook сервер: {settings.host}:{settings.port}{settings.path} "
+                         f"(одновременно {self.application.concurrent_updates})")
+
+        if settings.url:
+            await self.application.bot.set_webhook(
+                url=settings.url + settings.path,
+                secret_token=settings.secret_token,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=settings.drop_pending_updates,
+                max_connections=settings.max_connections,
+            )
+            self.logger.info(f"✅ Webhook зарегистрирован: {settings.url}{settings.path}")
+        elif not os.getenv('TELEGRAM_WEBHOOK_SECRET'):
+            self.logger.warning("⚠️ TELEGRAM_WEBHOOK_URL и TELEGRAM_WEBHOOK_SECRET не заданы - "
+                                "Telegram не знает сгенерированный секрет, апдейты будут отклонены")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self.application.running:
+            await self.application.stop()
+        await self.application.shutdown()
+        if self.application.post_shutdown:
+            await self.application.post_shutdown(self.application)
+
+    def request_stop(self):
+        """Останавливает run() из любого потока"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def run(self):
+        """Блокирующий запуск до Ctrl+C/SIGTERM или request_stop()"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        # Сигналы ставятся только в главном потоке (TelegramNotifier работает в фоновом)
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, loop.stop)
+                except NotImplementedError:
+                    pass
+
+        try:
+            loop.run_until_complete(self.start())
+            loop.run_forever()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            try:
+                loop.run_until_complete(self.stop())
+            finally:
+                loop.close()
+                self.logger.info("🛑 Webhook сервер остановлен")
@@ -2,6 +2,8 @@
 from jesse.strategies import Strategy
 import jesse.indicators as ta
 
+from enhanced_strategy_base import EnhancedStrategy
+
 
 class ActiveScalper(EnhancedStrategy):
     """
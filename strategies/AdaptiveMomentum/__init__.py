@@ -3,7 +3,18 @@ from jesse.strategies import Strategy
 import jesse.indicators as ta
 import numpy as np
 
+from utils.bar_cache import per_bar
+from utils.indicator_bus import shared_indicator
+from utils.logging_utils import install_strategy_logging, strategy_logs_enabled
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import track_strategy
+from utils.strategy_profiler import profile_if_enabled
 
+
+@track_strategy
+@instrument_strategy
+@profile_if_enabled
+@install_strategy_logging
 class AdaptiveMomentum(Strategy):
     """
     Adaptive Momentum Strategy для крипторынка
@@ -52,39 +63,46 @@ class AdaptiveMomentum(Strategy):
     # === СВОЙСТВА ИНДИКАТОРОВ ===
     @property
     def ema21(self):
-        return ta.ema(self.candles, period=self.ema_fast)
+        return shared_indicator(self, ta.ema, period=self.ema_fast)
     
     @property
     def ema50(self):
-        return ta.ema(self.candles, period=self.ema_slow)
+        return shared_indicator(self, ta.ema, period=self.ema_slow)
     
     @property
     def rsi(self):
-        return ta.rsi(self.candles, period=self.rsi_period)
+        return shared_indicator(self, ta.rsi, period=self.rsi_period)
     
     @property
     def volume_ma(self):
-        return ta.sma(self.candles[:, 5], period=self.volume_ma_period)  # Volume
+        return shared_indicator(self, ta.sma, period=self.volume_ma_period, source_type='volume')  # Volume
     
     @property
     def atr(self):
-        return ta.atr(self.candles, period=self.atr_period)
+        return shared_indicator(self, ta.atr, period=self.atr_period)
     
     @property
     def current_volume(self):
         return self.candles[-1, 5]  # Текущий объём
     
     # === АНАЛИЗ РЫНКА ===
+    @per_bar
     def _update_market_regime(self):
-        """Определяем текущий режим рынка: BULL/BEAR/NEUTRAL"""
+        """
+        Определяем текущий режим рынка: BULL/BEAR/NEUTRAL
+        
+        Свой критерий стратегии (100 баров, ±2%, раз в сутки), а не общий
+        REGIME_LOOKBACK/REGIME_THRESHOLD_PCT из utils/market_regime.py
+        """
         if self.index - self.last_regime_update < 24:  # Обновляем раз в сутки
             return
             
         if self.index < self.market_regime_period:
             return
             
-        # Изменение цены за период
-        price_change = (self.close - self.candles[-self.market_regime_period, 4]) / self.candles[-self.market_regime_period, 4]
+        # Изменение цены закрытия за период (столбец 2 в формате Jesse)
+        base_price = self.candles[-self.market_regime_period, 2]
+        price_change = (self.close - base_price) / base_price
         
         # Определяем режим
         if price_change > self.bull_threshold:
@@ -132,6 +150,7 @@ class AdaptiveMomentum(Strategy):
         else:
             return "SIDEWAYS"
     
+    @per_bar
     def _can_trade(self):
         """Базовые условия для торговли"""
         # Достаточно данных
@@ -348,6 +367,9 @@ class AdaptiveMomentum(Strategy):
         """Отладочная информация"""
         # Каждые 24 часа показываем состояние
         if self.index % 24 == 0 and self.index >= self.ema_slow:
+            if not strategy_logs_enabled():
+                return
+            
             trend = self._get_trend_direction()
             vol_ratio = self.current_volume / self.volume_ma if self.volume_ma > 0 else 1
             
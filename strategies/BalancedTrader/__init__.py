@@ -2,7 +2,19 @@
 from jesse.strategies import Strategy
 import jesse.indicators as ta
 
+from utils.bar_cache import per_bar
+from utils.indicator_bus import shared_indicator
+from utils.logging_utils import install_strategy_logging, strategy_logs_enabled
+from utils.market_regime import market_regime
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import track_strategy
+from utils.strategy_profiler import profile_if_enabled
 
+
+@track_strategy
+@instrument_strategy
+@profile_if_enabled
+@install_strategy_logging
 class BalancedTrader(Strategy):
     """
     BALANCED TRADER v2.0 - Улучшенная золотая середина
@@ -73,27 +85,27 @@ class BalancedTrader(Strategy):
     # === ИНДИКАТОРЫ ===
     @property
     def ema9(self):
-        return ta.ema(self.candles, period=self.ema_fast)
+        return shared_indicator(self, ta.ema, period=self.ema_fast)
     
     @property
     def ema21(self):
-        return ta.ema(self.candles, period=self.ema_slow)
+        return shared_indicator(self, ta.ema, period=self.ema_slow)
     
     @property
     def rsi(self):
-        return ta.rsi(self.candles, period=self.rsi_period)
+        return shared_indicator(self, ta.rsi, period=self.rsi_period)
     
     @property
     def bb_upper(self):
-        return ta.bollinger_bands(self.candles, period=self.bb_period, devup=self.bb_std)[0]
+        return shared_indicator(self, ta.bollinger_bands, period=self.bb_period, devup=self.bb_std)[0]
     
     @property
     def bb_middle(self):
-        return ta.bollinger_bands(self.candles, period=self.bb_period, devup=self.bb_std)[1]
+        return shared_indicator(self, ta.bollinger_bands, period=self.bb_period, devup=self.bb_std)[1]
     
     @property
     def bb_lower(self):
-        return ta.bollinger_bands(self.candles, period=self.bb_period, devup=self.bb_std)[2]
+        return shared_indicator(self, ta.bollinger_bands, period=self.bb_period, devup=self.bb_std)[2]
     
     @property
     def bb_width(self):
@@ -102,17 +114,18 @@ class BalancedTrader(Strategy):
     
     @property
     def atr(self):
-        return ta.atr(self.candles, period=self.atr_period)
+        return shared_indicator(self, ta.atr, period=self.atr_period)
     
     @property
     def volume_ma(self):
-        return ta.sma(self.candles[:, 5], period=self.volume_ma_period)
+        return shared_indicator(self, ta.sma, period=self.volume_ma_period, source_type='volume')
     
     @property
     def current_volume(self):
         return self.candles[-1, 5]
     
     # === ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ===
+    @per_bar
     def _update_daily_counter(self):
         """Обновляем счётчик дневных сделок"""
         current_day = self.index // 96  # 96 свечей по 15 мин = 1 день
@@ -122,21 +135,12 @@ class BalancedTrader(Strategy):
             self.daily_trades_count = 0
             self.last_day = current_day
     
+    @per_bar
     def _update_market_regime(self):
-        """Определяем режим рынка"""
-        if self.index < 48:  # Нужно минимум 2 дня данных
-            return
-        
-        # Анализ за последние 2 дня (48 свечей)
-        price_48h_ago = self.candles[-48, 4]  # Цена закрытия 48 свечей назад
-        price_change = (self.close - price_48h_ago) / price_48h_ago * 100
-        
-        if price_change > 3:
-            self.market_regime = "BULL"
-        elif price_change < -3:
-            self.market_regime = "BEAR"
-        else:
-            self.market_regime = "NEUTRAL"
+        """Определяем режим рынка (общий движок utils/market_regime.py)"""
+        snapshot = market_regime(self)
+        if snapshot is not None:
+            self.market_regime = snapshot.regime
     
     def _get_ema_separation(self):
         """Расстояние между EMA в процентах"""
@@ -206,6 +210,7 @@ class BalancedTrader(Strategy):
         distance_to_upper = (self.bb_upper - self.close) / self.close * 100
         return distance_to_upper < 0.5
     
+    @per_bar
     def _can_trade(self):
         """Базовые условия для торговли"""
         self._update_daily_counter()
@@ -547,6 +552,9 @@ class BalancedTrader(Strategy):
             self._update_daily_counter()
             self._update_market_regime()
             
+            if not strategy_logs_enabled():
+                return
+            
             # Расчёт текущих сил сигналов
             long_str = self._calculate_signal_strength_long()
             short_str = self._calculate_signal_strength_short()
@@ -3,7 +3,18 @@ from jesse.strategies import Strategy
 import jesse.indicators as ta
 import numpy as np
 
+from utils.bar_cache import per_bar
+from utils.indicator_bus import shared_indicator
+from utils.logging_utils import install_strategy_logging, strategy_logs_enabled
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import track_strategy
+from utils.strategy_profiler import profile_if_enabled
 
+
+@track_strategy
+@instrument_strategy
+@profile_if_enabled
+@install_strategy_logging
 class FakeoutHunter(Strategy):
     """
     FAKEOUT HUNTER v3.0 - Активная версия
@@ -82,15 +93,15 @@ class FakeoutHunter(Strategy):
     # === ИНДИКАТОРЫ ===
     @property
     def bb_upper(self):
-        return ta.bollinger_bands(self.candles, period=self.bb_period, devup=self.bb_std)[0]
+        return shared_indicator(self, ta.bollinger_bands, period=self.bb_period, devup=self.bb_std)[0]
     
     @property
     def bb_middle(self):
-        return ta.bollinger_bands(self.candles, period=self.bb_period, devup=self.bb_std)[1]
+        return shared_indicator(self, ta.bollinger_bands, period=self.bb_period, devup=self.bb_std)[1]
     
     @property
     def bb_lower(self):
-        return ta.bollinger_bands(self.candles, period=self.bb_period, devup=self.bb_std)[2]
+        return shared_indicator(self, ta.bollinger_bands, period=self.bb_period, devup=self.bb_std)[2]
     
     @property
     def bb_width(self):
@@ -98,25 +109,26 @@ class FakeoutHunter(Strategy):
     
     @property
     def ema50(self):
-        return ta.ema(self.candles, period=self.ema_period)
+        return shared_indicator(self, ta.ema, period=self.ema_period)
     
     @property
     def rsi(self):
-        return ta.rsi(self.candles, period=self.rsi_period)
+        return shared_indicator(self, ta.rsi, period=self.rsi_period)
     
     @property
     def atr(self):
-        return ta.atr(self.candles, period=self.atr_period)
+        return shared_indicator(self, ta.atr, period=self.atr_period)
     
     @property
     def volume_ma(self):
-        return ta.sma(self.candles[:, 5], period=self.volume_ma_period)
+        return shared_indicator(self, ta.sma, period=self.volume_ma_period, source_type='volume')
     
     @property
     def current_volume(self):
         return self.candles[-1, 5]
     
     # === ЛОЖНЫЕ ПРОБОИ (ОРИГИНАЛ) ===
+    @per_bar
     def _is_bb_lower_fakeout(self):
         """Ложный пробой нижней границы BB"""
         for i in range(1, self.max_bars_outside + 1):
@@ -124,8 +136,8 @@ class FakeoutHunter(Strategy):
                 continue
             
             past_low = self.candles[-i, 3]
-            bb_lower_then = ta.bollinger_bands(self.candles[:-i] if i > 0 else self.candles, 
-                                              period=self.bb_period, devup=self.bb_std)[2]
+            bb_lower_then = shared_indicator(self, ta.bollinger_bands, self.candles[:-i] if i > 0 else self.candles,
+                                             period=self.bb_period, devup=self.bb_std)[2]
             
             penetration = (bb_lower_then - past_low) / bb_lower_then * 100
             
@@ -135,6 +147,7 @@ class FakeoutHunter(Strategy):
                     return True, "FAKEOUT"
         return False, None
     
+    @per_bar
     def _is_bb_upper_fakeout(self):
         """Ложный пробой верхней границы BB"""
         for i in range(1, self.max_bars_outside + 1):
@@ -142,8 +155,8 @@ class FakeoutHunter(Strategy):
                 continue
             
             past_high = self.candles[-i, 2]
-            bb_upper_then = ta.bollinger_bands(self.candles[:-i] if i > 0 else self.candles, 
-                                              period=self.bb_period, devup=self.bb_std)[0]
+            bb_upper_then = shared_indicator(self, ta.bollinger_bands, self.candles[:-i] if i > 0 else self.candles,
+                                             period=self.bb_period, devup=self.bb_std)[0]
             
             penetration = (past_high - bb_upper_then) / bb_upper_then * 100
             
@@ -154,6 +167,7 @@ class FakeoutHunter(Strategy):
         return False, None
     
     # === НОВЫЕ СИГНАЛЫ: ОТСКОКИ ===
+    @per_bar
     def _is_bb_lower_bounce(self):
         """Отскок от нижней границы BB"""
         if not self.enable_bb_bounces:
@@ -172,6 +186,7 @@ class FakeoutHunter(Strategy):
         
         return False, None
     
+    @per_bar
     def _is_bb_upper_bounce(self):
         """Отскок от верхней границы BB"""
         if not self.enable_bb_bounces:
@@ -190,6 +205,7 @@ class FakeoutHunter(Strategy):
         
         return False, None
     
+    @per_bar
     def _is_ema_bounce_up(self):
         """Отскок вверх от EMA"""
         if not self.enable_ema_bounces:
@@ -208,6 +224,7 @@ class FakeoutHunter(Strategy):
         
         return False, None
     
+    @per_bar
     def _is_ema_bounce_down(self):
         """Отскок вниз от EMA"""
         if not self.enable_ema_bounces:
@@ -243,6 +260,7 @@ class FakeoutHunter(Strategy):
             short_ratio = self.total_shorts / total_trades
             return short_ratio < self.max_direction_imbalance
     
+    @per_bar
     def _update_daily_counter(self):
         """Обновляем счётчик дневных сделок"""
         current_day = self.index // 96
@@ -253,6 +271,7 @@ class FakeoutHunter(Strategy):
             self.daily_trades_count = 0
             self.last_day = current_day
     
+    @per_bar
     def _can_trade(self):
         """Условия для торговли"""
         self._update_daily_counter()
@@ -591,6 +610,9 @@ class FakeoutHunter(Strategy):
         """Мониторинг каждые 2 часа"""
         if self.index % 8 == 0 and self.index >= max(self.bb_period, self.ema_period) + 10:
             
+            if not strategy_logs_enabled():
+                return
+            
             # Текущие позиции относительно уровней
             bb_pos = "ABOVE_BB" if self.close > self.bb_upper else "BELOW_BB" if self.close < self.bb_lower else "IN_BB"
             ema_pos = "↑" if self.close > self.ema50 else "↓"
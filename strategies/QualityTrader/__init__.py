@@ -3,7 +3,18 @@ from jesse.strategies import Strategy
 import jesse.indicators as ta
 import numpy as np
 
+from utils.bar_cache import per_bar
+from utils.indicator_bus import shared_indicator
+from utils.logging_utils import install_strategy_logging, strategy_logs_enabled
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import track_strategy
+from utils.strategy_profiler import profile_if_enabled
 
+
+@track_strategy
+@instrument_strategy
+@profile_if_enabled
+@install_strategy_logging
 class QualityTrader(Strategy):
     """
     QUALITY OVER QUANTITY STRATEGY
@@ -66,27 +77,27 @@ class QualityTrader(Strategy):
     # === ИНДИКАТОРЫ ===
     @property
     def ema12(self):
-        return ta.ema(self.candles, period=self.ema_fast)
+        return shared_indicator(self, ta.ema, period=self.ema_fast)
     
     @property
     def ema26(self):
-        return ta.ema(self.candles, period=self.ema_slow)
+        return shared_indicator(self, ta.ema, period=self.ema_slow)
     
     @property
     def ema50(self):
-        return ta.ema(self.candles, period=self.ema_trend)
+        return shared_indicator(self, ta.ema, period=self.ema_trend)
     
     @property
     def rsi(self):
-        return ta.rsi(self.candles, period=self.rsi_period)
+        return shared_indicator(self, ta.rsi, period=self.rsi_period)
     
     @property
     def atr(self):
-        return ta.atr(self.candles, period=self.atr_period)
+        return shared_indicator(self, ta.atr, period=self.atr_period)
     
     @property
     def volume_ma(self):
-        return ta.sma(self.candles[:, 5], period=self.volume_ma_period)
+        return shared_indicator(self, ta.sma, period=self.volume_ma_period, source_type='volume')
     
     @property
     def current_volume(self):
@@ -145,6 +156,7 @@ class QualityTrader(Strategy):
         # Если диапазон меньше 2% - рынок боковой
         return price_range < 2.0
     
+    @per_bar
     def _update_daily_counter(self):
         """Обновляем счётчик дневных сделок"""
         current_day = self.index // 24  # 24 часовые свечи = 1 день
@@ -189,6 +201,7 @@ class QualityTrader(Strategy):
         
         return 0
     
+    @per_bar
     def _can_trade(self):
         """СТРОГИЕ условия для торговли"""
         self._update_daily_counter()
@@ -484,6 +497,9 @@ class QualityTrader(Strategy):
         if self.index % 6 == 0 and self.index >= self.ema_trend:
             self._update_daily_counter()
             
+            if not strategy_logs_enabled():
+                return
+            
             trend = self._get_trend_direction()
             is_choppy = self._is_market_choppy()
             
@@ -2,7 +2,18 @@
 from jesse.strategies import Strategy
 import jesse.indicators as ta
 
+from utils.bar_cache import per_bar
+from utils.indicator_bus import shared_indicator
+from utils.logging_utils import install_strategy_logging, strategy_logs_enabled
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import track_strategy
+from utils.strategy_profiler import profile_if_enabled
 
+
+@track_strategy
+@instrument_strategy
+@profile_if_enabled
+@install_strategy_logging
 class RSIBot(Strategy):
     """
     RSI стратегия v2.1 - Сбалансированная версия
@@ -46,7 +57,7 @@ class RSIBot(Strategy):
     @property
     def rsi(self):
         """RSI индикатор"""
-        return ta.rsi(self.candles, period=self.rsi_period)
+        return shared_indicator(self, ta.rsi, period=self.rsi_period)
     
     @property 
     def rsi_previous(self):
@@ -58,7 +69,7 @@ class RSIBot(Strategy):
     @property
     def sma(self):
         """Короткая скользящая средняя"""
-        return ta.sma(self.candles, period=self.sma_period)
+        return shared_indicator(self, ta.sma, period=self.sma_period)
     
     def _trend_allows_long(self):
         """Проверка тренда для покупки (мягкий фильтр)"""
@@ -74,6 +85,7 @@ class RSIBot(Strategy):
         # Простое условие: цена ниже SMA20
         return self.close < self.sma
     
+    @per_bar
     def _can_trade(self):
         """Базовые проверки возможности торговли"""
         # Не торгуем если позиция открыта
@@ -300,6 +312,9 @@ class RSIBot(Strategy):
     def before(self):
         """Отладочная информация (каждые 24 часа)"""
         if self.index % 24 == 0 and self.index >= max(self.rsi_period, self.sma_period):
+            if not strategy_logs_enabled():
+                return
+            
             current_rsi = self.rsi
             trend_direction = "📈" if self.close > self.sma else "📉"
             
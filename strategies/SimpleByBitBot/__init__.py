@@ -2,7 +2,16 @@
 from jesse.strategies import Strategy
 import jesse.indicators as ta
 
+from utils.logging_utils import install_strategy_logging
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import track_strategy
+from utils.strategy_profiler import profile_if_enabled
 
+
+@track_strategy
+@instrument_strategy
+@profile_if_enabled
+@install_strategy_logging
 class SimpleByBitBot(Strategy):
     """
     Простая стратегия для тестирования с отладкой
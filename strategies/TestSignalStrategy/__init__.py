@@ -3,7 +3,16 @@ from jesse.strategies import Strategy
 import jesse.indicators as ta
 import logging
 
+from utils.logging_utils import install_strategy_logging, strategy_logs_enabled
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import track_strategy
+from utils.strategy_profiler import profile_if_enabled
 
+
+@track_strategy
+@instrument_strategy
+@profile_if_enabled
+@install_strategy_logging
 class TestSignalStrategy(Strategy):
     """
     ИСПРАВЛЕННАЯ тестовая стратегия для проверки сигналов
@@ -202,6 +211,9 @@ class TestSignalStrategy(Strategy):
     def before(self):
         """Мониторинг каждые 15 минут"""
         if self.index % 15 == 0 and self.index > 0:
+            if not strategy_logs_enabled():
+                return
+            
             current_price = self.close
             
             logging.info(f"📊 MONITOR (Bar {self.index}):")
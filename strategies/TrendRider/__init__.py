@@ -3,7 +3,19 @@ from jesse.strategies import Strategy
 import jesse.indicators as ta
 import numpy as np
 
+from utils.bar_cache import per_bar
+from utils.indicator_bus import shared_indicator
+from utils.logging_utils import install_strategy_logging, strategy_logs_enabled
+from utils.market_regime import get_market_regime_engine, market_regime
+from utils.metrics import instrument_strategy
+from utils.strategy_hooks import track_strategy
+from utils.strategy_profiler import profile_if_enabled
 
+
+@track_strategy
+@instrument_strategy
+@profile_if_enabled
+@install_strategy_logging
 class TrendRider(Strategy):
     """
     TREND RIDER - Продуманная трендовая стратегия
@@ -25,15 +37,14 @@ class TrendRider(Strategy):
         # === ТРЕНДОВЫЕ ИНДИКАТОРЫ ===
         self.ema_fast = 21          # Быстрая EMA для сигналов
         self.ema_medium = 50        # Средняя EMA для входов
-        self.ema_trend = 200        # ГЛАВНЫЙ фильтр тренда
+        # ГЛАВНЫЙ фильтр тренда - медленная EMA общего движка режима (REGIME_EMA_SLOW, 200)
+        self.ema_trend = get_market_regime_engine().settings.ema_slow
         self.rsi_period = 14        # RSI для откатов
         self.atr_period = 20        # ATR для стопов
         self.volume_ma_period = 20  # Средний объём
         
         # === ОПРЕДЕЛЕНИЕ ТРЕНДА ===
-        self.trend_strength_min = 1.0      # Минимум 1% цена от EMA200
         self.ema_alignment_min = 0.5       # Минимальное расстояние между EMA
-        self.trend_confirmation_bars = 5   # Подтверждение тренда на барах
         
         # === УСЛОВИЯ ВХОДА (КОНСЕРВАТИВНЫЕ) ===
         self.rsi_oversold_bull = 35        # RSI для покупки в бычьем тренде
@@ -78,27 +89,27 @@ class TrendRider(Strategy):
     # === ИНДИКАТОРЫ ===
     @property
     def ema21(self):
-        return ta.ema(self.candles, period=self.ema_fast)
+        return shared_indicator(self, ta.ema, period=self.ema_fast)
     
     @property
     def ema50(self):
-        return ta.ema(self.candles, period=self.ema_medium)
+        return shared_indicator(self, ta.ema, period=self.ema_medium)
     
     @property
     def ema200(self):
-        return ta.ema(self.candles, period=self.ema_trend)
+        return shared_indicator(self, ta.ema, period=self.ema_trend)
     
     @property
     def rsi(self):
-        return ta.rsi(self.candles, period=self.rsi_period)
+        return shared_indicator(self, ta.rsi, period=self.rsi_period)
     
     @property
     def atr(self):
-        return ta.atr(self.candles, period=self.atr_period)
+        return shared_indicator(self, ta.atr, period=self.atr_period)
     
     @property
     def volume_ma(self):
-        return ta.sma(self.candles[:, 5], period=self.volume_ma_period)
+        return shared_indicator(self, ta.sma, period=self.volume_ma_period, source_type='volume')
     
     @property
     def current_volume(self):
@@ -106,60 +117,22 @@ class TrendRider(Strategy):
     
     # === АНАЛИЗ ТРЕНДА (КЛЮЧЕВАЯ ЛОГИКА) ===
     def _analyze_trend(self):
-        """Определяем текущий тренд и его силу"""
-        if self.index < self.ema_trend + 10:
-            self.current_trend = "NEUTRAL"
-            self.trend_strength = 0
-            return
+        """
+        Текущий тренд и его сила из общего движка (utils/market_regime.py)
         
-        # Расстояние цены от EMA200
-        price_vs_ema200 = (self.close - self.ema200) / self.ema200 * 100
-        
-        # Порядок EMA
-        ema_bull_alignment = self.ema21 > self.ema50 > self.ema200
-        ema_bear_alignment = self.ema21 < self.ema50 < self.ema200
-        
-        # Подтверждение тренда на последних барах
-        trend_confirmed = self._confirm_trend_direction()
-        
-        # Определяем тренд
-        if (price_vs_ema200 > self.trend_strength_min and 
-            ema_bull_alignment and trend_confirmed):
-            self.current_trend = "BULL"
-            self.trend_strength = min(abs(price_vs_ema200), 10)  # Макс 10%
-        elif (price_vs_ema200 < -self.trend_strength_min and 
-              ema_bear_alignment and trend_confirmed):
-            self.current_trend = "BEAR" 
-            self.trend_strength = min(abs(price_vs_ema200), 10)
-        else:
+        Движок считает тот же критерий инкрементально раз в бар: порядок
+        EMA21/50/200, отрыв цены от EMA200 больше trend_strength_min (1%) и
+        подтверждение на 80% из confirmation_bars (5) последних баров. Пороги -
+        в RegimeSettings движка (REGIME_*), общие для всех стратегий процесса.
+        """
+        snapshot = market_regime(self)
+        if snapshot is None:
             self.current_trend = "NEUTRAL"
             self.trend_strength = 0
-    
-    def _confirm_trend_direction(self):
-        """Подтверждаем направление тренда на нескольких барах"""
-        if self.index < self.trend_confirmation_bars:
-            return False
+            return
         
-        bull_bars = 0
-        bear_bars = 0
-        
-        for i in range(self.trend_confirmation_bars):
-            if i == 0:
-                close_price = self.close
-                ema200_value = self.ema200
-            else:
-                close_price = self.candles[-i-1, 4]
-                past_candles = self.candles[:-i] if i > 0 else self.candles
-                ema200_value = ta.ema(past_candles, period=self.ema_trend)
-            
-            if close_price > ema200_value:
-                bull_bars += 1
-            else:
-                bear_bars += 1
-        
-        # Тренд подтвержден если 80%+ баров в одном направлении
-        confirmation_threshold = int(self.trend_confirmation_bars * 0.8)
-        return bull_bars >= confirmation_threshold or bear_bars >= confirmation_threshold
+        self.current_trend = snapshot.trend
+        self.trend_strength = snapshot.trend_strength
     
     def _is_pullback_to_ema50(self):
         """Проверяем откат к EMA50"""
@@ -190,6 +163,7 @@ class TrendRider(Strategy):
         
         return False
     
+    @per_bar
     def _update_daily_counter(self):
         """Обновляем счётчик дневных сделок"""
         current_day = self.index // 24  # 24 часовые свечи = 1 день
@@ -210,6 +184,7 @@ class TrendRider(Strategy):
         body_percent = abs(self.close - self.open) / self.open * 100
         return body_percent >= self.min_candle_body
     
+    @per_bar
     def _can_trade(self):
         """Базовые условия для торговли"""
         self._update_daily_counter()
@@ -470,6 +445,9 @@ class TrendRider(Strategy):
         if self.index % 6 == 0 and self.index >= self.ema_trend + 20:
             self._analyze_trend()
             
+            if not strategy_logs_enabled():
+                return
+            
             # Эмодзи для тренда
             trend_emoji = {"BULL": "🚀", "BEAR": "🐻", "NEUTRAL": "😴"}
             
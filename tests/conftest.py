@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Модули бота импортируются из корня репозитория (utils, notifications, ai_analysis...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,164 @@
+# tests/test_ai_service.py
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from ai_analysis import service as service_module
+from ai_analysis.service import PRIORITY_HIGH, AnalysisService, AnalysisServiceClient, job_key
+
+
+def _service(handler, **kwargs) -> AnalysisService:
+    return AnalysisService(socket_path='/nonexistent', concurrency=1, processes=1,
+                           handlers={'echo': handler}, **kwargs)
+
+
+async def _run_workers(service: AnalysisService):
+    service._queue = asyncio.PriorityQueue()
+    service._workers = [asyncio.create_task(service._worker()) for _ in range(service.concurrency)]
+
+
+async def _stop_workers(service: AnalysisService):
+    for task in service._workers:
+        task.cancel()
+    await asyncio.gather(*service._workers, return_exceptions=True)
+
+
+def test_job_key_ignores_dict_order():
+    assert job_key('signal', {'a': 1, 'b': 2}) == job_key('signal', {'b': 2, 'a': 1})
+    assert job_key('signal', {'a': 1}) != job_key('market', {'a': 1})
+
+
+def test_same_key_joins_running_job():
+    calls = []
+
+    async def echo(payload):
+        calls.append(payload)
+        await asyncio.sleep(0.01)
+        return payload['n']
+
+    async def scenario():
+        service = _service(echo)
+        await _run_workers(service)
+        first, deduped_first = service.submit('echo', {'n': 1})
+        second, deduped_second = service.submit('echo', {'n': 1}, notify=True)
+        other, _ = service.submit('echo', {'n': 2})
+        await asyncio.gather(first.done.wait(), other.done.wait())
+        await _stop_workers(service)
+        return service, first, second, other, (deduped_first, deduped_second)
+
+    service, first, second, other, deduped = asyncio.run(scenario())
+    assert second is first and deduped == (False, True)
+    assert first.notify  # повторная заявка с notify не теряется
+    assert (first.result, other.result) == (1, 2)
+    assert calls == [{'n': 1}, {'n': 2}]
+    assert (service.submitted, service.deduped, service.completed) == (2, 1, 2)
+
+
+def test_finished_result_reused_until_ttl():
+    async def echo(payload):
+        return payload['n']
+
+    async def scenario(ttl):
+        service = _service(echo, result_ttl=ttl)
+        await _run_workers(service)
+        job, _ = service.submit('echo', {'n': 1}, key='k')
+        await job.done.wait()
+        await asyncio.sleep(0.02)
+        again, deduped = service.submit('echo', {'n': 1}, key='k')
+        await again.done.wait()
+        await _stop_workers(service)
+        return job, again, deduped
+
+    job, again, deduped = asyncio.run(scenario(ttl=30))
+    assert again is job and deduped
+
+    job, again, deduped = asyncio.run(scenario(ttl=0.01))
+    assert again is not job and not deduped
+
+
+def test_failed_job_can_be_resubmitted():
+    attempts = []
+
+    async def flaky(payload):
+        attempts.append(payload)
+        if len(attempts) == 1:
+            raise RuntimeError('OpenAI недоступен')
+        return 'ok'
+
+    async def scenario():
+        service = _service(flaky)
+        await _run_workers(service)
+        failed, _ = service.submit('echo', {}, key='k')
+        await failed.done.wait()
+        retry, deduped = service.submit('echo', {}, key='k')
+        await retry.done.wait()
+        await _stop_workers(service)
+        return failed, retry, deduped
+
+    failed, retry, deduped = asyncio.run(scenario())
+    assert failed.response()['status'] == 'failed'
+    assert retry is not failed and not deduped
+    assert retry.response() == {'ok': True, 'job_id': retry.id, 'status': 'done', 'result': 'ok'}
+
+
+def test_higher_priority_duplicate_jumps_queue():
+    order = []
+
+    async def echo(payload):
+        order.append(payload['n'])
+
+    async def scenario():
+        service = _service(echo)
+        service._queue = asyncio.PriorityQueue()
+        jobs = [service.submit('echo', {'n': n})[0] for n in range(3)]
+        service.submit('echo', {'n': 2}, priority=PRIORITY_HIGH)
+        service._workers = [asyncio.create_task(service._worker())]
+        await asyncio.gather(*(job.done.wait() for job in jobs))
+        await _stop_workers(service)
+
+    asyncio.run(scenario())
+    assert order == [2, 0, 1]
+
+
+def test_unknown_kind_is_rejected():
+    service = _service(None)
+    with pytest.raises(ValueError):
+        service.submit('nope', {})
+
+
+def test_dedupe_over_socket(monkeypatch):
+    monkeypatch.setattr(service_module, 'PRELOAD_MODULES', ())
+    calls = []
+
+    async def echo(payload):
+        calls.append(payload)
+        await asyncio.sleep(0.05)
+        return payload
+
+    async def scenario(socket_path):
+        service = AnalysisService(socket_path=socket_path, concurrency=2, processes=1,
+                                  handlers={'echo': echo})
+        await service.start()
+        try:
+            client = AnalysisServiceClient(socket_path)
+            responses = await asyncio.gather(*(client.submit('echo', {'n': 1}, timeout=5) for _ in range(3)))
+            stats = (await client.request({'op': 'stats'}))['stats']
+        finally:
+            await service.stop()
+        return responses, stats
+
+    # Путь Unix сокета ограничен ~100 байтами - tmp_path pytest бывает длиннее
+    directory = tempfile.mkdtemp(prefix='ai_service', dir='/tmp')
+    socket_path = os.path.join(directory, 's.sock')
+    try:
+        responses, stats = asyncio.run(scenario(socket_path))
+    finally:
+        os.rmdir(directory)
+    assert calls == [{'n': 1}]
+    assert {response['job_id'] for response in responses} == {responses[0]['job_id']}
+    assert sorted(response['deduped'] for response in responses) == [False, True, True]
+    assert all(response['result'] == {'n': 1} for response in responses)
+    assert (stats['submitted'], stats['deduped']) == (1, 2)
+    assert not os.path.exists(socket_path)
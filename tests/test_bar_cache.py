@@ -0,0 +1,67 @@
+# tests/test_bar_cache.py
+import pytest
+
+from utils.bar_cache import per_bar
+
+
+class Strategy:
+    def __init__(self):
+        self.index = 0
+        self.calls = []
+
+    @per_bar
+    def can_trade(self):
+        self.calls.append('can_trade')
+        return len(self.calls) % 2 == 1
+
+    @per_bar
+    def level(self, period):
+        self.calls.append(('level', period))
+        return period * 10 + self.index
+
+    @per_bar
+    def nothing(self):
+        self.calls.append('nothing')
+
+    @per_bar
+    def broken(self):
+        self.calls.append('broken')
+        raise RuntimeError('boom')
+
+
+def test_cached_until_next_bar():
+    strategy = Strategy()
+    assert strategy.can_trade() is True
+    assert strategy.can_trade() is True
+    assert strategy.calls == ['can_trade']
+
+    strategy.index = 1
+    assert strategy.can_trade() is False
+    assert strategy.calls == ['can_trade', 'can_trade']
+
+
+def test_key_includes_arguments():
+    strategy = Strategy()
+    assert (strategy.level(20), strategy.level(50), strategy.level(20)) == (200, 500, 200)
+    assert strategy.calls == [('level', 20), ('level', 50)]
+
+    strategy.index = 3
+    assert strategy.level(20) == 203
+
+
+def test_none_is_cached_and_exceptions_are_not():
+    strategy = Strategy()
+    assert strategy.nothing() is None
+    assert strategy.nothing() is None
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            strategy.broken()
+    assert strategy.calls == ['nothing', 'broken', 'broken']
+
+
+def test_instances_do_not_share_cache():
+    first, second = Strategy(), Strategy()
+    first.level(20)
+    second.level(20)
+    assert first.calls == second.calls == [('level', 20)]
@@ -0,0 +1,78 @@
+# tests/test_config_manager.py
+import pytest
+
+from utils import config_manager
+from utils.config_manager import ConfigManager
+
+
+ENV_KEYS = ('AI_ANALYSIS_ENABLED', 'OPENAI_API_KEY', 'TELEGRAM_ENABLED', 'TELEGRAM_BOT_TOKEN',
+            'TELEGRAM_CHAT_ID', 'MIN_AI_CONFIDENCE', 'ENABLE_AI_VALIDATION')
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    env_file = tmp_path / '.env'
+    env_file.write_text('')
+    monkeypatch.setenv('CONFIG_ENV_FILE', str(env_file))
+    monkeypatch.setenv('CONFIG_WATCH_INTERVAL', '0')
+    # reload() пишет значения из .env прямо в os.environ - восстанавливаем после теста
+    for key in ENV_KEYS:
+        monkeypatch.setenv(key, '')
+        monkeypatch.delenv(key)
+    return env_file
+
+
+def test_invalid_ai_config_turns_ai_off(env, monkeypatch):
+    monkeypatch.setenv('AI_ANALYSIS_ENABLED', 'true')
+    monkeypatch.setenv('ENABLE_AI_VALIDATION', 'true')
+
+    manager = ConfigManager()
+
+    assert manager.errors == ("AI включен, но OPENAI_API_KEY не установлен",)
+    assert not manager.snapshot.valid
+    assert manager.ai.enabled is False
+    assert manager.trading.enable_ai_validation is False
+    assert manager.ai_analysis_enabled is False
+
+
+def test_get_config_caches_invalid_snapshot(env, monkeypatch):
+    monkeypatch.setenv('MIN_AI_CONFIDENCE', '150')
+    monkeypatch.setattr(config_manager, '_global_config', None)
+
+    first = config_manager.get_config()
+    assert first.errors == ("MIN_AI_CONFIDENCE должен быть от 0 до 100",)
+    assert config_manager.get_config() is first
+
+
+def test_reload_rejects_new_errors_and_notifies_subscribers(env, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-old')
+    manager = ConfigManager()
+    calls = []
+    unsubscribe = manager.subscribe(lambda old, new, changes: calls.append(changes))
+
+    env.write_text('MIN_AI_CONFIDENCE=-5\n')
+    assert manager.reload() is None
+    assert manager.version == 1 and manager.snapshot.valid
+
+    env.write_text('MIN_AI_CONFIDENCE=70\n')
+    changes = manager.reload()
+    assert changes == {'trading.min_ai_confidence': (60, 70)}
+    assert calls == [changes]
+
+    unsubscribe()
+    env.write_text('MIN_AI_CONFIDENCE=80\n')
+    manager.reload()
+    assert len(calls) == 1
+
+
+def test_reload_clears_fixed_errors(env, monkeypatch):
+    monkeypatch.setenv('AI_ANALYSIS_ENABLED', 'true')
+    manager = ConfigManager()
+    assert manager.errors
+
+    env.write_text('OPENAI_API_KEY=sk-new\n')
+    changes = manager.reload()
+
+    assert manager.errors == ()
+    assert manager.ai_analysis_enabled is True
+    assert changes['ai.enabled'] == (False, True)
@@ -0,0 +1,46 @@
+# tests/test_kernels.py
+import numpy as np
+import pytest
+
+from benchmarks import kernel_parity
+from benchmarks.fixtures import get_candles
+from utils import kernels
+
+BARS = 1500
+WARMUP = 210
+
+
+@pytest.fixture(scope='module')
+def candles():
+    return get_candles('synthetic', BARS + WARMUP, seed=42)
+
+
+def test_numpy_and_compiled_kernels_match_loops(candles):
+    bands, ema = kernel_parity.reference_bands(candles)
+    assert kernel_parity.check_backends(candles, bands, ema) == []
+
+
+@pytest.mark.parametrize('seed', [1, 7])
+def test_kernels_match_loops_on_other_series(seed):
+    candles = get_candles('synthetic', 600, seed=seed)
+    bands, ema = kernel_parity.reference_bands(candles)
+    assert kernel_parity.check_backends(candles, bands, ema) == []
+
+
+def test_kernels_leave_warmup_bars_false(candles):
+    bands, _ = kernel_parity.reference_bands(candles)
+    close = candles[:, 2]
+    result = kernels.lower_fakeout(candles[:, 4], close, bands[2])
+
+    assert result.dtype == np.bool_ and len(result) == len(candles)
+    assert not result[:19].any()  # полосы еще NaN
+
+
+def test_kernels_match_strategy_predicates(candles):
+    run = pytest.importorskip('benchmarks.run')
+    try:
+        run._import_jesse()
+    except ImportError as e:
+        pytest.skip(f"jesse не установлен: {e}")
+
+    assert kernel_parity.check_strategies(candles, WARMUP) == []
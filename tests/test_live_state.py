@@ -0,0 +1,158 @@
+# tests/test_live_state.py
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import strategy_hooks
+from utils.live_state import SLOT_SIZE, LiveStateBoard, StrategyState, _PAYLOAD, _SEQ, timeframe_seconds
+
+
+def _state(**overrides) -> StrategyState:
+    values = dict(strategy='TestSignalStrategy', exchange='Bybit USDT Perpetual', symbol='BTC-USDT',
+                  timeframe='5m', side=1, qty=0.01, entry_price=60000.5, price=60100.25,
+                  unrealized_pnl=0.9775, realized_pnl=-1.5, trades=3, daily_trades_count=2,
+                  consecutive_losses=1, last_signal='LONG', last_signal_price=60000.5,
+                  last_signal_at=1700000000.0, indicators={'rsi': 55.5, 'ema21': 60010.0})
+    values.update(overrides)
+    return StrategyState(**values)
+
+
+def test_payload_fits_slot():
+    assert _SEQ.size + _PAYLOAD.size <= SLOT_SIZE
+
+
+def test_pack_unpack_round_trip():
+    state = _state(updated_at=1700000123.5)
+    buffer = bytearray(_PAYLOAD.size)
+    state.pack_into(buffer, 0)
+
+    assert StrategyState.from_values(_PAYLOAD.unpack_from(buffer, 0)) == state
+
+
+def test_pack_truncates_long_fields():
+    state = _state(strategy='S' * 40, indicators={f'indicator_{i}': float(i) for i in range(12)})
+    buffer = bytearray(_PAYLOAD.size)
+    state.pack_into(buffer, 0)
+    unpacked = StrategyState.from_values(_PAYLOAD.unpack_from(buffer, 0))
+
+    assert unpacked.strategy == 'S' * 32
+    assert len(unpacked.indicators) == 8
+
+
+def test_board_publish_and_read(tmp_path):
+    path = str(tmp_path / 'live_state')
+    writer = LiveStateBoard(path, slots=4)
+    assert writer.publish(_state())
+    assert writer.publish(_state(symbol='ETH-USDT', side=-1))
+    assert writer.publish(_state(price=60200.0))  # тот же маршрут - тот же слот
+
+    reader = LiveStateBoard(path)
+    states = {state.symbol: state for state in reader.read_all()}
+    assert set(states) == {'BTC-USDT', 'ETH-USDT'}
+    assert states['BTC-USDT'].price == 60200.0
+    assert states['ETH-USDT'].side_name == 'SHORT'
+
+    writer.close()
+    reader.close()
+
+
+def test_disabled_board():
+    board = LiveStateBoard('')
+    assert not board.publish(_state())
+    assert board.read_all() == []
+
+
+def test_is_active_uses_timeframe():
+    assert timeframe_seconds('4h') == 14400
+    assert _state(timeframe='4h', updated_at=time.time() - 3600).is_active
+    assert not _state(timeframe='1m', updated_at=time.time() - 3600).is_active
+
+
+# === track_strategy ===
+
+class Position:
+    is_open = False
+    qty = 0.0
+    entry_price = None
+    pnl = 0.0
+
+
+class BaseStrategy:
+    exchange, symbol, timeframe = 'Bybit USDT Perpetual', 'BTC-USDT', '5m'
+    is_live = True
+    is_long = is_short = False
+    price = 100.0
+    current_candle = [1700000000000]
+
+    def __init__(self):
+        self.position = Position()
+        self.logs = []
+
+    def log(self, msg):
+        self.logs.append(msg)
+
+    def after(self):
+        pass
+
+    def on_open_position(self, order):
+        pass
+
+    def on_close_position(self, order, closed_trade):
+        pass
+
+
+@pytest.fixture
+def board(monkeypatch, tmp_path):
+    board = LiveStateBoard(str(tmp_path / 'live_state'), slots=4)
+    recorded = []
+    monkeypatch.setattr(strategy_hooks, '_live_state_mode', 'auto')
+    monkeypatch.setattr('utils.live_state.get_live_state', lambda: board)
+    monkeypatch.setattr(strategy_hooks, 'record_trade_stats', lambda s, pnl, price: recorded.append(pnl))
+    monkeypatch.setattr(strategy_hooks, '_service_analysis_enabled', lambda s: False)
+    board.recorded = recorded
+    yield board
+    board.close()
+
+
+def test_track_strategy_publishes_plain_strategy(board):
+    @strategy_hooks.track_strategy
+    class Plain(BaseStrategy):
+        def on_close_position(self, order):  # старая сигнатура без closed_trade
+            self.closed = order.price
+
+    strategy = Plain()
+    strategy.is_long = True
+    strategy.on_open_position(SimpleNamespace(price=100.0, qty=1.0))
+    strategy.on_close_position(SimpleNamespace(price=110.0), SimpleNamespace(pnl=10.0))
+    strategy.after()
+
+    assert strategy.closed == 110.0
+    assert board.recorded == [10.0]
+    (state,) = board.read_all()
+    assert state.strategy == 'Plain'
+    assert (state.trades, state.realized_pnl, state.last_signal) == (1, 10.0, 'EXIT')
+    assert strategy.logs == []
+
+
+def test_track_strategy_runs_hooks_once_through_super(board):
+    @strategy_hooks.track_strategy
+    class Parent(BaseStrategy):
+        pass
+
+    @strategy_hooks.track_strategy
+    class Child(Parent):
+        def on_close_position(self, order, closed_trade):
+            super().on_close_position(order, closed_trade)
+
+    Child().on_close_position(SimpleNamespace(price=90.0), SimpleNamespace(pnl=-5.0))
+    assert board.recorded == [-5.0]
+
+
+def test_track_strategy_skips_backtests(board):
+    @strategy_hooks.track_strategy
+    class Backtest(BaseStrategy):
+        is_live = False
+
+    Backtest().after()
+    assert board.read_all() == []
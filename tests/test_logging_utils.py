@@ -0,0 +1,142 @@
+# tests/test_logging_utils.py
+import logging
+
+import pytest
+
+from utils import logging_utils
+from utils.logging_utils import LogThrottle, ThrottleFilter, install_strategy_logging
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@install_strategy_logging
+class Strategy:
+    """Стратегия с log как у Jesse: запоминает записанные сообщения"""
+
+    def __init__(self):
+        self.logged = []
+
+    def log(self, msg, log_type='info', send_notification=False, webhook=None):
+        self.logged.append((msg, log_type))
+
+
+@pytest.fixture
+def strategy_throttle(monkeypatch):
+    clock = Clock()
+    throttle = LogThrottle(limit=2, window=60, sample_rate=1, clock=clock)
+    monkeypatch.setattr(logging_utils, '_strategy_throttle', throttle)
+    monkeypatch.setattr(logging_utils, '_strategy_log_mode', 'throttled')
+    return clock
+
+
+def _record(level=logging.INFO, lineno=10, msg='цена %s', args=(100,)):
+    return logging.LogRecord('bot', level, 'bot.py', lineno, msg, args, None)
+
+
+def test_limit_per_key_and_window():
+    clock = Clock()
+    throttle = LogThrottle(limit=2, window=60, sample_rate=1, clock=clock)
+
+    assert [throttle.allow('a')[0] for _ in range(4)] == [True, True, False, False]
+    assert throttle.allow('b') == (True, 0)  # у другого места вызова свой лимит
+
+    clock.now = 60
+    assert throttle.allow('a') == (True, 2)  # новое окно, пропущенные сообщаются один раз
+    assert throttle.allow('a') == (True, 0)
+
+
+def test_sampling_keeps_every_nth():
+    throttle = LogThrottle(limit=0, window=60, sample_rate=3)
+    assert [throttle.allow('a') for _ in range(7)] == [
+        (True, 0), (False, 0), (False, 0), (True, 2), (False, 0), (False, 0), (True, 2)]
+
+
+def test_zero_limit_without_sampling_is_inactive():
+    assert not LogThrottle(limit=0, window=60, sample_rate=1).active
+    assert LogThrottle(limit=0, window=60, sample_rate=2).active
+
+
+def test_filter_appends_suppressed_count():
+    clock = Clock()
+    throttle_filter = ThrottleFilter(LogThrottle(limit=1, window=60, sample_rate=1, clock=clock))
+
+    assert throttle_filter.filter(_record(args=(1,)))
+    assert not throttle_filter.filter(_record(args=(2,)))
+    assert not throttle_filter.filter(_record(args=(3,)))
+    assert throttle_filter.filter(_record(lineno=11))  # другая строка - другой ключ
+
+    clock.now = 60
+    record = _record(args=(4,))
+    assert throttle_filter.filter(record)
+    assert record.getMessage() == 'цена 4 (+2 пропущено)'
+
+
+def test_filter_passes_warnings():
+    throttle_filter = ThrottleFilter(LogThrottle(limit=1, window=60, sample_rate=1))
+    assert all(throttle_filter.filter(_record(level=logging.WARNING)) for _ in range(5))
+    assert all(throttle_filter.filter(_record(level=logging.ERROR)) for _ in range(5))
+
+
+def test_strategy_log_throttles_per_call_site(strategy_throttle):
+    strategy = Strategy()
+
+    def on_bar(i):
+        strategy.log(f"бар {i}")
+
+    for i in range(5):
+        on_bar(i)
+    strategy.log('другое место')
+
+    strategy_throttle.now = 60
+    on_bar(5)
+
+    assert [msg for msg, _ in strategy.logged] == [
+        'бар 0', 'бар 1', 'другое место', 'бар 5 (+3 пропущено)']
+
+
+def test_strategy_log_message_is_lazy(strategy_throttle):
+    strategy = Strategy()
+    calls = []
+
+    def build(i):
+        return lambda: calls.append(i) or f"индикаторы {i}"
+
+    for i in range(5):
+        strategy.log(build(i))
+
+    assert calls == [0, 1]  # пропущенные сообщения не собираются
+    assert [msg for msg, _ in strategy.logged] == ['индикаторы 0', 'индикаторы 1']
+
+
+def test_errors_and_notifications_are_never_throttled(strategy_throttle):
+    strategy = Strategy()
+    for _ in range(4):
+        strategy.log('ошибка', log_type='error')
+        strategy.log('сделка', send_notification=True)
+    assert len(strategy.logged) == 8
+
+
+def test_auto_mode_is_quiet_in_backtest(monkeypatch):
+    monkeypatch.setattr(logging_utils, '_strategy_log_mode', 'auto')
+    monkeypatch.setattr(logging_utils, '_jesse_config', {'app': {'trading_mode': 'backtest'}})
+    strategy = Strategy()
+
+    assert not logging_utils.strategy_logs_enabled()
+    strategy.log(lambda: pytest.fail('сообщение не должно собираться'))
+    strategy.log('стоп', log_type='error')
+    strategy.log('сделка', send_notification=True)
+    assert [msg for msg, _ in strategy.logged] == ['стоп', 'сделка']
+
+    monkeypatch.setattr(logging_utils, '_jesse_config', {'app': {'trading_mode': 'livetrade'}})
+    assert logging_utils.strategy_log_mode() == 'throttled'
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        logging_utils.set_strategy_log_mode('verbose')
@@ -0,0 +1,120 @@
+# tests/test_loop_monitor.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import loop_monitor
+from utils.loop_monitor import LoopLagMonitor, ResourceWatchdog
+
+
+@pytest.fixture
+def watchdog(monkeypatch):
+    # Пустые реестры: проверка видит только то, что добавил тест
+    monkeypatch.setattr(loop_monitor, '_monitors', set())
+    monkeypatch.setattr(loop_monitor, '_executors', {})
+    sent = []
+    watchdog = ResourceWatchdog(interval=60, alert=lambda text: sent.append(text) or True)
+    watchdog.max_threads = 10_000
+    watchdog.sent = sent
+    return watchdog
+
+
+@pytest.fixture
+def running_loop():
+    """Loop в своем потоке с LoopLagMonitor (интервал 50мс), как поток ИИ анализа стратегии"""
+    loop = asyncio.new_event_loop()
+    monitor = LoopLagMonitor('test_loop', interval=0.05, warn_ms=10_000)
+    monitor.start(loop)
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop, monitor
+    loop.call_soon_threadsafe(monitor.stop)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('LOOP_MONITOR_ENABLED', raising=False)
+    assert not loop_monitor.loop_monitor_enabled()
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop_monitor.monitor_loop('strategy_ai', loop) is None
+    finally:
+        loop.close()
+
+    monkeypatch.setenv('LOOP_MONITOR_ENABLED', 'true')
+    assert loop_monitor.loop_monitor_enabled()
+
+
+def test_thread_threshold(watchdog):
+    assert watchdog.check() == []
+
+    watchdog.max_threads = threading.active_count() - 1
+    problems = watchdog.check()
+    assert len(problems) == 1 and problems[0].startswith('🧵 Живых потоков')
+    assert watchdog.sent == problems and watchdog.alerts_sent == 1
+
+
+def test_executor_queue_threshold(watchdog, monkeypatch):
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setitem(loop_monitor._executors, 'test_pool', executor)
+    watchdog.max_queue = 3
+    try:
+        futures = [executor.submit(release.wait) for _ in range(5)]
+        time.sleep(0.05)  # первая задача уже в потоке, четыре ждут в очереди
+        problems = watchdog.check()
+    finally:
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+        executor.shutdown()
+
+    assert problems == ["📥 Очередь пула test_pool: 4 задач, 1 потоков (порог 3)"]
+
+
+def test_cooldown_suppresses_repeats(watchdog):
+    watchdog.max_threads = 0
+    watchdog.cooldown = 600
+
+    assert len(watchdog.check()) == 1
+    assert len(watchdog.check()) == 1  # проблема еще есть, но оповещение не повторяется
+    assert watchdog.alerts_sent == 1
+
+    watchdog._last_alerts['threads'] -= 600  # прошло ALERT_COOLDOWN
+    watchdog.check()
+    assert watchdog.alerts_sent == 2
+
+    watchdog._send('loop:bot', 'другая проблема')  # у другого ключа свой интервал
+    assert watchdog.alerts_sent == 3
+
+
+def test_failed_alert_is_not_counted(watchdog):
+    watchdog.alert = lambda text: 1 / 0
+    watchdog.max_threads = 0
+    watchdog.check()
+    assert watchdog.alerts_sent == 0
+
+
+def test_stalled_and_busy_loop(watchdog, running_loop):
+    loop, monitor = running_loop
+    watchdog.max_lag = 0.2
+    time.sleep(0.15)
+    assert watchdog.check() == []
+
+    loop.call_soon_threadsafe(time.sleep, 0.6)  # синхронный код занял loop
+    time.sleep(0.4)
+    stalled = watchdog.check()
+    assert len(stalled) == 1 and 'test_loop не отвечает' in stalled[0]
+
+    time.sleep(0.4)  # loop освободился: задержка видна в максимуме окна
+    watchdog._last_alerts.clear()
+    busy = watchdog.check()
+    assert len(busy) == 1 and 'test_loop был занят' in busy[0]
+    assert monitor.stalled_for() < watchdog.max_lag
+
+    assert watchdog.check() == []  # максимум окна сбрасывается после проверки
@@ -0,0 +1,128 @@
+# tests/test_market_regime.py
+import importlib
+
+import pytest
+
+from benchmarks.fixtures import synthetic_candles
+from utils.market_regime import MarketRegimeEngine, RegimeSettings
+
+ROUTE = ('Bybit USDT Perpetual', 'BTC-USDT', '1h')
+
+
+@pytest.fixture(scope='module')
+def candles():
+    # Часовые свечи с дрейфом и высокой волатильностью: есть и BULL, и BEAR тренды
+    return synthetic_candles(bars=2500, seed=1, drift=0.001, volatility=0.01, interval_ms=3_600_000)
+
+
+def test_incremental_matches_rebuild(candles):
+    incremental = MarketRegimeEngine(RegimeSettings())
+    for end in range(1, len(candles) + 1):
+        snapshot = incremental.update(ROUTE, candles[:end])
+
+    rebuilt = MarketRegimeEngine(RegimeSettings()).update(ROUTE, candles)
+    for name, value in rebuilt.as_dict().items():
+        assert getattr(snapshot, name) == pytest.approx(value, rel=1e-9), name
+
+
+def test_sliding_window_continues_history(candles):
+    """Jesse в live отдает окно фиксированной длины - оно сдвигается, история не рвется"""
+    sliding = MarketRegimeEngine(RegimeSettings())
+    full = MarketRegimeEngine(RegimeSettings())
+    sliding.update(ROUTE, candles[:300])
+    full.update(ROUTE, candles[:300])
+
+    for end in range(301, 600):
+        a = sliding.update(ROUTE, candles[end - 300:end])
+        b = full.update(ROUTE, candles[:end])
+    assert a == b
+    assert a.bars == 599
+
+
+def test_same_bar_is_cached_and_gap_rebuilds(candles):
+    engine = MarketRegimeEngine(RegimeSettings())
+    first = engine.update(ROUTE, candles[:500])
+    assert engine.update(ROUTE, candles[:500]) is first
+
+    # Последний учтенный бар выпал из окна - состояние строится заново по окну
+    after_gap = engine.update(ROUTE, candles[1000:1400])
+    fresh = MarketRegimeEngine(RegimeSettings()).update(ROUTE, candles[1000:1400])
+    assert after_gap == fresh
+    assert after_gap.bars == 400
+
+
+def test_regime_change_over_lookback(candles):
+    settings = RegimeSettings(lookback=48, threshold_pct=3.0)
+    engine = MarketRegimeEngine(settings)
+    closes = candles[:, 2]
+    regimes = set()
+    for end in range(50, 800):
+        snapshot = engine.update(ROUTE, candles[:end])
+        change = (closes[end - 1] - closes[end - 49]) / closes[end - 49] * 100
+        expected = 'BULL' if change > 3.0 else 'BEAR' if change < -3.0 else 'NEUTRAL'
+        assert snapshot.regime == expected
+        regimes.add(expected)
+    assert regimes == {'BULL', 'BEAR', 'NEUTRAL'}
+
+
+def _jesse():
+    run = pytest.importorskip('benchmarks.run')
+    try:
+        run._import_jesse()
+    except ImportError as e:
+        pytest.skip(f"jesse не установлен: {e}")
+    return importlib.import_module('jesse.indicators')
+
+
+def test_trend_matches_trend_rider_criterion(candles):
+    """Тренд движка = прежний TrendRider._analyze_trend (по close вместо low, EMA Jesse)"""
+    ta = _jesse()
+    close = candles[:, 2]
+    ema21, ema50, ema200 = (ta.ema(candles, period=p, sequential=True) for p in (21, 50, 200))
+
+    engine = MarketRegimeEngine(RegimeSettings())
+    trends = []
+    for i in range(len(candles)):
+        snapshot = engine.update(ROUTE, candles[:i + 1])
+        if i < 210:
+            continue
+
+        distance = (close[i] - ema200[i]) / ema200[i] * 100
+        above = sum(close[i - k] > ema200[i - k] for k in range(5))
+        confirmed = above >= 4 or 5 - above >= 4
+        if distance > 1.0 and ema21[i] > ema50[i] > ema200[i] and confirmed:
+            expected = 'BULL'
+        elif distance < -1.0 and ema21[i] < ema50[i] < ema200[i] and confirmed:
+            expected = 'BEAR'
+        else:
+            expected = 'NEUTRAL'
+
+        assert snapshot.trend == expected, i
+        if expected != 'NEUTRAL':
+            assert snapshot.trend_strength == pytest.approx(min(abs(distance), 10.0))
+        trends.append(expected)
+
+    assert {'BULL', 'BEAR', 'NEUTRAL'} <= set(trends)
+
+
+def test_adaptive_momentum_keeps_own_regime_and_trades(candles):
+    """AdaptiveMomentum: свой режим (100 баров, ±2%, раз в 24 бара) и сделки на фикстуре"""
+    _jesse()
+    from benchmarks.replay import StrategyReplay
+
+    strategy_class = importlib.import_module('strategies.AdaptiveMomentum').AdaptiveMomentum
+    replay = StrategyReplay(strategy_class, candles, timeframe='1h')
+    strategy = replay.strategy
+    close = candles[:, 2]
+
+    expected, last_update = 'NEUTRAL', 0
+    for i in range(len(candles)):
+        strategy._replay_i = strategy.index = i
+        strategy._update_market_regime()
+        if i - last_update >= 24 and i >= 100:
+            change = (close[i] - close[i - 99]) / close[i - 99]
+            expected = 'BULL' if change > 0.02 else 'BEAR' if change < -0.02 else 'NEUTRAL'
+            last_update = i
+        assert strategy.market_regime == expected, i
+
+    assert StrategyReplay(strategy_class, candles, timeframe='1h').run(warmup=210)['trades'] > 0
@@ -0,0 +1,137 @@
+# tests/test_message_queue.py
+import asyncio
+import concurrent.futures
+import time
+
+import pytest
+from telegram.error import RetryAfter
+
+from notifications import message_queue
+from notifications.message_queue import PRIORITY_CRITICAL, PRIORITY_LOW, PRIORITY_NORMAL, TelegramMessageQueue
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setenv('TELEGRAM_COALESCE_WINDOW', '0')
+    queue = TelegramMessageQueue(bot_token='123:test', default_chat_id='1')
+    queue._wakeup = asyncio.Event()  # без потока отправителя: _enqueue вызывается напрямую
+    return queue
+
+
+def _drain(queue: TelegramMessageQueue):
+    """Порядок отправки без сети: _pick_next по очереди, лимиты не учитываются"""
+    order = []
+    while queue._pending:
+        message, _ = queue._pick_next(float('inf'))
+        queue._pending.remove(message)
+        order.append(message)
+    return order
+
+
+class FakeBot:
+    """Bot Telegram в памяти: RetryAfter для чатов из retry_after, один раз"""
+
+    sent = []
+    retry_after = {}
+
+    def __init__(self, token, base_url=None):
+        pass
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if FakeBot.retry_after.pop(chat_id, None) is not None:
+            raise RetryAfter(1)
+        FakeBot.sent.append((chat_id, text, time.monotonic()))
+
+
+def test_low_priority_burst_is_merged(queue):
+    futures = [concurrent.futures.Future() for _ in range(3)]
+    for i, future in enumerate(futures):
+        queue._enqueue('1', f"статус {i}", 'HTML', PRIORITY_LOW, future)
+    queue._enqueue('2', 'другой чат', 'HTML', PRIORITY_LOW)
+
+    (merged, other) = sorted(queue._pending, key=lambda message: message.chat_id)
+    assert merged.text == "статус 0\n\nстатус 1\n\nстатус 2"
+    assert merged.futures == futures
+    assert other.text == 'другой чат'
+    assert queue.coalesced_count == 2
+
+
+def test_normal_messages_are_not_merged(queue):
+    queue._enqueue('1', 'сигнал 1', 'HTML', PRIORITY_NORMAL)
+    queue._enqueue('1', 'сигнал 2', 'HTML', PRIORITY_NORMAL)
+    assert [message.text for message in queue._pending] == ['сигнал 1', 'сигнал 2']
+
+
+def test_merge_stops_at_message_limit(queue):
+    block = 'x' * 2000
+    for _ in range(3):
+        queue._enqueue('1', block, None, PRIORITY_LOW)
+
+    lengths = [len(message.text) for message in queue._pending]
+    assert lengths == [4002, 2000]
+    assert all(length <= queue.max_message_length for length in lengths)
+
+
+def test_long_text_is_split_by_lines(queue):
+    lines = [f"{i:04d} " + 'y' * 95 for i in range(100)]  # 100 строк по 100 символов
+    future = concurrent.futures.Future()
+    queue._enqueue('1', '\n'.join(lines), None, PRIORITY_NORMAL, future)
+
+    chunks = [message.text for message in queue._pending]
+    assert len(chunks) == 3
+    assert all(len(chunk) <= 4096 for chunk in chunks)
+    assert '\n'.join(chunks).split('\n') == lines
+    assert [bool(message.futures) for message in queue._pending] == [False, False, True]
+
+
+def test_single_line_longer_than_limit_is_cut(queue):
+    assert [len(chunk) for chunk in queue._split_text('z' * 9000)] == [4096, 4096, 808]
+
+
+def test_monitor_alerts_are_low_priority(monkeypatch):
+    from utils import loop_monitor
+    sent = []
+    monkeypatch.setattr(message_queue, 'notify', lambda text, priority: sent.append(priority) or True)
+    assert loop_monitor._notify_alert('потоков 500')
+    assert sent == [PRIORITY_LOW]
+
+
+def test_priority_order(queue):
+    queue._enqueue('1', 'обзор', None, PRIORITY_LOW)
+    queue._enqueue('1', 'сигнал', None, PRIORITY_NORMAL)
+    queue._enqueue('1', 'сделка', None, PRIORITY_CRITICAL)
+    queue._enqueue('1', 'сигнал 2', None, PRIORITY_NORMAL)
+
+    assert [message.text for message in _drain(queue)] == ['сделка', 'сигнал', 'сигнал 2', 'обзор']
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+@pytest.mark.parametrize('timedelta', ['0', '1'])  # retry_after - int или timedelta (PTB_TIMEDELTA)
+def test_retry_after_defers_only_that_chat(monkeypatch, timedelta):
+    monkeypatch.setenv('PTB_TIMEDELTA', timedelta)
+    monkeypatch.setattr(message_queue, 'Bot', FakeBot)
+    monkeypatch.setenv('TELEGRAM_CHAT_RATE_LIMIT', '1000')
+    monkeypatch.setenv('TELEGRAM_GLOBAL_RATE_LIMIT', '1000')
+    FakeBot.sent = []
+    FakeBot.retry_after = {'1': True}
+
+    queue = TelegramMessageQueue(bot_token='123:test', default_chat_id='1')
+    started = time.monotonic()
+    first = queue.submit('чат 1', chat_id='1')
+    second = queue.submit('чат 2', chat_id='2')
+    try:
+        assert second.result(timeout=5) is True
+        assert first.result(timeout=5) is True
+    finally:
+        queue.stop()
+
+    sent = {chat_id: at - started for chat_id, _, at in FakeBot.sent}
+    assert sent['2'] < 0.5  # другой чат не ждет
+    assert sent['1'] >= 0.95  # RetryAfter(1) только для чата 1
+    assert queue.get_stats()['failed'] == 0
@@ -0,0 +1,86 @@
+# tests/test_metrics.py
+import random
+
+import pytest
+
+from utils.metrics import LatencyHistogram, MetricsExporter, MetricsRegistry, instrument_strategy, set_metrics_enabled
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for us in range(1, 11):
+        histogram.record(us / 1_000_000)
+
+    assert histogram.count == 10
+    assert histogram.min_us == 1
+    assert histogram.max_us == 10
+    assert histogram.percentile(0.5) == pytest.approx(5e-6)
+    assert histogram.percentile(1.0) == pytest.approx(10e-6)
+
+
+def test_percentile_relative_error_is_bounded():
+    rng = random.Random(7)
+    values = sorted(rng.randint(1, 5_000_000) for _ in range(20000))
+    histogram = LatencyHistogram()
+    for us in values:
+        histogram.record(us / 1_000_000)
+
+    # 2^SUB_BITS корзин на октаву - погрешность не больше 1/32
+    for quantile in (0.5, 0.9, 0.99, 0.999):
+        exact = values[max(1, int(round(quantile * len(values)))) - 1]
+        approx = histogram.percentile(quantile) * 1_000_000
+        assert exact <= approx <= exact * (1 + 1 / 32) + 1
+
+
+def test_bucket_bounds_cover_index():
+    histogram = LatencyHistogram()
+    for value in (0, 31, 32, 33, 100, 1023, 1024, 10 ** 6, 10 ** 9):
+        index = histogram._index(value)
+        assert value <= histogram._bucket_upper(index)
+        if index >= histogram._sub_count:
+            assert histogram._bucket_upper(index - 1) < value
+
+
+def test_empty_and_huge_values():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.99) == 0.0
+
+    histogram.record(10 ** 7)  # больше MAX_EXPONENT - в последнюю корзину
+    assert histogram.percentile(0.5) == pytest.approx(10 ** 7)
+
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    registry.histogram('decision_seconds', strategy='RSIBot').record(0.002)
+    registry.counter('signals_total', side='long').inc(3)
+    registry.gauge('queue_depth').set(4)
+
+    text = registry.render_prometheus()
+    assert 'decision_seconds_count{strategy="RSIBot"} 1' in text
+    assert 'signals_total{side="long"} 3' in text
+    assert 'queue_depth 4' in text
+
+
+def test_exporter_role(monkeypatch):
+    monkeypatch.delenv('METRICS_FILE', raising=False)
+    monkeypatch.setenv('METRICS_ROLE', 'bot')
+    assert MetricsExporter(MetricsRegistry()).path.endswith('metrics_bot.prom')
+    assert MetricsExporter(MetricsRegistry(), role='ai_service').path.endswith('metrics_ai_service.prom')
+
+
+def test_instrument_strategy_only_times_decisions():
+    class Strategy:
+        def should_long(self):
+            return True
+
+        def log(self, msg):
+            return msg
+
+    try:
+        set_metrics_enabled(True)
+        instrument_strategy(Strategy)
+    finally:
+        set_metrics_enabled()
+
+    assert getattr(Strategy.__dict__['should_long'], '_metrics_timed', False)
+    assert Strategy.__dict__['log'](None, 'x') == 'x'
@@ -0,0 +1,107 @@
+# tests/test_notify_buffer.py
+import threading
+
+import pytest
+
+from notifications import message_queue
+from notifications.message_queue import TelegramMessageQueue
+from notifications.notify_buffer import NotifyRingBuffer
+
+
+class RecordingBot:
+    """Bot Telegram в памяти: запоминает текст и поток, из которого отправлено"""
+
+    sent = []
+
+    def __init__(self, token, base_url=None):
+        pass
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        RecordingBot.sent.append((text, threading.current_thread().name))
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setattr(message_queue, 'Bot', RecordingBot)
+    monkeypatch.setenv('TELEGRAM_GLOBAL_RATE_LIMIT', '1000')
+    RecordingBot.sent = []
+    return RecordingBot
+
+
+def test_overflow_drops_new_items_and_counts_them():
+    buffer = NotifyRingBuffer(capacity=3)
+    assert [buffer.push(i) for i in range(5)] == [True, True, True, False, False]
+    assert buffer.pop_batch() == [0, 1, 2]
+    assert buffer.get_stats() == {'buffered': 0, 'capacity': 3, 'enqueued': 3, 'dropped': 2, 'drained': 3}
+
+    assert buffer.push(5)  # место освободилось
+    assert buffer.pop_batch() == [5]
+
+
+def test_pop_batch_keeps_order_and_limit():
+    buffer = NotifyRingBuffer(capacity=10)
+    for i in range(7):
+        buffer.push(i)
+    assert buffer.pop_batch(max_items=4) == [0, 1, 2, 3]
+    assert buffer.pop_batch(max_items=4) == [4, 5, 6]
+    assert buffer.pop_batch() == []
+    assert buffer.drained == 7
+
+
+def test_concurrent_producers_are_counted_exactly():
+    buffer = NotifyRingBuffer(capacity=500)
+
+    def produce():
+        for i in range(250):
+            buffer.push(i)
+
+    threads = [threading.Thread(target=produce) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = buffer.get_stats()
+    assert (stats['enqueued'], stats['dropped'], stats['buffered']) == (500, 1500, 500)
+
+
+def test_sender_thread_drains_buffer(bot, monkeypatch):
+    monkeypatch.setenv('TELEGRAM_CHAT_RATE_LIMIT', '1000')
+    buffer = NotifyRingBuffer(capacity=5)
+    for i in range(8):
+        buffer.push(('1', f"уведомление {i}", None, message_queue.PRIORITY_NORMAL))
+
+    queue = TelegramMessageQueue(bot_token='123:test', default_chat_id='1', ring=buffer)
+    queue.start()
+    try:
+        assert queue.flush(timeout=5)
+    finally:
+        queue.stop()
+
+    assert [text for text, _ in bot.sent] == [f"уведомление {i}" for i in range(5)]
+    assert {thread for _, thread in bot.sent} == {'TelegramSender'}
+    assert queue.get_stats()['buffer_drained'] == 5
+    assert queue._reported_drops == 3  # переполнение попало в лог отправителя
+
+
+def test_shutdown_flushes_notify_buffer(bot, monkeypatch):
+    # 20 сообщений в секунду на чат: к моменту остановки большая часть еще в буфере и очереди
+    monkeypatch.setenv('TELEGRAM_CHAT_RATE_LIMIT', '20')
+    buffer = NotifyRingBuffer(capacity=100)
+    queue = TelegramMessageQueue(bot_token='123:test', default_chat_id='1', ring=buffer)
+    queue.start()
+    monkeypatch.setattr(message_queue, '_notify_buffer', buffer)
+    monkeypatch.setattr(message_queue, '_global_queue', queue)
+
+    assert all(message_queue.notify(f"сделка {i}") for i in range(10))
+    message_queue.shutdown_message_queue(timeout=5)
+
+    assert [text for text, _ in bot.sent] == [f"сделка {i}" for i in range(10)]
+    assert queue.get_stats()['pending'] == 0 and not len(buffer)
+    assert not queue._thread.is_alive()
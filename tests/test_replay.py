@@ -0,0 +1,32 @@
+# tests/test_replay.py
+import importlib
+import threading
+
+import pytest
+
+from benchmarks.fixtures import get_candles
+
+
+@pytest.fixture
+def replay_class():
+    run = pytest.importorskip('benchmarks.run')
+    try:
+        run._import_jesse()
+    except ImportError as e:
+        pytest.skip(f"jesse не установлен: {e}")
+    from benchmarks.replay import StrategyReplay
+    return StrategyReplay
+
+
+def test_replay_never_starts_ai_analysis(replay_class, monkeypatch):
+    from utils.config_manager import get_config
+    monkeypatch.setattr(type(get_config()), 'ai_analysis_enabled', property(lambda self: True))
+
+    strategy_class = importlib.import_module('strategies.ActiveScalper').ActiveScalper
+    replay = replay_class(strategy_class, get_candles('synthetic', 1500, seed=42))
+    assert replay.run(warmup=210)['trades'] > 0
+
+    strategy = replay.strategy
+    assert not strategy.enable_ai_analysis and not strategy.enable_notifications
+    assert not strategy._submit_to_analysis_service('LONG', {})
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('AI_Analysis_')]
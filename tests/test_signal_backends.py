@@ -0,0 +1,187 @@
+# tests/test_signal_backends.py
+import asyncio
+import os
+import socket
+import threading
+
+import pytest
+
+from utils.signal_backends import MQTTBackend, RedisStreamBackend, SignalBackend, _RedisLoopState
+
+
+def _reachable(host: str, port: int) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+class FakePipeline:
+    def __init__(self, log):
+        self.log = log
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def xadd(self, stream, fields, **kwargs):
+        self.commands.append(stream)
+
+    async def execute(self, raise_on_error=True):
+        await asyncio.sleep(0)
+        self.log.append(len(self.commands))
+        return [b'1-0'] * len(self.commands)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.pipelines = []
+        self.closed = False
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self.pipelines)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_backend_base_is_abstract():
+    with pytest.raises(TypeError):
+        SignalBackend()
+
+    class Incomplete(SignalBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_redis_concurrent_publishes_share_one_pipeline():
+    backend = RedisStreamBackend()
+    client = FakeRedis()
+
+    async def run():
+        backend._states[asyncio.get_running_loop()] = _RedisLoopState(client)
+        results = await asyncio.gather(*(backend.publish('signal', {'i': i}) for i in range(10)))
+        await backend.close()
+        return results
+
+    assert asyncio.run(run()) == [True] * 10
+    assert client.pipelines == [10]
+    assert client.closed
+
+
+def test_redis_flush_task_is_kept_until_done():
+    """Сброс идет задачей со ссылкой в состоянии loop; close() дожидается его"""
+    backend = RedisStreamBackend()
+    client = FakeRedis()
+
+    async def run():
+        state = backend._states[asyncio.get_running_loop()] = _RedisLoopState(client)
+        first = asyncio.gather(*(backend.publish('signal', {'i': i}) for i in range(3)))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)  # первый сброс начался и ждет pipeline
+        in_flight = set(state.flush_tasks)
+
+        second = asyncio.ensure_future(backend.publish('signal', {'i': 3}))
+        await asyncio.sleep(0)
+        overlapping = len(state.flush_tasks)
+
+        await backend.close()
+        assert all(task.done() for task in in_flight)
+        return in_flight, overlapping, await first, await second, state
+
+    in_flight, overlapping, first, second, state = asyncio.run(run())
+    assert len(in_flight) == 1 and overlapping == 2  # публикация во время сброса - свой pipeline
+    assert (first, second) == ([True] * 3, True)
+    assert client.pipelines == [3, 1]
+    assert not state.flush_tasks and client.closed
+
+
+def test_redis_pending_is_per_loop():
+    """Публикации из двух потоков со своими loop'ами не теряют futures друг друга"""
+    backend = RedisStreamBackend()
+    results = {}
+
+    def worker(name):
+        async def run():
+            backend._states[asyncio.get_running_loop()] = _RedisLoopState(FakeRedis())
+            results[name] = await asyncio.wait_for(
+                asyncio.gather(*(backend.publish('signal', {'i': i}) for i in range(5))), timeout=5
+            )
+        asyncio.run(run())
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert results == {n: [True] * 5 for n in range(4)}
+
+
+class FailingMQTTClient:
+    def __init__(self):
+        self.exited = False
+
+    async def publish(self, topic, payload=None, qos=0):
+        raise ConnectionError("connection lost")
+
+    async def __aexit__(self, *exc):
+        self.exited = True
+
+
+def test_mqtt_failed_client_is_closed():
+    backend = MQTTBackend()
+    client = FailingMQTTClient()
+
+    async def run():
+        backend._loop = asyncio.get_running_loop()
+        backend._connect_lock = asyncio.Lock()
+        backend._client = client
+        return await backend.publish_many([('signal', {'signal': {'symbol': 'BTCUSDT'}})])
+
+    assert asyncio.run(run()) == 0
+    assert client.exited
+    assert backend._client is None
+
+
+@pytest.mark.skipif(not _reachable(os.getenv('REDIS_HOST', 'localhost'), int(os.getenv('REDIS_PORT', '6379'))),
+                    reason="redis-server недоступен")
+def test_redis_streams_local_server():
+    pytest.importorskip('redis')
+    backend = RedisStreamBackend()
+    backend.stream_prefix = 'pytest'
+
+    async def run():
+        ok = await asyncio.gather(*(backend.publish('signal', {'i': i}) for i in range(3)))
+        length = await backend._get_client().xlen('pytest:signal')
+        await backend._get_client().delete('pytest:signal')
+        await backend.close()
+        return ok, length
+
+    ok, length = asyncio.run(run())
+    assert ok == [True] * 3
+    assert length >= 3
+
+
+@pytest.mark.skipif(not _reachable(os.getenv('MQTT_HOST', 'localhost'), int(os.getenv('MQTT_PORT', '1883'))),
+                    reason="mosquitto недоступен")
+def test_mqtt_local_broker():
+    try:
+        import asyncio_mqtt  # noqa: F401
+    except ImportError:
+        pytest.importorskip('aiomqtt')
+    backend = MQTTBackend()
+    backend.topic_prefix = 'pytest'
+
+    async def run():
+        published = await backend.publish_many([('signal', {'signal': {'symbol': 'BTCUSDT'}})] * 3)
+        await backend.close()
+        return published
+
+    assert asyncio.run(run()) == 3
@@ -0,0 +1,58 @@
+# tests/test_signal_encoding.py
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from utils import signal_encoding
+from utils.signal_encoding import (ENCODING_JSON, ENCODING_JSONL_GZIP, ENCODING_MSGPACK,
+                                   encode_events, parse_webhook_spec)
+
+EVENTS = [
+    {'kind': 'signal', 'idempotency_key': 'a' * 32, 'data': {'symbol': 'BTC-USDT', 'price': 60000.5}},
+    {'kind': 'trade', 'idempotency_key': 'b' * 32, 'data': {'pnl': -1.25, 'note': 'стоп'}},
+]
+
+
+def test_json_single_and_batch():
+    body, headers = encode_events(EVENTS[:1], ENCODING_JSON, batched=False)
+    assert headers == {'Content-Type': 'application/json'}
+    assert json.loads(body) == EVENTS[0]
+
+    body, _ = encode_events(EVENTS, ENCODING_JSON, batched=True)
+    assert json.loads(body) == {'batch': EVENTS, 'count': 2}
+
+
+def test_jsonl_gzip_round_trip():
+    body, headers = encode_events(EVENTS, ENCODING_JSONL_GZIP, batched=True)
+    assert headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(body).decode('utf-8').split('\n')
+    assert [json.loads(line) for line in lines] == EVENTS
+
+
+def test_non_json_values_become_strings():
+    moment = datetime(2024, 1, 2, 3, 4, 5)
+    body, _ = encode_events([{'at': moment}], ENCODING_JSONL_GZIP, batched=False)
+    assert json.loads(gzip.decompress(body)) == {'at': str(moment)}
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip('msgpack')
+    body, headers = encode_events(EVENTS, ENCODING_MSGPACK, batched=True)
+    assert headers == {'Content-Type': 'application/msgpack'}
+    assert msgpack.unpackb(body, raw=False) == EVENTS
+
+    body, _ = encode_events(EVENTS[:1], ENCODING_MSGPACK, batched=False)
+    assert msgpack.unpackb(body, raw=False) == EVENTS[0]
+
+
+def test_parse_webhook_spec():
+    assert parse_webhook_spec(' https://collector/hook ') == ('https://collector/hook', ENCODING_JSON)
+    assert parse_webhook_spec('https://collector/hook|JSONL-GZIP') == ('https://collector/hook', ENCODING_JSONL_GZIP)
+    assert parse_webhook_spec('https://collector/hook|xml') == ('https://collector/hook', ENCODING_JSON)
+
+
+def test_msgpack_falls_back_without_package(monkeypatch):
+    monkeypatch.setattr(signal_encoding, 'MSGPACK_AVAILABLE', False)
+    assert parse_webhook_spec('https://collector/hook|msgpack') == ('https://collector/hook', ENCODING_JSONL_GZIP)
@@ -0,0 +1,92 @@
+# tests/test_signal_outbox.py
+import time
+
+import pytest
+
+from utils.signal_outbox import SignalOutbox
+
+WEBHOOKS = ['http://a.example/hook', 'http://b.example/hook']
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = SignalOutbox(str(tmp_path / 'outbox.db'), max_attempts=3)
+    yield outbox
+    outbox.close()
+
+
+def test_append_is_idempotent_per_webhook(outbox):
+    key = outbox.append('signal', {'symbol': 'BTC-USDT', 'side': 'LONG'}, WEBHOOKS)
+    assert outbox.append('signal', {'side': 'LONG', 'symbol': 'BTC-USDT'}, WEBHOOKS) == key
+
+    entries = outbox.fetch_due()
+    assert sorted(entry.webhook_url for entry in entries) == WEBHOOKS
+    assert {entry.idempotency_key for entry in entries} == {key}
+    assert outbox.pending_count() == 2
+
+
+def test_delivered_entries_leave_queue_and_compact(outbox):
+    outbox.append('signal', {'n': 1}, WEBHOOKS)
+    outbox.mark_delivered([entry.id for entry in outbox.fetch_due()])
+
+    assert outbox.fetch_due() == []
+    assert outbox.next_due_in() is None
+    assert outbox.compact(retention_seconds=3600) == 0
+    assert outbox.compact(retention_seconds=-1) == 2
+
+
+def test_failed_entry_backs_off_then_goes_dead(outbox):
+    outbox.append('signal', {'n': 1}, WEBHOOKS[:1])
+    (entry,) = outbox.fetch_due()
+
+    assert not outbox.mark_failed(entry.id, 'HTTP 500', time.time() + 60)
+    assert outbox.fetch_due() == []  # ждет следующей попытки
+    assert outbox.next_due_in() == pytest.approx(60, abs=1)
+
+    assert not outbox.mark_failed(entry.id, 'HTTP 500', time.time())
+    assert outbox.mark_failed(entry.id, 'HTTP 500', time.time())  # третья попытка - dead-letter
+    assert (outbox.pending_count(), outbox.dead_count()) == (0, 1)
+    assert outbox.fetch_due() == []
+
+
+def test_requeue_dead_resets_attempts(outbox):
+    outbox.append('signal', {'n': 1}, WEBHOOKS[:1])
+    (entry,) = outbox.fetch_due()
+    for _ in range(3):
+        outbox.mark_failed(entry.id, 'timeout', time.time())
+
+    assert outbox.requeue_dead() == 1
+    (entry,) = outbox.fetch_due()
+    assert entry.attempts == 0
+    assert outbox.dead_count() == 0
+
+
+def test_dead_letter_compaction_uses_own_retention(outbox):
+    outbox.append('signal', {'n': 1}, WEBHOOKS[:1])
+    (entry,) = outbox.fetch_due()
+    for _ in range(3):
+        outbox.mark_failed(entry.id, 'timeout', time.time())
+
+    assert outbox.compact(retention_seconds=-1) == 0  # без dead_retention не трогаем
+    assert outbox.compact(retention_seconds=3600, dead_retention_seconds=-1) == 1
+    assert outbox.dead_count() == 0
+
+
+def test_unlimited_attempts_never_go_dead(tmp_path):
+    outbox = SignalOutbox(str(tmp_path / 'outbox.db'), max_attempts=0)
+    outbox.append('signal', {'n': 1}, WEBHOOKS[:1])
+    (entry,) = outbox.fetch_due()
+    assert not any(outbox.mark_failed(entry.id, 'timeout', time.time()) for _ in range(50))
+    assert outbox.dead_count() == 0
+    outbox.close()
+
+
+def test_pending_entries_survive_restart(tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    first = SignalOutbox(path, max_attempts=3)
+    first.append('signal', {'n': 1}, WEBHOOKS)
+    first.close()
+
+    second = SignalOutbox(path, max_attempts=3)
+    assert second.pending_count() == 2
+    second.close()
@@ -0,0 +1,109 @@
+# tests/test_trade_stats.py
+import os
+import random
+import statistics
+import threading
+import time
+
+import pytest
+
+from utils.trade_stats import RunningStats, TradeStatsAggregator
+
+DAY = 86400
+
+
+def test_welford_matches_two_pass():
+    rng = random.Random(3)
+    pnls = [rng.gauss(5, 40) for _ in range(2000)]
+    stats = RunningStats()
+    for pnl in pnls:
+        stats.update(pnl)
+
+    assert stats.trades == len(pnls)
+    assert stats.mean == pytest.approx(statistics.fmean(pnls))
+    assert stats.variance == pytest.approx(statistics.variance(pnls))
+    assert stats.sharpe == pytest.approx(statistics.fmean(pnls) / statistics.stdev(pnls))
+
+
+def test_welford_is_stable_with_large_offset():
+    # Наивная формула E[x^2] - E[x]^2 теряет точность на больших значениях
+    stats = RunningStats()
+    for pnl in (1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16):
+        stats.update(pnl)
+    assert stats.variance == pytest.approx(30.0)
+
+
+def test_drawdown_streaks_and_extremes():
+    stats = RunningStats()
+    for pnl in (10, 5, -3, -4, -2, 8, 0):
+        stats.update(pnl)
+
+    assert (stats.wins, stats.losses) == (3, 3)
+    assert stats.max_drawdown == 9
+    assert (stats.max_win_streak, stats.max_loss_streak, stats.current_streak) == (2, 3, 0)
+    assert (stats.best_trade, stats.worst_trade) == (10, -4)
+    assert stats.win_rate == pytest.approx(3 / 7 * 100)
+
+
+def test_round_trip_through_dict():
+    stats = RunningStats()
+    for pnl in (1.5, -2.0, 3.25):
+        stats.update(pnl)
+    assert RunningStats.from_dict(stats.to_dict()) == stats
+
+
+def test_aggregator_memory_only_and_day_buckets(tmp_path):
+    aggregator = TradeStatsAggregator(snapshot_path='')
+    now = time.time()
+    aggregator.record_trade('RSIBot', 10.0, 'BTC-USDT', timestamp=now)
+    aggregator.record_trade('TrendRider', -4.0, 'BTC-USDT', timestamp=now)
+
+    summary = aggregator.get_summary()
+    assert summary['totals']['trades'] == 2
+    assert summary['today']['total_pnl'] == 6.0
+    assert set(summary['today']['strategies']) == {'RSIBot', 'TrendRider'}
+    assert not list(tmp_path.iterdir())
+
+
+def test_trade_older_than_retention_goes_to_totals_only(monkeypatch):
+    monkeypatch.setenv('TRADE_STATS_MAX_DAYS', '2')
+    aggregator = TradeStatsAggregator(snapshot_path='')
+    start = time.time()
+    for day in (10, 11):
+        aggregator.record_trade('RSIBot', 1.0, timestamp=start - day * DAY + 3600)
+    aggregator.record_trade('RSIBot', 1.0, timestamp=start - 30 * DAY)  # раньше окна
+
+    assert aggregator.totals.trades == 3
+    assert len(aggregator.recent_trades) == 3
+    assert len(aggregator.by_day) == 2
+    assert sum(stats.trades for stats in aggregator.by_day.values()) == 2
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'trade_stats.json')
+    writer = TradeStatsAggregator(snapshot_path=path, snapshot_interval=0)
+    writer.record_trade('RSIBot', 12.5, 'BTC-USDT')
+
+    reader = TradeStatsAggregator(snapshot_path=path)
+    assert reader.totals == writer.totals
+    assert reader.by_strategy['RSIBot'].total_pnl == 12.5
+
+
+def test_concurrent_saves_keep_latest_snapshot(tmp_path):
+    path = str(tmp_path / 'trade_stats.json')
+    aggregator = TradeStatsAggregator(snapshot_path=path, snapshot_interval=3600)
+
+    def trade_and_save(n):
+        for _ in range(50):
+            aggregator.record_trade(f'S{n}', 1.0)
+            aggregator.save_snapshot()
+
+    threads = [threading.Thread(target=trade_and_save, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    aggregator.save_snapshot()
+
+    assert TradeStatsAggregator(snapshot_path=path).totals.trades == 200
+    assert os.listdir(tmp_path) == ['trade_stats.json']  # временные файлы не остаются
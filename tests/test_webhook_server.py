@@ -0,0 +1,83 @@
+# tests/test_webhook_server.py
+import asyncio
+import json
+
+import pytest
+from aiohttp import test_utils
+from telegram import Update
+from telegram.ext import ApplicationBuilder
+
+from notifications.webhook_server import SECRET_HEADER, TelegramWebhookServer, WebhookSettings
+
+SECRET = 'test-secret'
+PATH = '/telegram/webhook'
+
+
+def _update(update_id: int) -> dict:
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 1700000000,
+            'chat': {'id': 42, 'type': 'private'},
+            'from': {'id': 42, 'is_bot': False, 'first_name': 'Тест'},
+            'text': '/status',
+        },
+    }
+
+
+def _post(requests, max_pending: int = 1000):
+    """Отправляет запросы (заголовки, тело) на webhook; возвращает сервер, ответы и очередь"""
+
+    async def scenario():
+        application = ApplicationBuilder().token('123:test').build()
+        server = TelegramWebhookServer(application, WebhookSettings(
+            path=PATH, secret_token=SECRET, max_pending=max_pending))
+
+        async with test_utils.TestClient(test_utils.TestServer(server.app())) as client:
+            responses = []
+            for headers, body in requests:
+                response = await client.post(PATH, headers=headers, data=body)
+                responses.append((response.status, response.headers.get('Retry-After')))
+
+        queued = []
+        while not application.update_queue.empty():
+            queued.append(application.update_queue.get_nowait())
+        return server, responses, queued
+
+    return asyncio.run(scenario())
+
+
+def _json(update_id: int) -> str:
+    return json.dumps(_update(update_id))
+
+
+@pytest.mark.parametrize('headers', [{}, {SECRET_HEADER: 'wrong'}, {SECRET_HEADER: SECRET + 'x'}])
+def test_wrong_or_missing_secret_is_forbidden(headers):
+    server, responses, queued = _post([(headers, _json(1))])
+    assert responses == [(403, None)]
+    assert (server.rejected, server.received, queued) == (1, 0, [])
+
+
+def test_valid_update_reaches_update_queue():
+    server, responses, queued = _post([({SECRET_HEADER: SECRET}, _json(7))])
+    assert responses == [(200, None)]
+    assert server.received == 1
+    assert [type(update) for update in queued] == [Update]
+    assert (queued[0].update_id, queued[0].message.text) == (7, '/status')
+
+
+@pytest.mark.parametrize('body', ['не json', '[]', 'null'])
+def test_bad_body_is_rejected(body):
+    server, responses, queued = _post([({SECRET_HEADER: SECRET}, body)])
+    assert responses == [(400, None)]
+    assert (server.invalid, queued) == (1, [])
+
+
+def test_overload_returns_503_with_retry_after():
+    requests = [({SECRET_HEADER: SECRET}, _json(i)) for i in range(4)]
+    server, responses, queued = _post(requests, max_pending=2)
+
+    assert responses == [(200, None), (200, None), (503, '1'), (503, '1')]
+    assert (server.received, server.overloaded) == (2, 2)
+    assert [update.update_id for update in queued] == [0, 1]
@@ -4,12 +4,79 @@ Utilities package for trading bot
 
 Includes:
 - Configuration management
-- Signal publishing
+- Signal publishing (with durable outbox and message-bus backends)
+- Trade statistics
+- Performance metrics (latency histograms, Prometheus export)
+- Strategy profiler for backtests
+- Shared per-bar indicator bus for strategies on the same route
+- Market regime engine (trend, volatility, choppiness) shared by strategies
+- Per-bar memoization of strategy predicates and state updates
+- Vectorized strategy predicate kernels (Numba when installed, NumPy otherwise)
+- Non-blocking, rate-limited logging and strategy log modes (quiet in backtests)
+- Bot handler concurrency: CPU work off the event loop, per-user serialization
+- Event loop lag and thread-pool saturation monitor with alerts
+- Shared-memory live strategy state for the Telegram bot (seqlock mmap slots)
+- Strategy hooks shared by all routed strategies (live state, trade stats, AI service)
 - Helper functions
-"""
 
-from .config_manager import ConfigManager
-from .signal_publisher import SignalPublisher
+Модули подгружаются лениво (PEP 562): `from utils.metrics import ...` в
+стратегиях не тянет aiohttp, SQLite outbox и прочее, что им не нужно.
+"""
+import importlib
 
 __version__ = "1.0.0"
-__all__ = ['ConfigManager', 'SignalPublisher']
+
+# Экспортируемое имя -> модуль пакета
+_LAZY_ATTRIBUTES = {
+    'ConfigManager': 'config_manager',
+    'get_config': 'config_manager',
+    'SignalPublisher': 'signal_publisher',
+    'WebhookResult': 'signal_publisher',
+    'get_signal_publisher': 'signal_publisher',
+    'SignalOutbox': 'signal_outbox',
+    'RedisStreamBackend': 'signal_backends',
+    'MQTTBackend': 'signal_backends',
+    'TradeStatsAggregator': 'trade_stats',
+    'get_trade_stats': 'trade_stats',
+    'LatencyHistogram': 'metrics',
+    'get_metrics': 'metrics',
+    'span': 'metrics',
+    'timed': 'metrics',
+    'StrategyProfiler': 'strategy_profiler',
+    'profile_strategy': 'strategy_profiler',
+    'IndicatorBus': 'indicator_bus',
+    'get_indicator_bus': 'indicator_bus',
+    'shared_indicator': 'indicator_bus',
+    'MarketRegimeEngine': 'market_regime',
+    'RegimeSnapshot': 'market_regime',
+    'get_market_regime_engine': 'market_regime',
+    'per_bar': 'bar_cache',
+    'configure_logging': 'logging_utils',
+    'LogThrottle': 'logging_utils',
+    'strategy_logs_enabled': 'logging_utils',
+    'run_cpu': 'concurrency',
+    'per_user': 'concurrency',
+    'LoopLagMonitor': 'loop_monitor',
+    'monitor_loop': 'loop_monitor',
+    'watch_executor': 'loop_monitor',
+    'StrategyState': 'live_state',
+    'LiveStateBoard': 'live_state',
+    'get_live_state': 'live_state',
+    'track_strategy': 'strategy_hooks',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # следующие обращения - без __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
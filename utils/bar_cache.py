@@ -0,0 +1,46 @@
+# utils/bar_cache.py
+"""
+Кэш решений стратегии в пределах одного бара
+
+Jesse на каждой свече вызывает should_long и should_short, и оба начинают
+с _can_trade (счетчик дня, режим рынка, фильтры), а предикаты входа
+(ложные пробои, отскоки) могут проверяться несколько раз. Декоратор
+@per_bar запоминает результат метода до смены бара (strategy.index):
+
+    @per_bar
+    def _can_trade(self):
+        self._update_daily_counter()
+        ...
+
+Ключ - имя метода и позиционные аргументы (должны быть hashable).
+Запоминается и None; исключения не кэшируются. Методы с побочными
+эффектами (_update_daily_counter) выполняются ровно один раз на бар, поэтому
+декорировать можно только то, что не зависит от изменений состояния внутри
+бара (открытие позиции в go_long идет после проверок should_*).
+"""
+import functools
+from typing import Callable
+
+_MISSING = object()
+
+
+def per_bar(method: Callable) -> Callable:
+    """Запоминает результат метода стратегии до следующего бара"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        index = self.index
+        state = self.__dict__.get('_bar_cache')
+        if state is None or state[0] != index:
+            state = self.__dict__['_bar_cache'] = (index, {})
+
+        key = (name,) + args if args else name
+        values = state[1]
+        value = values.get(key, _MISSING)
+        if value is _MISSING:
+            value = values[key] = method(self, *args)
+        return value
+
+    return wrapper
+
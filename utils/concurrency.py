@@ -0,0 +1,93 @@
+# utils/concurrency.py
+"""
+Конкурентная обработка апдейтов в event loop бота
+
+- run_cpu(func, *args): CPU-работа (NumPy, сборка больших сообщений) в
+  пуле потоков BOT_CPU_WORKERS - event loop тем временем отвечает другим
+  пользователям
+- @per_user: обработчик выполняется для одного пользователя по очереди
+  (второй /analyze ждет первый), для разных - параллельно, насколько
+  позволяет Application.concurrent_updates
+"""
+import asyncio
+import contextlib
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Общий пул для CPU-работы обработчиков (создается при первом обращении)"""
+    global _cpu_executor
+
+    if _cpu_executor is None:
+        with _executor_lock:
+            if _cpu_executor is None:
+                workers = int(os.getenv('BOT_CPU_WORKERS', str(min(4, os.cpu_count() or 1))))
+                _cpu_executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='bot-cpu')
+                from .loop_monitor import watch_executor
+                watch_executor('bot_cpu', _cpu_executor)
+
+    return _cpu_executor
+
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    """Выполняет func(*args, **kwargs) в пуле CPU-работы, не блокируя event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+
+class UserLocks:
+    """Блокировки по пользователю; запись удаляется, когда ее никто не держит и не ждет"""
+
+    def __init__(self):
+        # ключ -> [блокировка, держит или ждет]
+        self._locks: Dict[Hashable, list] = {}
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key: Hashable):
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+def _user_key(event) -> Hashable:
+    """Пользователь апдейта или callback query (для каналов - чат)"""
+    user = getattr(event, 'effective_user', None) or getattr(event, 'from_user', None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, 'effective_chat', None)
+    return chat.id if chat is not None else None
+
+
+def per_user(method: Callable) -> Callable:
+    """
+    Обработчик-метод (self, update или query, ...) выполняется для одного
+    пользователя по очереди; блокировки хранятся в экземпляре
+    """
+    @functools.wraps(method)
+    async def wrapper(self, event, *args, **kwargs):
+        locks = self.__dict__.get('_user_locks')
+        if locks is None:
+            locks = self.__dict__['_user_locks'] = UserLocks()
+
+        async with locks.hold(_user_key(event)):
+            return await method(self, event, *args, **kwargs)
+
+    return wrapper
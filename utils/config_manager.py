@@ -1,32 +1,54 @@
 # utils/config_manager.py
+"""
+Конфигурация системы
+
+- загружается один раз в неизменяемый снимок (ConfigSnapshot); горячие пути
+  читают готовые атрибуты, а не os.environ
+- reload() перечитывает переменные окружения и .env (CONFIG_ENV_FILE):
+  вручную, командой /reload_config или фоновым наблюдателем за файлом
+  (CONFIG_WATCH_INTERVAL секунд, 0 - выключен)
+- подписчики (subscribe) получают старый снимок, новый и список изменений
+- ошибки валидации не бросаются: снимок создается и кэшируется, ошибки
+  лежат в snapshot.errors, а секция с ошибками выключается (ИИ без ключа
+  или с неверной MIN_AI_CONFIDENCE - ИИ отключен)
+"""
 import os
 import logging
-from typing import Optional, Dict, Any
-from dataclasses import dataclass
+import threading
+import time
+from typing import Callable, List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass, field, fields, replace
+
+try:
+    from dotenv import dotenv_values
+    DOTENV_AVAILABLE = True
+except ImportError:
+    dotenv_values = None
+    DOTENV_AVAILABLE = False
 
 
-@dataclass
+@dataclass(frozen=True)
 class AIConfig:
     """Конфигурация для ИИ анализа"""
     enabled: bool = False
-    openai_api_key: Optional[str] = None
+    openai_api_key: Optional[str] = field(default=None, repr=False)
     openai_model: str = 'gpt-4'
     analysis_timeout: int = 30
     max_retries: int = 3
     min_analysis_gap: int = 300  # секунд
 
 
-@dataclass
+@dataclass(frozen=True)
 class TelegramConfig:
     """Конфигурация для Telegram"""
     enabled: bool = False
-    bot_token: Optional[str] = None
+    bot_token: Optional[str] = field(default=None, repr=False)
     chat_id: Optional[str] = None
     max_message_length: int = 4096
     retry_attempts: int = 3
 
 
-@dataclass
+@dataclass(frozen=True)
 class TradingConfig:
     """Конфигурация для торговли"""
     enable_ai_validation: bool = False
@@ -35,21 +57,128 @@ class TradingConfig:
     ai_veto_trades: bool = True  # ИИ может отклонить сделку
 
 
+# Bybit по умолчанию - тестовая сеть (как и ключ BYBIT_USDT_PERPETUAL_TESTNET_API_KEY)
+DEFAULT_BYBIT_API_URL = 'https://api-testnet.bybit.com'
+
+
+@dataclass(frozen=True)
+class ExchangeConfig:
+    """Конфигурация биржи"""
+    bybit_api_key: Optional[str] = field(default=None, repr=False)
+    bybit_api_url: str = DEFAULT_BYBIT_API_URL
+
+
+# Поля, значения которых не попадают в логи и сообщения
+SECRET_FIELDS = ('ai.openai_api_key', 'telegram.bot_token', 'exchange.bybit_api_key')
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Неизменяемый снимок конфигурации"""
+    ai: AIConfig
+    telegram: TelegramConfig
+    trading: TradingConfig
+    exchange: ExchangeConfig
+    version: int = 1
+    loaded_at: float = 0.0
+    errors: Tuple[str, ...] = ()
+    
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    @property
+    def ai_analysis_enabled(self) -> bool:
+        return self.ai.enabled and bool(self.ai.openai_api_key)
+
+    @property
+    def telegram_enabled(self) -> bool:
+        return self.telegram.enabled and bool(self.telegram.bot_token) and bool(self.telegram.chat_id)
+
+    def diff(self, other: 'ConfigSnapshot') -> Dict[str, tuple]:
+        """Изменившиеся поля: 'секция.поле' -> (старое, новое)"""
+        changes = {}
+        for section in ('ai', 'telegram', 'trading', 'exchange'):
+            old_section, new_section = getattr(self, section), getattr(other, section)
+            for item in fields(old_section):
+                old_value, new_value = getattr(old_section, item.name), getattr(new_section, item.name)
+                if old_value != new_value:
+                    changes[f"{section}.{item.name}"] = (old_value, new_value)
+        return changes
+
+
+ConfigSubscriber = Callable[[ConfigSnapshot, ConfigSnapshot, Dict[str, tuple]], None]
+
+
+def describe_changes(changes: Dict[str, tuple]) -> List[str]:
+    """Изменения в виде строк для логов и Telegram (секреты скрыты)"""
+    lines = []
+    for name, (old_value, new_value) in changes.items():
+        if name in SECRET_FIELDS:
+            lines.append(f"{name}: (скрыто)")
+        else:
+            lines.append(f"{name}: {old_value} → {new_value}")
+    return lines
+
+
 class ConfigManager:
     """
     Управляет конфигурацией всех компонентов системы
     """
     
-    def __init__(self):
-        self._load_config()
-        self._validate_config()
+    def __init__(self, env_file: Optional[str] = None):
+        self.env_file = env_file or os.getenv('CONFIG_ENV_FILE', '.env')
+        self._lock = threading.Lock()
+        self._subscribers: List[ConfigSubscriber] = []
+        self._watch_stop = threading.Event()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._env_file_mtime = self._file_mtime()
+        
+        # Значения .env на момент последней загрузки. При старте переменные
+        # окружения контейнера приоритетнее файла (как в стартовом скрипте)
+        self._env_file_values = self._read_env_file()
+        
+        self._snapshot = self._validated(self._build_snapshot(version=1))
+        self._warn_disabled(self._snapshot)
         logging.info("⚙️ Конфигурация загружена")
     
-    def _load_config(self):
+    # === Снимок ===
+    
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """Текущий снимок (ссылка меняется атомарно при reload)"""
+        return self._snapshot
+    
+    @property
+    def ai(self) -> AIConfig:
+        return self._snapshot.ai
+    
+    @property
+    def telegram(self) -> TelegramConfig:
+        return self._snapshot.telegram
+    
+    @property
+    def trading(self) -> TradingConfig:
+        return self._snapshot.trading
+    
+    @property
+    def exchange(self) -> ExchangeConfig:
+        return self._snapshot.exchange
+    
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+    
+    @property
+    def errors(self) -> Tuple[str, ...]:
+        """Ошибки валидации текущего снимка"""
+        return self._snapshot.errors
+    
+    def _build_snapshot(self, version: int) -> ConfigSnapshot:
         """Загружает конфигурацию из переменных окружения"""
         
         # AI Configuration
-        self.ai = AIConfig(
+        ai = AIConfig(
             enabled=self._get_bool_env('AI_ANALYSIS_ENABLED', False),
             openai_api_key=os.getenv('OPENAI_API_KEY'),
             openai_model=os.getenv('OPENAI_MODEL', 'gpt-4'),
@@ -59,7 +188,7 @@ class ConfigManager:
         )
         
         # Telegram Configuration
-        self.telegram = TelegramConfig(
+        telegram = TelegramConfig(
             enabled=self._get_bool_env('TELEGRAM_ENABLED', False),
             bot_token=os.getenv('TELEGRAM_BOT_TOKEN'),
             chat_id=os.getenv('TELEGRAM_CHAT_ID'),
@@ -68,49 +197,200 @@ class ConfigManager:
         )
         
         # Trading Configuration
-        self.trading = TradingConfig(
+        trading = TradingConfig(
             enable_ai_validation=self._get_bool_env('ENABLE_AI_VALIDATION', False),
             min_ai_confidence=self._get_int_env('MIN_AI_CONFIDENCE', 60),
             require_ai_approval=self._get_bool_env('REQUIRE_AI_APPROVAL', False),
             ai_veto_trades=self._get_bool_env('AI_VETO_TRADES', True)
         )
+        
+        # Exchange Configuration
+        exchange = ExchangeConfig(
+            bybit_api_key=os.getenv('BYBIT_USDT_PERPETUAL_TESTNET_API_KEY'),
+            bybit_api_url=os.getenv('BYBIT_API_URL', DEFAULT_BYBIT_API_URL).rstrip('/')
+        )
+        
+        return ConfigSnapshot(ai=ai, telegram=telegram, trading=trading, exchange=exchange,
+                              version=version, loaded_at=time.time())
     
-    def _validate_config(self):
-        """Валидирует конфигурацию"""
-        errors = []
+    def _validate_config(self, snapshot: ConfigSnapshot) -> Dict[str, List[str]]:
+        """Валидирует конфигурацию: секция -> список ошибок"""
+        errors: Dict[str, List[str]] = {}
         
         # Проверка AI конфигурации
-        if self.ai.enabled:
-            if not self.ai.openai_api_key:
-                errors.append("AI включен, но OPENAI_API_KEY не установлен")
+        if snapshot.ai.enabled:
+            if not snapshot.ai.openai_api_key:
+                errors.setdefault('ai', []).append("AI включен, но OPENAI_API_KEY не установлен")
             
-            if self.ai.analysis_timeout < 10:
+            if snapshot.ai.analysis_timeout < 10:
                 logging.warning("⚠️ Слишком короткий таймаут для ИИ анализа")
         
         # Проверка Telegram конфигурации  
-        if self.telegram.enabled:
-            if not self.telegram.bot_token:
-                errors.append("Telegram включен, но TELEGRAM_BOT_TOKEN не установлен")
+        if snapshot.telegram.enabled:
+            if not snapshot.telegram.bot_token:
+                errors.setdefault('telegram', []).append("Telegram включен, но TELEGRAM_BOT_TOKEN не установлен")
             
-            if not self.telegram.chat_id:
-                errors.append("Telegram включен, но TELEGRAM_CHAT_ID не установлен")
+            if not snapshot.telegram.chat_id:
+                errors.setdefault('telegram', []).append("Telegram включен, но TELEGRAM_CHAT_ID не установлен")
         
         # Проверка торговых настроек
-        if self.trading.min_ai_confidence < 0 or self.trading.min_ai_confidence > 100:
-            errors.append("MIN_AI_CONFIDENCE должен быть от 0 до 100")
+        if snapshot.trading.min_ai_confidence < 0 or snapshot.trading.min_ai_confidence > 100:
+            errors.setdefault('ai', []).append("MIN_AI_CONFIDENCE должен быть от 0 до 100")
         
-        if errors:
-            error_message = "❌ Ошибки конфигурации:\n" + "\n".join(f"  • {e}" for e in errors)
-            logging.error(error_message)
-            raise ValueError(error_message)
+        return errors
+    
+    def _validated(self, snapshot: ConfigSnapshot) -> ConfigSnapshot:
+        """Снимок с ошибками валидации; секции с ошибками выключены"""
+        errors = self._validate_config(snapshot)
+        if not errors:
+            return snapshot
+        
+        messages = tuple(message for section in errors.values() for message in section)
+        logging.error("❌ Ошибки конфигурации:\n" + "\n".join(f"  • {e}" for e in messages))
+        
+        ai, trading, telegram = snapshot.ai, snapshot.trading, snapshot.telegram
+        if 'ai' in errors:
+            logging.warning("⚠️ ИИ анализ отключен из-за ошибок конфигурации")
+            ai = replace(ai, enabled=False)
+            trading = replace(trading, enable_ai_validation=False, require_ai_approval=False)
+        if 'telegram' in errors:
+            telegram = replace(telegram, enabled=False)
         
+        return replace(snapshot, ai=ai, trading=trading, telegram=telegram, errors=messages)
+    
+    @staticmethod
+    def _warn_disabled(snapshot: ConfigSnapshot):
         # Предупреждения
-        if not self.ai.enabled:
+        if not snapshot.ai.enabled:
             logging.warning("⚠️ ИИ анализ отключен")
         
-        if not self.telegram.enabled:
+        if not snapshot.telegram.enabled:
             logging.warning("⚠️ Telegram уведомления отключены")
     
+    # === Перезагрузка ===
+    
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.env_file).st_mtime
+        except OSError:
+            return None
+    
+    def _read_env_file(self) -> Dict[str, str]:
+        """Читает .env (python-dotenv, иначе простой разбор KEY=VALUE)"""
+        if not os.path.isfile(self.env_file):
+            return {}
+        
+        try:
+            if DOTENV_AVAILABLE:
+                return {key: value for key, value in dotenv_values(self.env_file).items() if value is not None}
+            
+            values = {}
+            with open(self.env_file, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith('#') or '=' not in line:
+                        continue
+                    key, _, value = line.partition('=')
+                    values[key.strip()] = value.strip().strip('"').strip("'")
+            return values
+            
+        except Exception as e:
+            logging.error(f"❌ Ошибка чтения {self.env_file}: {e}")
+            return {}
+    
+    def _apply_env_file(self) -> List[str]:
+        """Переносит измененные в .env значения в os.environ"""
+        values = self._read_env_file()
+        changed = [key for key, value in values.items() if self._env_file_values.get(key) != value]
+        
+        for key in changed:
+            os.environ[key] = values[key]
+        
+        self._env_file_values = values
+        return changed
+    
+    def reload(self) -> Optional[Dict[str, tuple]]:
+        """
+        Перечитывает .env и переменные окружения
+        
+        Returns:
+            Изменения ('секция.поле' -> (старое, новое)); None, если в новой
+            конфигурации появились ошибки валидации (текущая остается в силе)
+        """
+        with self._lock:
+            self._env_file_mtime = self._file_mtime()
+            env_keys = self._apply_env_file()
+            
+            old = self._snapshot
+            new = self._validated(self._build_snapshot(version=old.version + 1))
+            
+            if set(new.errors) - set(old.errors):
+                logging.error(f"❌ Новая конфигурация отклонена, остается версия {old.version}")
+                return None
+            
+            changes = old.diff(new)
+            if not changes and new.errors != old.errors:
+                # Ошибки исправлены, но итоговые значения те же
+                self._snapshot = new
+                logging.info(f"✅ Ошибки конфигурации исправлены (версия {new.version})")
+                return {}
+            if not changes:
+                if env_keys:
+                    logging.info(f"⚙️ {self.env_file}: изменились {', '.join(env_keys)}, конфигурация та же")
+                return {}
+            
+            self._snapshot = new
+            subscribers = list(self._subscribers)
+        
+        logging.info(f"🔄 Конфигурация обновлена (версия {new.version}): "
+                     + "; ".join(describe_changes(changes)))
+        
+        for callback in subscribers:
+            try:
+                callback(old, new, changes)
+            except Exception as e:
+                logging.error(f"❌ Ошибка подписчика конфигурации {callback!r}: {e}")
+        
+        return changes
+    
+    def subscribe(self, callback: ConfigSubscriber) -> Callable[[], None]:
+        """
+        Подписка на изменения: callback(old, new, changes)
+        
+        Returns:
+            Функция отписки
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        
+        return unsubscribe
+    
+    def start_watching(self, interval: float) -> bool:
+        """Фоновая проверка mtime .env и reload при изменении"""
+        if self._watch_thread is not None or interval <= 0:
+            return False
+        
+        def watch():
+            while not self._watch_stop.wait(interval):
+                mtime = self._file_mtime()
+                if mtime != self._env_file_mtime:
+                    logging.info(f"👀 {self.env_file} изменен, перезагружаю конфигурацию")
+                    self.reload()
+        
+        self._watch_thread = threading.Thread(target=watch, daemon=True, name="ConfigWatcher")
+        self._watch_thread.start()
+        logging.info(f"👀 Наблюдение за {self.env_file} каждые {interval:g}с")
+        return True
+    
+    def stop_watching(self):
+        self._watch_stop.set()
+        self._watch_thread = None
+    
     def _get_bool_env(self, key: str, default: bool = False) -> bool:
         """Получает булево значение из переменной окружения"""
         value = os.getenv(key, str(default)).lower()
@@ -135,12 +415,12 @@ class ConfigManager:
     @property
     def ai_analysis_enabled(self) -> bool:
         """Проверяет, включен ли ИИ анализ"""
-        return self.ai.enabled and bool(self.ai.openai_api_key)
+        return self._snapshot.ai_analysis_enabled
     
     @property
     def telegram_enabled(self) -> bool:
         """Проверяет, включены ли Telegram уведомления"""
-        return self.telegram.enabled and bool(self.telegram.bot_token) and bool(self.telegram.chat_id)
+        return self._snapshot.telegram_enabled
     
     def get_summary(self) -> Dict[str, Any]:
         """Возвращает сводку конфигурации"""
@@ -159,7 +439,8 @@ class ConfigManager:
                 'min_confidence': self.trading.min_ai_confidence,
                 'ai_approval_required': self.trading.require_ai_approval,
                 'ai_can_veto': self.trading.ai_veto_trades
-            }
+            },
+            'errors': list(self.errors)
         }
     
     def log_summary(self):
@@ -178,7 +459,35 @@ class ConfigManager:
         logging.info(f"    • ИИ валидация: {'✅' if summary['trading']['ai_validation'] else '❌'}")
         logging.info(f"    • Минимальная уверенность: {summary['trading']['min_confidence']}%")
         logging.info(f"    • ИИ может отклонить: {'✅' if summary['trading']['ai_can_veto'] else '❌'}")
+        
+        for error in summary['errors']:
+            logging.warning(f"  ⚠️ {error}")
+
+
+_global_config: Optional[ConfigManager] = None
+
+
+_global_config_lock = threading.Lock()
+
+
+def get_config() -> ConfigManager:
+    """
+    Возвращает глобальную конфигурацию (создается при первом обращении)
+    
+    Не бросает исключений на неверных значениях: ошибки в get_config().errors
+    """
+    global _global_config
+    if _global_config is None:
+        with _global_config_lock:
+            if _global_config is None:
+                manager = ConfigManager()
+                manager.start_watching(float(os.getenv('CONFIG_WATCH_INTERVAL', '0')))
+                _global_config = manager
+    return _global_config
 
 
-# Глобальный экземпляр конфигурации
-config = ConfigManager()
+def __getattr__(name):
+    # Совместимость: utils.config_manager.config без загрузки при импорте
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
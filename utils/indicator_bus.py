@@ -0,0 +1,104 @@
+# utils/indicator_bus.py
+"""
+Общая шина индикаторов для стратегий одного процесса
+
+Несколько маршрутов на одном exchange/symbol/timeframe считают одни и те же
+EMA/RSI/ATR/SMA объема на каждом баре, а Bollinger Bands пересчитываются
+для каждой из трех полос. Шина считает значение один раз на бар и отдает
+его всем стратегиям.
+
+Ключ: (exchange, symbol, timeframe, индикатор, параметры, последняя
+свеча, число свечей). Свеча берется целиком (время и OHLCV), а длина
+окна входит в ключ, чтобы формирующаяся свеча и срез candles[:-1] не
+попадали на чужое значение. Параметры сравниваются в порядке передачи.
+
+    @property
+    def ema21(self):
+        return shared_indicator(self, ta.ema, period=self.ema_slow)
+
+Стратегии Jesse исполняются в одном потоке, поэтому шина без блокировок.
+INDICATOR_BUS_ENABLED=false - прямой расчет без кэша.
+"""
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class IndicatorBus:
+    """
+    Ограниченный кэш значений индикаторов (вытесняются самые старые записи)
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, enabled: Optional[bool] = None):
+        self.max_entries = max_entries or int(os.getenv('INDICATOR_BUS_SIZE', '4096'))
+        if enabled is None:
+            enabled = os.getenv('INDICATOR_BUS_ENABLED', 'true').lower() == 'true'
+        self.enabled = enabled
+        self._values: Dict[Tuple, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, route: Tuple[str, str, str], func: Callable, candles: np.ndarray,
+            params: Dict[str, Any]) -> Any:
+        """Значение func(candles, **params) для маршрута route, посчитанное один раз на бар"""
+        if not self.enabled or not len(candles):
+            return func(candles, **params)
+
+        # Последняя свеча целиком (время, OHLCV) и длина окна
+        key = (route, func, tuple(params.items()), candles[-1].tobytes(), len(candles))
+
+        values = self._values
+        try:
+            value = values[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = values[key] = func(candles, **params)
+        if len(values) > self.max_entries:
+            # dict хранит порядок вставки - первый ключ самый старый
+            del values[next(iter(values))]
+        return value
+
+    def clear(self):
+        """Сбрасывает кэш (между бэктестами по разным данным)"""
+        self._values.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._values),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+# Глобальный экземпляр (создается при первом обращении)
+_indicator_bus: Optional[IndicatorBus] = None
+
+
+def get_indicator_bus() -> IndicatorBus:
+    """Шина индикаторов процесса"""
+    global _indicator_bus
+    if _indicator_bus is None:
+        _indicator_bus = IndicatorBus()
+    return _indicator_bus
+
+
+def shared_indicator(strategy, func: Callable, candles: Optional[np.ndarray] = None, **params) -> Any:
+    """
+    Индикатор Jesse через общую шину
+
+    candles по умолчанию - strategy.candles; для объема вместо
+    ta.sma(self.candles[:, 5]) используйте source_type='volume'.
+    """
+    if candles is None:
+        candles = strategy.candles
+    bus = _indicator_bus or get_indicator_bus()
+    return bus.get((strategy.exchange, strategy.symbol, strategy.timeframe), func, candles, params)
@@ -0,0 +1,234 @@
+# utils/kernels.py
+"""
+Векторные ядра предикатов стратегий
+
+Те же условия, что стратегии проверяют по одному бару (ложный пробой BB,
+отскок от BB/EMA, качество свечи, боковик), но сразу по всему массиву:
+значение [t] - результат проверки на закрытии бара t. Нужны для прогонов
+по истории и перебора параметров, где Python на каждом баре дороже
+самих вычислений.
+
+Если установлен numba, ядра - скомпилированные циклы, иначе векторный
+NumPy. KERNELS_BACKEND=numpy отключает numba, KERNELS_BACKEND=numba
+требует его. Оба варианта дают одинаковый результат
+(python -m benchmarks.kernel_parity).
+
+Массивы одной длины, float64. Индикаторы (BB, EMA) считаются заранее,
+например ta.bollinger_bands(candles, sequential=True); NaN на прогреве
+дает False.
+"""
+import logging
+import os
+
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+# === Циклы (компилируются numba; без него - эталон для сверки) ===
+
+def _fakeout_loop(price, close, band, sign, lookback, max_penetration, min_return):
+    n = len(close)
+    result = np.zeros(n, dtype=np.bool_)
+    last_hit = -1
+    for t in range(n):
+        # Пробой бара t относительно полосы на закрытии t-1
+        if t >= 1:
+            penetration = sign * ((band[t - 1] - price[t]) / band[t - 1] * 100)
+            if 0 < penetration <= max_penetration:
+                last_hit = t
+        if last_hit >= 0 and t - last_hit < lookback:
+            return_distance = sign * ((close[t] - band[t]) / band[t] * 100)
+            result[t] = return_distance >= min_return
+    return result
+
+
+def _bounce_loop(open_, extreme, close, level, sign, tolerance, confirm_close):
+    n = len(close)
+    result = np.zeros(n, dtype=np.bool_)
+    for t in range(n):
+        distance = abs(close[t] - level[t]) / level[t] * 100
+        if not distance <= tolerance:
+            continue
+        if sign > 0:
+            touched = extreme[t] <= level[t] * (1 + tolerance / 100)
+            direction = close[t] > open_[t]
+            side = close[t] > level[t]
+        else:
+            touched = extreme[t] >= level[t] * (1 - tolerance / 100)
+            direction = close[t] < open_[t]
+            side = close[t] < level[t]
+        result[t] = touched and direction and (side or not confirm_close)
+    return result
+
+
+def _good_candle_loop(open_, high, low, close, min_body_pct, min_body_to_range):
+    n = len(close)
+    result = np.zeros(n, dtype=np.bool_)
+    for t in range(n):
+        body = abs(close[t] - open_[t])
+        candle_range = high[t] - low[t]
+        if candle_range <= 0:
+            continue
+        result[t] = body / open_[t] * 100 >= min_body_pct and body / candle_range > min_body_to_range
+    return result
+
+
+def _choppy_loop(high, low, close, window, max_range_pct):
+    n = len(close)
+    result = np.zeros(n, dtype=np.bool_)
+    for t in range(window, n):
+        highest = high[t - window + 1]
+        lowest = low[t - window + 1]
+        for j in range(t - window + 2, t + 1):
+            if high[j] > highest:
+                highest = high[j]
+            if low[j] < lowest:
+                lowest = low[j]
+        result[t] = (highest - lowest) / close[t] * 100 < max_range_pct
+    return result
+
+
+LOOP_KERNELS = {
+    'fakeout': _fakeout_loop,
+    'bounce': _bounce_loop,
+    'good_candle': _good_candle_loop,
+    'choppy': _choppy_loop,
+}
+
+
+# === NumPy ===
+
+def _fakeout_numpy(price, close, band, sign, lookback, max_penetration, min_return):
+    n = len(close)
+    hits = np.zeros(n, dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        penetration = sign * ((band[:-1] - price[1:]) / band[:-1] * 100)
+        hits[1:] = (penetration > 0) & (penetration <= max_penetration)
+        return_distance = sign * ((close - band) / band * 100)
+
+    # Был ли пробой среди последних lookback баров (включая текущий)
+    total = np.cumsum(hits)
+    recent = total.copy()
+    recent[lookback:] -= total[:-lookback]
+    return (recent > 0) & (return_distance >= min_return)
+
+
+def _bounce_numpy(open_, extreme, close, level, sign, tolerance, confirm_close):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        near = np.abs(close - level) / level * 100 <= tolerance
+    if sign > 0:
+        result = near & (extreme <= level * (1 + tolerance / 100)) & (close > open_)
+        if confirm_close:
+            result &= close > level
+    else:
+        result = near & (extreme >= level * (1 - tolerance / 100)) & (close < open_)
+        if confirm_close:
+            result &= close < level
+    return result
+
+
+def _good_candle_numpy(open_, high, low, close, min_body_pct, min_body_to_range):
+    body = np.abs(close - open_)
+    candle_range = high - low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((candle_range > 0) & (body / open_ * 100 >= min_body_pct)
+                & (body / candle_range > min_body_to_range))
+
+
+def _choppy_numpy(high, low, close, window, max_range_pct):
+    n = len(close)
+    result = np.zeros(n, dtype=np.bool_)
+    if n <= window:
+        return result
+    highest = np.lib.stride_tricks.sliding_window_view(high, window).max(axis=1)
+    lowest = np.lib.stride_tricks.sliding_window_view(low, window).min(axis=1)
+    # Окно, заканчивающееся на баре t, - строка t - window + 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[window:] = (highest[1:] - lowest[1:]) / close[window:] * 100 < max_range_pct
+    return result
+
+
+NUMPY_KERNELS = {
+    'fakeout': _fakeout_numpy,
+    'bounce': _bounce_numpy,
+    'good_candle': _good_candle_numpy,
+    'choppy': _choppy_numpy,
+}
+
+
+def _select_backend() -> str:
+    backend = os.getenv('KERNELS_BACKEND', 'auto').lower()
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        raise ImportError("KERNELS_BACKEND=numba, но numba не установлен")
+    if backend == 'numpy' or not NUMBA_AVAILABLE:
+        return 'numpy'
+    return 'numba'
+
+
+BACKEND = _select_backend()
+
+if BACKEND == 'numba':
+    _KERNELS = {name: numba.njit(cache=True, error_model='numpy')(func) for name, func in LOOP_KERNELS.items()}
+else:
+    _KERNELS = NUMPY_KERNELS
+
+logger.debug(f"⚙️ Ядра предикатов: {BACKEND}")
+
+
+def _arrays(*arrays):
+    return [np.ascontiguousarray(a, dtype=np.float64) for a in arrays]
+
+
+# === Предикаты ===
+
+def lower_fakeout(low, close, bb_lower, lookback: int = 4, max_penetration: float = 0.4,
+                  min_return: float = 0.05) -> np.ndarray:
+    """
+    Ложный пробой нижней полосы: за последние lookback баров low пробил
+    полосу предыдущего бара не глубже max_penetration %, а close вернулся
+    выше текущей полосы минимум на min_return %
+    """
+    low, close, bb_lower = _arrays(low, close, bb_lower)
+    return _KERNELS['fakeout'](low, close, bb_lower, 1.0, lookback, max_penetration, min_return)
+
+
+def upper_fakeout(high, close, bb_upper, lookback: int = 4, max_penetration: float = 0.4,
+                  min_return: float = 0.05) -> np.ndarray:
+    """Ложный пробой верхней полосы (зеркально lower_fakeout)"""
+    high, close, bb_upper = _arrays(high, close, bb_upper)
+    return _KERNELS['fakeout'](high, close, bb_upper, -1.0, lookback, max_penetration, min_return)
+
+
+def bounce_up(open_, low, close, level, tolerance: float, confirm_close: bool = False) -> np.ndarray:
+    """
+    Отскок вверх от уровня: close в пределах tolerance % от уровня, low его
+    коснулся, свеча зеленая; confirm_close - close еще и выше уровня (EMA)
+    """
+    open_, low, close, level = _arrays(open_, low, close, level)
+    return _KERNELS['bounce'](open_, low, close, level, 1.0, tolerance, confirm_close)
+
+
+def bounce_down(open_, high, close, level, tolerance: float, confirm_close: bool = False) -> np.ndarray:
+    """Отскок вниз от уровня (зеркально bounce_up)"""
+    open_, high, close, level = _arrays(open_, high, close, level)
+    return _KERNELS['bounce'](open_, high, close, level, -1.0, tolerance, confirm_close)
+
+
+def good_candle(open_, high, low, close, min_body_pct: float, min_body_to_range: float = 0.3) -> np.ndarray:
+    """Тело свечи не меньше min_body_pct % цены и больше min_body_to_range диапазона (не доджи)"""
+    open_, high, low, close = _arrays(open_, high, low, close)
+    return _KERNELS['good_candle'](open_, high, low, close, min_body_pct, min_body_to_range)
+
+
+def choppy(high, low, close, window: int = 10, max_range_pct: float = 2.0) -> np.ndarray:
+    """Боковик: диапазон последних window баров меньше max_range_pct % цены (False до бара window)"""
+    high, low, close = _arrays(high, low, close)
+    return _KERNELS['choppy'](high, low, close, window, max_range_pct)
@@ -0,0 +1,320 @@
+# utils/live_state.py
+"""
+Живое состояние стратегий в общей памяти для Telegram бота
+
+Стратегии Jesse и бот - разные процессы. Стратегия (декоратор
+track_strategy, utils/strategy_hooks.py) после каждого бара и при
+открытии/закрытии позиции записывает компактный снимок в свой слот файла
+LIVE_STATE_PATH (по умолчанию в /dev/shm), бот читает слоты через mmap -
+без базы данных, сокетов и блокировок.
+
+Слот защищен seqlock: писатель делает счетчик нечетным, записывает данные
+и делает его четным. Читатель разбирает слот struct.unpack_from прямо из
+mmap и повторяет чтение, если счетчик был нечетным или изменился за время
+чтения. У каждого слота один писатель (стратегия маршрута), поэтому
+писателям тоже не нужны блокировки между процессами.
+
+    board = get_live_state()
+    board.publish(StrategyState(strategy='ActiveScalper', symbol='BTC-USDT', ...))
+    for state in board.read_all():   # в процессе бота
+        ...
+
+LIVE_STATE_PATH='' отключает публикацию и чтение.
+LIVE_STATE_SLOTS - число слотов (маршрутов), по умолчанию 32.
+"""
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b'LVST'
+VERSION = 1
+INDICATOR_SLOTS = 8
+READ_RETRIES = 100
+
+# magic, версия, размер слота, число слотов
+_HEADER = struct.Struct('<4sHII')
+HEADER_SIZE = 64
+
+_SEQ = struct.Struct('<Q')
+# strategy, exchange, symbol, timeframe, время обновления, сторона позиции,
+# qty, цена входа, текущая цена, нереализованный и реализованный P&L,
+# сделок, сделок за день, убытков подряд, последний сигнал, его цена и время
+_PAYLOAD = struct.Struct('<32s24s16s8sdbdddddiii8sdd' + '12sd' * INDICATOR_SLOTS)
+SLOT_SIZE = 512
+
+assert _SEQ.size + _PAYLOAD.size <= SLOT_SIZE
+
+_TIMEFRAME_SECONDS = {'m': 60, 'h': 3600, 'D': 86400, 'W': 604800}
+
+
+def default_state_path() -> str:
+    """Файл в /dev/shm (память), если есть, иначе во временном каталоге"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'jesse_live_state')
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """'5m' -> 300, '4h' -> 14400; 0 для неизвестного формата"""
+    try:
+        return int(timeframe[:-1]) * _TIMEFRAME_SECONDS[timeframe[-1]]
+    except (KeyError, ValueError, IndexError):
+        return 0
+
+
+def _encode(text: str, size: int) -> bytes:
+    return (text or '').encode('utf-8')[:size]
+
+
+def _decode(raw: bytes) -> str:
+    return raw.rstrip(b'\0').decode('utf-8', 'ignore')
+
+
+@dataclass
+class StrategyState:
+    """Снимок состояния стратегии на одном маршруте"""
+    strategy: str
+    exchange: str = ''
+    symbol: str = ''
+    timeframe: str = ''
+    updated_at: float = 0.0
+    side: int = 0  # 1 лонг, -1 шорт, 0 без позиции
+    qty: float = 0.0
+    entry_price: float = 0.0
+    price: float = 0.0
+    unrealized_pnl: float = 0.0
+    realized_pnl: float = 0.0
+    trades: int = 0
+    daily_trades_count: int = 0
+    consecutive_losses: int = 0
+    last_signal: str = ''
+    last_signal_price: float = 0.0
+    last_signal_at: float = 0.0
+    indicators: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def key(self) -> Tuple[str, str, str, str]:
+        return self.strategy, self.exchange, self.symbol, self.timeframe
+
+    @property
+    def side_name(self) -> str:
+        return 'LONG' if self.side > 0 else 'SHORT' if self.side < 0 else 'FLAT'
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.updated_at)
+
+    @property
+    def is_active(self) -> bool:
+        """Обновлялась ли стратегия за последние 3 бара (не реже, чем за LIVE_STATE_STALE секунд)"""
+        stale_after = max(3 * timeframe_seconds(self.timeframe), int(os.getenv('LIVE_STATE_STALE', '300')))
+        return self.age <= stale_after
+
+    def pack_into(self, buffer, offset: int):
+        indicators = []
+        for name, value in list(self.indicators.items())[:INDICATOR_SLOTS]:
+            indicators += [_encode(name, 12), float(value)]
+        indicators += [b'', 0.0] * (INDICATOR_SLOTS - len(indicators) // 2)
+
+        _PAYLOAD.pack_into(
+            buffer, offset,
+            _encode(self.strategy, 32), _encode(self.exchange, 24), _encode(self.symbol, 16),
+            _encode(self.timeframe, 8), self.updated_at, self.side, self.qty, self.entry_price,
+            self.price, self.unrealized_pnl, self.realized_pnl, self.trades,
+            self.daily_trades_count, self.consecutive_losses, _encode(self.last_signal, 8),
+            self.last_signal_price, self.last_signal_at, *indicators
+        )
+
+    @classmethod
+    def from_values(cls, values: tuple) -> 'StrategyState':
+        head, raw_indicators = values[:17], values[17:]
+        indicators = {
+            _decode(raw_indicators[i]): raw_indicators[i + 1]
+            for i in range(0, len(raw_indicators), 2) if raw_indicators[i].strip(b'\0')
+        }
+        return cls(
+            strategy=_decode(head[0]), exchange=_decode(head[1]), symbol=_decode(head[2]),
+            timeframe=_decode(head[3]), updated_at=head[4], side=head[5], qty=head[6],
+            entry_price=head[7], price=head[8], unrealized_pnl=head[9], realized_pnl=head[10],
+            trades=head[11], daily_trades_count=head[12], consecutive_losses=head[13],
+            last_signal=_decode(head[14]), last_signal_price=head[15], last_signal_at=head[16],
+            indicators=indicators,
+        )
+
+
+class LiveStateBoard:
+    """
+    Слоты состояния стратегий в mmap файле
+
+    Писатель (процесс Jesse) создает файл при первой публикации; читатель
+    (бот) открывает его только на чтение и до появления файла видит пустой
+    список.
+    """
+
+    def __init__(self, path: Optional[str] = None, slots: Optional[int] = None):
+        self.path = default_state_path() if path is None else path
+        self.slots = slots or int(os.getenv('LIVE_STATE_SLOTS', '32'))
+        self.size = HEADER_SIZE + self.slots * SLOT_SIZE
+        self.logger = logging.getLogger(__name__)
+
+        self._mm: Optional[mmap.mmap] = None
+        self._writable = False
+        self._inode = None
+        self._slot_of: Dict[Tuple[str, str, str, str], int] = {}
+        self._seq: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    # === Писатель ===
+
+    def _open_for_write(self) -> mmap.mmap:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) != self.size:
+            # Новый файл или другая раскладка (LIVE_STATE_SLOTS): собираем рядом и
+            # подменяем - у читателя остается прежнее отображение, не обрезанное
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, SLOT_SIZE, self.slots).ljust(HEADER_SIZE, b'\0'))
+                f.truncate(self.size)
+            os.replace(tmp_path, self.path)
+
+        with open(self.path, 'r+b') as f:
+            mm = mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_WRITE)
+
+        if _HEADER.unpack_from(mm, 0) != (MAGIC, VERSION, SLOT_SIZE, self.slots):
+            mm[:] = bytes(self.size)
+            _HEADER.pack_into(mm, 0, MAGIC, VERSION, SLOT_SIZE, self.slots)
+        return mm
+
+    def _claim_slot(self, mm: mmap.mmap, key: Tuple[str, str, str, str]) -> Optional[int]:
+        """Слот этого маршрута (после перезапуска - прежний), иначе первый свободный"""
+        key = tuple(_decode(_encode(part, size)) for part, size in zip(key, (32, 24, 16, 8)))
+        free = None
+        for index in range(self.slots):
+            offset = HEADER_SIZE + index * SLOT_SIZE
+            names = struct.unpack_from('<32s24s16s8s', mm, offset + _SEQ.size)
+            if not names[0].strip(b'\0'):
+                if free is None:
+                    free = index
+                continue
+            if tuple(_decode(raw) for raw in names) == key:
+                return index
+        return free
+
+    def publish(self, state: StrategyState) -> bool:
+        """Записывает снимок в слот стратегии; False - публикация недоступна"""
+        if not self.enabled:
+            return False
+        try:
+            with self._lock:
+                if self._mm is None or not self._writable:
+                    self.close()
+                    self._mm = self._open_for_write()
+                    self._writable = True
+
+                index = self._slot_of.get(state.key)
+                if index is None:
+                    index = self._claim_slot(self._mm, state.key)
+                    if index is None:
+                        self.logger.warning(f"⚠️ Нет свободных слотов живого состояния "
+                                            f"({self.slots}), увеличьте LIVE_STATE_SLOTS")
+                        return False
+                    self._slot_of[state.key] = index
+                    self._seq[index] = _SEQ.unpack_from(self._mm, HEADER_SIZE + index * SLOT_SIZE)[0] & ~1
+
+                offset = HEADER_SIZE + index * SLOT_SIZE
+                seq = self._seq[index] + 1
+                _SEQ.pack_into(self._mm, offset, seq)  # нечетный: идет запись
+                state.updated_at = state.updated_at or time.time()
+                state.pack_into(self._mm, offset + _SEQ.size)
+                _SEQ.pack_into(self._mm, offset, seq + 1)
+                self._seq[index] = seq + 1
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка публикации живого состояния: {e}")
+            return False
+
+    # === Читатель ===
+
+    def _open_for_read(self) -> Optional[mmap.mmap]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self.close()
+            return None
+
+        # Файл пересоздан писателем (другой размер или inode) - переоткрываем
+        if self._mm is not None and (stat.st_ino != self._inode or len(self._mm) != stat.st_size):
+            self.close()
+        if self._mm is None:
+            if stat.st_size < HEADER_SIZE:
+                return None
+            with open(self.path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), stat.st_size, access=mmap.ACCESS_READ)
+            self._inode = stat.st_ino
+        return self._mm
+
+    def _read_slot(self, mm: mmap.mmap, offset: int) -> Optional[StrategyState]:
+        for _ in range(READ_RETRIES):
+            before = _SEQ.unpack_from(mm, offset)[0]
+            if before & 1:
+                continue
+            values = _PAYLOAD.unpack_from(mm, offset + _SEQ.size)
+            if _SEQ.unpack_from(mm, offset)[0] == before:
+                return StrategyState.from_values(values) if values[0].strip(b'\0') else None
+        return None
+
+    def read_all(self, active_only: bool = False) -> List[StrategyState]:
+        """Снимки всех стратегий (active_only - только обновлявшиеся недавно)"""
+        if not self.enabled:
+            return []
+        try:
+            with self._lock:
+                mm = self._mm if self._writable else self._open_for_read()
+                if mm is None:
+                    return []
+
+                magic, version, slot_size, slots = _HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or version != VERSION or slot_size != SLOT_SIZE:
+                    return []
+                slots = min(slots, (len(mm) - HEADER_SIZE) // SLOT_SIZE)
+
+                states = []
+                for index in range(slots):
+                    state = self._read_slot(mm, HEADER_SIZE + index * SLOT_SIZE)
+                    if state is not None and (state.is_active or not active_only):
+                        states.append(state)
+            return states
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка чтения живого состояния: {e}")
+            return []
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = None
+        self._writable = False
+        self._inode = None
+        self._slot_of.clear()
+        self._seq.clear()
+
+
+_board: Optional[LiveStateBoard] = None
+_board_lock = threading.Lock()
+
+
+def get_live_state() -> LiveStateBoard:
+    """Глобальная доска живого состояния (LIVE_STATE_PATH, '' - отключена)"""
+    global _board
+    if _board is None:
+        with _board_lock:
+            if _board is None:
+                _board = LiveStateBoard(os.getenv('LIVE_STATE_PATH'))
+    return _board
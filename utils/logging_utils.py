@@ -0,0 +1,263 @@
+# utils/logging_utils.py
+"""
+Логирование бота и стратегий
+
+- configure_logging(): корневой логгер пишет в QueueHandler, а файл и
+  консоль обслуживает QueueListener в отдельном потоке - event loop бота
+  не ждет диск
+- LogThrottle / ThrottleFilter: ограничение частоты по месту вызова
+  (LOG_RATE_LIMIT сообщений за LOG_RATE_WINDOW секунд) и сэмплирование
+  (LOG_SAMPLE_RATE - каждое N-е). Пропущенные считаются и дописываются
+  к следующему сообщению. WARNING и выше не ограничиваются. Для корневого
+  логгера LOG_RATE_LIMIT по умолчанию 0 (выключено), для логов стратегий - 30
+- LOG_FORMAT=json - одна JSON-строка на запись (поля из extra включаются)
+- strategy_log: замена Strategy.log для стратегий (подключается декоратором
+  install_strategy_logging). Режим STRATEGY_LOG_MODE:
+    auto      - quiet в бэктесте и оптимизации Jesse, иначе throttled
+    full      - все сообщения
+    throttled - с ограничением частоты по месту вызова
+    quiet     - только ошибки и сообщения с send_notification
+  Сообщение можно передать функцией - она вызывается, только если
+  сообщение будет записано: self.log(lambda: f"...").
+  Блоки мониторинга в before() проверяют strategy_logs_enabled(), чтобы не
+  собирать строки, которые никто не прочитает.
+"""
+import atexit
+import inspect
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+STRATEGY_LOG_MODES = ('auto', 'full', 'throttled', 'quiet')
+
+# Атрибуты LogRecord, которые не относятся к extra
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class LogThrottle:
+    """
+    Ограничение частоты сообщений по ключу (месту вызова)
+
+    В каждом окне window секунд проходит не больше limit сообщений ключа
+    (0 - без ограничения); при sample_rate > 1 до окна доходит только каждое
+    sample_rate-е сообщение.
+    """
+
+    def __init__(self, limit: Optional[int] = None, window: Optional[float] = None,
+                 sample_rate: Optional[int] = None, clock=time.monotonic):
+        self.limit = int(os.getenv('LOG_RATE_LIMIT', '30')) if limit is None else limit
+        self.window = float(os.getenv('LOG_RATE_WINDOW', '60')) if window is None else window
+        self.sample_rate = max(1, int(os.getenv('LOG_SAMPLE_RATE', '1')) if sample_rate is None else sample_rate)
+        self._clock = clock
+        # ключ -> [начало окна, записано в окне, всего сообщений, пропущено с последней записи]
+        self._sites: Dict[Any, list] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.limit > 0 or self.sample_rate > 1
+
+    def allow(self, key) -> Tuple[bool, int]:
+        """(записывать ли сообщение, сколько сообщений ключа пропущено до него)"""
+        now = self._clock()
+        with self._lock:
+            state = self._sites.get(key)
+            if state is None:
+                state = self._sites[key] = [now, 0, 0, 0]
+            state[2] += 1
+
+            if self.sample_rate > 1 and (state[2] - 1) % self.sample_rate:
+                state[3] += 1
+                return False, 0
+
+            if self.limit > 0:
+                if now - state[0] >= self.window:
+                    state[0], state[1] = now, 0
+                if state[1] >= self.limit:
+                    state[3] += 1
+                    return False, 0
+                state[1] += 1
+
+            suppressed, state[3] = state[3], 0
+            return True, suppressed
+
+    def reset(self):
+        with self._lock:
+            self._sites.clear()
+
+
+class ThrottleFilter(logging.Filter):
+    """Фильтр logging: LogThrottle по месту вызова для записей ниже WARNING"""
+
+    def __init__(self, throttle: Optional[LogThrottle] = None):
+        super().__init__()
+        self.throttle = throttle or LogThrottle()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        allowed, suppressed = self.throttle.allow((record.pathname, record.lineno))
+        if allowed and suppressed:
+            record.msg = f"{record.getMessage()} (+{suppressed} пропущено)"
+            record.args = None
+        return allowed
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись одной строкой JSON: время, уровень, логгер, сообщение и поля extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+# === Настройка процесса ===
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(log_file: Optional[str] = None, level: Optional[str] = None,
+                      fmt: str = DEFAULT_FORMAT) -> Optional[logging.handlers.QueueListener]:
+    """
+    Корневой логгер через очередь: консоль и log_file пишет фоновый поток
+
+    Повторный вызов ничего не меняет; как и logging.basicConfig, ничего не
+    делает, если у корневого логгера уже есть обработчики. Очередь
+    дописывается при выходе из процесса (atexit).
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None or logging.getLogger().handlers:
+            return _listener
+
+        if os.getenv('LOG_FORMAT', 'text').lower() == 'json':
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(fmt)
+
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            try:
+                handlers.append(logging.FileHandler(log_file))
+            except OSError as e:
+                print(f"⚠️ Лог-файл {log_file} недоступен: {e}", file=sys.stderr)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        # Логи бота по умолчанию не ограничиваются - только явным LOG_RATE_LIMIT
+        throttle_filter = ThrottleFilter(LogThrottle(limit=int(os.getenv('LOG_RATE_LIMIT', '0'))))
+        if throttle_filter.throttle.active:
+            queue_handler.addFilter(throttle_filter)
+
+        root = logging.getLogger()
+        root.setLevel((level or os.getenv('LOG_LEVEL', 'INFO')).upper())
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
+
+
+# === Логи стратегий ===
+
+_strategy_log_mode = os.getenv('STRATEGY_LOG_MODE', 'auto').lower()
+_strategy_throttle: Optional[LogThrottle] = None
+_jesse_config: Optional[dict] = None
+
+
+def set_strategy_log_mode(mode: str):
+    """Режим логов стратегий (auto/full/throttled/quiet) - например, из бенчмарка"""
+    global _strategy_log_mode
+    if mode not in STRATEGY_LOG_MODES:
+        raise ValueError(f"Неизвестный режим логов: {mode}")
+    _strategy_log_mode = mode
+
+
+def trading_mode() -> str:
+    """Режим Jesse (backtest, optimize, livetrade...) или '' вне Jesse"""
+    global _jesse_config
+    if _jesse_config is None:
+        try:
+            from jesse.config import config
+        except ImportError:
+            config = {'app': {}}
+        _jesse_config = config
+    return _jesse_config['app'].get('trading_mode', '')
+
+
+def is_simulation() -> bool:
+    """Бэктест или оптимизация Jesse"""
+    return trading_mode() in ('backtest', 'optimize')
+
+
+def strategy_log_mode() -> str:
+    """Действующий режим: auto раскрывается по режиму Jesse"""
+    mode = _strategy_log_mode
+    if mode == 'auto':
+        return 'quiet' if is_simulation() else 'throttled'
+    return mode
+
+
+def strategy_logs_enabled() -> bool:
+    """Пишутся ли информационные логи стратегий"""
+    return strategy_log_mode() != 'quiet'
+
+
+def _get_strategy_throttle() -> LogThrottle:
+    global _strategy_throttle
+    if _strategy_throttle is None:
+        _strategy_throttle = LogThrottle()
+    return _strategy_throttle
+
+
+def strategy_log(self, msg, log_type: str = 'info', send_notification: bool = False, webhook=None):
+    """Strategy.log с режимом, ограничением частоты и ленивым сообщением"""
+    suppressed = 0
+    if log_type == 'info' and not send_notification:
+        mode = strategy_log_mode()
+        if mode == 'quiet':
+            return
+        if mode == 'throttled':
+            throttle = _strategy_throttle or _get_strategy_throttle()
+            if throttle.active:
+                caller = sys._getframe(1)
+                allowed, suppressed = throttle.allow((caller.f_code, caller.f_lineno))
+                if not allowed:
+                    return
+
+    if callable(msg):
+        msg = msg()
+    if suppressed:
+        msg = f"{msg} (+{suppressed} пропущено)"
+    self._emit_log(msg, log_type, send_notification, webhook)
+
+
+def install_strategy_logging(cls):
+    """Подменяет log у класса стратегии на strategy_log (исходный log - _emit_log)"""
+    if getattr(cls, 'log', None) is strategy_log:
+        return cls
+    cls._emit_log = inspect.getattr_static(cls, 'log')
+    cls.log = strategy_log
+    return cls
@@ -0,0 +1,277 @@
+# utils/loop_monitor.py
+"""
+Монитор event loop'ов и пулов потоков
+
+Бот, TelegramNotifier, очередь отправки и ИИ анализ стратегий работают
+каждый в своем потоке со своим event loop. Здесь:
+
+- LoopLagMonitor: в loop раз в LOOP_LAG_INTERVAL секунд планируется
+  callback; насколько позже срока он выполнился - столько loop был занят
+  чужим синхронным кодом. Задержки пишутся в гистограмму
+  event_loop_lag_seconds{loop=...} (общую для loop'ов с одним именем),
+  выше LOOP_LAG_WARN_MS - предупреждение в лог (не чаще раза в минуту)
+- ResourceWatchdog: поток, который раз в RESOURCE_WATCH_INTERVAL секунд
+  смотрит число живых потоков, очереди пулов (watch_executor и default
+  executor отслеживаемых loop'ов) и loop'ы - задержанные или зависшие
+  (callback не выполнялся дольше порога). Значения - в gauge метрики,
+  превышение порога - уведомление через notify() (одно и то же не чаще
+  ALERT_COOLDOWN секунд)
+
+    monitor = monitor_loop('bot')                 # внутри работающего loop
+    monitor = monitor_loop('strategy_ai', loop)   # до run_until_complete
+    ...
+    monitor.stop()
+
+Пороги: ALERT_LOOP_LAG_MS (500), ALERT_THREADS (100), ALERT_EXECUTOR_QUEUE (50).
+LOOP_MONITOR_ENABLED: по умолчанию мониторинг выключен; bot_runner и сервис
+ИИ анализа включают его для своего процесса (os.environ.setdefault), в
+процессе Jesse он работает только при явном LOOP_MONITOR_ENABLED=true.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .metrics import LatencyHistogram, get_metrics, metrics_enabled, set_gauge
+
+WARN_INTERVAL = 60.0
+
+logger = logging.getLogger(__name__)
+
+# Гистограммы без реестра метрик (имя loop -> гистограмма)
+_histograms: Dict[str, LatencyHistogram] = {}
+_monitors: 'weakref.WeakSet' = weakref.WeakSet()
+_executors: 'weakref.WeakValueDictionary' = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+
+
+def loop_monitor_enabled() -> bool:
+    return os.getenv('LOOP_MONITOR_ENABLED', 'false').lower() in ('true', '1', 'yes')
+
+
+def lag_histogram(name: str) -> LatencyHistogram:
+    """Гистограмма задержек loop'ов с этим именем (в реестре, если мониторинг включен)"""
+    if metrics_enabled():
+        return get_metrics().histogram('event_loop_lag_seconds', loop=name)
+    with _lock:
+        return _histograms.setdefault(name, LatencyHistogram())
+
+
+class LoopLagMonitor:
+    """Замер задержки event loop запланированным callback"""
+
+    def __init__(self, name: str, interval: Optional[float] = None, warn_ms: Optional[float] = None):
+        self.name = name
+        self.interval = float(os.getenv('LOOP_LAG_INTERVAL', '0.5')) if interval is None else interval
+        self.warn_ms = float(os.getenv('LOOP_LAG_WARN_MS', '100')) if warn_ms is None else warn_ms
+        self.histogram = lag_histogram(name)
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.last_lag = 0.0
+        self.window_max = 0.0  # максимум с последней проверки ResourceWatchdog
+        self.last_tick = time.monotonic()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._expected = 0.0
+        self._last_warning = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._handle is not None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> 'LoopLagMonitor':
+        """Начинает замер в loop (по умолчанию - в работающем); вызывать из потока loop"""
+        if self.running:
+            return self
+        self.loop = loop or asyncio.get_running_loop()
+        self.last_tick = time.monotonic()
+        self._schedule()
+        with _lock:
+            _monitors.add(self)
+        return self
+
+    def stop(self):
+        """Прекращает замер (из потока loop или после его остановки)"""
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            handle.cancel()
+        with _lock:
+            _monitors.discard(self)
+
+    def _schedule(self):
+        self._expected = self.loop.time() + self.interval
+        self._handle = self.loop.call_at(self._expected, self._tick)
+
+    def _tick(self):
+        lag = max(0.0, self.loop.time() - self._expected)
+        self.last_lag = lag
+        self.window_max = max(self.window_max, lag)
+        self.last_tick = time.monotonic()
+        self.histogram.record(lag)
+        self._check(lag)
+        if self._handle is not None:
+            self._schedule()
+
+    def _check(self, lag: float):
+        if lag * 1000 < self.warn_ms:
+            return
+        now = time.monotonic()
+        if now - self._last_warning >= WARN_INTERVAL:
+            self._last_warning = now
+            logger.warning(f"🐢 Event loop '{self.name}' занят {lag * 1000:.0f}мс "
+                           f"(p99 {self.histogram.percentile(0.99) * 1000:.0f}мс)")
+
+    def stalled_for(self) -> float:
+        """Сколько секунд очередной callback опаздывает прямо сейчас (loop завис)"""
+        if not self.running or self.loop is None or not self.loop.is_running():
+            return 0.0
+        return max(0.0, time.monotonic() - self.last_tick - self.interval)
+
+    def summary(self) -> dict:
+        summary = self.histogram.summary()
+        summary['last_ms'] = self.last_lag * 1000
+        return summary
+
+
+def watch_executor(name: str, executor: Executor):
+    """Добавляет пул в наблюдение ResourceWatchdog (очередь и число потоков)"""
+    if not loop_monitor_enabled():
+        return
+    with _lock:
+        _executors[name] = executor
+    get_resource_watchdog().start()
+
+
+def executor_stats(executor: Executor) -> Tuple[int, int]:
+    """(задач в очереди, рабочих потоков/процессов) пула"""
+    work_queue = getattr(executor, '_work_queue', None)
+    if work_queue is not None:
+        return work_queue.qsize(), len(getattr(executor, '_threads', ()))
+    # ProcessPoolExecutor: поставленные, но не завершенные задачи
+    pending = len(getattr(executor, '_pending_work_items', {}))
+    return pending, len(getattr(executor, '_processes', None) or {})
+
+
+def _notify_alert(text: str) -> bool:
+    from notifications.message_queue import PRIORITY_LOW, notify
+    # Низкий приоритет: серия алертов склеивается в одно сообщение и не обгоняет сделки
+    return notify(f"⚠️ <b>Мониторинг бота</b>\n{text}", priority=PRIORITY_LOW)
+
+
+class ResourceWatchdog:
+    """Фоновая проверка потоков, пулов и event loop'ов с оповещением при превышении порогов"""
+
+    def __init__(self, interval: Optional[float] = None, alert: Optional[Callable[[str], bool]] = None):
+        self.interval = float(os.getenv('RESOURCE_WATCH_INTERVAL', '10')) if interval is None else interval
+        self.max_lag = float(os.getenv('ALERT_LOOP_LAG_MS', '500')) / 1000
+        self.max_threads = int(os.getenv('ALERT_THREADS', '100'))
+        self.max_queue = int(os.getenv('ALERT_EXECUTOR_QUEUE', '50'))
+        self.cooldown = float(os.getenv('ALERT_COOLDOWN', '600'))
+        self.alert = alert or _notify_alert
+
+        self.alerts_sent = 0
+        self._last_alerts: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ResourceWatchdog")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"❌ Ошибка проверки ресурсов: {e}")
+
+    def snapshot(self) -> dict:
+        """Потоки, пулы и задержки loop'ов на текущий момент"""
+        with _lock:
+            monitors = list(_monitors)
+            executors = dict(_executors)
+
+        for monitor in monitors:
+            default_executor = getattr(monitor.loop, '_default_executor', None)
+            if default_executor is not None:
+                executors[f"{monitor.name}_default"] = default_executor
+
+        return {
+            'threads': threading.active_count(),
+            'executors': {name: executor_stats(executor) for name, executor in executors.items()},
+            'loops': [(monitor, monitor.window_max, monitor.stalled_for()) for monitor in monitors],
+        }
+
+    def check(self) -> List[str]:
+        """Одна проверка: обновляет gauge метрики и отправляет оповещения; возвращает проблемы"""
+        snapshot = self.snapshot()
+        problems: List[Tuple[str, str]] = []
+
+        threads = snapshot['threads']
+        set_gauge('process_threads', threads)
+        if threads > self.max_threads:
+            problems.append(('threads', f"🧵 Живых потоков: {threads} (порог {self.max_threads})"))
+
+        for name, (depth, workers) in snapshot['executors'].items():
+            set_gauge('executor_queue_depth', depth, executor=name)
+            set_gauge('executor_workers', workers, executor=name)
+            if depth > self.max_queue:
+                problems.append((f"executor:{name}",
+                                 f"📥 Очередь пула {name}: {depth} задач, {workers} потоков (порог {self.max_queue})"))
+
+        for monitor, lag, stalled in snapshot['loops']:
+            monitor.window_max = 0.0
+            worst = max(lag, stalled)
+            set_gauge('event_loop_lag_max_seconds', worst, loop=monitor.name)
+            if worst > self.max_lag:
+                state = "не отвечает" if stalled >= lag else "был занят"
+                problems.append((f"loop:{monitor.name}",
+                                 f"🐢 Event loop {monitor.name} {state} {worst * 1000:.0f}мс "
+                                 f"(порог {self.max_lag * 1000:.0f}мс)"))
+
+        for key, text in problems:
+            self._send(key, text)
+        return [text for _, text in problems]
+
+    def _send(self, key: str, text: str):
+        now = time.monotonic()
+        if now - self._last_alerts.get(key, -self.cooldown) < self.cooldown:
+            return
+        self._last_alerts[key] = now
+        logger.warning(text)
+        try:
+            if self.alert(text):
+                self.alerts_sent += 1
+        except Exception as e:
+            logger.error(f"❌ Не удалось отправить оповещение мониторинга: {e}")
+
+
+_watchdog: Optional[ResourceWatchdog] = None
+
+
+def get_resource_watchdog() -> ResourceWatchdog:
+    """Глобальный ResourceWatchdog (поток стартует в monitor_loop/watch_executor)"""
+    global _watchdog
+    if _watchdog is None:
+        with _lock:
+            if _watchdog is None:
+                _watchdog = ResourceWatchdog()
+    return _watchdog
+
+
+def monitor_loop(name: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[LoopLagMonitor]:
+    """Запускает LoopLagMonitor для loop и ResourceWatchdog; None, если мониторинг выключен"""
+    if not loop_monitor_enabled():
+        return None
+    monitor = LoopLagMonitor(name).start(loop)
+    get_resource_watchdog().start()
+    return monitor
@@ -0,0 +1,310 @@
+# utils/market_regime.py
+"""
+Общий сервис рыночного режима
+
+Вместо того чтобы каждая стратегия на каждом вызове считала свой BULL/BEAR
+по сырым свечам, движок ведет для каждого exchange/symbol/timeframe
+инкрементальное состояние и обновляет его один раз на новый бар:
+
+- regime        - BULL/BEAR/NEUTRAL по изменению цены за REGIME_LOOKBACK баров
+- trend         - BULL/BEAR/NEUTRAL по порядку EMA fast/mid/slow, отрыву цены
+                  от EMA slow и подтверждению на последних барах
+- trend_strength- отрыв цены от EMA slow в % (0 без тренда, максимум 10)
+- volatility    - LOW/MEDIUM/HIGH по std доходностей, плюс ATR в % цены
+- choppiness    - Choppiness Index (<38.2 - тренд, >61.8 - пила)
+
+    snapshot = market_regime(self)       # в стратегии
+    if snapshot.regime == 'BULL': ...
+
+Свечи в формате Jesse: timestamp, open, close, high, low, volume. Снимок
+считается по закрытым барам: повторный вызов с тем же последним баром
+возвращает готовый снимок.
+"""
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+_TIMESTAMP, _CLOSE, _HIGH, _LOW = 0, 2, 3, 4
+
+# Уровни Choppiness Index (отношения Фибоначчи, как в оригинальном индикаторе)
+CHOP_TRENDING = 38.2
+CHOP_RANGING = 61.8
+
+
+@dataclass(frozen=True)
+class RegimeSnapshot:
+    """Режим рынка на закрытии бара"""
+    timestamp: int
+    close: float
+    bars: int
+    regime: str
+    price_change_pct: float
+    trend: str
+    trend_strength: float
+    ema_fast: float
+    ema_mid: float
+    ema_slow: float
+    volatility: str
+    volatility_pct: float
+    atr_pct: float
+    choppiness: float
+
+    @property
+    def is_choppy(self) -> bool:
+        return self.choppiness > CHOP_RANGING
+
+    @property
+    def is_trending(self) -> bool:
+        return self.choppiness < CHOP_TRENDING
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class RegimeSettings:
+    """Параметры движка (REGIME_* из окружения)"""
+    lookback: int = 48
+    threshold_pct: float = 3.0
+    ema_fast: int = 21
+    ema_mid: int = 50
+    ema_slow: int = 200
+    trend_strength_min: float = 1.0
+    confirmation_bars: int = 5
+    volatility_window: int = 20
+    atr_period: int = 14
+    chop_period: int = 14
+
+    @classmethod
+    def from_env(cls) -> 'RegimeSettings':
+        return cls(
+            lookback=int(os.getenv('REGIME_LOOKBACK', '48')),
+            threshold_pct=float(os.getenv('REGIME_THRESHOLD_PCT', '3.0')),
+            ema_fast=int(os.getenv('REGIME_EMA_FAST', '21')),
+            ema_mid=int(os.getenv('REGIME_EMA_MID', '50')),
+            ema_slow=int(os.getenv('REGIME_EMA_SLOW', '200')),
+            trend_strength_min=float(os.getenv('REGIME_TREND_STRENGTH_MIN', '1.0')),
+            confirmation_bars=int(os.getenv('REGIME_CONFIRMATION_BARS', '5')),
+        )
+
+
+class _RouteState:
+    """Инкрементальное состояние одного маршрута: O(1) на бар"""
+
+    def __init__(self, settings: RegimeSettings):
+        self.settings = settings
+        self.last_ts: Optional[float] = None
+        self.bars = 0
+        self.prev_close: Optional[float] = None
+
+        self.ema = [None, None, None]
+        self.alphas = [2 / (period + 1) for period in (settings.ema_fast, settings.ema_mid, settings.ema_slow)]
+
+        self.closes = deque(maxlen=settings.lookback + 1)
+        self.above_slow = deque(maxlen=settings.confirmation_bars)
+
+        # Доходности: скользящие сумма и сумма квадратов
+        self.returns = deque(maxlen=settings.volatility_window)
+        self.returns_sum = 0.0
+        self.returns_sq_sum = 0.0
+
+        # ATR по Уайлдеру
+        self.atr: Optional[float] = None
+        self.atr_seed = []
+
+        # Choppiness: сумма TR и экстремумы за chop_period
+        self.true_ranges = deque(maxlen=settings.chop_period)
+        self.tr_sum = 0.0
+        self.highs = deque(maxlen=settings.chop_period)
+        self.lows = deque(maxlen=settings.chop_period)
+
+        self.snapshot: Optional[RegimeSnapshot] = None
+
+    def add_bar(self, timestamp: float, close: float, high: float, low: float):
+        settings = self.settings
+        self.bars += 1
+        self.last_ts = timestamp
+
+        for i, alpha in enumerate(self.alphas):
+            ema = self.ema[i]
+            self.ema[i] = close if ema is None else ema + alpha * (close - ema)
+
+        self.closes.append(close)
+        self.above_slow.append(close > self.ema[2])
+
+        prev_close = self.prev_close
+        true_range = high - low
+        if prev_close is not None:
+            true_range = max(true_range, abs(high - prev_close), abs(low - prev_close))
+
+            if len(self.returns) == self.returns.maxlen:
+                dropped = self.returns[0]
+                self.returns_sum -= dropped
+                self.returns_sq_sum -= dropped * dropped
+            value = (close - prev_close) / prev_close * 100 if prev_close else 0.0
+            self.returns.append(value)
+            self.returns_sum += value
+            self.returns_sq_sum += value * value
+
+        if self.atr is None:
+            self.atr_seed.append(true_range)
+            if len(self.atr_seed) == settings.atr_period:
+                self.atr = sum(self.atr_seed) / settings.atr_period
+        else:
+            self.atr = (self.atr * (settings.atr_period - 1) + true_range) / settings.atr_period
+
+        if len(self.true_ranges) == self.true_ranges.maxlen:
+            self.tr_sum -= self.true_ranges[0]
+        self.true_ranges.append(true_range)
+        self.tr_sum += true_range
+        self.highs.append(high)
+        self.lows.append(low)
+
+        self.prev_close = close
+        self.snapshot = None
+
+    def build_snapshot(self) -> RegimeSnapshot:
+        settings = self.settings
+        close = self.closes[-1]
+        ema_fast, ema_mid, ema_slow = self.ema
+
+        # Режим: изменение цены за lookback баров
+        base = self.closes[0]
+        change = (close - base) / base * 100 if len(self.closes) > settings.lookback and base else 0.0
+        if change > settings.threshold_pct:
+            regime = 'BULL'
+        elif change < -settings.threshold_pct:
+            regime = 'BEAR'
+        else:
+            regime = 'NEUTRAL'
+
+        # Тренд: порядок EMA, отрыв от EMA slow, 80%+ последних баров по одну сторону
+        trend, strength = 'NEUTRAL', 0.0
+        if self.bars >= settings.ema_slow + 10 and len(self.above_slow) == settings.confirmation_bars:
+            distance = (close - ema_slow) / ema_slow * 100
+            above = sum(self.above_slow)
+            needed = int(settings.confirmation_bars * 0.8)
+            confirmed = above >= needed or settings.confirmation_bars - above >= needed
+
+            if distance > settings.trend_strength_min and ema_fast > ema_mid > ema_slow and confirmed:
+                trend, strength = 'BULL', min(abs(distance), 10.0)
+            elif distance < -settings.trend_strength_min and ema_fast < ema_mid < ema_slow and confirmed:
+                trend, strength = 'BEAR', min(abs(distance), 10.0)
+
+        # Волатильность: std доходностей в %
+        count = len(self.returns)
+        volatility_pct = 0.0
+        if count > 1:
+            mean = self.returns_sum / count
+            volatility_pct = math.sqrt(max(self.returns_sq_sum / count - mean * mean, 0.0))
+        volatility = 'HIGH' if volatility_pct > 3 else 'MEDIUM' if volatility_pct > 1 else 'LOW'
+
+        # Choppiness Index
+        choppiness = 50.0
+        price_range = max(self.highs) - min(self.lows)
+        if len(self.true_ranges) == settings.chop_period and price_range > 0 and self.tr_sum > 0:
+            choppiness = 100 * math.log10(self.tr_sum / price_range) / math.log10(settings.chop_period)
+
+        self.snapshot = RegimeSnapshot(
+            timestamp=int(self.last_ts),
+            close=close,
+            bars=self.bars,
+            regime=regime,
+            price_change_pct=change,
+            trend=trend,
+            trend_strength=strength,
+            ema_fast=ema_fast,
+            ema_mid=ema_mid,
+            ema_slow=ema_slow,
+            volatility=volatility,
+            volatility_pct=volatility_pct,
+            atr_pct=(self.atr / close * 100) if self.atr and close else 0.0,
+            choppiness=choppiness,
+        )
+        return self.snapshot
+
+
+class MarketRegimeEngine:
+    """
+    Режим рынка по маршрутам (exchange, symbol, timeframe)
+
+    update() добавляет в состояние только бары новее уже учтенных. Если
+    свечи не продолжают историю (новый бэктест, пропуск больше окна),
+    состояние строится заново по переданному окну.
+    """
+
+    def __init__(self, settings: Optional[RegimeSettings] = None):
+        self.settings = settings or RegimeSettings.from_env()
+        self._routes: Dict[Tuple, _RouteState] = {}
+        # Стратегии и поток ИИ анализа (MarketContextCollector) читают одновременно
+        self._lock = threading.Lock()
+
+    def update(self, route: Tuple[str, str, str], candles: np.ndarray) -> Optional[RegimeSnapshot]:
+        """Снимок режима на последнем баре candles (None без свечей)"""
+        if candles is None or not len(candles):
+            return None
+
+        last_ts = candles[-1, _TIMESTAMP]
+
+        with self._lock:
+            state = self._routes.get(route)
+
+            if state is not None and state.last_ts == last_ts and state.snapshot is not None:
+                return state.snapshot
+
+            start = 0
+            if state is not None and state.last_ts is not None and last_ts > state.last_ts:
+                # Обычный случай - добавился один бар
+                if len(candles) > 1 and candles[-2, _TIMESTAMP] == state.last_ts:
+                    start = len(candles) - 1
+                else:
+                    start = int(np.searchsorted(candles[:, _TIMESTAMP], state.last_ts, side='right'))
+                # Последний учтенный бар должен быть в окне, иначе история разорвана
+                if start == 0 or candles[start - 1, _TIMESTAMP] != state.last_ts:
+                    state, start = None, 0
+            else:
+                state = None
+
+            if state is None:
+                state = self._routes[route] = _RouteState(self.settings)
+
+            for timestamp, close, high, low in candles[start:, (_TIMESTAMP, _CLOSE, _HIGH, _LOW)].tolist():
+                state.add_bar(timestamp, close, high, low)
+
+            return state.build_snapshot()
+
+    def get(self, route: Tuple[str, str, str]) -> Optional[RegimeSnapshot]:
+        """Последний посчитанный снимок маршрута (без обновления)"""
+        with self._lock:
+            state = self._routes.get(route)
+            return state.snapshot if state else None
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+# Глобальный экземпляр (создается при первом обращении)
+_market_regime_engine: Optional[MarketRegimeEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_market_regime_engine() -> MarketRegimeEngine:
+    """Движок режима рынка процесса"""
+    global _market_regime_engine
+    if _market_regime_engine is None:
+        with _engine_lock:
+            if _market_regime_engine is None:
+                _market_regime_engine = MarketRegimeEngine()
+    return _market_regime_engine
+
+
+def market_regime(strategy) -> Optional[RegimeSnapshot]:
+    """Снимок режима для маршрута стратегии Jesse на текущем баре"""
+    route = (strategy.exchange, strategy.symbol, strategy.timeframe)
+    return get_market_regime_engine().update(route, strategy.candles)
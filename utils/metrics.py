@@ -0,0 +1,433 @@
+# utils/metrics.py
+"""
+Легковесные метрики производительности
+
+- LatencyHistogram: HDR-подобная гистограмма (лог-линейные корзины),
+  O(1) запись и ~3% точность перцентилей при фиксированной памяти
+- Counter: монотонный счетчик
+- Gauge: текущее значение (потоки, глубина очередей)
+- span() / timed: замер участков кода и функций (sync и async)
+- экспорт в формате Prometheus: файл раз в METRICS_EXPORT_INTERVAL секунд
+  и, если задан METRICS_PORT, HTTP endpoint /metrics
+
+Все включается флагом ENABLE_PERFORMANCE_MONITORING (читается один раз,
+set_metrics_enabled() меняет его на лету). Когда он выключен, timed
+возвращает функцию без обертки, а span() - пустой контекст.
+
+Файл экспорта: METRICS_FILE или ./data/metrics_{METRICS_ROLE}.prom. Роль
+задает точка входа процесса (bot_runner - 'bot', сервис ИИ - 'ai_service'),
+по умолчанию 'jesse'.
+"""
+import atexit
+import contextlib
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Перцентили, которые попадают в экспорт
+EXPORT_QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+_enabled: Optional[bool] = None
+
+
+def metrics_enabled() -> bool:
+    """Включен ли сбор метрик (флаг читается из окружения при первом вызове)"""
+    enabled = _enabled
+    if enabled is None:
+        enabled = set_metrics_enabled()
+    return enabled
+
+
+def set_metrics_enabled(enabled: Optional[bool] = None) -> bool:
+    """Включает/выключает сбор метрик; None - перечитать ENABLE_PERFORMANCE_MONITORING"""
+    global _enabled
+    if enabled is None:
+        enabled = os.getenv('ENABLE_PERFORMANCE_MONITORING', 'false').lower() in ('true', '1', 'yes')
+    _enabled = enabled
+    return enabled
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек в микросекундах
+
+    Значения до 2^SUB_BITS хранятся точно, дальше каждая степень двойки
+    делится на 2^SUB_BITS линейных корзин.
+    """
+
+    SUB_BITS = 5
+    MAX_EXPONENT = 40  # ~12 суток в микросекундах
+
+    def __init__(self):
+        self._sub_count = 1 << self.SUB_BITS
+        self._counts = [0] * (self._sub_count * (self.MAX_EXPONENT - self.SUB_BITS + 2))
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_count:
+            return value
+        shift = value.bit_length() - self.SUB_BITS - 1
+        return min(
+            (shift + 1) * self._sub_count + ((value >> shift) - self._sub_count),
+            len(self._counts) - 1
+        )
+
+    def _bucket_upper(self, index: int) -> int:
+        if index < self._sub_count:
+            return index
+        shift = index // self._sub_count - 1
+        return ((self._sub_count + index % self._sub_count + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        """Записывает длительность в секундах"""
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_us += value
+            if self.min_us is None or value < self.min_us:
+                self.min_us = value
+            if value > self.max_us:
+                self.max_us = value
+
+    def percentile(self, quantile: float) -> float:
+        """Значение перцентиля в секундах (верхняя граница корзины)"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+
+            target = max(1, int(round(quantile * self.count)))
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                if bucket_count:
+                    seen += bucket_count
+                    if seen >= target:
+                        # Последняя корзина собирает все, что выше MAX_EXPONENT
+                        if index == len(self._counts) - 1:
+                            return self.max_us / 1_000_000
+                        return min(self._bucket_upper(index), self.max_us) / 1_000_000
+
+        return self.max_us / 1_000_000
+
+    @property
+    def total_seconds(self) -> float:
+        return self.total_us / 1_000_000
+
+    def summary(self) -> Dict[str, float]:
+        """Краткая сводка для логов и команд бота"""
+        return {
+            'count': self.count,
+            'mean_ms': (self.total_us / self.count / 1000) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5) * 1000,
+            'p95_ms': self.percentile(0.95) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'max_ms': self.max_us / 1000,
+        }
+
+
+class Counter:
+    """Монотонный счетчик"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Текущее значение (перезаписывается)"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[LabelsKey, LatencyHistogram]] = {}
+        self.counters: Dict[str, Dict[LabelsKey, Counter]] = {}
+        self.gauges: Dict[str, Dict[LabelsKey, Gauge]] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelsKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        key = self._key(labels)
+        family = self.histograms.get(name)
+        if family is None or key not in family:
+            with self._lock:
+                family = self.histograms.setdefault(name, {})
+                family.setdefault(key, LatencyHistogram())
+        return family[key]
+
+    def counter(self, name: str, **labels) -> Counter:
+        key = self._key(labels)
+        family = self.counters.get(name)
+        if family is None or key not in family:
+            with self._lock:
+                family = self.counters.setdefault(name, {})
+                family.setdefault(key, Counter())
+        return family[key]
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        key = self._key(labels)
+        family = self.gauges.get(name)
+        if family is None or key not in family:
+            with self._lock:
+                family = self.gauges.setdefault(name, {})
+                family.setdefault(key, Gauge())
+        return family[key]
+
+    @staticmethod
+    def _format_labels(key: Iterable[Tuple[str, str]]) -> str:
+        pairs = ','.join(f'{name}="{value}"' for name, value in key)
+        return f"{{{pairs}}}" if pairs else ""
+
+    def render_prometheus(self) -> str:
+        """Текстовый формат Prometheus (histogram экспортируется как summary)"""
+        lines: List[str] = []
+
+        for name, family in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} summary")
+            for key, histogram in family.items():
+                for quantile in EXPORT_QUANTILES:
+                    labels = self._format_labels(key + (('quantile', str(quantile)),))
+                    lines.append(f"{name}{labels} {histogram.percentile(quantile):.6f}")
+                labels = self._format_labels(key)
+                lines.append(f"{name}_sum{labels} {histogram.total_seconds:.6f}")
+                lines.append(f"{name}_count{labels} {histogram.count}")
+
+        for name, family in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for key, counter in family.items():
+                lines.append(f"{name}{self._format_labels(key)} {counter.value}")
+
+        for name, family in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            for key, gauge in family.items():
+                lines.append(f"{name}{self._format_labels(key)} {gauge.value:g}")
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Сводка по всем гистограммам: 'имя{метки}' -> перцентили"""
+        return {
+            f"{name}{self._format_labels(key)}": histogram.summary()
+            for name, family in self.histograms.items()
+            for key, histogram in family.items()
+        }
+
+
+class MetricsExporter:
+    """Периодический экспорт метрик в файл и (опционально) HTTP endpoint"""
+
+    def __init__(self, registry: MetricsRegistry, role: Optional[str] = None):
+        self.registry = registry
+        self.interval = float(os.getenv('METRICS_EXPORT_INTERVAL', '300'))
+        self.port = int(os.getenv('METRICS_PORT', '0'))
+
+        # У каждого процесса (бот, Jesse, сервис ИИ) свой файл
+        self.role = role or os.getenv('METRICS_ROLE', 'jesse')
+        self.path = os.getenv('METRICS_FILE', f'./data/metrics_{self.role}.prom')
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="MetricsExporter")
+        self._thread.start()
+
+        if self.port:
+            self._start_http_server()
+
+        logging.info(f"📈 Метрики: файл {self.path} каждые {self.interval:.0f}с"
+                     + (f", http://0.0.0.0:{self.port}/metrics" if self.port else ""))
+
+    def _start_http_server(self):
+        # http.server тянет email/html парсеры - импортируем только при METRICS_PORT
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(('0.0.0.0', self.port), MetricsHandler)
+            threading.Thread(target=self._server.serve_forever, daemon=True, name="MetricsHTTP").start()
+        except OSError as e:
+            logging.error(f"❌ Не удалось открыть порт метрик {self.port}: {e}")
+            self._server = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.export()
+
+    def export(self) -> bool:
+        """Атомарно записывает текущие метрики в файл"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.registry.render_prometheus())
+            os.replace(tmp_path, self.path)
+            return True
+
+        except Exception as e:
+            logging.error(f"❌ Ошибка экспорта метрик: {e}")
+            return False
+
+    def stop(self):
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+        self.export()
+
+
+_registry: Optional[MetricsRegistry] = None
+_exporter: Optional[MetricsExporter] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Глобальный реестр (экспортер стартует при первом обращении)"""
+    global _registry, _exporter
+
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = MetricsRegistry()
+                if metrics_enabled():
+                    _exporter = MetricsExporter(registry)
+                    _exporter.start()
+                    atexit.register(_exporter.stop)
+                _registry = registry
+
+    return _registry
+
+
+def observe(name: str, seconds: float, **labels):
+    """Записывает длительность в гистограмму (ничего не делает без мониторинга)"""
+    if metrics_enabled():
+        get_metrics().histogram(name, **labels).record(seconds)
+
+
+def inc(name: str, amount: int = 1, **labels):
+    """Увеличивает счетчик (ничего не делает без мониторинга)"""
+    if metrics_enabled():
+        get_metrics().counter(name, **labels).inc(amount)
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Записывает текущее значение (ничего не делает без мониторинга)"""
+    if metrics_enabled():
+        get_metrics().gauge(name, **labels).set(value)
+
+
+@contextlib.contextmanager
+def _span(histogram: LatencyHistogram, name: str, labels: Dict[str, str]):
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        get_metrics().counter(f"{name}_errors_total", **labels).inc()
+        raise
+    finally:
+        histogram.record(time.perf_counter() - started)
+
+
+def span(name: str, **labels):
+    """
+    Замер участка кода
+
+    with span('market_analysis_step_seconds', step='bybit'):
+        ...
+    """
+    if not metrics_enabled():
+        return contextlib.nullcontext()
+    return _span(get_metrics().histogram(name, **labels), name, labels)
+
+
+def timed(name: str, **labels):
+    """
+    Декоратор замера функции (обычной или async)
+
+    Решение принимается при декорировании: при выключенном мониторинге
+    функция возвращается как есть, без накладных расходов.
+    """
+    def decorator(func):
+        if not metrics_enabled():
+            return func
+
+        histogram = get_metrics().histogram(name, **labels)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _span(histogram, name, labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _span(histogram, name, labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def instrument_strategy(cls):
+    """
+    Декоратор класса стратегии Jesse: замер should_long/should_short на каждом баре
+
+    Метрика strategy_decision_seconds{strategy, method}. Логи и профайлер
+    подключаются отдельными декораторами (install_strategy_logging,
+    profile_if_enabled).
+    """
+    for method_name in ('should_long', 'should_short'):
+        method = cls.__dict__.get(method_name)
+        if method is not None and not getattr(method, '_metrics_timed', False):
+            wrapped = timed('strategy_decision_seconds', strategy=cls.__name__, method=method_name)(method)
+            if wrapped is not method:
+                wrapped._metrics_timed = True
+                setattr(cls, method_name, wrapped)
+    return cls
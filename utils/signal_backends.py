@@ -0,0 +1,285 @@
+# utils/signal_backends.py
+"""
+Бэкенды шины сообщений для SignalPublisher
+
+- redis: Redis Streams (XADD с обрезкой MAXLEN), пул соединений и
+  автоматическая склейка одновременных публикаций в один pipeline
+- mqtt: MQTT топики через одно постоянное соединение
+
+Включаются через SIGNAL_BACKENDS=redis,mqtt. Для локальной проверки
+достаточно redis-server / mosquitto и переменных хоста ниже.
+"""
+import abc
+import asyncio
+import json
+import logging
+import os
+import weakref
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class SignalBackend(abc.ABC):
+    """Базовый класс бэкенда публикации"""
+
+    name = 'base'
+
+    async def publish(self, kind: str, payload: Dict[str, Any]) -> bool:
+        return await self.publish_many([(kind, payload)]) == 1
+
+    @abc.abstractmethod
+    async def publish_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Публикует пачку сообщений, возвращает число успешно опубликованных"""
+
+    async def close(self):
+        pass
+
+    @staticmethod
+    def _encode(payload: Dict[str, Any]) -> str:
+        return json.dumps(payload, default=str, separators=(',', ':'))
+
+
+class RedisStreamBackend(SignalBackend):
+    """
+    Публикация в Redis Streams
+
+    Поток на каждый тип сообщения: {prefix}:signal, {prefix}:trade_result.
+    Одновременные publish() в пределах одного витка event loop уходят
+    одним pipeline.
+    """
+
+    name = 'redis'
+
+    def __init__(self):
+        self.url = os.getenv('SIGNAL_REDIS_URL') or self._build_url()
+        self.stream_prefix = os.getenv('SIGNAL_REDIS_STREAM_PREFIX', 'trading')
+        self.maxlen = int(os.getenv('SIGNAL_REDIS_MAXLEN', '10000'))
+        self.max_connections = int(os.getenv('SIGNAL_REDIS_MAX_CONNECTIONS', '10'))
+
+        # Клиент, ожидающие публикации и флаг сброса - свои у каждого event loop
+        self._states: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _build_url() -> str:
+        host = os.getenv('REDIS_HOST', 'localhost')
+        port = os.getenv('REDIS_PORT', '6379')
+        password = os.getenv('REDIS_PASSWORD')
+        auth = f":{password}@" if password else ""
+        return f"redis://{auth}{host}:{port}/0"
+
+    def _state(self) -> '_RedisLoopState':
+        """Состояние текущего event loop (клиент с пулом соединений создается при первом вызове)"""
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+
+        if state is None:
+            import redis.asyncio as aioredis
+
+            state = _RedisLoopState(aioredis.Redis.from_url(self.url, max_connections=self.max_connections))
+            self._states[loop] = state
+
+        return state
+
+    def _get_client(self):
+        return self._state().client
+
+    async def publish(self, kind: str, payload: Dict[str, Any]) -> bool:
+        """Публикация с автоматическим объединением в pipeline"""
+        state = self._state()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        state.pending.append((kind, payload, future))
+
+        if not state.flush_scheduled:
+            state.flush_scheduled = True
+            # Ссылка на задачу держится до ее завершения: loop хранит только слабые
+            task = loop.create_task(self._flush_pending(state))
+            state.flush_tasks.add(task)
+            task.add_done_callback(state.flush_tasks.discard)
+
+        return await future
+
+    async def _flush_pending(self, state: '_RedisLoopState'):
+        pending, state.pending = state.pending, []
+        state.flush_scheduled = False
+
+        try:
+            published = await self.publish_many([(kind, payload) for kind, payload, _ in pending])
+            success = published == len(pending)
+        except Exception as e:
+            logging.error(f"❌ Redis Streams: ошибка публикации: {e}")
+            success = False
+
+        for _, _, future in pending:
+            if not future.done():
+                future.set_result(success)
+
+    async def publish_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> int:
+        if not items:
+            return 0
+
+        client = self._get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for kind, payload in items:
+                pipe.xadd(
+                    f"{self.stream_prefix}:{kind}",
+                    {'kind': kind, 'payload': self._encode(payload)},
+                    maxlen=self.maxlen,
+                    approximate=True
+                )
+            results = await pipe.execute(raise_on_error=False)
+
+        return sum(1 for result in results if not isinstance(result, Exception))
+
+    @staticmethod
+    async def _close_client(client):
+        try:
+            await client.aclose() if hasattr(client, 'aclose') else await client.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        """Закрывает клиент текущего loop; клиенты других работающих loop'ов - в их loop"""
+        current = asyncio.get_running_loop()
+        for loop, state in list(self._states.items()):
+            if loop is current:
+                await asyncio.gather(*state.flush_tasks, return_exceptions=True)
+                await self._close_client(state.client)
+            elif loop.is_running() and not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(self._close_client(state.client), loop)
+        self._states.clear()
+
+
+class _RedisLoopState:
+    """Клиент Redis и очередь склейки одного event loop"""
+
+    __slots__ = ('client', 'pending', 'flush_scheduled', 'flush_tasks')
+
+    def __init__(self, client):
+        self.client = client
+        self.pending: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self.flush_scheduled = False
+        self.flush_tasks: Set[asyncio.Task] = set()
+
+
+class MQTTBackend(SignalBackend):
+    """
+    Публикация в MQTT
+
+    Топик: {prefix}/{kind}/{symbol}, например trading/signal/BTCUSDT.
+    """
+
+    name = 'mqtt'
+
+    def __init__(self):
+        self.host = os.getenv('MQTT_HOST', 'localhost')
+        self.port = int(os.getenv('MQTT_PORT', '1883'))
+        self.username = os.getenv('MQTT_USERNAME')
+        self.password = os.getenv('MQTT_PASSWORD')
+        self.topic_prefix = os.getenv('SIGNAL_MQTT_TOPIC_PREFIX', 'trading')
+        self.qos = int(os.getenv('SIGNAL_MQTT_QOS', '1'))
+
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    async def _get_client(self):
+        """Постоянное соединение (переподключение при смене event loop)"""
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            previous, previous_loop = self._client, self._loop
+            self._client = None
+            self._loop = loop
+            self._connect_lock = asyncio.Lock()
+            # Соединение прежнего loop закрывается в нем, если он еще работает
+            if previous is not None and previous_loop is not None \
+                    and previous_loop.is_running() and not previous_loop.is_closed():
+                asyncio.run_coroutine_threadsafe(self._disconnect(previous), previous_loop)
+
+        async with self._connect_lock:
+            if self._client is None:
+                try:
+                    from asyncio_mqtt import Client
+                except ImportError:
+                    from aiomqtt import Client
+
+                client = Client(
+                    hostname=self.host,
+                    port=self.port,
+                    username=self.username,
+                    password=self.password
+                )
+                await client.__aenter__()
+                self._client = client
+                logging.info(f"📡 MQTT подключен: {self.host}:{self.port}")
+
+        return self._client
+
+    def _topic(self, kind: str, payload: Dict[str, Any]) -> str:
+        symbol = (payload.get('signal') or payload.get('trade_result') or {}).get('symbol')
+        return f"{self.topic_prefix}/{kind}/{symbol}" if symbol else f"{self.topic_prefix}/{kind}"
+
+    async def publish_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> int:
+        if not items:
+            return 0
+
+        try:
+            client = await self._get_client()
+        except Exception as e:
+            logging.error(f"❌ MQTT недоступен: {e}")
+            return 0
+
+        results = await asyncio.gather(
+            *(client.publish(self._topic(kind, payload), payload=self._encode(payload), qos=self.qos)
+              for kind, payload in items),
+            return_exceptions=True
+        )
+
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            logging.warning(f"⚠️ MQTT: не опубликовано {len(failed)} из {len(items)}: {failed[0]}")
+            # Соединение могло оборваться - закрываем и переподключимся при следующей публикации
+            if self._client is client:
+                self._client = None
+                await self._disconnect(client)
+
+        return len(items) - len(failed)
+
+    @staticmethod
+    async def _disconnect(client):
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception:
+            pass
+
+    async def close(self):
+        client, self._client = self._client, None
+        if client is None:
+            return
+        loop = self._loop
+        if loop is None or loop is asyncio.get_running_loop():
+            await self._disconnect(client)
+        elif loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._disconnect(client), loop)
+
+
+BACKENDS = {
+    RedisStreamBackend.name: RedisStreamBackend,
+    MQTTBackend.name: MQTTBackend,
+}
+
+
+def create_backends(names: str) -> List[SignalBackend]:
+    """Создает бэкенды по списку имен через запятую (SIGNAL_BACKENDS)"""
+    backends = []
+
+    for name in (n.strip().lower() for n in names.split(',')):
+        if not name:
+            continue
+        backend_class = BACKENDS.get(name)
+        if backend_class is None:
+            logging.warning(f"⚠️ Неизвестный бэкенд сигналов: {name}")
+            continue
+        backends.append(backend_class())
+
+    return backends
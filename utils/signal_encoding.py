@@ -0,0 +1,76 @@
+# utils/signal_encoding.py
+"""
+Кодирование payload для webhooks
+
+Поддерживаемые форматы (задаются для каждого webhook в SIGNAL_WEBHOOKS
+через суффикс "|формат", например "https://collector/hook|msgpack"):
+- json        - обычный JSON документ (по умолчанию)
+- jsonl-gzip  - JSON lines, сжатые gzip
+- msgpack     - MessagePack (нужен пакет msgpack, иначе jsonl-gzip)
+"""
+import gzip
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+
+ENCODING_JSON = 'json'
+ENCODING_JSONL_GZIP = 'jsonl-gzip'
+ENCODING_MSGPACK = 'msgpack'
+
+SUPPORTED_ENCODINGS = (ENCODING_JSON, ENCODING_JSONL_GZIP, ENCODING_MSGPACK)
+
+
+def parse_webhook_spec(spec: str) -> Tuple[str, str]:
+    """Разбирает "url|формат" на URL и формат"""
+    url, _, encoding = spec.partition('|')
+    url = url.strip()
+    encoding = encoding.strip().lower() or ENCODING_JSON
+
+    if encoding not in SUPPORTED_ENCODINGS:
+        logging.warning(f"⚠️ Неизвестный формат webhook '{encoding}', используется json: {url}")
+        encoding = ENCODING_JSON
+
+    if encoding == ENCODING_MSGPACK and not MSGPACK_AVAILABLE:
+        logging.warning(f"⚠️ msgpack не установлен, для {url} используется {ENCODING_JSONL_GZIP}")
+        encoding = ENCODING_JSONL_GZIP
+
+    return url, encoding
+
+
+def encode_events(events: List[Dict[str, Any]], encoding: str, batched: bool) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Кодирует одно событие или пачку событий
+
+    Args:
+        events: События (для batched=False - ровно одно)
+        encoding: Формат из SUPPORTED_ENCODINGS
+        batched: Пачка или одиночный документ
+
+    Returns:
+        Тело запроса и HTTP заголовки
+    """
+    if encoding == ENCODING_MSGPACK:
+        data = events if batched else events[0]
+        return msgpack.packb(data, default=str, use_bin_type=True), {
+            'Content-Type': 'application/msgpack'
+        }
+
+    if encoding == ENCODING_JSONL_GZIP:
+        lines = '\n'.join(json.dumps(event, default=str, separators=(',', ':')) for event in events)
+        return gzip.compress(lines.encode('utf-8'), compresslevel=5), {
+            'Content-Type': 'application/x-ndjson',
+            'Content-Encoding': 'gzip'
+        }
+
+    document = {'batch': events, 'count': len(events)} if batched else events[0]
+    return json.dumps(document, default=str, separators=(',', ':')).encode('utf-8'), {
+        'Content-Type': 'application/json'
+    }
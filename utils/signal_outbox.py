@@ -0,0 +1,403 @@
+# utils/signal_outbox.py
+"""
+Персистентный outbox для публикации сигналов (at-least-once доставка)
+
+publish_signal только записывает строку в локальную SQLite базу,
+а фоновый диспетчер доставляет ее в webhooks с экспоненциальной
+задержкой и заголовком Idempotency-Key. После рестарта недоставленные
+записи продолжают отправляться.
+
+Запись, не доставленная за SIGNAL_OUTBOX_MAX_ATTEMPTS попыток, переходит
+в dead-letter (dead_at): больше не отправляется и удаляется компактацией
+через SIGNAL_OUTBOX_DEAD_RETENTION секунд - сломанный endpoint не
+раздувает таблицу бесконечно.
+
+В пакетном режиме (SIGNAL_BATCH_ENABLED) записи одного webhook
+отправляются одной пачкой каждые SIGNAL_BATCH_INTERVAL_MS мс
+или как только накопится SIGNAL_BATCH_MAX_EVENTS событий.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class OutboxEntry:
+    """Запись outbox для одного webhook"""
+    id: int
+    idempotency_key: str
+    webhook_url: str
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class SignalOutbox:
+    """
+    Очередь исходящих сообщений в SQLite
+
+    Одна строка на пару (сообщение, webhook), поэтому медленный
+    endpoint не задерживает доставку в остальные.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_attempts: Optional[int] = None):
+        self.path = path or os.getenv('SIGNAL_OUTBOX_PATH', './data/signal_outbox.db')
+        # 0 - повторять без ограничения
+        self.max_attempts = int(os.getenv('SIGNAL_OUTBOX_MAX_ATTEMPTS', '20')) if max_attempts is None else max_attempts
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+        # WAL + NORMAL: короткий commit без fsync на каждую запись
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL,
+                webhook_url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                delivered_at REAL,
+                dead_at REAL,
+                last_error TEXT,
+                UNIQUE (idempotency_key, webhook_url)
+            )
+        """)
+        # База из прошлой версии - без dead-letter колонки
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if 'dead_at' not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN dead_at REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (delivered_at, next_attempt_at)"
+        )
+
+    @staticmethod
+    def make_idempotency_key(kind: str, payload: Dict[str, Any]) -> str:
+        """Стабильный ключ сообщения (одинаков для всех повторов доставки)"""
+        raw = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(f"{kind}:{raw}".encode('utf-8')).hexdigest()[:32]
+
+    def append(self, kind: str, payload: Dict[str, Any], webhooks: List[str],
+               idempotency_key: Optional[str] = None) -> str:
+        """Добавляет сообщение для всех webhooks одной транзакцией"""
+        key = idempotency_key or self.make_idempotency_key(kind, payload)
+        body = json.dumps(payload, default=str)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO outbox "
+                    "(idempotency_key, webhook_url, kind, payload, next_attempt_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(key, url, kind, body, now, now) for url in webhooks]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return key
+
+    def fetch_due(self, limit: int = 100) -> List[OutboxEntry]:
+        """Возвращает записи, которые пора доставить"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, idempotency_key, webhook_url, kind, payload, attempts FROM outbox "
+                "WHERE delivered_at IS NULL AND dead_at IS NULL AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+
+        return [
+            OutboxEntry(id=row[0], idempotency_key=row[1], webhook_url=row[2],
+                        kind=row[3], payload=json.loads(row[4]), attempts=row[5])
+            for row in rows
+        ]
+
+    def next_due_in(self) -> Optional[float]:
+        """Через сколько секунд появится следующая запись к доставке"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE delivered_at IS NULL AND dead_at IS NULL"
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def mark_delivered(self, entry_ids: List[int]):
+        if not entry_ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET delivered_at = ?, last_error = NULL WHERE id = ?",
+                [(time.time(), entry_id) for entry_id in entry_ids]
+            )
+
+    def mark_failed(self, entry_id: int, error: str, next_attempt_at: float) -> bool:
+        """Учитывает неудачную попытку; True - попытки исчерпаны, запись в dead-letter"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?, "
+                "dead_at = CASE WHEN ? > 0 AND attempts + 1 >= ? THEN ? ELSE NULL END WHERE id = ?",
+                (error, next_attempt_at, self.max_attempts, self.max_attempts, now, entry_id)
+            )
+            row = self._conn.execute("SELECT dead_at FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        return row is not None and row[0] is not None
+
+    def compact(self, retention_seconds: float, dead_retention_seconds: Optional[float] = None) -> int:
+        """Удаляет подтвержденные записи старше retention_seconds и dead-letter старше dead_retention_seconds"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE delivered_at IS NOT NULL AND delivered_at < ?",
+                (now - retention_seconds,)
+            )
+            removed = cursor.rowcount
+            if dead_retention_seconds is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM outbox WHERE dead_at IS NOT NULL AND dead_at < ?",
+                    (now - dead_retention_seconds,)
+                )
+                removed += cursor.rowcount
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return removed
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE delivered_at IS NULL AND dead_at IS NULL"
+            ).fetchone()[0]
+
+    def dead_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE dead_at IS NOT NULL"
+            ).fetchone()[0]
+
+    def requeue_dead(self) -> int:
+        """Возвращает dead-letter записи в доставку (например, после починки endpoint)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE outbox SET dead_at = NULL, attempts = 0, next_attempt_at = ? WHERE dead_at IS NOT NULL",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxDispatcher:
+    """
+    Фоновый доставщик outbox
+
+    Работает в собственном потоке с отдельным event loop,
+    HTTP-запросы выполняет через SignalPublisher.
+    """
+
+    def __init__(self, outbox: SignalOutbox, publisher):
+        self.outbox = outbox
+        self.publisher = publisher
+
+        self.poll_interval = float(os.getenv('SIGNAL_OUTBOX_POLL_INTERVAL', '1.0'))
+        self.batch_size = int(os.getenv('SIGNAL_OUTBOX_BATCH_SIZE', '100'))
+        self.backoff_base = float(os.getenv('SIGNAL_OUTBOX_BACKOFF_BASE', '2'))
+        self.backoff_max = float(os.getenv('SIGNAL_OUTBOX_BACKOFF_MAX', '300'))
+        self.retention = float(os.getenv('SIGNAL_OUTBOX_RETENTION', '3600'))
+        self.dead_retention = float(os.getenv('SIGNAL_OUTBOX_DEAD_RETENTION', str(7 * 24 * 3600)))
+        self.compact_interval = float(os.getenv('SIGNAL_OUTBOX_COMPACT_INTERVAL', '600'))
+
+        # Пакетный режим
+        self.batch_enabled = getattr(publisher, 'batch_enabled', False)
+        self.batch_max_events = getattr(publisher, 'batch_max_events', 100)
+        if self.batch_enabled:
+            self.poll_interval = publisher.batch_interval_ms / 1000
+            self.batch_size = max(self.batch_size, self.batch_max_events * max(1, len(publisher.webhooks)))
+        self._appended_since_flush = 0
+
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_compact = time.time()
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run_thread, daemon=True, name="SignalOutbox")
+        self._thread.start()
+
+        logging.info(f"📦 Outbox диспетчер запущен (ожидают доставки: {self.outbox.pending_count()})")
+
+    def stop(self, timeout: float = 5.0):
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def notify(self):
+        """Будит диспетчер после добавления записи"""
+        self._wakeup.set()
+
+    def notify_appended(self):
+        """Учитывает новую запись; в пакетном режиме будит только при полной пачке"""
+        if not self.batch_enabled:
+            self._wakeup.set()
+            return
+
+        self._appended_since_flush += 1
+        if self._appended_since_flush >= self.batch_max_events:
+            self._wakeup.set()
+
+    def _run_thread(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        try:
+            while self._running:
+                try:
+                    delivered = loop.run_until_complete(self._dispatch_once())
+                except Exception as e:
+                    logging.error(f"❌ Ошибка outbox диспетчера: {e}")
+                    delivered = 0
+
+                if time.time() - self._last_compact >= self.compact_interval:
+                    self._compact()
+
+                # Полная пачка - сразу берем следующую
+                if delivered >= self.batch_size:
+                    continue
+
+                if self.batch_enabled:
+                    # Пачки уходят по таймеру, а не по первой записи
+                    wait = self.poll_interval
+                else:
+                    next_due = self.outbox.next_due_in()
+                    wait = self.poll_interval if next_due is None else min(self.poll_interval, next_due)
+                self._wakeup.wait(timeout=wait)
+                self._wakeup.clear()
+        finally:
+            # Только сессия этого loop: бэкенды и сессии других loop'ов принадлежат publisher
+            try:
+                loop.run_until_complete(self.publisher.close_session())
+            except Exception:
+                pass
+            loop.close()
+
+    async def _dispatch_once(self) -> int:
+        """Доставляет все записи, которым пора, параллельно"""
+        self._appended_since_flush = 0
+        entries = self.outbox.fetch_due(self.batch_size)
+        if not entries:
+            return 0
+
+        if self.batch_enabled:
+            return await self._dispatch_batches(entries)
+
+        results = await asyncio.gather(*(self._deliver(entry) for entry in entries))
+
+        delivered_ids = [entry.id for entry, ok in zip(entries, results) if ok]
+        self.outbox.mark_delivered(delivered_ids)
+        return len(entries)
+
+    async def _dispatch_batches(self, entries: List[OutboxEntry]) -> int:
+        """Группирует записи по webhook и отправляет пачками"""
+        groups = defaultdict(list)
+        for entry in entries:
+            groups[entry.webhook_url].append(entry)
+
+        batches = []
+        for url, url_entries in groups.items():
+            for i in range(0, len(url_entries), self.batch_max_events):
+                batches.append((url, url_entries[i:i + self.batch_max_events]))
+
+        results = await asyncio.gather(*(self._deliver_batch(url, batch) for url, batch in batches))
+
+        delivered_ids = [entry.id for (_, batch), ok in zip(batches, results) if ok for entry in batch]
+        self.outbox.mark_delivered(delivered_ids)
+        return len(entries)
+
+    async def _deliver_batch(self, url: str, entries: List[OutboxEntry]) -> bool:
+        events = [
+            {'kind': entry.kind, 'idempotency_key': entry.idempotency_key, 'data': entry.payload}
+            for entry in entries
+        ]
+        batch_key = hashlib.sha256(
+            ''.join(entry.idempotency_key for entry in entries).encode('utf-8')
+        ).hexdigest()[:32]
+
+        result = await self.publisher._post_batch(url, events, headers={'Idempotency-Key': batch_key})
+
+        if result.success:
+            return True
+
+        attempts = min(entry.attempts for entry in entries)
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempts)) * random.uniform(0.5, 1.0)
+        dead = sum(
+            self.outbox.mark_failed(entry.id, result.error or 'unknown', time.time() + delay)
+            for entry in entries
+        )
+
+        logging.warning(
+            f"⚠️ Outbox: {url} не принял пачку из {len(entries)} событий: "
+            f"{result.error}, повтор через {delay:.0f}с"
+        )
+        if dead:
+            logging.error(f"☠️ Outbox: {dead} событий для {url} исчерпали попытки, перенесены в dead-letter")
+        return False
+
+    async def _deliver(self, entry: OutboxEntry) -> bool:
+        result = await self.publisher._post_once(
+            entry.webhook_url,
+            entry.payload,
+            headers={'Idempotency-Key': entry.idempotency_key}
+        )
+
+        if result.success:
+            return True
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** entry.attempts))
+        delay *= random.uniform(0.5, 1.0)  # jitter
+        if self.outbox.mark_failed(entry.id, result.error or 'unknown', time.time() + delay):
+            logging.error(
+                f"☠️ Outbox: {entry.webhook_url} не принял {entry.kind} за {entry.attempts + 1} попыток "
+                f"({result.error}), запись перенесена в dead-letter"
+            )
+            return False
+
+        logging.warning(
+            f"⚠️ Outbox: {entry.webhook_url} не принял {entry.kind} "
+            f"(попытка {entry.attempts + 1}): {result.error}, повтор через {delay:.0f}с"
+        )
+        return False
+
+    def _compact(self):
+        try:
+            removed = self.outbox.compact(self.retention, self.dead_retention)
+            if removed:
+                logging.info(f"🧹 Outbox: удалено подтвержденных и dead-letter записей: {removed}")
+        except Exception as e:
+            logging.error(f"❌ Ошибка компактации outbox: {e}")
+        self._last_compact = time.time()
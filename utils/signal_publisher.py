@@ -2,15 +2,38 @@
 """
 Публикатор торговых сигналов для интеграции с внешними системами
 Может использоваться для отправки сигналов в очереди сообщений, webhooks и т.д.
+
+По умолчанию сигналы пишутся в персистентный outbox (utils/signal_outbox.py)
+и доставляются фоновым диспетчером. Дополнительно сигналы можно дублировать
+в локальную шину сообщений (utils/signal_backends.py, SIGNAL_BACKENDS).
 """
 
 import asyncio
 import json
 import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import aiohttp
 
+from .metrics import inc, observe
+from .signal_backends import SignalBackend, create_backends
+from .signal_encoding import ENCODING_JSON, encode_events, parse_webhook_spec
+
+
+@dataclass
+class WebhookResult:
+    """Результат доставки в один webhook"""
+    url: str
+    success: bool
+    status: Optional[int] = None
+    latency_ms: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+
 
 class SignalPublisher:
     """
@@ -19,29 +42,98 @@ class SignalPublisher:
     
     def __init__(self):
         self.webhooks: List[str] = []
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.webhook_encodings: Dict[str, str] = {}
+        self.backends: List[SignalBackend] = []
+        # Сессия на каждый event loop (aiohttp привязан к loop, в котором создан)
+        self._sessions: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
         self.enabled = False
+        self.last_results: List[WebhookResult] = []
+        self.outbox = None
+        self.dispatcher = None
+        self._outbox_lock = threading.Lock()
         
         # Загрузка настроек из переменных окружения
         self._load_config()
         
         if self.enabled:
             logging.info("📡 Signal Publisher инициализирован")
+            
+            # Продолжаем доставку того, что осталось с прошлого запуска
+            if self.outbox_enabled and self.webhooks:
+                self._init_outbox()
     
     def _load_config(self):
         """Загружает конфигурацию из переменных окружения"""
         import os
         
-        # Webhook URLs (разделенные запятой)
+        # Webhook URLs (разделенные запятой, формат через "|": url|msgpack)
         webhook_urls = os.getenv('SIGNAL_WEBHOOKS', '')
         if webhook_urls:
-            self.webhooks = [url.strip() for url in webhook_urls.split(',') if url.strip()]
+            for spec in webhook_urls.split(','):
+                if not spec.strip():
+                    continue
+                url, encoding = parse_webhook_spec(spec)
+                self.webhooks.append(url)
+                self.webhook_encodings[url] = encoding
+        
+        # Шина сообщений (redis, mqtt) - подключение при первой публикации
+        self.backends = create_backends(os.getenv('SIGNAL_BACKENDS', ''))
         
-        self.enabled = len(self.webhooks) > 0
+        self.enabled = len(self.webhooks) > 0 or len(self.backends) > 0
         
         # Настройки для отправки
         self.timeout = int(os.getenv('SIGNAL_TIMEOUT', '10'))
         self.max_retries = int(os.getenv('SIGNAL_MAX_RETRIES', '3'))
+        
+        # Общий бюджет времени на один endpoint (все попытки вместе)
+        self.endpoint_timeout = float(os.getenv('SIGNAL_ENDPOINT_TIMEOUT', str(self.timeout * 2)))
+        
+        # Лимиты пула соединений общего aiohttp коннектора
+        self.max_connections = int(os.getenv('SIGNAL_MAX_CONNECTIONS', '100'))
+        self.max_connections_per_host = int(os.getenv('SIGNAL_MAX_CONNECTIONS_PER_HOST', '4'))
+        
+        # Персистентный outbox (at-least-once доставка)
+        self.outbox_enabled = os.getenv('SIGNAL_OUTBOX_ENABLED', 'true').lower() in ('true', '1', 'yes')
+        
+        # Пакетная отправка: одна пачка каждые N мс или по K событий (только через outbox)
+        self.batch_enabled = os.getenv('SIGNAL_BATCH_ENABLED', 'false').lower() in ('true', '1', 'yes')
+        self.batch_max_events = int(os.getenv('SIGNAL_BATCH_MAX_EVENTS', '100'))
+        self.batch_interval_ms = int(os.getenv('SIGNAL_BATCH_INTERVAL_MS', '500'))
+        
+        if self.batch_enabled and not self.outbox_enabled:
+            logging.warning("⚠️ SIGNAL_BATCH_ENABLED требует outbox, пакетная отправка отключена")
+            self.batch_enabled = False
+    
+    def _init_outbox(self) -> bool:
+        """Открывает outbox и запускает фоновый диспетчер"""
+        if self.dispatcher is not None:
+            return True
+        
+        with self._outbox_lock:
+            if self.dispatcher is not None:
+                return True
+            
+            try:
+                from .signal_outbox import SignalOutbox, OutboxDispatcher
+                
+                self.outbox = SignalOutbox()
+                self.dispatcher = OutboxDispatcher(self.outbox, self)
+                self.dispatcher.start()
+                return True
+                
+            except Exception as e:
+                logging.error(f"❌ Outbox недоступен, используется прямая отправка: {e}")
+                self.outbox_enabled = False
+                return False
+    
+    def _enqueue(self, kind: str, payload: Dict[str, Any]) -> bool:
+        """Записывает сообщение в outbox (доставка - в фоне)"""
+        if not self._init_outbox():
+            return False
+        
+        self.outbox.append(kind, payload, self.webhooks)
+        self.dispatcher.notify_appended()
+        return True
     
     async def publish_signal(self, signal_data: Dict[str, Any], ai_analysis: Optional[Dict[str, Any]] = None) -> bool:
         """
@@ -61,27 +153,58 @@ class SignalPublisher:
             # Подготавливаем данные для отправки
             payload = self._prepare_payload(signal_data, ai_analysis)
             
-            # Отправляем во все настроенные webhooks
-            success_count = 0
+            # Webhooks и шина сообщений - параллельно
+            webhooks_ok, backends_ok = await asyncio.gather(
+                self._publish_to_webhooks('signal', payload),
+                self._publish_to_backends('signal', payload)
+            )
             
-            for webhook_url in self.webhooks:
-                if await self._send_to_webhook(webhook_url, payload):
-                    success_count += 1
-            
-            # Считаем успешным если хотя бы один webhook сработал
-            success = success_count > 0
-            
-            if success:
-                logging.info(f"📡 Сигнал опубликован успешно ({success_count}/{len(self.webhooks)} webhooks)")
-            else:
-                logging.error("❌ Не удалось опубликовать сигнал ни в один webhook")
-            
-            return success
+            # Считаем успешным если хотя бы один получатель сработал
+            return webhooks_ok or backends_ok
             
         except Exception as e:
             logging.error(f"❌ Ошибка публикации сигнала: {e}")
             return False
     
+    async def _publish_to_webhooks(self, kind: str, payload: Dict[str, Any]) -> bool:
+        """Публикует в webhooks: через outbox или прямой рассылкой"""
+        if not self.webhooks:
+            return False
+        
+        if self.outbox_enabled and self._enqueue(kind, payload):
+            logging.info(f"📦 {kind} записан в outbox ({len(self.webhooks)} webhooks)")
+            return True
+        
+        # Параллельная рассылка во все webhooks
+        results = await self._fan_out(payload)
+        success_count = sum(1 for result in results if result.success)
+        
+        if success_count:
+            slowest = max(result.latency_ms for result in results)
+            logging.info(f"📡 {kind} опубликован успешно ({success_count}/{len(self.webhooks)} webhooks, {slowest:.0f}мс)")
+        else:
+            logging.error(f"❌ Не удалось опубликовать {kind} ни в один webhook")
+        
+        return success_count > 0
+    
+    async def _publish_to_backends(self, kind: str, payload: Dict[str, Any]) -> bool:
+        """Публикует в шину сообщений (все бэкенды параллельно)"""
+        if not self.backends:
+            return False
+        
+        results = await asyncio.gather(
+            *(backend.publish(kind, payload) for backend in self.backends),
+            return_exceptions=True
+        )
+        
+        for backend, result in zip(self.backends, results):
+            if isinstance(result, Exception):
+                logging.warning(f"⚠️ Бэкенд {backend.name}: {result}")
+            elif not result:
+                logging.warning(f"⚠️ Бэкенд {backend.name} не принял {kind}")
+        
+        return any(result is True for result in results)
+    
     def _prepare_payload(self, signal_data: Dict[str, Any], ai_analysis: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Подготавливает данные для отправки
@@ -115,42 +238,145 @@ class SignalPublisher:
         
         return payload
     
-    async def _send_to_webhook(self, webhook_url: str, payload: Dict[str, Any]) -> bool:
+    def _get_session(self) -> aiohttp.ClientSession:
         """
-        Отправляет данные в конкретный webhook
+        Возвращает общую сессию с пулом соединений для текущего event loop
+        
+        Сессия привязана к event loop, поэтому у каждого loop (например,
+        потока ИИ анализа) своя. Поток, который закрывает свой loop,
+        сначала вызывает close_session().
+        """
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'User-Agent': 'AI-Trading-Bot/1.0'}
+            )
+            self._sessions[loop] = session
+        
+        return session
+    
+    async def _fan_out(self, payload: Dict[str, Any]) -> List[WebhookResult]:
+        """
+        Отправляет payload во все webhooks параллельно
+        
+        Время публикации равно времени самого медленного endpoint,
+        а не сумме всех.
         """
+        results = await asyncio.gather(
+            *(self._deliver(url, payload) for url in self.webhooks)
+        )
+        self.last_results = list(results)
+        
+        for result in results:
+            if result.success:
+                logging.debug(f"✅ Webhook {result.url}: {result.status} за {result.latency_ms:.0f}мс")
+            else:
+                logging.warning(f"⚠️ Webhook {result.url} недоступен: {result.error} ({result.attempts} попыток)")
+        
+        return self.last_results
+    
+    async def _deliver(self, webhook_url: str, payload: Dict[str, Any]) -> WebhookResult:
+        """Доставляет payload в webhook с ограничением общего времени"""
+        result = WebhookResult(url=webhook_url, success=False)
+        started = time.perf_counter()
+        
+        try:
+            await asyncio.wait_for(
+                self._send_with_retries(webhook_url, payload, result),
+                timeout=self.endpoint_timeout
+            )
+        except asyncio.TimeoutError:
+            result.error = f"endpoint timeout {self.endpoint_timeout}s"
+        except Exception as e:
+            result.error = str(e)
+        
+        result.latency_ms = (time.perf_counter() - started) * 1000
+        observe('webhook_delivery_seconds', result.latency_ms / 1000, url=webhook_url)
+        return result
+    
+    async def _send_with_retries(self, webhook_url: str, payload: Dict[str, Any], result: WebhookResult):
+        """Попытки отправки с экспоненциальной задержкой"""
         for attempt in range(self.max_retries):
-            try:
-                if not self.session:
-                    self.session = aiohttp.ClientSession()
-                
-                async with self.session.post(
-                    webhook_url,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=self.timeout),
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'AI-Trading-Bot/1.0'
-                    }
-                ) as response:
-                    
-                    if response.status == 200:
-                        logging.debug(f"✅ Webhook успешно: {webhook_url}")
-                        return True
-                    else:
-                        logging.warning(f"⚠️ Webhook вернул {response.status}: {webhook_url}")
-                        
-            except asyncio.TimeoutError:
-                logging.warning(f"⏰ Timeout webhook (попытка {attempt + 1}): {webhook_url}")
-                
-            except Exception as e:
-                logging.warning(f"❌ Ошибка webhook (попытка {attempt + 1}): {webhook_url} - {e}")
+            attempt_result = await self._post_once(webhook_url, payload)
+            
+            result.attempts = attempt + 1
+            result.status = attempt_result.status
+            result.error = attempt_result.error
+            
+            if attempt_result.success:
+                result.success = True
+                return
             
             # Задержка перед повторной попыткой
             if attempt < self.max_retries - 1:
                 await asyncio.sleep(2 ** attempt)  # Экспоненциальная задержка
+    
+    async def _post_once(self, webhook_url: str, payload: Dict[str, Any],
+                         headers: Optional[Dict[str, str]] = None) -> WebhookResult:
+        """Одна попытка POST запроса в webhook"""
+        return await self._post_events(webhook_url, [payload], batched=False, headers=headers)
+    
+    async def _post_batch(self, webhook_url: str, events: List[Dict[str, Any]],
+                          headers: Optional[Dict[str, str]] = None) -> WebhookResult:
+        """Отправляет пачку событий одним запросом"""
+        return await self._post_events(webhook_url, events, batched=True, headers=headers)
+    
+    async def _post_events(self, webhook_url: str, events: List[Dict[str, Any]], batched: bool,
+                           headers: Optional[Dict[str, str]] = None) -> WebhookResult:
+        """POST запрос в формате, согласованном с webhook"""
+        result = WebhookResult(url=webhook_url, success=False, attempts=1)
+        started = time.perf_counter()
+        encoding = self.webhook_encodings.get(webhook_url, ENCODING_JSON)
         
-        return False
+        try:
+            body, request_headers = encode_events(events, encoding, batched)
+            if headers:
+                request_headers.update(headers)
+            
+            session = self._get_session()
+            async with session.post(
+                webhook_url,
+                data=body,
+                headers=request_headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                result.status = response.status
+                
+                if 200 <= response.status < 300:
+                    result.success = True
+                else:
+                    result.error = f"HTTP {response.status}"
+                    
+                    # Webhook не понимает формат - откатываемся на JSON
+                    if response.status == 415 and encoding != ENCODING_JSON:
+                        logging.warning(f"⚠️ {webhook_url} не принимает {encoding}, переключаемся на json")
+                        self.webhook_encodings[webhook_url] = ENCODING_JSON
+                    
+        except asyncio.TimeoutError:
+            result.error = f"timeout {self.timeout}s"
+            
+        except aiohttp.ClientError as e:
+            result.error = f"{type(e).__name__}: {e}"
+        
+        result.latency_ms = (time.perf_counter() - started) * 1000
+        observe('webhook_request_seconds', result.latency_ms / 1000, url=webhook_url)
+        inc('webhook_requests_total', url=webhook_url, status=result.status or 'error')
+        return result
+    
+    async def _send_to_webhook(self, webhook_url: str, payload: Dict[str, Any]) -> bool:
+        """
+        Отправляет данные в конкретный webhook
+        """
+        result = await self._deliver(webhook_url, payload)
+        return result.success
     
     async def publish_trade_result(self, trade_result: Dict[str, Any]) -> bool:
         """
@@ -175,24 +401,45 @@ class SignalPublisher:
                 'version': '1.0.0'
             }
             
-            success_count = 0
-            for webhook_url in self.webhooks:
-                if await self._send_to_webhook(webhook_url, payload):
-                    success_count += 1
-            
-            return success_count > 0
+            webhooks_ok, backends_ok = await asyncio.gather(
+                self._publish_to_webhooks('trade_result', payload),
+                self._publish_to_backends('trade_result', payload)
+            )
+            return webhooks_ok or backends_ok
             
         except Exception as e:
             logging.error(f"❌ Ошибка публикации результата сделки: {e}")
             return False
     
+    async def close_session(self):
+        """Закрывает сессию текущего event loop (перед остановкой этого loop)"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+    
     async def close(self):
         """
         Закрывает соединения
+        
+        Сессии других loop'ов закрываются в их loop'ах (если те еще работают).
         """
-        if self.session:
-            await self.session.close()
-            self.session = None
+        await self.close_session()
+        
+        for loop, session in list(self._sessions.items()):
+            if session.closed:
+                continue
+            if loop.is_running() and not loop.is_closed():
+                future = asyncio.run_coroutine_threadsafe(session.close(), loop)
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(future), timeout=5)
+                except Exception as e:
+                    logging.warning(f"⚠️ Сессия webhook другого loop не закрыта: {e}")
+            else:
+                logging.warning("⚠️ Сессия webhook осталась от остановленного loop без close_session()")
+        self._sessions.clear()
+        
+        for backend in self.backends:
+            await backend.close()
     
     async def __aenter__(self):
         """Асинхронный контекстный менеджер"""
@@ -203,5 +450,19 @@ class SignalPublisher:
         await self.close()
 
 
-# Глобальный экземпляр
-signal_publisher = SignalPublisher()
+_global_signal_publisher: Optional[SignalPublisher] = None
+
+
+def get_signal_publisher() -> SignalPublisher:
+    """Возвращает глобальный publisher (создается при первом обращении)"""
+    global _global_signal_publisher
+    if _global_signal_publisher is None:
+        _global_signal_publisher = SignalPublisher()
+    return _global_signal_publisher
+
+
+def __getattr__(name):
+    # Совместимость: utils.signal_publisher.signal_publisher без создания при импорте
+    if name == 'signal_publisher':
+        return get_signal_publisher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,263 @@
+# utils/strategy_hooks.py
+"""
+Общие хуки стратегий Jesse: живое состояние, статистика сделок, сервис ИИ
+
+Декоратор track_strategy не зависит от базового класса: им помечена каждая
+стратегия из strategies/ (в т.ч. маршрутная TestSignalStrategy), наследники
+EnhancedStrategy получают его из __init_subclass__.
+
+- after(): снимок позиции и индикаторов в общую память (utils/live_state.py)
+- on_open_position: последний сигнал, снимок; при включенном ИИ анализе в
+  live торговле сигнал уходит сервису ИИ (ai_analysis/service.py)
+- on_close_position: сделка в агрегатор (utils/trade_stats.py), счетчики,
+  снимок и, как при открытии, сигнал EXIT сервису ИИ
+
+Сначала вызывается метод стратегии, потом хук; ошибки хуков только
+логируются. Стратегии со своим ИИ анализом (_trigger_ai_analysis_async у
+EnhancedStrategy) передают сигналы сервису сами.
+
+Jesse вызывает on_close_position(order, closed_trade); стратегиям с
+сигнатурой on_close_position(self, order) closed_trade не передается, а
+P&L сделки берется из closed_trade.
+"""
+import functools
+import inspect
+import os
+import time
+from typing import Any, Dict, Optional
+
+_live_state_mode: Optional[str] = None
+
+
+class _HookState:
+    """Счетчики живого состояния одного экземпляра стратегии"""
+
+    __slots__ = ('realized_pnl', 'trades', 'last_signal', 'active')
+
+    def __init__(self):
+        self.realized_pnl = 0.0
+        self.trades = 0
+        self.last_signal = ('', 0.0, 0.0)  # сигнал, цена, время
+        self.active = set()  # хуки, выполняемые сейчас (super() в наследнике)
+
+
+def _state(strategy) -> _HookState:
+    state = strategy.__dict__.get('_hook_state')
+    if state is None:
+        state = strategy._hook_state = _HookState()
+    return state
+
+
+def _positional_count(method) -> int:
+    """Сколько позиционных аргументов (с self) принимает метод"""
+    try:
+        parameters = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError):
+        return 1
+    if any(p.kind == p.VAR_POSITIONAL for p in parameters):
+        return 1 << 16
+    return sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in parameters)
+
+
+def _hooked(name: str, method, hook):
+    accepts = _positional_count(method) - 1
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        state = _state(self)
+        if name in state.active:
+            return method(self, *args[:accepts])
+
+        state.active.add(name)
+        try:
+            result = method(self, *args[:accepts])
+        finally:
+            state.active.discard(name)
+
+        try:
+            hook(self, *args)
+        except Exception as e:
+            self.log(f"⚠️ Ошибка хука {name}: {e}")
+        return result
+
+    wrapper._strategy_hooked = True
+    return wrapper
+
+
+def track_strategy(cls):
+    """Декоратор класса стратегии Jesse: живое состояние, статистика сделок, сервис ИИ"""
+    for name, hook in (('after', _after), ('on_open_position', _on_open_position),
+                       ('on_close_position', _on_close_position)):
+        method = getattr(cls, name)
+        if not getattr(method, '_strategy_hooked', False):
+            setattr(cls, name, _hooked(name, method, hook))
+    return cls
+
+
+# === Хуки ===
+
+def _after(strategy):
+    publish_live_state(strategy)
+
+
+def _on_open_position(strategy, order):
+    signal_type = 'LONG' if strategy.is_long else 'SHORT' if strategy.is_short else 'UNKNOWN'
+    _state(strategy).last_signal = (signal_type, float(order.price), time.time())
+    publish_live_state(strategy)
+
+    if _service_analysis_enabled(strategy):
+        submit_to_analysis_service(strategy, signal_type, collect_signal_data(
+            strategy, signal_type, f"Position opened at {order.price}",
+            {'entry_price': float(order.price), 'position_size': float(order.qty)}
+        ))
+
+
+def _on_close_position(strategy, order, closed_trade=None):
+    pnl = float(closed_trade.pnl) if closed_trade is not None else float(strategy.position.pnl or 0)
+    exit_price = float(order.price)
+
+    state = _state(strategy)
+    state.realized_pnl += pnl
+    state.trades += 1
+    state.last_signal = ('EXIT', exit_price, time.time())
+
+    record_trade_stats(strategy, pnl, exit_price)
+    publish_live_state(strategy)
+
+    if _service_analysis_enabled(strategy):
+        submit_to_analysis_service(strategy, 'EXIT', collect_signal_data(
+            strategy, 'EXIT', 'Position closed',
+            {'exit_price': exit_price, 'pnl': pnl, 'exit_reason': 'TP_SL_or_Manual'}
+        ))
+
+
+# === Действия ===
+
+def live_state_enabled(strategy) -> bool:
+    """LIVE_STATE_ENABLED (читается один раз): auto - только live/paper торговля, true/false - всегда/никогда"""
+    global _live_state_mode
+    if _live_state_mode is None:
+        _live_state_mode = os.getenv('LIVE_STATE_ENABLED', 'auto').lower()
+    if _live_state_mode == 'auto':
+        return bool(strategy.is_live)
+    return _live_state_mode in ('true', '1', 'yes')
+
+
+def publish_live_state(strategy):
+    """Записывает позицию, P&L, последний сигнал и индикаторы в общую память"""
+    if not live_state_enabled(strategy):
+        return
+
+    from .live_state import StrategyState, get_live_state
+
+    state = _state(strategy)
+    position = strategy.position
+    is_open = bool(position and position.is_open)
+    signal, signal_price, signal_at = state.last_signal
+    get_indicators = getattr(strategy, '_get_current_indicators', None)
+
+    get_live_state().publish(StrategyState(
+        strategy=strategy.__class__.__name__,
+        exchange=strategy.exchange,
+        symbol=strategy.symbol,
+        timeframe=strategy.timeframe,
+        side=1 if strategy.is_long else -1 if strategy.is_short else 0,
+        qty=float(position.qty) if is_open else 0.0,
+        entry_price=float(position.entry_price) if is_open else 0.0,
+        price=float(strategy.price),
+        unrealized_pnl=float(position.pnl) if is_open else 0.0,
+        realized_pnl=state.realized_pnl,
+        trades=state.trades,
+        daily_trades_count=int(getattr(strategy, 'daily_trades_count', 0) or 0),
+        consecutive_losses=int(getattr(strategy, 'consecutive_losses', 0) or 0),
+        last_signal=signal,
+        last_signal_price=signal_price,
+        last_signal_at=signal_at,
+        indicators=get_indicators() if get_indicators else {},
+    ))
+
+
+def record_trade_stats(strategy, pnl: float, exit_price: float):
+    """Передает результат сделки в агрегатор статистики (O(1), без пересчета истории)"""
+    from .trade_stats import get_trade_stats
+
+    get_trade_stats().record_trade(
+        strategy=strategy.__class__.__name__,
+        pnl=pnl,
+        symbol=strategy.symbol,
+        timestamp=strategy.current_candle[0] / 1000,
+        exit_price=exit_price
+    )
+
+
+def _service_analysis_enabled(strategy) -> bool:
+    """Сервис ИИ для стратегий без своего ИИ анализа: только live торговля и включенный ИИ"""
+    if hasattr(strategy, '_trigger_ai_analysis_async') or not strategy.is_live:
+        return False
+    from .config_manager import get_config
+    return get_config().ai_analysis_enabled
+
+
+def collect_signal_data(strategy, signal_type: str, reason: str,
+                        additional_data: Optional[Dict] = None) -> Dict[str, Any]:
+    """Данные сигнала в формате EnhancedStrategy._collect_signal_data"""
+    candles = strategy.candles[-20:]
+    get_indicators = getattr(strategy, '_get_current_indicators', None)
+    return {
+        'strategy': strategy.__class__.__name__,
+        'signal_type': signal_type,
+        'reason': reason,
+        'price': float(strategy.close),
+        'timestamp': int(time.time()),
+        'symbol': strategy.symbol,
+        'timeframe': strategy.timeframe,
+        'exchange': strategy.exchange,
+        'candles_data': {
+            # Колонки Jesse: время, open, close, high, low, volume
+            'recent_candles': [
+                {'timestamp': int(c[0]), 'open': float(c[1]), 'high': float(c[3]),
+                 'low': float(c[4]), 'close': float(c[2]), 'volume': float(c[5])}
+                for c in candles
+            ],
+            'current_volume': float(candles[-1, 5]) if len(candles) else 0.0,
+        },
+        'indicators': get_indicators() if get_indicators else {'current_price': float(strategy.close)},
+        'additional_data': additional_data or {},
+    }
+
+
+def submit_to_analysis_service(strategy, signal_type: str, signal_data: Dict) -> bool:
+    """Передает сигнал сервису ИИ анализа; False - сервис не запущен или не принял задачу"""
+    try:
+        from ai_analysis.service import CONTEXT_BARS, AnalysisServiceClient
+        from .config_manager import get_config
+
+        client = AnalysisServiceClient()
+        if not client.available():
+            return False
+
+        # Режим рынка - из общего движка этого процесса (в сервисе его нет)
+        from .market_regime import get_market_regime_engine
+        snapshot = get_market_regime_engine().update(
+            (strategy.exchange, strategy.symbol, strategy.timeframe), strategy.candles)
+
+        payload = {
+            'signal_data': signal_data,
+            'symbol': strategy.symbol,
+            'timeframe': strategy.timeframe,
+            'candles': strategy.candles[-CONTEXT_BARS:].tolist(),
+            'market_regime': snapshot.as_dict() if snapshot else None,
+        }
+        # Один сигнал на свече - одна задача, даже если стратегия вызовет анализ повторно
+        key = (f"{strategy.__class__.__name__}:{strategy.symbol}:{strategy.timeframe}:"
+               f"{signal_type}:{int(strategy.candles[-1, 0])}")
+
+        job_id = client.submit_nowait('signal', payload, key=key, notify=get_config().telegram_enabled)
+        if job_id is None:
+            return False
+
+        strategy.log(f"📨 ИИ анализ передан сервису: задача {job_id}")
+        return True
+    except Exception as e:
+        strategy.log(f"⚠️ Сервис ИИ анализа недоступен: {e}")
+        return False
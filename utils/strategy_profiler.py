@@ -0,0 +1,217 @@
+# utils/strategy_profiler.py
+"""
+Профайлер стратегий Jesse для бэктестов
+
+Оборачивает свойства-индикаторы (ema*, rsi*, atr*, bb_*, volume_ma, sma*)
+и методы стратегии, считает вызовы и время (полное и собственное) с
+привязкой к бару. По завершении процесса пишет:
+- {Strategy}.folded - стеки в формате flamegraph.pl / speedscope
+- {Strategy}.txt    - таблица "кто сколько стоит на баре"
+
+Включается STRATEGY_PROFILE=true, каталог отчетов - STRATEGY_PROFILE_DIR.
+"""
+import atexit
+import fnmatch
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+INDICATOR_PATTERNS = ('ema*', 'rsi*', 'atr*', 'bb_*', 'volume_ma', 'sma*')
+
+# Служебные методы Jesse, которые не несут логики стратегии
+SKIPPED_METHODS = ('log', 'hyperparameters', 'dna')
+
+
+def profiling_enabled() -> bool:
+    """Включен ли профайлинг стратегий"""
+    return os.getenv('STRATEGY_PROFILE', 'false').lower() in ('true', '1', 'yes')
+
+
+class StrategyProfiler:
+    """Накопитель статистики вызовов одной стратегии"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._local = threading.local()
+
+        # путь стека -> [вызовы, полное время нс, собственное время нс]
+        self.stacks: Dict[Tuple[str, ...], List[int]] = {}
+        # имя -> [вызовы, полное время нс, собственное время нс]
+        self.functions: Dict[str, List[int]] = {}
+
+        self.bar_times_ns: List[int] = []
+        self._current_bar = None
+        self._bar_ns = 0
+
+    @property
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _on_top_level_call(self, bar):
+        if bar != self._current_bar:
+            if self._current_bar is not None:
+                self.bar_times_ns.append(self._bar_ns)
+            self._current_bar = bar
+            self._bar_ns = 0
+
+    def call(self, name: str, func, instance, *args, **kwargs):
+        stack = self._stack
+        if not stack:
+            self._on_top_level_call(getattr(instance, 'index', None))
+
+        # [имя, накопленное время дочерних вызовов]
+        frame = [name, 0]
+        stack.append(frame)
+        started = time.perf_counter_ns()
+        try:
+            return func(instance, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - started
+            stack.pop()
+            self_ns = elapsed - frame[1]
+
+            path = (self.name,) + tuple(f[0] for f in stack) + (name,)
+            entry = self.stacks.get(path)
+            if entry is None:
+                entry = self.stacks[path] = [0, 0, 0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += self_ns
+
+            if stack:
+                stack[-1][1] += elapsed
+            else:
+                self._bar_ns += elapsed
+
+            totals = self.functions.get(name)
+            if totals is None:
+                totals = self.functions[name] = [0, 0, 0]
+            totals[0] += 1
+            # Рекурсивные вызовы не учитываем в полном времени дважды
+            if not any(f[0] == name for f in stack):
+                totals[1] += elapsed
+            totals[2] += self_ns
+
+    @property
+    def bars(self) -> int:
+        return len(self.bar_times_ns) + (1 if self._current_bar is not None else 0)
+
+    def collapsed_stacks(self) -> str:
+        """Стеки в формате "a;b;c <собственное время в мкс>" для flame graph"""
+        lines = []
+        for path, (_, _, self_ns) in sorted(self.stacks.items()):
+            if self_ns > 0:
+                lines.append(f"{';'.join(path)} {self_ns // 1000}")
+        return '\n'.join(lines) + '\n'
+
+    def report(self) -> str:
+        """Таблица по функциям, отсортированная по собственному времени"""
+        bars = max(self.bars, 1)
+        bar_times = sorted(self.bar_times_ns + ([self._bar_ns] if self._current_bar is not None else []))
+        total_ns = sum(bar_times)
+        p99_ns = bar_times[max(0, int(len(bar_times) * 0.99) - 1)] if bar_times else 0
+
+        lines = [
+            f"Стратегия: {self.name}",
+            f"Баров: {self.bars}, всего {total_ns / 1e9:.3f}с, "
+            f"в среднем {total_ns / bars / 1000:.1f}мкс/бар, p99 {p99_ns / 1000:.1f}мкс/бар",
+            "",
+            f"{'функция':<32}{'вызовов/бар':>12}{'мкс/бар':>12}{'собств. мкс/бар':>17}{'доля':>8}",
+        ]
+
+        for name, (calls, full_ns, self_ns) in sorted(self.functions.items(), key=lambda item: -item[1][2]):
+            share = (self_ns / total_ns * 100) if total_ns else 0.0
+            lines.append(
+                f"{name:<32}{calls / bars:>12.2f}{full_ns / bars / 1000:>12.1f}"
+                f"{self_ns / bars / 1000:>17.1f}{share:>7.1f}%"
+            )
+
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, directory: Optional[str] = None) -> Optional[str]:
+        """Пишет .folded и .txt отчеты, возвращает путь к таблице"""
+        if not self.functions:
+            return None
+
+        directory = directory or os.getenv('STRATEGY_PROFILE_DIR', './data/profiles')
+        try:
+            os.makedirs(directory, exist_ok=True)
+            base = os.path.join(directory, self.name)
+
+            with open(f"{base}.folded", 'w', encoding='utf-8') as f:
+                f.write(self.collapsed_stacks())
+            with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+                f.write(self.report())
+
+            logging.info(f"🔬 Профиль {self.name}: {base}.txt, {base}.folded")
+            return f"{base}.txt"
+
+        except Exception as e:
+            logging.error(f"❌ Ошибка записи профиля {self.name}: {e}")
+            return None
+
+
+_profilers: Dict[str, StrategyProfiler] = {}
+
+
+def get_profiler(name: str) -> StrategyProfiler:
+    """Профайлер стратегии (один на класс в пределах процесса)"""
+    profiler = _profilers.get(name)
+    if profiler is None:
+        profiler = _profilers[name] = StrategyProfiler(name)
+        if len(_profilers) == 1:
+            atexit.register(dump_all)
+    return profiler
+
+
+def dump_all(directory: Optional[str] = None) -> List[str]:
+    """Сохраняет отчеты всех профилированных стратегий"""
+    return [path for path in (p.dump(directory) for p in _profilers.values()) if path]
+
+
+def _wrap(profiler: StrategyProfiler, name: str, func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        return profiler.call(name, func, self, *args, **kwargs)
+    wrapper._profiled = True
+    return wrapper
+
+
+def profile_if_enabled(cls):
+    """Декоратор класса стратегии: profile_strategy при STRATEGY_PROFILE=true, иначе класс как есть"""
+    return profile_strategy(cls) if profiling_enabled() else cls
+
+
+def profile_strategy(cls, profiler: Optional[StrategyProfiler] = None):
+    """
+    Оборачивает индикаторы и методы класса стратегии
+
+    Изменяет класс на месте и возвращает его (можно использовать как декоратор).
+    """
+    profiler = profiler or get_profiler(cls.__name__)
+
+    for name, attribute in list(cls.__dict__.items()):
+        if name.startswith('__') or name in SKIPPED_METHODS:
+            continue
+
+        if isinstance(attribute, property):
+            if attribute.fget is None or getattr(attribute.fget, '_profiled', False):
+                continue
+            if not any(fnmatch.fnmatchcase(name, pattern) for pattern in INDICATOR_PATTERNS):
+                continue
+            setattr(cls, name, property(
+                _wrap(profiler, name, attribute.fget), attribute.fset, attribute.fdel, attribute.__doc__
+            ))
+
+        elif callable(attribute) and not isinstance(attribute, (staticmethod, classmethod, type)):
+            if getattr(attribute, '_profiled', False):
+                continue
+            setattr(cls, name, _wrap(profiler, name, attribute))
+
+    return cls
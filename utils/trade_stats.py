@@ -0,0 +1,341 @@
+# utils/trade_stats.py
+"""
+Инкрементальный агрегатор торговой статистики
+
+Каждая закрытая сделка обновляет накопительные метрики за O(1):
+среднее и дисперсию P&L (алгоритм Welford), Sharpe, максимальную
+просадку, серии побед/убытков, а также корзины по стратегиям и дням.
+Состояние сохраняется на диск не позже чем через
+TRADE_STATS_SNAPSHOT_INTERVAL секунд после сделки (отложенная запись в
+фоновом таймере), поэтому /stats в процессе бота отвечает мгновенно, не
+пересчитывая историю сделок. В бэктесте и оптимизации Jesse снапшот не
+пишется (если TRADE_STATS_FILE не задан явно) - живой файл не смешивается
+с симуляцией.
+"""
+import os
+import json
+import atexit
+import math
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+
+@dataclass
+class RunningStats:
+    """Накопительная статистика по набору сделок"""
+    trades: int = 0
+    wins: int = 0
+    losses: int = 0
+    total_pnl: float = 0.0
+    mean: float = 0.0
+    m2: float = 0.0  # Сумма квадратов отклонений (Welford)
+    best_trade: Optional[float] = None
+    worst_trade: Optional[float] = None
+    peak_equity: float = 0.0
+    max_drawdown: float = 0.0
+    current_streak: int = 0  # > 0 серия побед, < 0 серия убытков
+    max_win_streak: int = 0
+    max_loss_streak: int = 0
+
+    def update(self, pnl: float):
+        """Добавляет результат сделки"""
+        self.trades += 1
+        self.total_pnl += pnl
+
+        # Welford: устойчивое онлайн-вычисление среднего и дисперсии
+        delta = pnl - self.mean
+        self.mean += delta / self.trades
+        self.m2 += delta * (pnl - self.mean)
+
+        if self.best_trade is None or pnl > self.best_trade:
+            self.best_trade = pnl
+        if self.worst_trade is None or pnl < self.worst_trade:
+            self.worst_trade = pnl
+
+        # Кривая капитала и просадка
+        self.peak_equity = max(self.peak_equity, self.total_pnl)
+        self.max_drawdown = max(self.max_drawdown, self.peak_equity - self.total_pnl)
+
+        # Серии
+        if pnl > 0:
+            self.wins += 1
+            self.current_streak = self.current_streak + 1 if self.current_streak > 0 else 1
+            self.max_win_streak = max(self.max_win_streak, self.current_streak)
+        elif pnl < 0:
+            self.losses += 1
+            self.current_streak = self.current_streak - 1 if self.current_streak < 0 else -1
+            self.max_loss_streak = max(self.max_loss_streak, -self.current_streak)
+        else:
+            self.current_streak = 0
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.trades - 1) if self.trades > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def sharpe(self) -> float:
+        """Sharpe на сделку (средний P&L / стандартное отклонение)"""
+        std = self.std
+        return self.mean / std if std > 0 else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trades * 100 if self.trades > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update({
+            'std': round(self.std, 6),
+            'sharpe': round(self.sharpe, 4),
+            'win_rate': round(self.win_rate, 2),
+        })
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+class TradeStatsAggregator:
+    """
+    Агрегатор статистики закрытых сделок
+
+    Обновляется из стратегий (on_close_position) и читается ботом
+    из снапшота на диске.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, snapshot_interval: Optional[float] = None):
+        # '' - только в памяти, без снапшота
+        self.snapshot_path = os.getenv('TRADE_STATS_FILE', './data/trade_stats.json') \
+            if snapshot_path is None else snapshot_path
+        self.snapshot_interval = snapshot_interval if snapshot_interval is not None else \
+            float(os.getenv('TRADE_STATS_SNAPSHOT_INTERVAL', '5'))
+        self.max_days = int(os.getenv('TRADE_STATS_MAX_DAYS', '90'))
+
+        self.totals = RunningStats()
+        self.by_strategy: Dict[str, RunningStats] = {}
+        self.by_day: Dict[str, RunningStats] = {}
+        self.by_day_strategy: Dict[str, Dict[str, RunningStats]] = {}
+        self.recent_trades = deque(maxlen=20)
+
+        self._lock = threading.Lock()
+        # Запись файла: таймер, atexit и явный save_snapshot не пишут одновременно
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._last_snapshot = time.time()
+        self._snapshot_mtime = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+
+        self.load_snapshot()
+
+    def record_trade(self, strategy: str, pnl: float, symbol: Optional[str] = None,
+                     timestamp: Optional[float] = None, **extra):
+        """
+        Учитывает закрытую сделку
+
+        Args:
+            strategy: Имя стратегии
+            pnl: Результат сделки в $
+            symbol: Торговая пара
+            timestamp: Время закрытия (unix, секунды)
+            extra: Доп. поля для истории (entry_price, exit_price, side...)
+        """
+        try:
+            pnl = float(pnl)
+            timestamp = timestamp or time.time()
+            day = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+            with self._lock:
+                self.totals.update(pnl)
+                self.by_strategy.setdefault(strategy, RunningStats()).update(pnl)
+
+                if day not in self.by_day:
+                    self.by_day[day] = RunningStats()
+                    self.by_day_strategy[day] = {}
+                    self._prune_days()
+                # День старше окна TRADE_STATS_MAX_DAYS (история не по порядку) - только в итоги
+                if day in self.by_day:
+                    self.by_day[day].update(pnl)
+                    self.by_day_strategy[day].setdefault(strategy, RunningStats()).update(pnl)
+
+                trade = {'strategy': strategy, 'symbol': symbol, 'pnl': pnl, 'timestamp': timestamp}
+                trade.update(extra)
+                self.recent_trades.append(trade)
+                self._dirty = True
+
+            self._schedule_flush()
+
+        except Exception as e:
+            logging.error(f"❌ Ошибка учета сделки в статистике: {e}")
+
+    def _schedule_flush(self):
+        """Сохраняет сразу, если интервал прошел, иначе ставит отложенную запись"""
+        if not self.snapshot_path:
+            return
+        delay = self._last_snapshot + self.snapshot_interval - time.time()
+        if delay <= 0:
+            self.save_snapshot()
+            return
+
+        with self._lock:
+            if self._flush_timer is not None:
+                return
+            self._flush_timer = threading.Timer(delay, self._flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush(self):
+        with self._lock:
+            self._flush_timer = None
+        self.save_snapshot()
+
+    def _prune_days(self):
+        """Удаляет самые старые дневные корзины сверх лимита"""
+        while len(self.by_day) > self.max_days:
+            oldest = min(self.by_day)
+            del self.by_day[oldest]
+            self.by_day_strategy.pop(oldest, None)
+
+    def get_daily_summary(self, date: Optional[str] = None) -> Dict[str, Any]:
+        """Возвращает дневную сводку в формате MessageFormatter.format_daily_summary"""
+        date = date or datetime.now().strftime('%Y-%m-%d')
+
+        with self._lock:
+            day_stats = self.by_day.get(date, RunningStats())
+            strategies = {
+                name: {'pnl': round(stats.total_pnl, 2), 'trades': stats.trades, 'win_rate': round(stats.win_rate, 1)}
+                for name, stats in self.by_day_strategy.get(date, {}).items()
+            }
+
+            return {
+                'date': date,
+                'total_trades': day_stats.trades,
+                'profitable_trades': day_stats.wins,
+                'total_pnl': round(day_stats.total_pnl, 2),
+                'strategies': strategies,
+                'best_trade': day_stats.best_trade,
+                'worst_trade': day_stats.worst_trade,
+            }
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Возвращает полную статистику: итоги, стратегии, сегодня, последние сделки"""
+        with self._lock:
+            summary = {
+                'totals': self.totals.to_dict(),
+                'strategies': {name: stats.to_dict() for name, stats in self.by_strategy.items()},
+                'recent_trades': list(self.recent_trades),
+            }
+        summary['today'] = self.get_daily_summary()
+        return summary
+
+    def save_snapshot(self) -> bool:
+        """
+        Атомарно сохраняет состояние на диск
+
+        Снимок копируется и пишется под _write_lock: более поздний снимок
+        никогда не заменяется более ранним. Временный файл свой у каждого
+        процесса (несколько процессов Jesse пишут один снапшот).
+        """
+        if not self.snapshot_path:
+            return True
+        with self._write_lock:
+            return self._write_snapshot()
+
+    def _write_snapshot(self) -> bool:
+        try:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                state = {
+                    'saved_at': time.time(),
+                    'totals': asdict(self.totals),
+                    'by_strategy': {k: asdict(v) for k, v in self.by_strategy.items()},
+                    'by_day': {k: asdict(v) for k, v in self.by_day.items()},
+                    'by_day_strategy': {
+                        day: {k: asdict(v) for k, v in buckets.items()}
+                        for day, buckets in self.by_day_strategy.items()
+                    },
+                    'recent_trades': list(self.recent_trades),
+                }
+                self._dirty = False
+                self._last_snapshot = time.time()
+
+            directory = os.path.dirname(self.snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+            return True
+
+        except Exception as e:
+            logging.error(f"❌ Ошибка сохранения снапшота статистики: {e}")
+            with self._lock:
+                self._dirty = True  # повторим при следующей записи
+            return False
+
+    def load_snapshot(self) -> bool:
+        """Загружает состояние из снапшота, если он есть"""
+        try:
+            if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+                return False
+
+            mtime = os.path.getmtime(self.snapshot_path)
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+
+            with self._lock:
+                self.totals = RunningStats.from_dict(state.get('totals', {}))
+                self.by_strategy = {k: RunningStats.from_dict(v) for k, v in state.get('by_strategy', {}).items()}
+                self.by_day = {k: RunningStats.from_dict(v) for k, v in state.get('by_day', {}).items()}
+                self.by_day_strategy = {
+                    day: {k: RunningStats.from_dict(v) for k, v in buckets.items()}
+                    for day, buckets in state.get('by_day_strategy', {}).items()
+                }
+                self.recent_trades = deque(state.get('recent_trades', []), maxlen=self.recent_trades.maxlen)
+                self._snapshot_mtime = mtime
+                self._dirty = False
+
+            return True
+
+        except Exception as e:
+            logging.error(f"❌ Ошибка загрузки снапшота статистики: {e}")
+            return False
+
+    def refresh_from_disk(self) -> bool:
+        """Перечитывает снапшот, если его обновил другой процесс"""
+        try:
+            if self.snapshot_path and os.path.exists(self.snapshot_path) and os.path.getmtime(self.snapshot_path) > self._snapshot_mtime:
+                return self.load_snapshot()
+        except OSError:
+            pass
+        return False
+
+
+# Глобальный агрегатор
+_global_trade_stats: Optional[TradeStatsAggregator] = None
+
+
+def get_trade_stats() -> TradeStatsAggregator:
+    """Возвращает глобальный агрегатор статистики"""
+    global _global_trade_stats
+    if _global_trade_stats is None:
+        from .logging_utils import is_simulation
+
+        # Бэктест не пишет в живой снапшот, который читает бот
+        snapshot_path = '' if is_simulation() and os.getenv('TRADE_STATS_FILE') is None else None
+        _global_trade_stats = TradeStatsAggregator(snapshot_path=snapshot_path)
+        atexit.register(_global_trade_stats.save_snapshot)
+    return _global_trade_stats